@@ -0,0 +1,192 @@
+"""
+Django management command comparing trade throughput on one hot pool:
+
+    locking     one transaction per trade, FOR UPDATE of the pool + every option state
+    optimistic  one transaction per trade, unlocked read + AmmPool.version CAS (retried)
+    sequencer   per-pool single writer with group commit
+
+Creates a throwaway market, pool and users per mode and leaves them in place,
+so run it against a scratch database.
+
+Usage:
+    python manage.py bench_trades --trades 2000 --threads 16
+    python manage.py bench_trades --mode locking --mode optimistic --outcomes 1000
+"""
+
+import logging
+
+import random
+import statistics
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from market.models import BalanceSnapshot, Market, MarketOption, MarketOptionStats, User
+from market.services.amm import execution
+from market.services.amm.execution import PoolVersionConflict, execute_buy
+from market.services.amm.setup import ensure_pool_initialized
+from market.services.amm.trade_profile import logger as trade_log
+
+MODES = ('locking', 'optimistic', 'sequencer')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark trades/sec on one pool: locking path vs sequencer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--trades',
+            type=int,
+            default=1000,
+            help='Trades per mode (default: 1000)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=8,
+            help='Concurrent clients, one user each (default: 8)'
+        )
+        parser.add_argument(
+            '--amount',
+            type=str,
+            default='1',
+            help='amount_in per buy (default: 1)'
+        )
+        parser.add_argument(
+            '--outcomes',
+            type=int,
+            default=2,
+            help='Options in the pool; clients buy random ones (default: 2)'
+        )
+        parser.add_argument(
+            '--mode',
+            action='append',
+            choices=MODES,
+            help='Mode to run, repeatable (default: all)'
+        )
+
+    def handle(self, *args, **options):
+        modes = options['mode'] or list(MODES)
+        results = {}
+        for mode in modes:
+            market, pool_options = self._fixture(options['outcomes'])
+            users = [self._user(options['trades'], options['amount']) for _ in range(options['threads'])]
+            results[mode] = self._run(mode, market, pool_options, users, options['trades'], options['amount'])
+            r = results[mode]
+            self.stdout.write(
+                f"{mode:>10}: {r['ok']} ok / {r['failed']} failed in {r['seconds']:.2f}s "
+                f"= {r['tps']:.1f} trades/s (p50 {r['p50']:.1f} ms, p99 {r['p99']:.1f} ms, "
+                f"cas conflicts {r['conflicts']}) market={market.id}"
+            )
+
+        base = results.get('locking')
+        if base and base['tps'] > 0:
+            for mode, r in results.items():
+                if mode != 'locking':
+                    self.stdout.write(self.style.SUCCESS(f"{mode} / locking: {r['tps'] / base['tps']:.2f}x"))
+
+    def _fixture(self, outcomes):
+        later = timezone.now() + timedelta(days=1)
+        market = Market.objects.create(
+            title=f'bench-{uuid.uuid4().hex[:8]}',
+            status='active',
+            trading_deadline=later,
+            resolution_deadline=later,
+        )
+        options = []
+        for i in range(outcomes):
+            side = ('no', 'yes')[i] if outcomes == 2 else None
+            opt = MarketOption.objects.create(market=market, option_index=i, title=side or f'o{i}', side=side)
+            MarketOptionStats.objects.create(option=opt, market=market, prob_bps=10000 // outcomes)
+            options.append(opt)
+        ensure_pool_initialized(market=market, amm_params={'initial_funding_amount': 100000})
+        return market, options
+
+    def _user(self, trades, amount):
+        user = User.objects.create(id=uuid.uuid4(), display_name=f'bench-{uuid.uuid4().hex[:8]}')
+        BalanceSnapshot.objects.create(
+            user=user,
+            token='USDC',
+            available_amount=Decimal(amount) * trades,
+            locked_amount=0,
+            updated_at=timezone.now(),
+        )
+        return user
+
+    def _run(self, mode, market, pool_options, users, trades, amount):
+        latencies = []
+        failed = []
+        lock = threading.Lock()
+        conflicts = _ConflictCounter()
+        per_thread = [trades // len(users) + (1 if i < trades % len(users) else 0) for i in range(len(users))]
+
+        def client(user, n):
+            mine, errors = [], 0
+            rng = random.Random(str(user.id))
+            try:
+                for _ in range(n):
+                    option = rng.choice(pool_options)
+                    t0 = time.perf_counter()
+                    try:
+                        execute_buy(
+                            user=user, market_id=market.id, option_id=str(option.id), option_index=None, amount_in=amount
+                        )
+                    except Exception:  # rejections and DB errors (lock timeouts, ...) alike
+                        errors += 1
+                    mine.append((time.perf_counter() - t0) * 1000.0)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(mine)
+                failed.append(errors)
+
+        previous = (execution.EXECUTION_MODE, execution.POOL_CONCURRENCY)
+        execution.EXECUTION_MODE = (
+            execution.EXECUTION_MODE_SEQUENCER if mode == 'sequencer' else execution.EXECUTION_MODE_LOCKING
+        )
+        execution.POOL_CONCURRENCY = (
+            execution.POOL_CONCURRENCY_LOCKING if mode == 'locking' else execution.POOL_CONCURRENCY_OPTIMISTIC
+        )
+        trade_log.addHandler(conflicts)
+        try:
+            threads = [threading.Thread(target=client, args=(u, n)) for u, n in zip(users, per_thread)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            seconds = time.perf_counter() - started
+        finally:
+            execution.EXECUTION_MODE, execution.POOL_CONCURRENCY = previous
+            trade_log.removeHandler(conflicts)
+
+        latencies.sort()
+        n_failed = sum(failed)
+        return {
+            'ok': len(latencies) - n_failed,
+            'failed': n_failed,
+            'seconds': seconds,
+            'tps': (len(latencies) - n_failed) / seconds if seconds else 0.0,
+            'p50': statistics.median(latencies) if latencies else 0.0,
+            'p99': latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0,
+            'conflicts': conflicts.count,
+        }
+
+
+class _ConflictCounter(logging.Handler):
+    """Counts lost CAS attempts from the per-trade profile records."""
+
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self.count = 0
+
+    def emit(self, record):
+        rec = getattr(record, 'amm_trade', None)
+        if rec and rec.get('outcome') == PoolVersionConflict.code:
+            self.count += 1
@@ -0,0 +1,95 @@
+"""
+Django management command paying out settlement jobs enqueued by the admin API
+(per-market jobs and exclusive-event jobs).
+Each chunk of winners is its own transaction with a persisted checkpoint, so the
+worker can be stopped or crash at any point and resume without double paying.
+
+Usage:
+    python manage.py process_settlement_jobs --interval 2
+    python manage.py process_settlement_jobs --once
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from market.models import EventSettlementJob, SettlementJob
+from market.services.amm.event_settlement import process_event_settlement_jobs, run_event_settlement_job
+from market.services.amm.settlement_jobs import (
+    JOB_FAILED,
+    JOB_PENDING,
+    OPEN_JOB_STATUSES,
+    process_settlement_jobs,
+    run_settlement_job,
+)
+
+
+class Command(BaseCommand):
+    help = 'Pay out enqueued market settlements in resumable chunks'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when no job is open (default: 2)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run the open jobs to completion and exit'
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Re-queue failed jobs first (they resume from their checkpoint)'
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            n = SettlementJob.objects.filter(status=JOB_FAILED).update(status=JOB_PENDING, error=None)
+            n += EventSettlementJob.objects.filter(status=JOB_FAILED).update(status=JOB_PENDING, error=None)
+            self.stdout.write(f'Re-queued {n} failed settlement jobs')
+
+        if options['once']:
+            n = process_settlement_jobs() + process_event_settlement_jobs()
+            self.stdout.write(self.style.SUCCESS(f'Finished {n} settlement jobs'))
+            return
+
+        def signal_handler(sig, frame):
+            self.stdout.write('\nShutting down after the current chunk...')
+            self.running = False
+
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+        interval = options['interval']
+        self.stdout.write(self.style.SUCCESS(f'Starting settlement worker (interval: {interval}s)'))
+        while self.running:
+            job = SettlementJob.objects.filter(status__in=OPEN_JOB_STATUSES).order_by('created_at', 'id').first()
+            if job is not None:
+                self._run('Settlement', run_settlement_job, job.id)
+                continue
+            job = EventSettlementJob.objects.filter(status__in=OPEN_JOB_STATUSES).order_by('created_at', 'id').first()
+            if job is not None:
+                self._run('Event settlement', run_event_settlement_job, job.id)
+                continue
+            time.sleep(interval)
+
+    def _run(self, label, run_job, job_id):
+        # Stops between chunks (transactions) on shutdown; the checkpoint resumes it
+        try:
+            job = run_job(job_id, keep_going=lambda: self.running)
+        except Exception as e:
+            self.stderr.write(f'{label} job {job_id} failed: {e}')
+            close_old_connections()
+            return
+        self.stdout.write(
+            f"{label} job {job_id}: {job['status']}, {job['winners_paid']} winners, {job['paid_amount']} paid"
+        )
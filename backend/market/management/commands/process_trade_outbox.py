@@ -0,0 +1,83 @@
+"""
+Django management command applying trade_outbox rows (display side effects of trades).
+Run it next to the web workers whenever AMM_TRADE_SIDE_EFFECTS=outbox (the default).
+
+Usage:
+    python manage.py process_trade_outbox --interval 0.25 --batch 500
+"""
+
+import asyncio
+import signal
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from market.services.amm.outbox import OUTBOX_BATCH_SIZE, apply_outbox_batch
+
+
+class Command(BaseCommand):
+    help = 'Apply pending trade side effects (option probs, series, volume) from trade_outbox'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.25,
+            help='Seconds to wait when the outbox is empty (bounds display lag; default: 0.25)'
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help=f'Max rows coalesced per transaction (default: {OUTBOX_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox once and exit'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        batch = options['batch']
+
+        if options['once']:
+            total = 0
+            while True:
+                n = apply_outbox_batch(batch)
+                total += n
+                if n < batch:
+                    break
+            self.stdout.write(self.style.SUCCESS(f'Applied {total} outbox rows'))
+            return
+
+        def signal_handler(sig, frame):
+            self.stdout.write('\nShutting down...')
+            self.running = False
+
+        signal.signal(signal.SIGINT, signal_handler)
+        signal.signal(signal.SIGTERM, signal_handler)
+
+        self.stdout.write(self.style.SUCCESS(f'Starting trade outbox worker (interval: {interval}s, batch: {batch})'))
+        asyncio.run(self._loop(interval, batch))
+
+    async def _loop(self, interval: float, batch: int):
+        # All DB work on one thread (Django connections are thread-bound)
+        apply = sync_to_async(apply_outbox_batch, thread_sensitive=True)
+        while self.running:
+            try:
+                n = await apply(batch)
+            except Exception as e:
+                self.stderr.write(f'Outbox batch failed: {e}')
+                await sync_to_async(close_old_connections, thread_sensitive=True)()
+                n = 0
+            if n:
+                self.stdout.write(f'Applied {n} outbox rows')
+            # Full batch: more is waiting, go again right away
+            if n < batch:
+                await asyncio.sleep(interval)
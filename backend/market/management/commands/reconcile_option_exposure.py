@@ -0,0 +1,57 @@
+"""
+Django management command verifying the option_exposure counters against
+SUM(positions.shares) per option, market by market.
+
+Without --fix it only reports (a trade committing mid-check can show up as a
+transient mismatch); --fix locks each market's counters and rewrites the ones
+that drifted.
+
+Usage:
+    python manage.py reconcile_option_exposure
+    python manage.py reconcile_option_exposure --market <market_id> --fix
+"""
+
+from django.core.management.base import BaseCommand
+
+from market.models import Market
+from market.services.amm.exposure import reconcile_market_exposure
+
+
+class Command(BaseCommand):
+    help = 'Check (and optionally repair) per-option outstanding shares against positions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--market',
+            action='append',
+            dest='markets',
+            help='Market id to check (repeatable; default: all markets)'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rewrite drifted counters from positions'
+        )
+
+    def handle(self, *args, **options):
+        market_ids = options['markets'] or Market.objects.order_by('id').values_list('id', flat=True).iterator()
+        fix = options['fix']
+
+        checked = drifted = 0
+        for market_id in market_ids:
+            checked += 1
+            for m in reconcile_market_exposure(market_id, fix=fix):
+                drifted += 1
+                self.stdout.write(
+                    f"market {m['market_id']} option {m['option_id']}: "
+                    f"counter={m['counter']} positions={m['positions']}"
+                )
+
+        if drifted == 0:
+            self.stdout.write(self.style.SUCCESS(f'{checked} markets checked, counters match positions'))
+        elif fix:
+            self.stdout.write(self.style.WARNING(f'{checked} markets checked, {drifted} counters repaired'))
+        else:
+            self.stdout.write(
+                self.style.ERROR(f'{checked} markets checked, {drifted} counters drifted (run with --fix)')
+            )
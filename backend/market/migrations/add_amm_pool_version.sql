@@ -0,0 +1,11 @@
+-- Migration: Optimistic concurrency version on AMM pools
+-- Date: 2026-10-18
+-- Description:
+--   Trades read the pool and its option states without row locks and commit with
+--   UPDATE amm_pools ... WHERE id = :id AND version = :v (retrying on zero rows),
+--   instead of locking every amm_pool_option_state row FOR UPDATE.
+--   Every write to a pool or its option states bumps version.
+
+ALTER TABLE amm_pools ADD COLUMN IF NOT EXISTS version bigint NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN amm_pools.version IS 'Bumped by every pool / option state write; trades compare-and-swap on it (AMM_POOL_CONCURRENCY=optimistic).';
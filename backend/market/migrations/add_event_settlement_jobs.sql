@@ -0,0 +1,42 @@
+-- Migration: Event-wide settlement for exclusive events
+-- Date: 2026-10-18
+-- Description:
+--   An exclusive event is resolved and settled as a whole: every child market is
+--   resolved (winner Yes, the rest No) in one transaction, then one job pays the
+--   winning Yes holders and all winning No holders across the child markets in a
+--   single position-id-ordered pass from the event pool. The pool is locked and
+--   debited once, for the exact total, in the transaction that creates the job;
+--   one aggregated market_settlements row is written per child market when it
+--   finishes. Same checkpoint scheme as settlement_jobs.
+
+CREATE TABLE IF NOT EXISTS event_settlement_jobs (
+  id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  event_id uuid NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  winning_market_id uuid NOT NULL REFERENCES markets(id),
+  pool_id uuid NOT NULL REFERENCES amm_pools(id),
+  token text NOT NULL,
+  settlement_tx_id text NOT NULL,
+  status text NOT NULL DEFAULT 'pending'
+    CHECK (status IN ('pending', 'running', 'done', 'failed')),
+  total_payout numeric NOT NULL DEFAULT 0 CHECK (total_payout >= 0),
+  paid_amount numeric NOT NULL DEFAULT 0 CHECK (paid_amount >= 0),
+  pool_cash_used numeric NOT NULL DEFAULT 0 CHECK (pool_cash_used >= 0),
+  collateral_used numeric NOT NULL DEFAULT 0 CHECK (collateral_used >= 0),
+  winners_paid integer NOT NULL DEFAULT 0,
+  last_position_id bigint NOT NULL DEFAULT 0,
+  error text,
+  settled_by uuid REFERENCES users(id),
+  created_at timestamp with time zone NOT NULL DEFAULT now(),
+  updated_at timestamp with time zone NOT NULL DEFAULT now(),
+  finished_at timestamp with time zone,
+
+  CONSTRAINT event_settlement_jobs_event_unique UNIQUE (event_id)
+);
+
+-- Worker pickup
+CREATE INDEX IF NOT EXISTS idx_event_settlement_jobs_open
+  ON event_settlement_jobs(created_at)
+  WHERE status IN ('pending', 'running');
+
+COMMENT ON TABLE event_settlement_jobs IS 'Single-pass payout of an exclusive event (all child markets); processed by process_settlement_jobs.';
+COMMENT ON COLUMN event_settlement_jobs.last_position_id IS 'Winning positions (any child market) with id <= this are paid.';
@@ -0,0 +1,29 @@
+-- Migration: Per-option outstanding shares
+-- Date: 2026-10-18
+-- Description:
+--   option_exposure holds SUM(positions.shares) per option. Buys, sells and dust
+--   cleanup move it in the same transaction as the position row (one upsert per
+--   trade / sequencer batch), so settlement pre-checks and the admin solvency
+--   endpoint read one row per outcome instead of aggregating positions.
+--   `manage.py reconcile_option_exposure` verifies (and with --fix repairs) it.
+
+CREATE TABLE IF NOT EXISTS option_exposure (
+  option_id bigint PRIMARY KEY REFERENCES market_options(id) ON DELETE CASCADE,
+  market_id uuid NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+  outstanding_shares numeric NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_option_exposure_market
+  ON option_exposure(market_id);
+
+-- Backfill from the current positions
+INSERT INTO option_exposure (option_id, market_id, outstanding_shares, updated_at)
+SELECT option_id, market_id, SUM(shares), now()
+FROM positions
+GROUP BY option_id, market_id
+ON CONFLICT (option_id) DO UPDATE SET
+  outstanding_shares = excluded.outstanding_shares,
+  updated_at = excluded.updated_at;
+
+COMMENT ON TABLE option_exposure IS 'Outstanding shares per option, maintained by the trade path; see reconcile_option_exposure.';
@@ -0,0 +1,19 @@
+-- Migration: Idempotent order submission
+-- Date: 2026-10-18
+-- Description:
+--   Orders sent with a client_nonce store their API response on the order intent.
+--   A retry with the same (user_id, client_nonce) is answered from it by one
+--   indexed read instead of executing (and filling) again. The unique index only
+--   covers rows with a stored response, so older intents that reused a nonce
+--   do not block it. request_hash is a digest of what was ordered (side, target,
+--   size, limits); a retry with the same nonce but a different order is rejected.
+
+ALTER TABLE order_intents ADD COLUMN IF NOT EXISTS response jsonb;
+ALTER TABLE order_intents ADD COLUMN IF NOT EXISTS request_hash text;
+
+CREATE UNIQUE INDEX IF NOT EXISTS order_intents_user_client_nonce
+  ON order_intents (user_id, client_nonce)
+  WHERE client_nonce IS NOT NULL AND response IS NOT NULL;
+
+COMMENT ON COLUMN order_intents.response IS 'Original order response, replayed for retries with the same client_nonce.';
+COMMENT ON COLUMN order_intents.request_hash IS 'Digest of the ordered terms; a retry with the same client_nonce must match it.';
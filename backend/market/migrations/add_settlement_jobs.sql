@@ -0,0 +1,43 @@
+-- Migration: Resumable background settlement
+-- Date: 2026-10-18
+-- Description:
+--   The admin settle endpoint enqueues a settlement_jobs row instead of paying
+--   every winner inside the HTTP request. `manage.py process_settlement_jobs`
+--   pays winners in fixed-size chunks, one transaction each, and advances the
+--   checkpoint (last_position_id, running totals) in the same transaction, so a
+--   crashed worker resumes where it stopped without paying anyone twice.
+--   The whole payout (exact winning shares) is debited from the pool in the
+--   transaction that creates the job (pool_cash_used / collateral_used), so no
+--   chunk can run out of funds after winners have been credited.
+
+CREATE TABLE IF NOT EXISTS settlement_jobs (
+  id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  market_id uuid NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+  option_id bigint NOT NULL REFERENCES market_options(id),
+  pool_id uuid NOT NULL REFERENCES amm_pools(id),
+  token text NOT NULL,
+  settlement_tx_id text NOT NULL,
+  status text NOT NULL DEFAULT 'pending'
+    CHECK (status IN ('pending', 'running', 'done', 'failed')),
+  total_payout numeric NOT NULL DEFAULT 0 CHECK (total_payout >= 0),
+  paid_amount numeric NOT NULL DEFAULT 0 CHECK (paid_amount >= 0),
+  pool_cash_used numeric NOT NULL DEFAULT 0 CHECK (pool_cash_used >= 0),
+  collateral_used numeric NOT NULL DEFAULT 0 CHECK (collateral_used >= 0),
+  winners_paid integer NOT NULL DEFAULT 0,
+  last_position_id bigint NOT NULL DEFAULT 0,
+  error text,
+  settled_by uuid REFERENCES users(id),
+  created_at timestamp with time zone NOT NULL DEFAULT now(),
+  updated_at timestamp with time zone NOT NULL DEFAULT now(),
+  finished_at timestamp with time zone,
+
+  CONSTRAINT settlement_jobs_market_unique UNIQUE (market_id)
+);
+
+-- Worker pickup
+CREATE INDEX IF NOT EXISTS idx_settlement_jobs_open
+  ON settlement_jobs(created_at)
+  WHERE status IN ('pending', 'running');
+
+COMMENT ON TABLE settlement_jobs IS 'Chunked market payouts with a resumable checkpoint; processed by process_settlement_jobs.';
+COMMENT ON COLUMN settlement_jobs.last_position_id IS 'Winning positions with id <= this are paid (keyset checkpoint).';
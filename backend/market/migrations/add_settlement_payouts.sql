@@ -0,0 +1,30 @@
+-- Migration: Set-based settlement payouts
+-- Date: 2026-10-18
+-- Description:
+--   settle_market credits winners one chunk at a time with a single upsert on
+--   balance_snapshot (user_id, token) and records one settlement_payouts row per
+--   winner (the audit trail of who was paid what).
+
+CREATE TABLE IF NOT EXISTS settlement_payouts (
+  id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  market_id uuid NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+  option_id bigint NOT NULL REFERENCES market_options(id),
+  user_id uuid NOT NULL REFERENCES users(id),
+  token text NOT NULL,
+  shares numeric NOT NULL CHECK (shares >= 0),
+  payout numeric NOT NULL CHECK (payout >= 0),
+  settlement_tx_id text NOT NULL,
+  created_at timestamp with time zone NOT NULL DEFAULT now(),
+
+  CONSTRAINT settlement_payouts_winner_unique UNIQUE (market_id, option_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_settlement_payouts_user
+  ON settlement_payouts(user_id, created_at DESC);
+
+COMMENT ON TABLE settlement_payouts IS 'Per-winner payouts of a market settlement.';
+
+-- Conflict target of the payout upsert. Already present where balance_snapshot
+-- was created with its unique (user_id, token) key; IF NOT EXISTS makes it a no-op then.
+CREATE UNIQUE INDEX IF NOT EXISTS balance_snapshot_user_id_token_key
+  ON balance_snapshot(user_id, token);
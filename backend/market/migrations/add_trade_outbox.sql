@@ -0,0 +1,16 @@
+-- Migration: Transactional outbox for trade side effects
+-- Date: 2026-10-18
+-- Description:
+--   Display-only updates of a trade (market_option_stats.prob_bps / volume,
+--   market_option_series) are written as one trade_outbox row inside the trade
+--   transaction and applied asynchronously by `manage.py process_trade_outbox`.
+
+CREATE TABLE IF NOT EXISTS trade_outbox (
+  id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  pool_id uuid NOT NULL REFERENCES amm_pools(id) ON DELETE CASCADE,
+  -- {"at", "option_ids", "prob_bps", "no_to_yes": [[no_option_id, pool_idx]], "volume": {"option_id", "amount"}}
+  payload jsonb NOT NULL,
+  created_at timestamp with time zone NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE trade_outbox IS 'Pending display side effects of committed trades; applied and deleted by process_trade_outbox.';
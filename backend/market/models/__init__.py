@@ -1,12 +1,16 @@
-from .amm import AmmPool, AmmPoolOptionState
+from .amm import AmmPool, AmmPoolOptionState, TradeOutbox
 from .comments import Comment
 from .events import Event
 from .ledger import (
     BalanceSnapshot,
     ChainEvent,
+    EventSettlementJob,
     MarketSettlement,
+    OptionExposure,
     OrderIntent,
     Position,
+    SettlementJob,
+    SettlementPayout,
     Trade,
     TxRequest,
 )
@@ -21,16 +25,21 @@ __all__ = [
     "ChainEvent",
     "Comment",
     "Event",
+    "EventSettlementJob",
     "EventTag",
     "Market",
     "MarketOption",
     "MarketOptionSeries",
     "MarketOptionStats",
     "MarketTag",
+    "OptionExposure",
     "OrderIntent",
     "Position",
+    "SettlementJob",
+    "SettlementPayout",
     "Tag",
     "Trade",
+    "TradeOutbox",
     "TxRequest",
     "User",
     "Wallet",
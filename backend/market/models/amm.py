@@ -33,6 +33,8 @@ class AmmPool(models.Model):
     collateral_amount = models.DecimalField(max_digits=40, decimal_places=18, default=0)
     # Net cash from trading (buys - sell payouts). Primary source for settlement.
     pool_cash = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    # Bumped by every write to the pool or its option states; trades compare-and-swap on it.
+    version = models.BigIntegerField(default=0)
     fee_recipient_user = models.ForeignKey(
         "market.User",
         db_column="fee_recipient_user_id",
@@ -81,3 +83,22 @@ class AmmPoolOptionState(models.Model):
         unique_together = ("pool", "option")
 
 
+
+
+class TradeOutbox(models.Model):
+    """
+    Display-only side effects of one committed trade (option probs, price series,
+    volume), written inside the trade transaction and applied by the
+    process_trade_outbox worker. Rows are deleted once applied.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    pool = models.ForeignKey(
+        AmmPool, db_column="pool_id", on_delete=models.DO_NOTHING, related_name="outbox_rows"
+    )
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = False
+        db_table = "trade_outbox"
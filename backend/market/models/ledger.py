@@ -86,6 +86,10 @@ class OrderIntent(models.Model):
     client_nonce = models.TextField(null=True, blank=True)
     tx_hash = models.TextField(null=True, blank=True)
     error_msg = models.TextField(null=True, blank=True)
+    # Original API response, replayed for retries with the same client_nonce
+    response = models.JSONField(null=True, blank=True)
+    # Digest of the ordered terms (idempotency.order_fingerprint); a retry must match it
+    request_hash = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
@@ -248,3 +252,176 @@ class MarketSettlement(models.Model):
         return f"Settlement:{self.market_id}:{self.settlement_tx_id}"
 
 
+
+
+class SettlementPayout(models.Model):
+    """
+    One row per winner paid by a settlement (the settlement's audit trail).
+    Unique per (market, option, user): re-running a chunk cannot pay twice.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    market = models.ForeignKey(
+        "market.Market",
+        db_column="market_id",
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_payouts",
+    )
+    option = models.ForeignKey(
+        "market.MarketOption",
+        db_column="option_id",
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_payouts",
+    )
+    user = models.ForeignKey(
+        "market.User",
+        db_column="user_id",
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_payouts",
+    )
+    token = models.TextField()
+    shares = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    payout = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    settlement_tx_id = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = False
+        db_table = "settlement_payouts"
+
+
+class SettlementJob(models.Model):
+    """
+    Background payout of one market, processed in chunks (one transaction each).
+    last_position_id and the running totals are the checkpoint a restarted
+    worker resumes from.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    market = models.OneToOneField(
+        "market.Market",
+        db_column="market_id",
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_job",
+    )
+    option = models.ForeignKey(
+        "market.MarketOption",
+        db_column="option_id",
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_jobs",
+    )
+    pool = models.ForeignKey(
+        "market.AmmPool",
+        db_column="pool_id",
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_jobs",
+    )
+    token = models.TextField()
+    settlement_tx_id = models.TextField()
+    status = models.TextField(default="pending")  # pending | running | done | failed
+    total_payout = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    paid_amount = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    # Debited from the pool when the job is created (payouts are funded up front)
+    pool_cash_used = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    collateral_used = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    winners_paid = models.IntegerField(default=0)
+    last_position_id = models.BigIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    settled_by = models.ForeignKey(
+        "market.User",
+        db_column="settled_by",
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_jobs",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "settlement_jobs"
+
+
+class OptionExposure(models.Model):
+    """
+    Outstanding shares per option (the sum of positions.shares), moved by the
+    same transaction as every position write. Solvency reads this instead of
+    aggregating positions; reconcile_option_exposure checks it.
+    """
+
+    option = models.OneToOneField(
+        "market.MarketOption",
+        primary_key=True,
+        db_column="option_id",
+        on_delete=models.DO_NOTHING,
+        related_name="exposure",
+    )
+    market = models.ForeignKey(
+        "market.Market",
+        db_column="market_id",
+        on_delete=models.DO_NOTHING,
+        related_name="option_exposures",
+    )
+    outstanding_shares = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = False
+        db_table = "option_exposure"
+
+
+class EventSettlementJob(models.Model):
+    """
+    Settlement of a whole exclusive event in one pass: the winning Yes holders
+    and every losing market's No holders, paid in position id order from the
+    event pool. Same checkpoint as SettlementJob; one MarketSettlement per
+    child market is written when it finishes.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    event = models.OneToOneField(
+        "market.Event",
+        db_column="event_id",
+        on_delete=models.DO_NOTHING,
+        related_name="settlement_job",
+    )
+    winning_market = models.ForeignKey(
+        "market.Market",
+        db_column="winning_market_id",
+        on_delete=models.DO_NOTHING,
+        related_name="event_settlement_jobs",
+    )
+    pool = models.ForeignKey(
+        "market.AmmPool",
+        db_column="pool_id",
+        on_delete=models.DO_NOTHING,
+        related_name="event_settlement_jobs",
+    )
+    token = models.TextField()
+    settlement_tx_id = models.TextField()
+    status = models.TextField(default="pending")  # pending | running | done | failed
+    total_payout = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    paid_amount = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    # Debited from the pool when the job is created (payouts are funded up front)
+    pool_cash_used = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    collateral_used = models.DecimalField(max_digits=40, decimal_places=18, default=0)
+    winners_paid = models.IntegerField(default=0)
+    last_position_id = models.BigIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    settled_by = models.ForeignKey(
+        "market.User",
+        db_column="settled_by",
+        null=True,
+        blank=True,
+        on_delete=models.DO_NOTHING,
+        related_name="event_settlement_jobs",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        managed = False
+        db_table = "event_settlement_jobs"
@@ -0,0 +1,256 @@
+"""
+Batch order execution: many buys / sells of one user, across markets, in ONE
+transaction (POST /api/orders/batch/).
+
+Global lock order (the relative order of execute_buy / execute_sell):
+  1) markets + their options (FOR UPDATE, ordered by id)
+  2) pools, ordered by pool id (locking mode: FOR UPDATE; optimistic: plain read,
+     version CAS at commit, the whole batch retried on a lost race)
+  3) the user's balance, once
+  4) the user's positions in those markets (FOR UPDATE, ordered by option id)
+
+Legs are applied in request order against the in-memory pool states with the
+sequencer's validate-then-apply helpers (build_quote, slippage guards, balance /
+share checks), so a later leg on the same pool pays the earlier legs' price
+impact. Writes are bulk statements: balance, positions, q and pool row per pool,
+order intents, trades, outbox rows.
+
+  all_or_nothing  the first failing leg aborts the batch (the error names the leg)
+  best_effort     failing legs are reported per leg; the rest commit
+
+Legs may carry a client_nonce: an already committed one is replayed, not re-filled
+(a leg ordering something else under that nonce fails with CLIENT_NONCE_REUSED).
+"""
+
+import os
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ...models import Event, Market, MarketOption, Position
+from .errors import QuoteError
+from .execution import (
+    DEFAULT_TOKEN,
+    MONEY_QUANT,
+    ExecutionError,
+    _parse_buy_args,
+    _parse_sell_args,
+    _pool_load_error,
+    _read_pool_state,
+    _resolve_wallet,
+    _retry_pool_conflicts,
+)
+from .idempotency import order_fingerprint, order_results, replay_response
+from .pool_cache import get_pool_state
+from .sequencer import TradeRequest, _Batch, apply_buy, apply_sell, write_accounts, write_pool_state
+from .trade_profile import profile_trade
+
+BATCH_MAX_LEGS = int(os.getenv("AMM_BATCH_MAX_LEGS", "50"))
+
+BATCH_ALL_OR_NOTHING = "all_or_nothing"
+BATCH_BEST_EFFORT = "best_effort"
+BATCH_MODES = (BATCH_ALL_OR_NOTHING, BATCH_BEST_EFFORT)
+
+
+class BatchLegError(ExecutionError):
+    """A leg failed in all_or_nothing mode; nothing was committed."""
+
+    def __init__(self, leg: int, exc: ExecutionError):
+        super().__init__(f"Leg {leg}: {exc}", code=exc.code, http_status=exc.http_status)
+        self.leg = leg
+
+    def to_payload(self) -> Dict:
+        return {**super().to_payload(), "leg": self.leg}
+
+
+# Leg keys that are order terms (same names as execute_*'s, amount_out for desired_amount_out)
+_LEG_TERMS = (
+    "option_id", "option_index", "amount_in", "min_shares_out", "max_slippage_bps",
+    "shares", "amount_out", "sell_all", "min_amount_out",
+)
+
+
+def _leg_fingerprint(side: str, market_id: str, leg: Dict, token: str) -> str:
+    terms = {k: leg.get(k) for k in _LEG_TERMS}
+    terms["sell_all"] = bool(terms["sell_all"])  # as _parse_leg reads it
+    return order_fingerprint(side, market_id=market_id, token=token, **terms)
+
+
+def _parse_leg(user, leg: Dict, token: str, wallet_id: Optional[str], wallet) -> TradeRequest:
+    if not isinstance(leg, dict):
+        raise ExecutionError("Each leg must be an object", code="INVALID_PARAM", http_status=400)
+    side = (leg.get("side") or "").lower()
+    try:
+        market_id = str(uuid.UUID(str(leg.get("market_id"))))
+    except ValueError:
+        raise ExecutionError("market_id must be a UUID", code="INVALID_PARAM", http_status=400)
+    client_nonce = leg.get("client_nonce") or None
+    common = dict(
+        user=user,
+        market_id=market_id,
+        option_id=str(leg["option_id"]) if leg.get("option_id") else None,
+        option_index=leg.get("option_index"),
+        token=token,
+        wallet_id=wallet_id,
+        wallet=wallet,
+        client_nonce=client_nonce,
+        request_hash=_leg_fingerprint(side, market_id, leg, token) if client_nonce else None,
+        money_quant=MONEY_QUANT,
+    )
+    if side == "buy":
+        amt, min_shares_units, max_slippage_bps = _parse_buy_args(
+            leg.get("amount_in"), leg.get("min_shares_out"), leg.get("max_slippage_bps")
+        )
+        return TradeRequest(
+            side="buy", amount_in=amt, min_shares_units=min_shares_units, max_slippage_bps=max_slippage_bps, **common
+        )
+    if side == "sell":
+        sell_all = bool(leg.get("sell_all", False))
+        shares, desired_out, min_amount_out = _parse_sell_args(
+            leg.get("shares"), leg.get("amount_out"), sell_all, leg.get("min_amount_out")
+        )
+        return TradeRequest(
+            side="sell", shares=shares, desired_out=desired_out, sell_all=sell_all, min_amount_out=min_amount_out, **common
+        )
+    raise ExecutionError("side must be 'buy' or 'sell'", code="INVALID_PARAM", http_status=400)
+
+
+def _lock(user, reqs: List[TradeRequest], token: str, now):
+    """-> (contexts by market id, pool contexts in pool id order, load errors by market id)"""
+    market_ids = sorted({req.market_id for req in reqs})
+    markets = {str(m.id): m for m in Market.objects.select_for_update().filter(pk__in=market_ids).order_by("id")}
+    options = list(MarketOption.objects.select_for_update().filter(market_id__in=list(markets)).order_by("id"))
+
+    # market -> pool from the pool cache (no queries on a hit), then pools in id order
+    by_pool: Dict[str, List[str]] = {}
+    errors: Dict[str, ExecutionError] = {}
+    for mid in markets:
+        try:
+            by_pool.setdefault(get_pool_state(mid).pool_id, []).append(mid)
+        except QuoteError as exc:
+            errors[mid] = _pool_load_error(exc)
+
+    by_market: Dict[str, _Batch] = {}
+    pools: List[_Batch] = []
+    for pid in sorted(by_pool):
+        pool, option_states, state = _read_pool_state(by_pool[pid][0])
+        ctx = _Batch(pool, option_states, state, now, accounts=pools[0] if pools else None)
+        pools.append(ctx)
+        for mid in by_pool[pid]:
+            by_market[mid] = ctx
+    if not pools:
+        return by_market, pools, errors
+
+    accounts = pools[0]
+    accounts.markets.update(markets)
+    event_ids = {m.event_id for m in markets.values() if m.event_id}
+    if event_ids:
+        accounts.events.update({e.id: e for e in Event.objects.filter(pk__in=event_ids)})
+    for opt in options:
+        accounts.options_by_id[str(opt.id)] = opt
+        accounts.options_by_index[(str(opt.market_id), opt.option_index)] = opt
+
+    accounts.balance(user.id, token)
+    for pos in (
+        Position.objects.select_for_update()
+        .filter(user_id=user.id, option_id__in=[o.id for o in options])
+        .order_by("option_id")
+    ):
+        accounts.positions[(pos.user_id, pos.option_id)] = pos
+    return by_market, pools, errors
+
+
+@_retry_pool_conflicts
+def _execute(user, legs: List[Dict], mode: str, token: str, wallet_id: Optional[str], wallet) -> Dict:
+    parsed: List[Union[TradeRequest, ExecutionError]] = []
+    for leg in legs:
+        try:
+            parsed.append(_parse_leg(user, leg, token, wallet_id, wallet))
+        except ExecutionError as exc:
+            parsed.append(exc)
+
+    nonces = [req.client_nonce for req in parsed if isinstance(req, TradeRequest) and req.client_nonce]
+    replays = order_results(user.id, nonces)
+    seen = set()
+
+    outcomes: List[Tuple[str, Dict]] = []  # (status, response / error payload) per leg
+    with profile_trade("batch_orders", legs=len(legs)) as prof, transaction.atomic():
+        now = timezone.now()
+        live = [req for req in parsed if isinstance(req, TradeRequest) and req.client_nonce not in replays]
+        by_market, pools, load_errors = _lock(user, live, token, now) if live else ({}, [], {})
+
+        prof.mark("quote")
+        for i, req in enumerate(parsed):
+            try:
+                if isinstance(req, ExecutionError):
+                    raise req
+                if req.client_nonce in replays:
+                    outcomes.append(("replayed", replay_response(replays[req.client_nonce], req.request_hash)))
+                    continue
+                if req.client_nonce in seen:
+                    raise ExecutionError("client_nonce repeated in batch", code="DUPLICATE_CLIENT_NONCE", http_status=400)
+                ctx = by_market.get(req.market_id)
+                if ctx is None:
+                    raise load_errors.get(req.market_id) or ExecutionError(
+                        "Market not found", code="MARKET_NOT_FOUND", http_status=404
+                    )
+                response = apply_buy(req, ctx) if req.side == "buy" else apply_sell(req, ctx)
+                if req.client_nonce:
+                    seen.add(req.client_nonce)
+                outcomes.append(("filled", response))
+            except ExecutionError as exc:
+                if mode == BATCH_ALL_OR_NOTHING:
+                    raise BatchLegError(i, exc)
+                outcomes.append(("failed", exc.to_payload()))
+
+        prof.mark("persist")
+        for ctx in pools:  # pool id order; optimistic mode CASes each pool row
+            write_pool_state(ctx, locked=False)
+        if pools:
+            write_accounts(pools[0])
+
+    # after write_accounts: order_intent_id is patched into the responses
+    results = [{"index": i, "status": status, **body} for i, (status, body) in enumerate(outcomes)]
+    filled = sum(1 for status, _ in outcomes if status != "failed")
+    return {"mode": mode, "filled": filled, "failed": len(results) - filled, "results": results}
+
+
+def execute_batch(
+    *,
+    user,
+    legs: List[Dict],
+    mode: str = BATCH_ALL_OR_NOTHING,
+    token: str = DEFAULT_TOKEN,
+    wallet_id: Optional[str] = None,
+) -> Dict:
+    """
+    Execute up to AMM_BATCH_MAX_LEGS legs ({"side", "market_id", "option_id" |
+    "option_index", buy: "amount_in", "min_shares_out", "max_slippage_bps";
+    sell: "shares" | "amount_out" | "sell_all", "min_amount_out"; "client_nonce"})
+    for one user in one transaction. See the module docstring for modes.
+    """
+    if mode not in BATCH_MODES:
+        raise ExecutionError(f"mode must be one of {', '.join(BATCH_MODES)}", code="INVALID_PARAM", http_status=400)
+    if not isinstance(legs, list) or not legs:
+        raise ExecutionError("legs must be a non-empty list", code="INVALID_PARAM", http_status=400)
+    if len(legs) > BATCH_MAX_LEGS:
+        raise ExecutionError(f"At most {BATCH_MAX_LEGS} legs per batch", code="TOO_MANY_LEGS", http_status=400)
+
+    wallet = _resolve_wallet(user, wallet_id)
+    try:
+        return _execute(user, legs, mode, token, wallet_id, wallet)
+    except IntegrityError:
+        # A concurrent attempt committed one of the legs' client_nonces: replay it
+        return _execute(user, legs, mode, token, wallet_id, wallet)
+
+
+__all__ = [
+    "BATCH_ALL_OR_NOTHING",
+    "BATCH_BEST_EFFORT",
+    "BATCH_MAX_LEGS",
+    "BATCH_MODES",
+    "BatchLegError",
+    "execute_batch",
+]
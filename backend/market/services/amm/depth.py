@@ -0,0 +1,153 @@
+"""
+Depth ladder: price impact for a fixed size grid, every outcome, buy and sell.
+
+One vectorized pass (lmsr_vec / NumPy) over all outcomes × sizes using the same
+closed forms as quote_core / quote_math:
+  - buy  (gross amount A): net = A - fee,  delta = b*log(1 + expm1(net/b)/p_i)
+  - sell (net amount_out A): gross = A/(1-fee), s = -b*log(1 + expm1(-gross/b)/p_i)
+Post-trade probability of the traded outcome moves on the logit scale by ±shares/b.
+
+Fees follow the quote rounding (buy fee / sell gross-up rounded UP to the cent); the ladder is
+indicative, quotes remain the source of truth for execution.
+
+Ladders are memoized per (pool_id, version) in a small process-local LRU.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .lmsr_vec import buy_amount_to_delta_q_batch
+from .money import _fee_rate_from_bps
+from .state import PoolState
+
+# $1 … $100k, 1-2-5 geometric steps
+DEPTH_SIZES: Tuple[int, ...] = tuple(m * 10**e for e in range(6) for m in (1, 2, 5) if m * 10**e <= 100_000)
+
+DEPTH_CACHE_SIZE = int(os.getenv("AMM_DEPTH_CACHE_SIZE", "256"))
+
+_cache: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def pool_version(state: PoolState) -> str:
+    """Content fingerprint of the pricing inputs (pool, b, fee, q)."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{state.pool_id}|{state.b!r}|{state.fee_bps}|".encode())
+    h.update(np.asarray(state.q, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def _logit_to_bps(logit: np.ndarray) -> np.ndarray:
+    # 1 / (1 + exp(-logit)), clipped so exp never overflows
+    p = 1.0 / (1.0 + np.exp(-np.clip(logit, -700.0, 700.0)))
+    return np.rint(p * 10000.0).astype(np.int64)
+
+
+def _fmt(values: np.ndarray, places: int) -> List[Optional[str]]:
+    return [None if not np.isfinite(v) else f"{v:.{places}f}" for v in values]
+
+
+def compute_depth(state: PoolState, sizes: Sequence[float] = DEPTH_SIZES) -> Dict:
+    """
+    Pure function (no DB). Returns:
+      {"pool_id", "version", "fee_bps", "sizes", "outcomes": [
+          {"option_id", "option_index", "prob_bps",
+           "buy":  {"shares", "avg_price_bps", "post_prob_bps"},   # one entry per size
+           "sell": {"shares", "avg_price_bps", "post_prob_bps"}}   # None where size exceeds max payout
+      ]}
+    """
+    n = len(state.q)
+    b = state.b
+    fee_rate = float(_fee_rate_from_bps(state.fee_bps))
+    amounts = np.asarray(sizes, dtype=np.float64)
+
+    q = np.asarray(state.q, dtype=np.float64)
+    log_z = state.lse.log_partition()
+    log_p = q / b - log_z                           # (N,)
+    p = np.exp(log_p)
+    log_1mp = np.log(-np.expm1(np.minimum(log_p, -1e-300)))
+    logit = (log_p - log_1mp)[:, np.newaxis]        # (N, 1)
+
+    # ---- buy: gross amount in ----
+    fee = np.ceil(amounts * fee_rate * 100.0 - 1e-9) / 100.0
+    net = amounts - fee
+    buy_shares = np.full((n, amounts.shape[0]), np.nan)
+    ok = net > 0
+    if np.any(ok):
+        buy_shares[:, ok] = buy_amount_to_delta_q_batch(np.tile(q, (n, 1)), b, np.arange(n), net[ok])
+    buy_avg_bps = np.rint(amounts / buy_shares * 10000.0)
+    buy_post = _logit_to_bps(logit + np.nan_to_num(buy_shares) / b)
+
+    # ---- sell: desired net amount out ----
+    # gross-up rounded UP to the cent, as quote_from_state does
+    gross = np.ceil(amounts / (1.0 - fee_rate) * 100.0 - 1e-9) / 100.0 if fee_rate < 1.0 else np.full_like(amounts, np.inf)
+    pc = p[:, np.newaxis]
+    max_gross = -b * np.log1p(-np.minimum(pc, 1.0 - 1e-16))
+    rhs = 1.0 + np.expm1(-gross / b) / pc
+    feasible = (gross < max_gross) & (rhs > 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sell_shares = np.where(feasible, -b * np.log(np.where(feasible, rhs, 1.0)), np.nan)
+        sell_avg_bps = np.rint(amounts / sell_shares * 10000.0)
+    sell_post = _logit_to_bps(logit - np.nan_to_num(sell_shares) / b)
+
+    prob_bps = state.prob_bps()
+    outcomes = []
+    for i in range(n):
+        sell_ok = feasible[i]
+        outcomes.append(
+            {
+                "option_id": state.option_ids[i],
+                "option_index": state.option_indexes[i],
+                "prob_bps": prob_bps[i],
+                "buy": {
+                    "shares": _fmt(buy_shares[i], 8),
+                    "avg_price_bps": [int(v) if np.isfinite(v) else None for v in buy_avg_bps[i]],
+                    "post_prob_bps": [int(v) if ok[k] else None for k, v in enumerate(buy_post[i])],
+                },
+                "sell": {
+                    "shares": _fmt(sell_shares[i], 8),
+                    "avg_price_bps": [int(v) if sell_ok[k] else None for k, v in enumerate(sell_avg_bps[i])],
+                    "post_prob_bps": [int(v) if sell_ok[k] else None for k, v in enumerate(sell_post[i])],
+                },
+            }
+        )
+
+    return {
+        "pool_id": state.pool_id,
+        "version": pool_version(state),
+        "fee_bps": state.fee_bps,
+        "sizes": [str(Decimal(str(s))) for s in sizes],
+        "outcomes": outcomes,
+    }
+
+
+def depth_for_state(state: PoolState) -> Dict:
+    """compute_depth on the default grid, memoized by (pool_id, version)."""
+    key = (state.pool_id, pool_version(state))
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+
+    ladder = compute_depth(state)
+    with _cache_lock:
+        _cache[key] = ladder
+        _cache.move_to_end(key)
+        while len(_cache) > DEPTH_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ladder
+
+
+def clear_depth_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+__all__ = ["DEPTH_SIZES", "compute_depth", "depth_for_state", "pool_version", "clear_depth_cache"]
@@ -13,3 +13,7 @@ class QuoteInputError(QuoteError):
 class QuoteMathError(QuoteError):
     """Math/feasibility issues."""
 
+
+
+class PoolStateNotFoundError(QuoteNotFoundError):
+    """Pool exists but has no option state rows."""
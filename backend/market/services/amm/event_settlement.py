@@ -0,0 +1,427 @@
+"""
+Event-wide settlement of exclusive events.
+
+Settling an exclusive event market by market re-reads and re-locks the shared
+event pool for every child market, scans positions once per market, and the
+first finished market closes the pool under the others. Here the event is one
+unit:
+
+  resolve_event()              ONE transaction: lock the event and its markets,
+                               resolve the winner to Yes and every other market
+                               to No
+  enqueue_event_settlement()   sum the winning positions and, in the
+                               transaction creating the event's
+                               event_settlement_jobs row, lock the event pool
+                               once to debit that total and close it
+  run_event_settlement_chunk() ONE transaction: pay the next SETTLEMENT_CHUNK
+                               winning positions of ANY child market (the
+                               winner's Yes, the others' No) in position id
+                               order and advance the checkpoint
+  _finish_event()              write one aggregated MarketSettlement per child
+                               market, mark every child market settled
+
+Per-market settlement (settlement_jobs.py) refuses markets of an event that has
+a job here, and this refuses events with a market already settling alone.
+Jobs are run by `manage.py process_settlement_jobs` alongside the market jobs.
+"""
+
+import logging
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from ...models import (
+    AmmPool,
+    Event,
+    EventSettlementJob,
+    Market,
+    MarketOption,
+    MarketSettlement,
+    Position,
+    SettlementJob,
+    SettlementPayout,
+)
+from .settlement import SettlementError, _generate_settlement_tx_id
+from .settlement_jobs import (
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_RUNNING,
+    OPEN_JOB_STATUSES,
+    _check_reserved,
+    _release_unpaid,
+    _reserve,
+    run_chunks,
+)
+from .settlement_payouts import next_event_winners, pay_positions
+from .setup import OptionSide
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_exclusive_event(event_id) -> Event:
+    try:
+        event = Event.objects.select_for_update().get(pk=event_id)
+    except Event.DoesNotExist:
+        raise SettlementError("Event not found", code="EVENT_NOT_FOUND", http_status=404)
+    if (event.group_rule or "").strip().lower() != "exclusive":
+        raise SettlementError("Only exclusive events settle as a whole", code="NOT_EXCLUSIVE", http_status=400)
+    return event
+
+
+def _winning_options(event_id) -> List[Tuple[object, int]]:
+    """(market_id, winning option_id) of each resolved child market, in market id order (one query)."""
+    return list(
+        MarketOption.objects.filter(market__event_id=event_id, option_index=F("market__resolved_option_index"))
+        .order_by("market_id")
+        .values_list("market_id", "id")
+    )
+
+
+def _resolution_payload(event: Event, markets: List[Market], options: Dict, *, already_resolved: bool) -> Dict:
+    return {
+        "event_id": str(event.id),
+        "status": event.status,
+        "resolved_at": event.resolved_at.isoformat() if event.resolved_at else None,
+        "winning_market_id": str(event.resolved_market_id) if event.resolved_market_id else None,
+        "markets": [
+            {
+                "market_id": str(m.id),
+                "resolved_option_index": m.resolved_option_index,
+                "resolved_option_id": options.get((m.id, m.resolved_option_index)),
+            }
+            for m in markets
+        ],
+        "already_resolved": already_resolved,
+    }
+
+
+@transaction.atomic
+def resolve_event(*, event_id, winning_market_id, resolved_by_user_id: Optional[str] = None) -> Dict:
+    """
+    Resolve every child market of an exclusive event at once: the winning market
+    to its Yes option, all others to their No option. Idempotent for the same
+    winner; a different winner (or a child market resolved the other way) is a
+    RESOLUTION_CONFLICT.
+    """
+    event = _lock_exclusive_event(event_id)
+    markets = list(Market.objects.select_for_update().filter(event_id=event.id).order_by("id"))
+    if str(winning_market_id) not in {str(m.id) for m in markets}:
+        raise SettlementError("Winning market not found in event", code="MARKET_NOT_FOUND", http_status=404)
+
+    rows = MarketOption.objects.filter(
+        market_id__in=[m.id for m in markets], is_active=True, side__in=(OptionSide.YES.value, OptionSide.NO.value)
+    ).values_list("market_id", "side", "id", "option_index")
+    by_side: Dict[Tuple[object, str], Tuple[int, int]] = {}
+    options: Dict[Tuple[object, int], int] = {}
+    for market_id, side, option_id, option_index in rows:
+        by_side[(market_id, side)] = (option_id, option_index)
+        options[(market_id, option_index)] = option_id
+
+    expected: Dict[object, int] = {}  # market id -> option_index it resolves to
+    targets: Dict[int, List] = {}  # option_index -> unresolved market ids to resolve to it
+    for m in markets:
+        side = OptionSide.YES.value if str(m.id) == str(winning_market_id) else OptionSide.NO.value
+        if (m.id, side) not in by_side:
+            raise SettlementError(
+                f"Market {m.id} has no active '{side}' option", code="OPTION_NOT_FOUND", http_status=404
+            )
+        option_index = expected[m.id] = by_side[(m.id, side)][1]
+        if m.status == "resolved":
+            if m.resolved_option_index != option_index:
+                raise SettlementError(
+                    f"Market {m.id} is already resolved to another outcome",
+                    code="RESOLUTION_CONFLICT",
+                    http_status=409,
+                )
+            continue
+        if m.status not in ("active", "closed"):
+            raise SettlementError(
+                f"Market {m.id} cannot be resolved from status '{m.status}'", code="INVALID_STATUS", http_status=400
+            )
+        targets.setdefault(option_index, []).append(m.id)
+
+    if event.resolved_market_id is not None and str(event.resolved_market_id) != str(winning_market_id):
+        raise SettlementError(
+            "Event is already resolved to another market", code="RESOLUTION_CONFLICT", http_status=409
+        )
+    if not targets and event.status == "resolved":
+        return _resolution_payload(event, markets, options, already_resolved=True)
+
+    now = timezone.now()
+    for option_index, market_ids in targets.items():
+        Market.objects.filter(pk__in=market_ids).update(
+            status="resolved", resolved_at=now, resolved_option_index=option_index, updated_at=now
+        )
+    for m in markets:
+        if m.status != "resolved":
+            m.status, m.resolved_at, m.resolved_option_index = "resolved", now, expected[m.id]
+
+    event.status = "resolved"
+    event.resolved_at = now
+    event.resolved_market_id = winning_market_id
+    event.updated_at = now
+    event.save(update_fields=["status", "resolved_at", "resolved_market", "updated_at"])
+
+    logger.info(
+        "Event resolved: event_id=%s, winning_market_id=%s, markets=%s, by=%s",
+        event.id,
+        winning_market_id,
+        len(markets),
+        resolved_by_user_id,
+    )
+    return _resolution_payload(event, markets, options, already_resolved=False)
+
+
+def event_job_payload(job: EventSettlementJob) -> Dict:
+    total = Decimal(job.total_payout)
+    paid = Decimal(job.paid_amount)
+    return {
+        "job_id": job.id,
+        "event_id": str(job.event_id),
+        "winning_market_id": str(job.winning_market_id),
+        "settlement_tx_id": job.settlement_tx_id,
+        "status": job.status,
+        "total_payout": str(total),
+        "paid_amount": str(paid),
+        "winners_paid": job.winners_paid,
+        "progress": float(paid / total) if total > 0 else (1.0 if job.status == JOB_DONE else 0.0),
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def event_settled_payload(job: EventSettlementJob, *, already_settled: bool) -> Dict:
+    settlements = MarketSettlement.objects.filter(market__event_id=job.event_id).order_by("market_id")
+    return {
+        "event_id": str(job.event_id),
+        "winning_market_id": str(job.winning_market_id),
+        "settlement_tx_id": job.settlement_tx_id,
+        "total_payout": str(job.paid_amount),
+        "winners_paid": job.winners_paid,
+        "markets": [
+            {
+                "market_id": str(s.market_id),
+                "winning_option_id": s.resolved_option_id,
+                "total_payout": str(s.total_payout),
+                "pool_cash_used": str(s.pool_cash_used),
+                "collateral_used": str(s.collateral_used),
+            }
+            for s in settlements
+        ],
+        "settled_at": job.finished_at.isoformat() if job.finished_at else None,
+        "already_settled": already_settled,
+    }
+
+
+def _total_payout(winners: List[Tuple[object, int]]) -> Decimal:
+    """Shares held on the winning options of every child market (one aggregate query)."""
+    total = Position.objects.filter(option_id__in=[option_id for _, option_id in winners], shares__gt=0).aggregate(
+        total=Sum("shares")
+    )["total"]
+    return Decimal(total or 0)
+
+
+def enqueue_event_settlement(
+    *,
+    event_id,
+    settlement_tx_id: Optional[str] = None,
+    settled_by_user_id: Optional[str] = None,
+) -> Dict:
+    """
+    Create (or return) the event's settlement job. A settled event returns its
+    settlements (already_settled); a failed job is put back in the queue.
+    """
+    with transaction.atomic():
+        event = _lock_exclusive_event(event_id)
+        job = EventSettlementJob.objects.select_for_update().filter(event=event).first()
+        if job is not None:
+            if job.status == JOB_DONE:
+                return event_settled_payload(job, already_settled=True)
+            if job.status == JOB_FAILED:
+                job.status, job.error, job.updated_at = JOB_PENDING, None, timezone.now()
+                job.save(update_fields=["status", "error", "updated_at"])
+            return event_job_payload(job)
+
+        if event.status != "resolved" or event.resolved_market_id is None:
+            raise SettlementError("Event must be resolved before settlement", code="NOT_RESOLVED", http_status=400)
+        markets = list(Market.objects.select_for_update().filter(event_id=event.id).order_by("id"))
+        if any(m.status != "resolved" for m in markets):
+            raise SettlementError("Every market of the event must be resolved", code="NOT_RESOLVED", http_status=400)
+        market_ids = [m.id for m in markets]
+        settling_alone = SettlementJob.objects.filter(market_id__in=market_ids).exists()
+        if settling_alone or any(m.settled_at is not None for m in markets):
+            raise SettlementError(
+                "A market of the event is already settled on its own", code="MARKET_SETTLEMENT_EXISTS", http_status=409
+            )
+
+        winners = _winning_options(event.id)
+        if len(winners) != len(markets):
+            raise SettlementError("Winning option not found", code="OPTION_NOT_FOUND", http_status=404)
+        pool = AmmPool.objects.select_for_update().filter(event=event).first()
+        if pool is None:
+            raise SettlementError("AMM pool not found for event", code="POOL_NOT_FOUND", http_status=404)
+
+        # The winner's Yes holders and every other market's No holders, 1 token per
+        # share: debited from the pool now, so nothing can run short once paying starts
+        total_payout = _total_payout(winners)
+        now = timezone.now()
+        pool_cash_used, collateral_used = _reserve(pool, total_payout, now)
+
+        job = EventSettlementJob.objects.create(
+            event=event,
+            winning_market_id=event.resolved_market_id,
+            pool=pool,
+            token=pool.collateral_token,
+            settlement_tx_id=settlement_tx_id or _generate_settlement_tx_id(),
+            status=JOB_PENDING,
+            total_payout=total_payout,
+            pool_cash_used=pool_cash_used,
+            collateral_used=collateral_used,
+            settled_by_id=settled_by_user_id,
+            created_at=now,
+            updated_at=now,
+        )
+    logger.info("Event settlement enqueued: event_id=%s, job_id=%s, total_payout=%s", event_id, job.id, total_payout)
+    return event_job_payload(job)
+
+
+def _finish_event(job: EventSettlementJob, winners: List[Tuple[object, int]], now) -> None:
+    """Last step, inside the chunk transaction holding the job row (the pool was debited at enqueue)."""
+    paid = Decimal(job.paid_amount)
+    pool_cash_used, collateral_used = _release_unpaid(job, now)
+
+    market_ids = [market_id for market_id, _ in winners]
+    per_market = dict(
+        SettlementPayout.objects.filter(market_id__in=market_ids, settlement_tx_id=job.settlement_tx_id)
+        .values("market_id")
+        .annotate(total=Sum("payout"))
+        .values_list("market_id", "total")
+    )
+    # pool_cash is drawn first, in market id order, the same split as _funding over the total
+    cash_left = pool_cash_used
+    settlements = []
+    for market_id, option_id in winners:
+        total = Decimal(per_market.get(market_id) or 0)
+        cash = min(cash_left, total)
+        cash_left -= cash
+        settlements.append(
+            MarketSettlement(
+                market_id=market_id,
+                resolved_option_id=option_id,
+                total_payout=total,
+                pool_cash_used=cash,
+                collateral_used=total - cash,
+                settled_by_id=job.settled_by_id,
+                settled_at=now,
+                settlement_tx_id=job.settlement_tx_id,
+            )
+        )
+    MarketSettlement.objects.bulk_create(settlements)
+    Market.objects.filter(pk__in=market_ids).update(
+        settled_at=now, settlement_tx_id=job.settlement_tx_id, updated_at=now
+    )
+
+    job.status = JOB_DONE
+    job.updated_at = job.finished_at = now
+    job.save(update_fields=["status", "updated_at", "finished_at"])
+    logger.info(
+        "Event settled: event_id=%s, tx_id=%s, markets=%s, total_payout=%s, pool_cash_used=%s, "
+        "collateral_used=%s, winners=%s",
+        job.event_id,
+        job.settlement_tx_id,
+        len(market_ids),
+        paid,
+        pool_cash_used,
+        collateral_used,
+        job.winners_paid,
+    )
+
+
+def run_event_settlement_chunk(job_id) -> bool:
+    """Pay one chunk across the event's markets (or finish the job) in one transaction. True while work remains."""
+    with transaction.atomic():
+        job = EventSettlementJob.objects.select_for_update().get(pk=job_id)
+        if job.status == JOB_DONE:
+            return False
+        now = timezone.now()
+        winners = _winning_options(job.event_id)
+        rows = next_event_winners([option_id for _, option_id in winners], job.last_position_id)
+        if not rows:
+            _finish_event(job, winners, now)
+            return False
+
+        _check_reserved(job, rows)
+        paid = pay_positions(rows, token=job.token, settlement_tx_id=job.settlement_tx_id, now=now)
+        job.last_position_id = paid.last_position_id
+        job.paid_amount = Decimal(job.paid_amount) + paid.total
+        job.winners_paid += paid.winners
+        job.status = JOB_RUNNING
+        job.updated_at = now
+        job.save(update_fields=["last_position_id", "paid_amount", "winners_paid", "status", "updated_at"])
+        return True
+
+
+def run_event_settlement_job(job_id, *, keep_going: Optional[Callable[[], bool]] = None) -> Dict:
+    """Run an event job from its checkpoint (see run_settlement_job)."""
+    return event_job_payload(run_chunks(EventSettlementJob, run_event_settlement_chunk, job_id, keep_going))
+
+
+def settle_event(*, event_id, settlement_tx_id: Optional[str] = None, settled_by_user_id: Optional[str] = None) -> Dict:
+    """Enqueue the event's settlement and run it to completion in-process."""
+    job = enqueue_event_settlement(
+        event_id=event_id, settlement_tx_id=settlement_tx_id, settled_by_user_id=settled_by_user_id
+    )
+    if job.get("already_settled"):
+        return job
+    run_event_settlement_job(job["job_id"])
+    return event_settled_payload(EventSettlementJob.objects.get(pk=job["job_id"]), already_settled=False)
+
+
+def resolve_and_settle_event(*, event_id, winning_market_id, settled_by_user_id: Optional[str] = None) -> Dict:
+    """resolve_event + settle_event in one call."""
+    resolution = resolve_event(
+        event_id=event_id, winning_market_id=winning_market_id, resolved_by_user_id=settled_by_user_id
+    )
+    settlement = settle_event(event_id=event_id, settled_by_user_id=settled_by_user_id)
+    return {"resolution": resolution, "settlement": settlement}
+
+
+def event_settlement_progress(event_id) -> Optional[Dict]:
+    job = EventSettlementJob.objects.filter(event_id=event_id).first()
+    return event_job_payload(job) if job else None
+
+
+def process_event_settlement_jobs(limit: Optional[int] = None) -> int:
+    """Run open event jobs oldest first. Returns the number finished; failures are logged and left failed."""
+    job_ids = list(
+        EventSettlementJob.objects.filter(status__in=OPEN_JOB_STATUSES)
+        .order_by("created_at", "id")
+        .values_list("id", flat=True)
+    )
+    finished = 0
+    for job_id in job_ids[:limit] if limit else job_ids:
+        try:
+            run_event_settlement_job(job_id)
+            finished += 1
+        except Exception:
+            logger.exception("Event settlement job %s failed", job_id)
+    return finished
+
+
+__all__ = [
+    "enqueue_event_settlement",
+    "event_job_payload",
+    "event_settled_payload",
+    "event_settlement_progress",
+    "process_event_settlement_jobs",
+    "resolve_and_settle_event",
+    "resolve_event",
+    "run_event_settlement_chunk",
+    "run_event_settlement_job",
+    "settle_event",
+]
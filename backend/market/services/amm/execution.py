@@ -1,4 +1,8 @@
-from decimal import Decimal, InvalidOperation
+import functools
+import os
+import random
+import time
+from decimal import Decimal, InvalidOperation, ROUND_UP
 from typing import Dict, List, Optional, Tuple
 
 from django.db import IntegrityError, transaction
@@ -17,21 +21,59 @@ from ...models import (
     OrderIntent,
     Position,
     Trade,
-    Wallet,
 )
-from .quote_core import quote_from_state
+from ..wallets import resolve_wallet
+from .errors import PoolStateNotFoundError, QuoteError, QuoteNotFoundError
+from .exposure import add_exposure
+from .firm_quote import FirmQuoteError, redeem_firm_quote
+from .idempotency import claim_client_nonce, idempotent, remember_order_results
+from .outbox import enqueue_trade_side_effects, side_effects_inline
+from .pool_cache import bump_pool_version_on_commit
+from .quote_core import build_quote
+from .q_writer import apply_q_deltas
+from .quote_result import Quote
+from .quote_loader import load_pool_rows
 from .state import PoolState
+from .trade_profile import profile_trade
 from .lmsr import prices
-from .money import _bps_from_probabilities
+from .money import (
+    MONEY_SCALE,
+    SHARES_SCALE,
+    _bps_from_probabilities,
+    _format_money,
+    _money_decimal,
+    _shares_decimal,
+    _units_from_decimal,
+)
 
 Number = Decimal
 
 # Money quantization for AMM calculations (cents in USD terms). Adjust as needed.
 MONEY_QUANT = Decimal("0.01")
 
+# Positions below this are cleaned up by sell_all without AMM calculation
+DUST_THRESHOLD = Decimal("0.1")  # 0.1 shares
+
 DEFAULT_TOKEN = "USDC"
 DEFAULT_CHAIN = "evm"
 
+# "locking" (default): one transaction per trade with row locks.
+# "sequencer": trades are queued to a per-pool single writer that group-commits (see sequencer.py).
+EXECUTION_MODE_LOCKING = "locking"
+EXECUTION_MODE_SEQUENCER = "sequencer"
+EXECUTION_MODE = os.getenv("AMM_EXECUTION_MODE", EXECUTION_MODE_LOCKING).strip().lower()
+
+# Pool concurrency for the locking path:
+# "optimistic" (default): read pool/states unlocked, compare-and-swap AmmPool.version on write.
+# "locking": FOR UPDATE of the pool and every option state row.
+POOL_CONCURRENCY_OPTIMISTIC = "optimistic"
+POOL_CONCURRENCY_LOCKING = "locking"
+POOL_CONCURRENCY = os.getenv("AMM_POOL_CONCURRENCY", POOL_CONCURRENCY_OPTIMISTIC).strip().lower()
+# CAS conflicts: retries per trade, backoff base / cap in ms (exponential, jittered).
+POOL_CAS_RETRIES = int(os.getenv("AMM_POOL_CAS_RETRIES", "8"))
+POOL_CAS_BACKOFF_MS = float(os.getenv("AMM_POOL_CAS_BACKOFF_MS", "2"))
+POOL_CAS_BACKOFF_MAX_MS = float(os.getenv("AMM_POOL_CAS_BACKOFF_MAX_MS", "50"))
+
 
 class ExecutionError(ValueError):
     """
@@ -62,92 +104,103 @@ def _lock_pool_state(market_id: str) -> Tuple[AmmPool, List[AmmPoolOptionState],
     """
     Lock pool + option_state rows for a market and build PoolState.
     IMPORTANT: Must lock *all* option_state rows to prevent concurrent q drift.
-    
-    For exclusive events, the pool is at the event level, not market level.
-    Also builds the no_to_yes_option_id mapping for exclusive events.
-    """
-    # Try market-level pool first (no select_related to avoid outer join with FOR UPDATE)
-    pool = AmmPool.objects.select_for_update().filter(market_id=market_id).first()
-    
-    is_exclusive = False
-    event = None
-    
-    # If no market-level pool, check for event-level pool (exclusive events)
-    if pool is None:
-        try:
-            market = Market.objects.select_related("event").get(pk=market_id)
-            if market.event_id:
-                pool = AmmPool.objects.select_for_update().filter(event_id=market.event_id).first()
-                if pool is not None:
-                    event = market.event
-                    is_exclusive = (event.group_rule or "").strip().lower() == "exclusive"
-        except Market.DoesNotExist:
-            pass
-    
-    if pool is None:
-        raise ExecutionError("AMM pool not found for market", code="POOL_NOT_FOUND", http_status=404)
-
-    if pool.b is None or Decimal(pool.b) <= 0:
-        raise ExecutionError("AMM pool liquidity parameter b is invalid", code="POOL_INVALID", http_status=422)
-
-    states = list(
-        AmmPoolOptionState.objects.select_for_update()
-        .select_related("option")
-        .filter(pool=pool)
-        .order_by("option__option_index", "option_id")
-    )
-    if not states:
-        raise ExecutionError("AMM pool has no option state", code="POOL_STATE_NOT_FOUND", http_status=404)
-
-    option_ids: List[str] = []
-    option_indexes: List[int] = []
-    q: List[float] = []
-    for s in states:
-        option_ids.append(str(s.option_id))
-        option_indexes.append(int(s.option.option_index))
-        q.append(float(s.q))
-
-    option_id_to_idx = {oid: i for i, oid in enumerate(option_ids)}
-    
-    # Build no_to_yes_option_id mapping for exclusive events
-    no_to_yes_option_id: Dict[str, Tuple[str, int]] = {}
-    if is_exclusive:
-        # For each Yes option in the pool, find its No counterpart
-        yes_option_ids = [int(oid) for oid in option_ids]
-        # Get all options (Yes and No) for the markets that have Yes options in the pool
-        yes_options = MarketOption.objects.filter(id__in=yes_option_ids).values_list("id", "market_id")
-        yes_market_ids = [m_id for _, m_id in yes_options]
-        yes_opt_by_market = {m_id: opt_id for opt_id, m_id in yes_options}
-        
-        # Find No counterparts (side='no' in the same markets)
-        no_options = list(
-            MarketOption.objects.filter(market_id__in=yes_market_ids, side="no", is_active=True)
-            .values_list("id", "market_id")
+
+    Shares the builder with quoting (quote_loader.load_pool_rows): one statement,
+    FOR UPDATE OF the pool and state rows; event-level pools for exclusive events.
+    """
+    try:
+        return load_pool_rows(market_id, lock=True)
+    except QuoteError as exc:
+        raise _pool_load_error(exc)
+
+
+def _pool_locked_first() -> bool:
+    """
+    Locking mode takes the pool/state rows before balances and positions; optimistic
+    mode writes the pool row (CAS) after them. Writers holding several of these
+    rows at once (sequencer batches) follow the same order.
+    """
+    return POOL_CONCURRENCY != POOL_CONCURRENCY_OPTIMISTIC
+
+
+def _read_pool_state(market_id: str) -> Tuple[AmmPool, List[AmmPoolOptionState], PoolState]:
+    """
+    Pool + option states for a trade. Optimistic mode reads without row locks (one
+    consistent statement) and relies on _write_pool's compare-and-swap; locking
+    mode is _lock_pool_state.
+    """
+    if _pool_locked_first():
+        return _lock_pool_state(market_id)
+    try:
+        return load_pool_rows(market_id)
+    except QuoteError as exc:
+        raise _pool_load_error(exc)
+
+
+class PoolVersionConflict(Exception):
+    """The pool was written after the trade read it; the trade is retried."""
+
+    code = "POOL_VERSION_CONFLICT"
+
+
+def _write_pool(pool: AmmPool, cash_delta: Decimal, now, *, locked: bool = False) -> None:
+    """
+    The trade's single pool-row write: pool_cash += cash_delta, version += 1.
+
+    Optimistic mode (unless the caller already holds the pool row, locked=True):
+    UPDATE ... WHERE version = <version read>. Zero rows means another trade won;
+    raise PoolVersionConflict so the whole transaction rolls back and is retried.
+    Done before the q writes, so the winner holds the pool row until commit and only
+    the winner writes q (one pool row + the changed state rows).
+    """
+    if POOL_CONCURRENCY == POOL_CONCURRENCY_OPTIMISTIC and not locked:
+        updated = AmmPool.objects.filter(pk=pool.pk, version=pool.version).update(
+            pool_cash=F("pool_cash") + cash_delta,
+            version=F("version") + 1,
+            updated_at=now,
         )
-        for no_opt_id, m_id in no_options:
-            yes_opt_id = yes_opt_by_market.get(m_id)
-            if yes_opt_id is not None:
-                yes_opt_str = str(yes_opt_id)
-                if yes_opt_str in option_id_to_idx:
-                    pool_idx = option_id_to_idx[yes_opt_str]
-                    no_to_yes_option_id[str(no_opt_id)] = (yes_opt_str, pool_idx)
-
-    state = PoolState(
-        market_id=str(market_id),  # Use the passed market_id, not pool.market_id (which is None for event pools)
-        pool_id=str(pool.id),
-        b=float(pool.b),
-        fee_bps=int(pool.fee_bps or 0),
-        option_ids=option_ids,
-        option_indexes=option_indexes,
-        q=q,
-        option_id_to_idx=option_id_to_idx,
-        option_index_to_idx={oi: i for i, oi in enumerate(option_indexes)},
-        no_to_yes_option_id=no_to_yes_option_id,
-        is_exclusive=is_exclusive,
-    )
-    return pool, states, state
+        if not updated:
+            raise PoolVersionConflict(str(pool.pk))
+        pool.pool_cash = Decimal(pool.pool_cash) + cash_delta
+        pool.version += 1
+        pool.updated_at = now
+    else:
+        pool.pool_cash = Decimal(pool.pool_cash) + cash_delta
+        pool.version += 1
+        pool.updated_at = now
+        pool.save(update_fields=["pool_cash", "version", "updated_at"])
+    bump_pool_version_on_commit(pool.id)
 
 
+def _cas_backoff_seconds(attempt: int) -> float:
+    """Exponential backoff with jitter (attempt 0 = first retry)."""
+    ceiling = min(POOL_CAS_BACKOFF_MAX_MS, POOL_CAS_BACKOFF_MS * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling) / 1000.0
+
+
+def _retry_pool_conflicts(fn):
+    """Re-run a trade that lost the pool CAS, up to POOL_CAS_RETRIES times."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(POOL_CAS_RETRIES + 1):
+            try:
+                return fn(*args, **kwargs)
+            except PoolVersionConflict:
+                if attempt < POOL_CAS_RETRIES:
+                    time.sleep(_cas_backoff_seconds(attempt))
+        raise ExecutionError("Pool is busy, please retry", code="POOL_CONTENDED", http_status=409)
+
+    return wrapper
+
+
+def _pool_load_error(exc: QuoteError) -> "ExecutionError":
+    if isinstance(exc, PoolStateNotFoundError):
+        return ExecutionError("AMM pool has no option state", code="POOL_STATE_NOT_FOUND", http_status=404)
+    if isinstance(exc, QuoteNotFoundError):
+        return ExecutionError("AMM pool not found for market", code="POOL_NOT_FOUND", http_status=404)
+    return ExecutionError(f"AMM pool is invalid: {exc}", code="POOL_INVALID", http_status=422)
+
 
 def _lock_market_and_option(market_id: str, option_id: Optional[str], option_index: Optional[int]):
     now = timezone.now()
@@ -162,14 +215,7 @@ def _lock_market_and_option(market_id: str, option_id: Optional[str], option_ind
     event = None
     if market.event_id:
         event = Event.objects.filter(pk=market.event_id).first()
-    if event and (event.status != "active" or event.is_hidden):
-        raise ExecutionError("Event is not active", code="EVENT_NOT_ACTIVE", http_status=400)
-    if market.status != "active" or market.is_hidden:
-        raise ExecutionError("Market is not active", code="MARKET_NOT_ACTIVE", http_status=400)
-
-    deadline = market.trading_deadline or (event.trading_deadline if event else None)
-    if deadline and deadline <= now:
-        raise ExecutionError("Trading deadline passed", code="MARKET_CLOSED", http_status=400)
+    _check_market_open(market, event, now)
 
     if not option_id and option_index is None:
         raise ExecutionError("option_id or option_index is required", code="INVALID_PARAM", http_status=400)
@@ -188,6 +234,17 @@ def _lock_market_and_option(market_id: str, option_id: Optional[str], option_ind
     return market, option, now
 
 
+def _check_market_open(market: Market, event: Optional[Event], now) -> None:
+    if event and (event.status != "active" or event.is_hidden):
+        raise ExecutionError("Event is not active", code="EVENT_NOT_ACTIVE", http_status=400)
+    if market.status != "active" or market.is_hidden:
+        raise ExecutionError("Market is not active", code="MARKET_NOT_ACTIVE", http_status=400)
+
+    deadline = market.trading_deadline or (event.trading_deadline if event else None)
+    if deadline and deadline <= now:
+        raise ExecutionError("Trading deadline passed", code="MARKET_CLOSED", http_status=400)
+
+
 def _lock_balance(user_id, token: str, now):
     """
     Lock balance row. If missing, create it safely under concurrency.
@@ -238,36 +295,15 @@ def _lock_position(user_id, market_id, option_id, now):
             return pos, False
 
 
-def _ensure_wallet(user, wallet_id: Optional[str], now):
+def _resolve_wallet(user, wallet_id: Optional[str]):
     """
-    Ensure a wallet exists to record OrderIntent/Trade.
-    - If wallet_id provided but invalid -> error
-    - Else prefer user's primary wallet, then any, else create a web2 placeholder
+    Wallet to record the trade against (cached per user, see services/wallets.py).
+    Resolved before the lock phase; an explicit wallet_id must belong to the user.
     """
-    if wallet_id:
-        w = Wallet.objects.filter(pk=wallet_id, user=user).first()
-        if not w:
-            raise ExecutionError("User wallet not found", code="WALLET_NOT_FOUND", http_status=400)
-        return w
-
-    primary_id = getattr(user, "primary_wallet_id", None)
-    if primary_id:
-        w = Wallet.objects.filter(pk=primary_id, user=user).first()
-        if w:
-            return w
-
-    existing = Wallet.objects.filter(user=user).order_by("-is_primary", "id").first()
-    if existing:
-        return existing
-
-    # Create placeholder wallet (web2)
-    return Wallet.objects.create(
-        user=user,
-        chain_family="web2",
-        address=f"web2-{user.id}",
-        is_primary=True,
-        created_at=now,
-    )
+    wallet = resolve_wallet(user, wallet_id)
+    if wallet is None:
+        raise ExecutionError("User wallet not found", code="WALLET_NOT_FOUND", http_status=400)
+    return wallet
 
 
 def _update_option_probs(option_states: List[AmmPoolOptionState], post_prob_bps: List[int], now):
@@ -295,53 +331,39 @@ def _update_option_probs(option_states: List[AmmPoolOptionState], post_prob_bps:
         MarketOptionStats.objects.bulk_update(to_update, ["prob_bps", "updated_at"])
 
 
-def _update_no_option_probs(option_states: List[AmmPoolOptionState], yes_prob_bps: List[int], now):
+def _update_no_option_probs(no_to_yes_option_id: Dict[str, Tuple[str, int]], yes_prob_bps: List[int], now):
     """
     For exclusive events, update the No options' prob_bps.
     Each No option's probability = 10000 - corresponding Yes option's probability.
     """
-    if not option_states or not yes_prob_bps:
+    if not no_to_yes_option_id or not yes_prob_bps:
         return
 
-    # Get the Yes option IDs and their market IDs
-    yes_option_ids = [st.option_id for st in option_states]
-    yes_options = list(MarketOption.objects.filter(id__in=yes_option_ids).values_list("id", "market_id"))
-    yes_opt_to_market = {opt_id: market_id for opt_id, market_id in yes_options}
-    market_ids = list(yes_opt_to_market.values())
-
-    # Find No options in the same markets
-    no_options = list(
-        MarketOption.objects.filter(market_id__in=market_ids, side="no", is_active=True)
-        .values_list("id", "market_id")
+    no_prob_by_option = {
+        int(no_opt_id): 10000 - int(yes_prob_bps[pool_idx])
+        for no_opt_id, (_, pool_idx) in no_to_yes_option_id.items()
+        if 0 <= pool_idx < len(yes_prob_bps)
+    }
+    no_stats_rows = list(
+        MarketOptionStats.objects.select_for_update().filter(option_id__in=list(no_prob_by_option))
     )
-    if not no_options:
-        return
-
-    # Build market_id -> yes_prob_bps mapping
-    market_to_yes_prob = {}
-    for st, prob in zip(option_states, yes_prob_bps):
-        market_id = yes_opt_to_market.get(st.option_id)
-        if market_id:
-            market_to_yes_prob[market_id] = prob
-
-    # Get No option stats and update
-    no_option_ids = [opt_id for opt_id, _ in no_options]
-    no_stats_rows = list(MarketOptionStats.objects.select_for_update().filter(option_id__in=no_option_ids))
-    no_opt_to_market = {opt_id: market_id for opt_id, market_id in no_options}
 
     to_update: List[MarketOptionStats] = []
     for row in no_stats_rows:
-        market_id = no_opt_to_market.get(row.option_id)
-        if market_id and market_id in market_to_yes_prob:
-            row.prob_bps = 10000 - market_to_yes_prob[market_id]
-            row.updated_at = now
-            to_update.append(row)
+        row.prob_bps = no_prob_by_option[row.option_id]
+        row.updated_at = now
+        to_update.append(row)
 
     if to_update:
         MarketOptionStats.objects.bulk_update(to_update, ["prob_bps", "updated_at"])
 
 
-def _recompute_option_probs(option_states: List[AmmPoolOptionState], b: float, now, is_exclusive: bool = False):
+def _recompute_option_probs(
+    option_states: List[AmmPoolOptionState],
+    b: float,
+    now,
+    no_to_yes_option_id: Optional[Dict[str, Tuple[str, int]]] = None,
+):
     """
     Compute probabilities from the latest on-chain-style q (after writes) and persist
     to MarketOptionStats. Best-effort; failures should not abort the trade.
@@ -358,13 +380,32 @@ def _recompute_option_probs(option_states: List[AmmPoolOptionState], b: float, n
     _update_option_probs(option_states, prob_bps, now)
 
     # For exclusive events, update No options as well
-    if is_exclusive:
-        _update_no_option_probs(option_states, prob_bps, now)
+    if no_to_yes_option_id:
+        _update_no_option_probs(no_to_yes_option_id, prob_bps, now)
 
     # Record price history
     _record_price_series(option_states, prob_bps, now)
 
 
+def _trade_side_effects(
+    pool_state: PoolState,
+    option_states: List[AmmPoolOptionState],
+    option_id,
+    amount: Decimal,
+    now,
+):
+    """
+    Display-only effects of a trade. Default: one trade_outbox row, applied off the
+    critical path by process_trade_outbox. AMM_TRADE_SIDE_EFFECTS=inline updates
+    stats / series / volume here, under the trade's locks.
+    """
+    if not side_effects_inline():
+        enqueue_trade_side_effects(pool_state, option_states, option_id, amount, now)
+        return
+    _recompute_option_probs(option_states, pool_state.b, now, pool_state.no_to_yes_option_id)
+    _update_stats_volume(option_id, amount, now)
+
+
 def _update_stats_volume(option_id: str, amount_delta: Decimal, now):
     """
     Update volume stats for the traded option.
@@ -414,6 +455,332 @@ def _record_price_series(option_states: List[AmmPoolOptionState], prob_bps: List
         pass  # Best-effort, don't fail the trade
 
 
+def _parse_buy_args(amount_in, min_shares_out, max_slippage_bps) -> Tuple[Decimal, Optional[int], Optional[int]]:
+    """-> (amount_in, min_shares_out in 1e-8 units, max_slippage_bps)"""
+    # Fixed-point from here on: micro-units for money, 1e-8 units for shares.
+    amt = _to_decimal(amount_in, "amount_in")
+    if _money_decimal(_units_from_decimal(amt, MONEY_SCALE, ROUND_UP)) != amt:
+        raise ExecutionError("amount_in supports at most 6 decimal places", code="INVALID_PARAM", http_status=400)
+    min_shares_units = (
+        _units_from_decimal(_to_decimal(min_shares_out, "min_shares_out"), SHARES_SCALE, ROUND_UP)
+        if min_shares_out is not None
+        else None
+    )
+
+    max_slippage_bps_int: Optional[int] = None
+    if max_slippage_bps is not None:
+        try:
+            max_slippage_bps_int = int(max_slippage_bps)
+        except (TypeError, ValueError):
+            raise ExecutionError("max_slippage_bps must be an integer", code="INVALID_PARAM", http_status=400)
+        if max_slippage_bps_int < 0:
+            raise ExecutionError("max_slippage_bps must be >= 0", code="INVALID_PARAM", http_status=400)
+    return amt, min_shares_units, max_slippage_bps_int
+
+
+def _parse_sell_args(shares, desired_amount_out, sell_all: bool, min_amount_out):
+    """-> (shares, desired_amount_out, min_amount_out) as Decimals (or None)"""
+    if not sell_all and shares is None and desired_amount_out is None:
+        raise ExecutionError("shares, desired_amount_out, or sell_all is required", code="INVALID_PARAM", http_status=400)
+
+    shares_in = _to_decimal(shares, "shares") if shares is not None else None
+    desired_out = _to_decimal(desired_amount_out, "desired_amount_out") if desired_amount_out is not None else None
+    min_amount_out_dec = _to_decimal(min_amount_out, "min_amount_out") if min_amount_out is not None else None
+    return shares_in, desired_out, min_amount_out_dec
+
+
+def _resolve_trade_target(pool_state: PoolState, option: MarketOption, option_id: Optional[str]):
+    """
+    -> (is_no_side, quote_option_id, target_idx). A No option of an exclusive event
+    is quoted against its Yes option; target_idx is that Yes option's pool index.
+    """
+    target_option_id = str(option.id)
+    if target_option_id in pool_state.no_to_yes_option_id:
+        yes_opt_id, target_idx = pool_state.no_to_yes_option_id[target_option_id]
+        return True, yes_opt_id, target_idx
+    if target_option_id not in pool_state.option_id_to_idx:
+        raise ExecutionError("Option not present in pool state", code="POOL_MISMATCH", http_status=422)
+    return False, option_id, pool_state.option_id_to_idx[target_option_id]
+
+
+def _quote_buy(
+    pool_state: PoolState,
+    *,
+    quote_option_id: Optional[str],
+    option_index: Optional[int],
+    is_no_side: bool,
+    target_idx: int,
+    amt: Decimal,
+    money_quant: Decimal,
+    min_shares_units: Optional[int],
+    max_slippage_bps: Optional[int],
+) -> Tuple[Quote, Decimal]:
+    """Quote a buy and apply the slippage guards. Pure math. -> (quote, shares_out)"""
+    try:
+        quote = build_quote(
+            pool_state,
+            option_id=quote_option_id,
+            option_index=option_index,
+            side="buy",
+            amount_in=amt,
+            shares=None,
+            money_quant=money_quant,
+            is_no_side=is_no_side,
+        )
+    except Exception as exc:
+        raise ExecutionError(f"Quote math error: {exc}", code="QUOTE_MATH_ERROR", http_status=422)
+
+    shares_out = _buy_fill(quote, min_shares_units)
+
+    if max_slippage_bps is not None:
+        pre_probs = quote.pre_prob_bps
+        expected_bps = None
+        if isinstance(pre_probs, list) and 0 <= target_idx < len(pre_probs):
+            # For No side, the "price" is 1 - p[target_idx]
+            expected_bps = 10000 - pre_probs[target_idx] if is_no_side else int(pre_probs[target_idx])
+
+        avg_price_bps = quote.avg_price_bps
+        if expected_bps is None or avg_price_bps is None:
+            raise ExecutionError(
+                "Slippage protection unavailable for this trade",
+                code="SLIPPAGE_PROTECTION",
+                http_status=422,
+            )
+
+        if expected_bps <= 0:
+            raise ExecutionError(
+                "Slippage protection unavailable: reference price invalid",
+                code="SLIPPAGE_PROTECTION",
+                http_status=422,
+            )
+
+        # avg > expected * (1 + slippage), compared exactly in integers
+        if int(avg_price_bps) * 10000 > expected_bps * (10000 + max_slippage_bps):
+            raise ExecutionError(
+                "Slippage protection: average price above max_slippage_bps",
+                code="SLIPPAGE_PROTECTION",
+                http_status=400,
+            )
+
+    return quote, shares_out
+
+
+def _buy_fill(quote: Quote, min_shares_units: Optional[int]) -> Decimal:
+    """Shares a buy quote fills, checked against min_shares_out."""
+    if quote.shares_units <= 0:
+        raise ExecutionError("Amount too low to cover fees / price impact", code="AMOUNT_TOO_LOW", http_status=400)
+
+    if min_shares_units is not None and quote.shares_units < min_shares_units:
+        raise ExecutionError(
+            "Slippage protection: shares_out below min_shares_out",
+            code="SLIPPAGE_PROTECTION",
+            http_status=400,
+        )
+    return _shares_decimal(quote.shares_units)
+
+
+def _quote_sell(
+    pool_state: PoolState,
+    *,
+    quote_option_id: Optional[str],
+    option_index: Optional[int],
+    is_no_side: bool,
+    shares_in: Optional[Decimal],
+    desired_out: Optional[Decimal],
+    money_quant: Decimal,
+    position_shares: Decimal,
+    min_amount_out: Optional[Decimal],
+) -> Tuple[Quote, Decimal, Decimal]:
+    """Quote a sell against the seller's position. Pure math. -> (quote, shares_to_sell, amount_out)"""
+    try:
+        quote = build_quote(
+            pool_state,
+            option_id=quote_option_id,
+            option_index=option_index,
+            side="sell",
+            amount_in=desired_out if desired_out is not None else None,
+            shares=shares_in if shares_in is not None else None,
+            money_quant=money_quant,
+            is_no_side=is_no_side,
+        )
+    except Exception as exc:
+        raise ExecutionError(f"Quote math error: {exc}", code="QUOTE_MATH_ERROR", http_status=422)
+
+    shares_to_sell, amount_out = _sell_fill(quote, position_shares, min_amount_out)
+    return quote, shares_to_sell, amount_out
+
+
+def _sell_fill(quote: Quote, position_shares: Decimal, min_amount_out: Optional[Decimal]) -> Tuple[Decimal, Decimal]:
+    """(shares_to_sell, amount_out) of a sell quote, checked against the position and min_amount_out."""
+    shares_to_sell = _shares_decimal(quote.shares_units)
+    if shares_to_sell <= 0:
+        raise ExecutionError("Invalid sell size", code="INVALID_PARAM", http_status=400)
+
+    # Allow selling all shares even with tiny precision differences
+    if shares_to_sell > position_shares:
+        # If difference is tiny (< 0.01), allow selling all
+        if shares_to_sell - position_shares < Decimal("0.01"):
+            shares_to_sell = position_shares
+        else:
+            raise ExecutionError("Insufficient shares", code="INSUFFICIENT_SHARES", http_status=400)
+
+    amount_out = _money_decimal(quote.amount_micros)
+    if amount_out <= 0:
+        raise ExecutionError("Sell amount too low after fees / price impact", code="AMOUNT_TOO_LOW", http_status=400)
+
+    if min_amount_out is not None and amount_out < min_amount_out:
+        raise ExecutionError(
+            "Slippage protection: amount_out below min_amount_out",
+            code="SLIPPAGE_PROTECTION",
+            http_status=400,
+        )
+    return shares_to_sell, amount_out
+
+
+def _firm_quote(
+    quote_token: Optional[str], pool_state: PoolState, option: MarketOption, side: str, size_kind: str, size, money_quant
+) -> Optional[Quote]:
+    """The signed quote when it is still firm for the pool version just read, else None (see firm_quote.py)."""
+    if not quote_token:
+        return None
+    try:
+        return redeem_firm_quote(
+            quote_token,
+            pool_state,
+            pool_id=pool_state.pool_id,
+            version=pool_state.version,
+            option_id=option.id,
+            side=side,
+            size_kind=size_kind,
+            size=size,
+            money_quant=money_quant,
+        )
+    except FirmQuoteError as exc:
+        raise ExecutionError(str(exc), code="INVALID_QUOTE_TOKEN", http_status=400)
+
+
+def _apply_trade_q(
+    option_states: List[AmmPoolOptionState],
+    quote: Quote,
+    is_no_side: bool,
+    target_idx: int,
+    shares_delta: Decimal,
+    now,
+) -> Dict[int, Decimal]:
+    """
+    Move q for one trade (in memory) and return the {option_id: delta} to persist
+    with q_writer.apply_q_deltas. No-side trades move every other outcome by
+    quote.deltas; standard trades move only the target by shares_delta (+ buy, - sell).
+    """
+    deltas: Dict[int, Decimal] = {}
+    if is_no_side and quote.deltas:
+        moves = [(idx, Decimal(str(delta))) for idx, delta in enumerate(quote.deltas) if delta != 0]
+    else:
+        moves = [(target_idx, shares_delta)]
+    for idx, delta in moves:
+        state_obj = option_states[idx]
+        state_obj.q = Decimal(state_obj.q) + delta
+        state_obj.updated_at = now
+        deltas[int(state_obj.option_id)] = delta
+    return deltas
+
+
+def _order_intent_row(
+    user, wallet, market, option, side: str, amount, shares, client_nonce, now, request_hash: Optional[str] = None
+) -> OrderIntent:
+    """Unsaved confirmed OrderIntent; for sells amount_in is the proceeds and shares_out the shares sold."""
+    return OrderIntent(
+        user=user,
+        wallet=wallet,
+        market=market,
+        option=option,
+        side=side,
+        amount_in=amount,
+        shares_out=shares,
+        chain=market.chain or DEFAULT_CHAIN,
+        status="confirmed",
+        client_nonce=client_nonce,
+        request_hash=request_hash,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _trade_row(order_intent: OrderIntent, quote: Quote) -> Trade:
+    """Unsaved off-chain Trade for a saved OrderIntent."""
+    return Trade(
+        chain=order_intent.chain,
+        tx_hash=f"offchain:{order_intent.id}",
+        block_number=0,
+        block_time=order_intent.created_at,
+        market=order_intent.market,
+        option=order_intent.option,
+        user=order_intent.user,
+        wallet=order_intent.wallet,
+        side=order_intent.side,
+        amount_in=order_intent.amount_in,
+        shares=order_intent.shares_out,
+        price_bps=quote.avg_price_bps,
+        fee_amount=_money_decimal(quote.fee_micros),
+        created_at=order_intent.created_at,
+        log_index=0,
+    )
+
+
+def _buy_response(market, option, amt, shares_out, quote: Quote, money_quant, balance, position, order_intent) -> Dict:
+    return {
+        "market_id": str(market.id),
+        "option_id": option.id,
+        "option_index": option.option_index,
+        "amount_in": str(amt),
+        "shares_out": str(shares_out),
+        "fee_amount": _format_money(quote.fee_micros, money_quant),
+        "avg_price_bps": quote.avg_price_bps,
+        "pre_prob_bps": quote.pre_prob_bps,
+        "post_prob_bps": quote.post_prob_bps,
+        "balance_available": str(balance.available_amount),
+        "position": {"shares": str(position.shares), "cost_basis": str(position.cost_basis)},
+        "order_intent_id": order_intent.id,
+    }
+
+
+def _sell_response(market, option, shares_to_sell, quote: Quote, money_quant, balance, position, order_intent) -> Dict:
+    return {
+        "market_id": str(market.id),
+        "option_id": option.id,
+        "option_index": option.option_index,
+        "amount_out": _format_money(quote.amount_micros, money_quant),
+        "shares_sold": str(shares_to_sell),
+        "fee_amount": _format_money(quote.fee_micros, money_quant),
+        "avg_price_bps": quote.avg_price_bps,
+        "pre_prob_bps": quote.pre_prob_bps,
+        "post_prob_bps": quote.post_prob_bps,
+        "balance_available": str(balance.available_amount),
+        "position": {"shares": str(position.shares), "cost_basis": str(position.cost_basis)},
+        "order_intent_id": order_intent.id,
+    }
+
+
+def _dust_response(market, option, position_shares, balance, order_intent) -> Dict:
+    return {
+        "market_id": str(market.id),
+        "option_id": option.id,
+        "option_index": option.option_index,
+        "amount_out": "0",
+        "shares_sold": str(position_shares),
+        "fee_amount": "0",
+        "avg_price_bps": 0,
+        "pre_prob_bps": None,
+        "post_prob_bps": None,
+        "balance_available": str(balance.available_amount),
+        "position": {"shares": "0", "cost_basis": "0"},
+        "dust_cleanup": True,
+        "order_intent_id": order_intent.id,
+    }
+
+
+@idempotent("buy")
+@_retry_pool_conflicts
 def execute_buy(
     *,
     user,
@@ -427,43 +794,61 @@ def execute_buy(
     money_quant: Decimal = MONEY_QUANT,
     min_shares_out: Optional[Number] = None,
     max_slippage_bps: Optional[int] = None,
+    quote_token: Optional[str] = None,
+    request_hash: Optional[str] = None,
 ) -> Dict:
     """
     Execute a BUY against the AMM with full locking and persistence.
+    With AMM_EXECUTION_MODE=sequencer the trade is queued to the pool's sequencer
+    instead (same validation and response; see sequencer.py).
+    quote_token: firm quote from the quote endpoint, filled as signed while the
+    pool version is unchanged (firm_quote.py; the sequencer always re-quotes).
+    request_hash: filled in by @idempotent for nonce'd orders (stored on the intent).
 
     LOCK ORDER (must be consistent across all execute_*):
+      0) client_nonce advisory lock (Postgres; retries replay the first response, see idempotency.py)
       1) Market + Option (FOR UPDATE)
-      2) AmmPoolOptionState rows (FOR UPDATE)
+      2) AmmPoolOptionState rows (FOR UPDATE; AMM_POOL_CONCURRENCY=locking only)
       3) BalanceSnapshot (FOR UPDATE)
       4) Position (FOR UPDATE)
+      5) AmmPool row (optimistic: the version CAS, held until commit)
+    Lost CAS races are retried with backoff (POOL_CONTENDED after AMM_POOL_CAS_RETRIES).
     """
-    amt = _to_decimal(amount_in, "amount_in")
-    min_shares_dec = _to_decimal(min_shares_out, "min_shares_out") if min_shares_out is not None else None
+    amt, min_shares_units, max_slippage_bps_int = _parse_buy_args(amount_in, min_shares_out, max_slippage_bps)
+    wallet = _resolve_wallet(user, wallet_id)
 
-    max_slippage_bps_int: Optional[int] = None
-    if max_slippage_bps is not None:
-        try:
-            max_slippage_bps_int = int(max_slippage_bps)
-        except (TypeError, ValueError):
-            raise ExecutionError("max_slippage_bps must be an integer", code="INVALID_PARAM", http_status=400)
-        if max_slippage_bps_int < 0:
-            raise ExecutionError("max_slippage_bps must be >= 0", code="INVALID_PARAM", http_status=400)
+    if EXECUTION_MODE == EXECUTION_MODE_SEQUENCER:
+        from .sequencer import TradeRequest, submit_trade
+
+        return submit_trade(TradeRequest(
+            side="buy",
+            user=user,
+            market_id=market_id,
+            option_id=option_id,
+            option_index=option_index,
+            token=token,
+            wallet_id=wallet_id,
+            wallet=wallet,
+            client_nonce=client_nonce,
+            request_hash=request_hash,
+            money_quant=money_quant,
+            amount_in=amt,
+            min_shares_units=min_shares_units,
+            max_slippage_bps=max_slippage_bps_int,
+        ))
+
+    with profile_trade("buy", market_id=str(market_id)) as prof, transaction.atomic():
+        # Retried client_nonce: wait for / replay the first attempt before any row lock
+        replay = claim_client_nonce(user.id, client_nonce, request_hash)
+        if replay is not None:
+            return replay
 
-    with transaction.atomic():
         market, option, now = _lock_market_and_option(market_id, option_id, option_index)
-        pool, option_states, pool_state = _lock_pool_state(market_id)
-
-        # Detect if this is a No option in an exclusive event
-        is_no_side = False
-        target_option_id = str(option.id)
-        if target_option_id in pool_state.no_to_yes_option_id:
-            is_no_side = True
-            # Map to the Yes option for LSMR calculation
-            yes_opt_id, _ = pool_state.no_to_yes_option_id[target_option_id]
-            # Use the Yes option_id for the quote, but keep original option for position tracking
-            quote_option_id = yes_opt_id
-        else:
-            quote_option_id = option_id
+        pool, option_states, pool_state = _read_pool_state(market_id)
+
+        # No option of an exclusive event: quote against its Yes option, keep the
+        # position on the original option.
+        is_no_side, quote_option_id, target_idx = _resolve_trade_target(pool_state, option, option_id)
 
         # 3) Lock balance first
         balance = _lock_balance(user.id, token, now)
@@ -473,80 +858,28 @@ def execute_buy(
         # 4) Then lock position (position is tracked on the ORIGINAL option, not the mapped one)
         position, _ = _lock_position(user.id, market.id, option.id, now)
 
-        # Quote (pure math)
-        try:
-            quote = quote_from_state(
+        # Quote (pure math, integer units)
+        prof.mark("quote")
+        quote = _firm_quote(quote_token, pool_state, option, "buy", "amount_in", amt, money_quant)
+        if quote is not None:
+            shares_out = _buy_fill(quote, min_shares_units)
+        else:
+            quote, shares_out = _quote_buy(
                 pool_state,
-                option_id=quote_option_id,
+                quote_option_id=quote_option_id,
                 option_index=option_index if not is_no_side else None,
-                side="buy",
-                amount_in=amt,
-                shares=None,
-                money_quant=money_quant,
                 is_no_side=is_no_side,
+                target_idx=target_idx,
+                amt=amt,
+                money_quant=money_quant,
+                min_shares_units=min_shares_units,
+                max_slippage_bps=max_slippage_bps_int,
             )
-        except Exception as exc:
-            raise ExecutionError(f"Quote math error: {exc}", code="QUOTE_MATH_ERROR", http_status=422)
-
-        shares_out = Decimal(str(quote.get("shares_out", "0")))
-        if shares_out <= 0:
-            raise ExecutionError("Amount too low to cover fees / price impact", code="AMOUNT_TOO_LOW", http_status=400)
-
-        # For No-side, target_idx is the Yes option we're betting against
-        if is_no_side:
-            _, target_idx = pool_state.no_to_yes_option_id[target_option_id]
-        else:
-            target_key = str(option.id)
-            if target_key not in pool_state.option_id_to_idx:
-                raise ExecutionError("Option not present in pool state", code="POOL_MISMATCH", http_status=422)
-            target_idx = pool_state.option_id_to_idx[target_key]
-
-        if min_shares_dec is not None and shares_out < min_shares_dec:
-            raise ExecutionError(
-                "Slippage protection: shares_out below min_shares_out",
-                code="SLIPPAGE_PROTECTION",
-                http_status=400,
-            )
-
-        if max_slippage_bps_int is not None:
-            pre_probs = quote.get("pre_prob_bps")
-            if is_no_side:
-                # For No side, the "price" is 1 - p[target_idx]
-                expected_bps = None
-                if isinstance(pre_probs, list) and 0 <= target_idx < len(pre_probs):
-                    expected_bps = Decimal(10000 - pre_probs[target_idx])
-            else:
-                expected_bps = None
-                if isinstance(pre_probs, list) and 0 <= target_idx < len(pre_probs):
-                    expected_bps = Decimal(str(pre_probs[target_idx]))
-                elif isinstance(pre_probs, int):
-                    expected_bps = Decimal(pre_probs)
-
-            avg_price_bps = quote.get("avg_price_bps")
-            if expected_bps is None or avg_price_bps is None:
-                raise ExecutionError(
-                    "Slippage protection unavailable for this trade",
-                    code="SLIPPAGE_PROTECTION",
-                    http_status=422,
-                )
-
-            if expected_bps <= 0:
-                raise ExecutionError(
-                    "Slippage protection unavailable: reference price invalid",
-                    code="SLIPPAGE_PROTECTION",
-                    http_status=422,
-                )
 
-            avg_price_dec = Decimal(str(avg_price_bps))
-            max_price = expected_bps * (Decimal(10000 + max_slippage_bps_int) / Decimal(10000))
-            if avg_price_dec > max_price:
-                raise ExecutionError(
-                    "Slippage protection: average price above max_slippage_bps",
-                    code="SLIPPAGE_PROTECTION",
-                    http_status=400,
-                )
+        # Claim the pool first (CAS / locked write), then apply balance and position
+        prof.mark("persist")
+        _write_pool(pool, amt, now)
 
-        # Apply balance and position
         balance.available_amount = Decimal(balance.available_amount) - amt
         balance.updated_at = now
         balance.save(update_fields=["available_amount", "updated_at"])
@@ -555,85 +888,29 @@ def execute_buy(
         position.cost_basis = Decimal(position.cost_basis) + amt
         position.updated_at = now
         position.save(update_fields=["shares", "cost_basis", "updated_at"])
+        add_exposure({option.id: (market.id, shares_out)}, now)
 
         # Update AMM state q
-        if is_no_side and quote.get("no_buy_deltas"):
-            # For No-side buy, update all options based on deltas
-            no_buy_deltas = quote["no_buy_deltas"]
-            for idx, delta in enumerate(no_buy_deltas):
-                if delta > 0:
-                    state_obj = option_states[idx]
-                    state_obj.q = Decimal(state_obj.q) + Decimal(str(delta))
-                    state_obj.updated_at = now
-                    state_obj.save(update_fields=["q", "updated_at"])
-        else:
-            # Standard buy: only target outcome changes
-            target_state = option_states[target_idx]
-            target_state.q = Decimal(target_state.q) + shares_out
-            target_state.updated_at = now
-            target_state.save(update_fields=["q", "updated_at"])
-
-        # Update displayed probabilities (cache) from persisted q
-        _recompute_option_probs(option_states, pool_state.b, now, is_exclusive=pool_state.is_exclusive)
+        apply_q_deltas(pool.id, _apply_trade_q(option_states, quote, is_no_side, target_idx, shares_out, now), now)
 
-        wallet = _ensure_wallet(user, wallet_id, now)
+        # Display-only updates (probs, series, volume): outbox row or inline
+        prof.mark("side_effects")
+        _trade_side_effects(pool_state, option_states, option.id, amt, now)
+        prof.mark("persist")
 
-        order_intent = OrderIntent.objects.create(
-            user=user,
-            wallet=wallet,
-            market=market,
-            option=option,
-            side="buy",
-            amount_in=amt,
-            shares_out=shares_out,
-            chain=market.chain or DEFAULT_CHAIN,
-            status="confirmed",
-            client_nonce=client_nonce,
-            created_at=now,
-            updated_at=now,
+        order_intent = _order_intent_row(
+            user, wallet, market, option, "buy", amt, shares_out, client_nonce, now, request_hash
         )
+        order_intent.save(force_insert=True)
+        _trade_row(order_intent, quote).save(force_insert=True)
 
-        Trade.objects.create(
-            chain=market.chain or DEFAULT_CHAIN,
-            tx_hash=f"offchain:{order_intent.id}",
-            block_number=0,
-            block_time=now,
-            market=market,
-            option=option,
-            user=user,
-            wallet=wallet,
-            side="buy",
-            amount_in=amt,
-            shares=shares_out,
-            price_bps=quote.get("avg_price_bps"),
-            fee_amount=Decimal(str(quote.get("fee_amount", "0"))),
-            created_at=now,
-            log_index=0,
-        )
-
-        _update_stats_volume(option.id, amt, now)
-
-        # Update pool_cash: money coming in from buy
-        pool.pool_cash = Decimal(pool.pool_cash) + amt
-        pool.updated_at = now
-        pool.save(update_fields=["pool_cash", "updated_at"])
-
-        return {
-            "market_id": str(market.id),
-            "option_id": option.id,
-            "option_index": option.option_index,
-            "amount_in": str(amt),
-            "shares_out": str(shares_out),
-            "fee_amount": quote.get("fee_amount"),
-            "avg_price_bps": quote.get("avg_price_bps"),
-            "pre_prob_bps": quote.get("pre_prob_bps"),
-            "post_prob_bps": quote.get("post_prob_bps"),
-            "balance_available": str(balance.available_amount),
-            "position": {"shares": str(position.shares), "cost_basis": str(position.cost_basis)},
-            "order_intent_id": order_intent.id,
-        }
+        response = _buy_response(market, option, amt, shares_out, quote, money_quant, balance, position, order_intent)
+        remember_order_results([(order_intent, response)])
+        return response
 
 
+@idempotent("sell")
+@_retry_pool_conflicts
 def execute_sell(
     *,
     user,
@@ -648,45 +925,61 @@ def execute_sell(
     client_nonce: Optional[str] = None,
     money_quant: Decimal = MONEY_QUANT,
     min_amount_out: Optional[Number] = None,
+    quote_token: Optional[str] = None,
+    request_hash: Optional[str] = None,
 ) -> Dict:
     """
     Execute a SELL against the AMM with full locking and persistence.
+    Routed to the pool's sequencer under AMM_EXECUTION_MODE=sequencer.
 
     Provide either:
       - shares: exact shares to sell
       - desired_amount_out: net amount you want to receive (engine will compute shares_in)
       - sell_all: True to sell all shares (handles dust cleanup)
+    quote_token: firm quote for the same shares / amount_out (see execute_buy).
 
     LOCK ORDER (must match execute_buy):
+      0) client_nonce advisory lock
       1) Market + Option
-      2) Pool option_state rows
+      2) Pool option_state rows (locking mode only)
       3) BalanceSnapshot
       4) Position
+      5) AmmPool row (optimistic: version CAS)
     """
-    if not sell_all and shares is None and desired_amount_out is None:
-        raise ExecutionError("shares, desired_amount_out, or sell_all is required", code="INVALID_PARAM", http_status=400)
+    shares_in, desired_out, min_amount_out_dec = _parse_sell_args(shares, desired_amount_out, sell_all, min_amount_out)
+    wallet = _resolve_wallet(user, wallet_id)
 
-    shares_in = _to_decimal(shares, "shares") if shares is not None else None
-    desired_out = _to_decimal(desired_amount_out, "desired_amount_out") if desired_amount_out is not None else None
-    min_amount_out_dec = _to_decimal(min_amount_out, "min_amount_out") if min_amount_out is not None else None
+    if EXECUTION_MODE == EXECUTION_MODE_SEQUENCER:
+        from .sequencer import TradeRequest, submit_trade
+
+        return submit_trade(TradeRequest(
+            side="sell",
+            user=user,
+            market_id=market_id,
+            option_id=option_id,
+            option_index=option_index,
+            token=token,
+            wallet_id=wallet_id,
+            wallet=wallet,
+            client_nonce=client_nonce,
+            request_hash=request_hash,
+            money_quant=money_quant,
+            shares=shares_in,
+            desired_out=desired_out,
+            sell_all=sell_all,
+            min_amount_out=min_amount_out_dec,
+        ))
+
+    with profile_trade("sell", market_id=str(market_id)) as prof, transaction.atomic():
+        replay = claim_client_nonce(user.id, client_nonce, request_hash)
+        if replay is not None:
+            return replay
 
-    with transaction.atomic():
         market, option, now = _lock_market_and_option(market_id, option_id, option_index)
-        pool, option_states, pool_state = _lock_pool_state(market_id)
-
-        # Detect if this is a No option in an exclusive event
-        is_no_side = False
-        target_option_id = str(option.id)
-        if target_option_id in pool_state.no_to_yes_option_id:
-            is_no_side = True
-            yes_opt_id, target_idx = pool_state.no_to_yes_option_id[target_option_id]
-            quote_option_id = yes_opt_id
-        else:
-            quote_option_id = option_id
-            target_key = str(option.id)
-            if target_key not in pool_state.option_id_to_idx:
-                raise ExecutionError("Option not present in pool state", code="POOL_MISMATCH", http_status=422)
-            target_idx = pool_state.option_id_to_idx[target_key]
+        pool, option_states, pool_state = _read_pool_state(market_id)
+
+        # No option of an exclusive event: quote against its Yes option
+        is_no_side, quote_option_id, target_idx = _resolve_trade_target(pool_state, option, option_id)
 
         # ✅ FIX: lock Balance BEFORE Position to match execute_buy and avoid deadlocks
         balance = _lock_balance(user.id, token, now)
@@ -701,69 +994,46 @@ def execute_sell(
         if sell_all:
             shares_in = position_shares
 
-        # Dust threshold: positions below this are cleaned up without AMM calculation
-        DUST_THRESHOLD = Decimal("0.1")  # 0.1 shares
-
         # If selling all and position is dust, clean up without AMM
         if sell_all and position_shares <= DUST_THRESHOLD:
             # Dust cleanup: zero out position, no proceeds
+            prof.mark("persist")
             position.shares = Decimal("0")
             position.cost_basis = Decimal("0")
             position.updated_at = now
             position.save(update_fields=["shares", "cost_basis", "updated_at"])
+            add_exposure({option.id: (market.id, -position_shares)}, now)
 
-            return {
-                "market_id": str(market.id),
-                "option_id": option.id,
-                "option_index": option.option_index,
-                "amount_out": "0",
-                "shares_sold": str(position_shares),
-                "fee_amount": "0",
-                "avg_price_bps": 0,
-                "pre_prob_bps": None,
-                "post_prob_bps": None,
-                "balance_available": str(balance.available_amount),
-                "position": {"shares": "0", "cost_basis": "0"},
-                "dust_cleanup": True,
-            }
-
-        try:
-            quote = quote_from_state(
+            # Recorded like a fill (no trade row): a retried client_nonce replays it
+            order_intent = _order_intent_row(
+                user, wallet, market, option, "sell", Decimal("0"), position_shares, client_nonce, now, request_hash
+            )
+            order_intent.save(force_insert=True)
+            response = _dust_response(market, option, position_shares, balance, order_intent)
+            remember_order_results([(order_intent, response)])
+            return response
+
+        prof.mark("quote")
+        size_kind, size = ("shares", shares_in) if shares_in is not None else ("amount_out", desired_out)
+        quote = _firm_quote(quote_token, pool_state, option, "sell", size_kind, size, money_quant)
+        if quote is not None:
+            shares_to_sell, amount_out = _sell_fill(quote, position_shares, min_amount_out_dec)
+        else:
+            quote, shares_to_sell, amount_out = _quote_sell(
                 pool_state,
-                option_id=quote_option_id,
+                quote_option_id=quote_option_id,
                 option_index=option_index if not is_no_side else None,
-                side="sell",
-                amount_in=desired_out if desired_out is not None else None,
-                shares=shares_in if shares_in is not None else None,
-                money_quant=money_quant,
                 is_no_side=is_no_side,
+                shares_in=shares_in,
+                desired_out=desired_out,
+                money_quant=money_quant,
+                position_shares=position_shares,
+                min_amount_out=min_amount_out_dec,
             )
-        except Exception as exc:
-            raise ExecutionError(f"Quote math error: {exc}", code="QUOTE_MATH_ERROR", http_status=422)
 
-        shares_to_sell = Decimal(str(quote.get("shares_in", "0")))
-        if shares_to_sell <= 0:
-            raise ExecutionError("Invalid sell size", code="INVALID_PARAM", http_status=400)
-
-        position_shares = Decimal(position.shares)
-        # Allow selling all shares even with tiny precision differences
-        if shares_to_sell > position_shares:
-            # If difference is tiny (< 0.01), allow selling all
-            if shares_to_sell - position_shares < Decimal("0.01"):
-                shares_to_sell = position_shares
-            else:
-                raise ExecutionError("Insufficient shares", code="INSUFFICIENT_SHARES", http_status=400)
-
-        amount_out = Decimal(str(quote.get("amount_out", "0")))
-        if amount_out <= 0:
-            raise ExecutionError("Sell amount too low after fees / price impact", code="AMOUNT_TOO_LOW", http_status=400)
-
-        if min_amount_out_dec is not None and amount_out < min_amount_out_dec:
-            raise ExecutionError(
-                "Slippage protection: amount_out below min_amount_out",
-                code="SLIPPAGE_PROTECTION",
-                http_status=400,
-            )
+        # Claim the pool first (CAS / locked write): money going out for sell
+        prof.mark("persist")
+        _write_pool(pool, -amount_out, now)
 
         # Update position (reduce cost_basis proportionally)
         cost_reduction = (
@@ -775,85 +1045,27 @@ def execute_sell(
         position.cost_basis = max(Decimal("0"), Decimal(position.cost_basis) - cost_reduction)
         position.updated_at = now
         position.save(update_fields=["shares", "cost_basis", "updated_at"])
+        add_exposure({option.id: (market.id, -shares_to_sell)}, now)
 
         # Update AMM state q
-        if is_no_side and quote.get("no_sell_deltas"):
-            # For No-side sell, update all options based on deltas
-            no_sell_deltas = quote["no_sell_deltas"]
-            for idx, delta in enumerate(no_sell_deltas):
-                if delta != 0:
-                    state_obj = option_states[idx]
-                    state_obj.q = Decimal(state_obj.q) + Decimal(str(delta))
-                    state_obj.updated_at = now
-                    state_obj.save(update_fields=["q", "updated_at"])
-        else:
-            # Standard sell: only target outcome changes
-            target_state = option_states[target_idx]
-            target_state.q = Decimal(target_state.q) - shares_to_sell
-            target_state.updated_at = now
-            target_state.save(update_fields=["q", "updated_at"])
+        apply_q_deltas(pool.id, _apply_trade_q(option_states, quote, is_no_side, target_idx, -shares_to_sell, now), now)
 
-        # Update probabilities (cache)
-        _recompute_option_probs(option_states, pool_state.b, now, is_exclusive=pool_state.is_exclusive)
+        # Display-only updates (probs, series, volume): outbox row or inline
+        prof.mark("side_effects")
+        _trade_side_effects(pool_state, option_states, option.id, amount_out, now)
+        prof.mark("persist")
 
         # Balance credit (we already hold the row lock)
         balance.available_amount = Decimal(balance.available_amount) + amount_out
         balance.updated_at = now
         balance.save(update_fields=["available_amount", "updated_at"])
 
-        wallet = _ensure_wallet(user, wallet_id, now)
-
-        order_intent = OrderIntent.objects.create(
-            user=user,
-            wallet=wallet,
-            market=market,
-            option=option,
-            side="sell",
-            amount_in=amount_out,          # schema field name; represents proceeds here
-            shares_out=shares_to_sell,     # schema field name; represents shares sold here
-            chain=market.chain or DEFAULT_CHAIN,
-            status="confirmed",
-            client_nonce=client_nonce,
-            created_at=now,
-            updated_at=now,
+        order_intent = _order_intent_row(
+            user, wallet, market, option, "sell", amount_out, shares_to_sell, client_nonce, now, request_hash
         )
+        order_intent.save(force_insert=True)
+        _trade_row(order_intent, quote).save(force_insert=True)
 
-        Trade.objects.create(
-            chain=market.chain or DEFAULT_CHAIN,
-            tx_hash=f"offchain:{order_intent.id}",
-            block_number=0,
-            block_time=now,
-            market=market,
-            option=option,
-            user=user,
-            wallet=wallet,
-            side="sell",
-            amount_in=amount_out,
-            shares=shares_to_sell,
-            price_bps=quote.get("avg_price_bps"),
-            fee_amount=Decimal(str(quote.get("fee_amount", "0"))),
-            created_at=now,
-            log_index=0,
-        )
-
-        _update_stats_volume(option.id, amount_out, now)
-
-        # Update pool_cash: money going out for sell
-        pool.pool_cash = Decimal(pool.pool_cash) - amount_out
-        pool.updated_at = now
-        pool.save(update_fields=["pool_cash", "updated_at"])
-
-        return {
-            "market_id": str(market.id),
-            "option_id": option.id,
-            "option_index": option.option_index,
-            "amount_out": str(amount_out),
-            "shares_sold": str(shares_to_sell),
-            "fee_amount": quote.get("fee_amount"),
-            "avg_price_bps": quote.get("avg_price_bps"),
-            "pre_prob_bps": quote.get("pre_prob_bps"),
-            "post_prob_bps": quote.get("post_prob_bps"),
-            "balance_available": str(balance.available_amount),
-            "position": {"shares": str(position.shares), "cost_basis": str(position.cost_basis)},
-            "order_intent_id": order_intent.id,
-        }
+        response = _sell_response(market, option, shares_to_sell, quote, money_quant, balance, position, order_intent)
+        remember_order_results([(order_intent, response)])
+        return response
@@ -0,0 +1,174 @@
+"""
+Per-option outstanding shares (option_exposure).
+
+Every position write moves its option's counter in the same transaction, as one
+upsert per trade (or per sequencer / batch-order group commit):
+
+  INSERT INTO option_exposure (...) VALUES (...), ...
+    ON CONFLICT (option_id) DO UPDATE SET outstanding_shares = outstanding_shares + excluded
+
+so what an outcome would pay if it won is one row read instead of an aggregate
+over positions: pool_solvency() is O(outcomes). Settlement does not trust the
+counter with money and sums the winning positions when it debits the pool.
+reconcile_market_exposure() checks the counters against positions (and repairs
+them); run it via `manage.py reconcile_option_exposure`.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from ...models import AmmPool, OptionExposure, Position
+from .pool_cache import get_pool_state
+
+# Counter drift below this is rounding (sqlite stores numerics as REAL).
+RECONCILE_TOLERANCE = Decimal("0.000000000001")
+
+_TABLE = OptionExposure._meta.db_table
+
+# {option_id: (market_id, shares)}
+ExposureDeltas = Dict[int, Tuple[object, Decimal]]
+
+
+def _upsert_sql(n: int, additive: bool) -> str:
+    cast = "%s::numeric" if connection.vendor == "postgresql" else "CAST(%s AS NUMERIC)"
+    values = ", ".join([f"(%s, %s, {cast}, %s)"] * n)
+    new_value = "excluded.outstanding_shares"
+    if additive:
+        new_value = f"{_TABLE}.outstanding_shares + {new_value}"
+    return (
+        f"INSERT INTO {_TABLE} (option_id, market_id, outstanding_shares, updated_at) "
+        f"VALUES {values} "
+        f"ON CONFLICT (option_id) DO UPDATE SET outstanding_shares = {new_value}, updated_at = excluded.updated_at"
+    )
+
+
+def _write(values: Mapping, now, *, additive: bool) -> None:
+    # Option id order: concurrent multi-option writers take the row locks in the same order
+    rows = sorted(
+        ((int(option_id), market_id, Decimal(x)) for option_id, (market_id, x) in values.items()
+         if not (additive and x == 0)),
+        key=lambda row: row[0],
+    )
+    if not rows:
+        return
+    market_field = OptionExposure._meta.get_field("market")
+    now_param = OptionExposure._meta.get_field("updated_at").get_db_prep_value(now, connection)
+    params: List = []
+    for option_id, market_id, x in rows:
+        params += [option_id, market_field.get_db_prep_value(market_id, connection), str(x), now_param]
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(len(rows), additive), params)
+
+
+def add_exposure(deltas: Mapping[int, Tuple[object, Decimal]], now) -> None:
+    """outstanding_shares += delta for {option_id: (market_id, delta)}, creating missing rows (one statement)."""
+    _write(deltas, now, additive=True)
+
+
+def merge_exposure(into: ExposureDeltas, option_id, market_id, delta: Decimal) -> ExposureDeltas:
+    """Accumulate one position change into a group commit's deltas."""
+    _, prev = into.get(option_id, (market_id, Decimal("0")))
+    into[option_id] = (market_id, prev + delta)
+    return into
+
+
+def outstanding_shares(option_ids: Iterable) -> Dict[str, Decimal]:
+    """{str(option_id): outstanding shares} (one query). Options never traded since the counters exist are absent."""
+    return {
+        str(option_id): Decimal(shares)
+        for option_id, shares in OptionExposure.objects.filter(option_id__in=list(option_ids)).values_list(
+            "option_id", "outstanding_shares"
+        )
+    }
+
+
+def pool_solvency(market_id) -> Dict:
+    """
+    Worst-case payout of the market's pool against what settlement can draw on
+    (pool_cash, then collateral). Outcome k pays its own holders plus, in an
+    exclusive event, the No holders of every other outcome.
+    """
+    state = get_pool_state(market_id)
+    pool = AmmPool.objects.values("pool_cash", "collateral_amount", "collateral_token", "status").get(pk=state.pool_id)
+    exposure = outstanding_shares([*state.option_ids, *state.no_to_yes_option_id])
+
+    no_by_idx: Dict[int, Decimal] = {}
+    for no_option_id, (_, idx) in state.no_to_yes_option_id.items():
+        no_by_idx[idx] = no_by_idx.get(idx, Decimal("0")) + exposure.get(str(no_option_id), Decimal("0"))
+    no_total = sum(no_by_idx.values(), Decimal("0"))
+
+    outcomes = []
+    for idx, option_id in enumerate(state.option_ids):
+        payout = exposure.get(str(option_id), Decimal("0")) + no_total - no_by_idx.get(idx, Decimal("0"))
+        outcomes.append({"option_id": option_id, "payout": payout})
+    worst = max(outcomes, key=lambda o: o["payout"]) if outcomes else {"option_id": None, "payout": Decimal("0")}
+
+    pool_cash = Decimal(pool["pool_cash"])
+    available = max(Decimal("0"), pool_cash) + Decimal(pool["collateral_amount"])
+    return {
+        "pool_id": state.pool_id,
+        "market_id": str(market_id),
+        "token": pool["collateral_token"],
+        "status": pool["status"],
+        "pool_cash": str(pool_cash),
+        "collateral_amount": str(pool["collateral_amount"]),
+        "available": str(available),
+        "outcomes": [{"option_id": o["option_id"], "payout": str(o["payout"])} for o in outcomes],
+        "worst_case_option_id": worst["option_id"],
+        "worst_case_payout": str(worst["payout"]),
+        "surplus": str(available - worst["payout"]),
+        "solvent": available >= worst["payout"],
+    }
+
+
+def reconcile_market_exposure(market_id, *, fix: bool = False, now=None) -> List[Dict]:
+    """
+    Compare the market's counters with SUM(positions.shares) per option; returns the
+    mismatches. With fix, the counter rows are locked before positions are read (a
+    trade in flight commits its delta on top of the repaired value).
+    """
+    with transaction.atomic():
+        counters = OptionExposure.objects.filter(market_id=market_id)
+        if fix:
+            counters = counters.select_for_update().order_by("option_id")
+        counted = {
+            option_id: Decimal(shares) for option_id, shares in counters.values_list("option_id", "outstanding_shares")
+        }
+        actual = {
+            row["option_id"]: Decimal(row["total"] or 0)
+            for row in Position.objects.filter(market_id=market_id).values("option_id").annotate(total=Sum("shares"))
+        }
+
+        mismatches = []
+        for option_id in sorted(set(counted) | set(actual)):
+            expected = actual.get(option_id, Decimal("0"))
+            counter: Optional[Decimal] = counted.get(option_id)
+            if abs((counter or Decimal("0")) - expected) <= RECONCILE_TOLERANCE:
+                continue
+            mismatches.append({
+                "market_id": str(market_id),
+                "option_id": option_id,
+                "counter": str(counter) if counter is not None else None,
+                "positions": str(expected),
+            })
+        if fix and mismatches:
+            _write(
+                {m["option_id"]: (market_id, actual.get(m["option_id"], Decimal("0"))) for m in mismatches},
+                now or timezone.now(),
+                additive=False,
+            )
+    return mismatches
+
+
+__all__ = [
+    "RECONCILE_TOLERANCE",
+    "add_exposure",
+    "merge_exposure",
+    "outstanding_shares",
+    "pool_solvency",
+    "reconcile_market_exposure",
+]
@@ -0,0 +1,160 @@
+"""
+Firm quotes: short-lived signed tokens that execution can fill without re-quoting.
+
+The quote endpoint (?firm=1) prices the trade exactly as execution would and
+signs the result together with the pool id and the AmmPool.version the q was read
+at (django.core.signing: HMAC with SECRET_KEY, timestamped). execute_buy /
+execute_sell accept it as quote_token:
+
+  - same pool version: every q write bumps the version, so the pool is exactly
+    the quoted one and the signed result is filled as is (no build_quote, no
+    max_slippage_bps math; explicit min_shares_out / min_amount_out still apply);
+  - version moved on or token expired: the normal path re-quotes with the
+    caller's slippage guards;
+  - tampered, or issued for another option / side / size: rejected.
+
+Tokens are not bound to a user: they only promise a price against a pool state.
+"""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from django.core import signing
+from django.utils import timezone
+
+from .errors import QuoteInputError
+from .money import Number
+from .quote_core import build_quote
+from .quote_result import Quote
+from .state import PoolState
+
+FIRM_QUOTE_TTL_SECONDS = int(os.getenv("AMM_FIRM_QUOTE_TTL_SECONDS", "10"))
+
+_SALT = "market.amm.firm_quote"
+
+# Quote fields carried in the token (everything execution reads from a Quote)
+_QUOTE_FIELDS = (
+    "target_idx",
+    "amount_micros",
+    "shares_units",
+    "fee_micros",
+    "avg_price_bps",
+    "q_delta",
+    "is_no_side",
+    "no_side_mode",
+    "deltas",
+    "requested_amount_out_micros",
+    "gross_needed_micros",
+)
+
+
+class FirmQuoteError(QuoteInputError):
+    """Token is forged / malformed or does not match the order it is used for."""
+
+
+@dataclass(frozen=True)
+class FirmQuote:
+    quote: Quote
+    token: str
+    expires_at: datetime
+
+
+def _target(state: PoolState, option_id: str) -> Tuple[bool, str]:
+    """-> (is_no_side, quote_option_id); same mapping as execution's _resolve_trade_target."""
+    if option_id in state.no_to_yes_option_id:
+        return True, state.no_to_yes_option_id[option_id][0]
+    if option_id not in state.option_id_to_idx:
+        raise QuoteInputError("Option not present in pool state")
+    return False, option_id
+
+
+def _size(side: str, kind: str, value) -> Dict:
+    return {"side": side, "kind": kind, "size": str(Decimal(str(value)))}
+
+
+def issue_firm_quote(
+    state: PoolState,
+    *,
+    option_id,
+    side: str,
+    amount_in: Optional[Number] = None,
+    shares: Optional[Number] = None,
+    money_quant: Decimal = Decimal("0.01"),
+) -> FirmQuote:
+    """
+    Quote `option_id` (a real option id; No options of exclusive events included)
+    the way execution will, and sign it. amount_in is the buy amount or the sell's
+    desired net amount_out, as in build_quote.
+    """
+    option_id = str(option_id)
+    is_no_side, quote_option_id = _target(state, option_id)
+    quote = build_quote(
+        state,
+        option_id=quote_option_id,
+        side=side,
+        amount_in=amount_in,
+        shares=shares,
+        money_quant=money_quant,
+        is_no_side=is_no_side,
+    )
+    if side == "buy":
+        order = _size("buy", "amount_in", amount_in)
+    elif shares is not None:
+        order = _size("sell", "shares", shares)
+    else:
+        order = _size("sell", "amount_out", amount_in)
+
+    payload = {
+        "pool": state.pool_id,
+        "v": state.version,
+        "option": option_id,
+        "mq": str(money_quant),
+        **order,
+        "q": {name: getattr(quote, name) for name in _QUOTE_FIELDS},
+    }
+    token = signing.dumps(payload, salt=_SALT, compress=True)
+    return FirmQuote(quote=quote, token=token, expires_at=timezone.now() + timedelta(seconds=FIRM_QUOTE_TTL_SECONDS))
+
+
+def redeem_firm_quote(
+    token: str,
+    state: PoolState,
+    *,
+    pool_id,
+    version: int,
+    option_id,
+    side: str,
+    size_kind: str,
+    size,
+    money_quant: Decimal,
+) -> Optional[Quote]:
+    """
+    The signed Quote rebuilt on `state` when the token is still firm for this pool
+    version, None when it expired or the pool moved on (caller re-quotes).
+    Raises FirmQuoteError for forged tokens or ones issued for a different order.
+    """
+    try:
+        payload = signing.loads(token, salt=_SALT, max_age=FIRM_QUOTE_TTL_SECONDS)
+    except signing.SignatureExpired:
+        return None
+    except signing.BadSignature:
+        raise FirmQuoteError("Invalid quote token")
+
+    if (
+        payload.get("option") != str(option_id)
+        or payload.get("side") != side
+        or payload.get("kind") != size_kind
+        or size is None
+        or Decimal(payload["size"]) != Decimal(str(size))
+    ):
+        raise FirmQuoteError("Quote token was issued for a different order")
+
+    if payload["pool"] != str(pool_id) or payload["v"] != int(version) or Decimal(payload["mq"]) != money_quant:
+        return None
+    return Quote(state=state, side=side, money_quant=money_quant, **payload["q"])
+
+
+__all__ = ["FIRM_QUOTE_TTL_SECONDS", "FirmQuote", "FirmQuoteError", "issue_firm_quote", "redeem_firm_quote"]
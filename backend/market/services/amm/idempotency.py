@@ -0,0 +1,256 @@
+"""
+Idempotent order submission keyed on (user, client_nonce).
+
+A client retrying an order (timeouts on mobile) sends the same client_nonce; it
+must get the original response back instead of a second fill:
+
+  1) replay: the response is stored on the order intent, so a retry is answered
+     by one read on the unique (user_id, client_nonce) index, or by a small
+     process-local LRU without touching the DB;
+  2) in-flight duplicates in this process wait for the first attempt (per-key
+     lock) instead of queuing behind it on the same row locks;
+  3) across processes the trade transaction takes a Postgres advisory lock on the
+     key before any row lock and re-checks (claim_client_nonce);
+  4) the unique index is the backstop: a duplicate insert fails and is replayed.
+
+The intent also stores a digest of what was ordered (order_fingerprint: side,
+target, size, limits); a retry whose payload differs is rejected
+(CLIENT_NONCE_REUSED) instead of being answered with another order's fill.
+
+Orders without a client_nonce are not deduplicated.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Mapping, Optional, Tuple
+
+from django.db import IntegrityError, connection, transaction
+
+from ...models import OrderIntent
+
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("AMM_IDEMPOTENCY_CACHE_SIZE", "1024"))
+
+Key = Tuple[str, str]
+# (request_hash, response) of a committed order
+Stored = Tuple[Optional[str], Dict]
+
+# execute_* keyword -> order term (batch legs use the term names)
+_TERM_ALIASES = {"desired_amount_out": "amount_out"}
+# Not part of what is ordered
+_NOT_TERMS = frozenset({"user", "client_nonce", "request_hash", "money_quant", "quote_token", "wallet_id"})
+
+_lock = threading.Lock()
+_results: "OrderedDict[Key, Stored]" = OrderedDict()
+# key -> [lock, waiters]; dropped when the last waiter leaves
+_inflight: Dict[Key, list] = {}
+
+
+def _key(user_id, client_nonce) -> Key:
+    return str(user_id), str(client_nonce)
+
+
+def _remember(key: Key, stored: Stored) -> None:
+    with _lock:
+        _results[key] = stored
+        _results.move_to_end(key)
+        while len(_results) > IDEMPOTENCY_CACHE_SIZE:
+            _results.popitem(last=False)
+
+
+def _term(value):
+    if value is None or isinstance(value, bool):
+        return value
+    try:
+        return str(Decimal(str(value)).normalize())  # "40" == "40.00" == Decimal("40")
+    except InvalidOperation:
+        return str(value)
+
+
+def order_fingerprint(side: str, **terms) -> str:
+    """
+    Digest of what an order asks for: side, market, option, size and limits
+    (execute_* keywords or batch leg keys). Numbers compare by value; unset
+    terms (None / False) are left out.
+    """
+    canonical = {"side": side}
+    for name, value in terms.items():
+        if name in _NOT_TERMS or value is None or value is False:
+            continue
+        canonical[_TERM_ALIASES.get(name, name)] = _term(value)
+    return hashlib.blake2b(json.dumps(canonical, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def replay_response(stored: Stored, request_hash: Optional[str]) -> Dict:
+    """The stored response, if the retry orders the same thing as the original."""
+    stored_hash, response = stored
+    if request_hash and stored_hash and request_hash != stored_hash:
+        from .execution import ExecutionError
+
+        raise ExecutionError(
+            "client_nonce was already used for a different order", code="CLIENT_NONCE_REUSED", http_status=409
+        )
+    return response
+
+
+def order_result(user_id, client_nonce, request_hash: Optional[str] = None) -> Optional[Dict]:
+    """
+    Response of the committed order with this nonce, or None. With request_hash,
+    a nonce committed for a different order raises CLIENT_NONCE_REUSED.
+    """
+    key = _key(user_id, client_nonce)
+    with _lock:
+        stored = _results.get(key)
+    if stored is None:
+        stored = (
+            OrderIntent.objects.filter(user_id=user_id, client_nonce=str(client_nonce), response__isnull=False)
+            .values_list("request_hash", "response")
+            .first()
+        )
+        if stored is None:
+            return None
+        _remember(key, stored)
+    return replay_response(stored, request_hash)
+
+
+def order_results(user_id, client_nonces) -> Dict[str, Stored]:
+    """{client_nonce: (request_hash, response)} of the committed orders among client_nonces (one read)."""
+    nonces = {str(n) for n in client_nonces if n}
+    if not nonces:
+        return {}
+    found = {
+        nonce: (request_hash, response)
+        for nonce, request_hash, response in OrderIntent.objects.filter(
+            user_id=user_id, client_nonce__in=nonces, response__isnull=False
+        ).values_list("client_nonce", "request_hash", "response")
+    }
+    for nonce, stored in found.items():
+        _remember(_key(user_id, nonce), stored)
+    return found
+
+
+def remember_order_results(pairs) -> None:
+    """
+    Inside the trade transaction, after the intents are inserted: store each
+    nonce'd (intent, response) on its intent row (the replay source) and in the
+    LRU once committed.
+    """
+    intents = []
+    for intent, response in pairs:
+        if intent.client_nonce:
+            intent.response = response
+            intents.append(intent)
+    if not intents:
+        return
+    if len(intents) == 1:
+        OrderIntent.objects.filter(pk=intents[0].pk).update(response=intents[0].response)
+    else:
+        OrderIntent.objects.bulk_update(intents, ["response"])
+
+    def publish():
+        for intent in intents:
+            _remember(_key(intent.user_id, intent.client_nonce), (intent.request_hash, intent.response))
+
+    transaction.on_commit(publish)
+
+
+def _advisory_key(key: Key) -> int:
+    digest = hashlib.blake2b(f"order:{key[0]}:{key[1]}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def claim_client_nonce(user_id, client_nonce, request_hash: Optional[str] = None) -> Optional[Dict]:
+    """
+    First statement of the trade transaction: serialize attempts with this nonce
+    across processes (Postgres advisory xact lock) and return the committed
+    response if another attempt got there first.
+    """
+    if not client_nonce:
+        return None
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [_advisory_key(_key(user_id, client_nonce))])
+    return order_result(user_id, client_nonce, request_hash)
+
+
+def _enter(key: Key) -> list:
+    with _lock:
+        entry = _inflight.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    entry[0].acquire()
+    return entry
+
+
+def _leave(key: Key, entry) -> None:
+    entry[0].release()
+    with _lock:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _inflight.pop(key, None)
+
+
+def idempotent(side: str):
+    """
+    execute_* wrapper: replay a committed nonce (same order only), else run once
+    per key at a time. The wrapped function gets the order's request_hash to
+    store on its intent.
+    """
+
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*, user, client_nonce: Optional[str] = None, **kwargs):
+            if not client_nonce:
+                return fn(user=user, client_nonce=client_nonce, **kwargs)
+
+            # Defaults included: an order leaving out token= matches one passing the default
+            call = signature.bind(user=user, client_nonce=client_nonce, **kwargs)
+            call.apply_defaults()
+            request_hash = order_fingerprint(side, **call.arguments)
+            replay = order_result(user.id, client_nonce, request_hash)
+            if replay is not None:
+                return replay
+
+            key = _key(user.id, client_nonce)
+            entry = _enter(key)
+            try:
+                replay = order_result(user.id, client_nonce, request_hash)
+                if replay is not None:
+                    return replay
+                try:
+                    return fn(user=user, client_nonce=client_nonce, request_hash=request_hash, **kwargs)
+                except IntegrityError:
+                    replay = order_result(user.id, client_nonce, request_hash)
+                    if replay is None:
+                        raise
+                    return replay
+            finally:
+                _leave(key, entry)
+
+        return wrapper
+
+    return decorate
+
+
+def clear_idempotency_cache() -> None:
+    with _lock:
+        _results.clear()
+
+
+__all__ = [
+    "IDEMPOTENCY_CACHE_SIZE",
+    "claim_client_nonce",
+    "clear_idempotency_cache",
+    "idempotent",
+    "order_fingerprint",
+    "order_result",
+    "order_results",
+    "remember_order_results",
+    "replay_response",
+]
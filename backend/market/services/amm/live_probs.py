@@ -0,0 +1,73 @@
+"""
+Read-side probabilities: prob_bps derived from the cached pool q when serializing.
+
+Trades never rewrite per-option probabilities: MarketOptionStats.prob_bps is a
+display denormalization refreshed asynchronously (trade outbox worker). Readers
+that need the current value ask here instead; on a pool cache hit this costs no
+queries, and one query per pool on a miss. An exclusive event's markets share
+one pool, so a whole event is resolved from one cached state.
+
+Only active markets are read live; anything else (draft / closed / resolved, no
+pool, AMM_LIVE_PROBS=0) falls back to the stored stats.
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, Optional
+
+from .errors import QuoteError
+from .pool_cache import get_pool_state
+from .state import PoolState
+
+logger = logging.getLogger(__name__)
+
+LIVE_PROBS = os.getenv("AMM_LIVE_PROBS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+LIVE_MARKET_STATUSES = ("active",)
+
+
+def pool_prob_bps(state: PoolState) -> Dict[int, int]:
+    """{option_id: prob_bps} for every option priced by the pool (Yes and No legs)."""
+    bps = state.prob_bps()
+    out = {int(opt_id): int(bps[idx]) for idx, opt_id in enumerate(state.option_ids)}
+    for no_opt_id, (_, idx) in state.no_to_yes_option_id.items():
+        if 0 <= idx < len(bps):
+            out[int(no_opt_id)] = 10000 - int(bps[idx])
+    return out
+
+
+def live_prob_bps(markets: Iterable) -> Dict[int, int]:
+    """
+    Current {option_id: prob_bps} for the active markets among `markets` (objects
+    with id and status). Markets without a usable pool are left out.
+    """
+    out: Dict[int, int] = {}
+    if not LIVE_PROBS:
+        return out
+    seen_pools = set()
+    for market in markets:
+        if getattr(market, "status", None) not in LIVE_MARKET_STATUSES:
+            continue
+        try:
+            state = get_pool_state(market.id)
+        except QuoteError:
+            continue
+        except Exception:
+            logger.exception("live probs unavailable for market %s", market.id)
+            continue
+        if state.pool_id in seen_pools:
+            continue
+        seen_pools.add(state.pool_id)
+        out.update(pool_prob_bps(state))
+    return out
+
+
+def option_prob_bps(option, live: Optional[Dict[int, int]] = None) -> Optional[int]:
+    """Live value when known, else the stored MarketOptionStats.prob_bps (None without stats)."""
+    if live is not None and option.id in live:
+        return live[option.id]
+    stats = getattr(option, "stats", None)
+    return stats.prob_bps if stats else None
+
+
+__all__ = ["LIVE_PROBS", "pool_prob_bps", "live_prob_bps", "option_prob_bps"]
@@ -96,3 +96,117 @@ def buy_amount_to_delta_q(
     # = log(1 + exp(log(t) + log_ratio))
     x = math.log(t) + log_ratio
     return b * _log1p_exp(x)
+
+
+# ---------------- cached log-sum-exp (O(1) single-outcome updates) ----------------
+
+# If a single-outcome update shrinks the running sum below this fraction of its
+# previous value, the subtraction has cancelled too many digits: rebuild from q.
+_LSE_REBUILD_RATIO = 1e-4
+
+
+class LogSumExp:
+    """
+    Running (shift, total) pair such that:
+      log(sum_j exp(q_j/b)) = shift + log(total)
+
+    `shift` is max(q/b) at the last full build (or any larger q_i/b seen since), so
+    `total` stays in [1, N]-ish. Changing one q_i is O(1) via `update`; the prices /
+    cost helpers below read from it instead of re-running `_logsumexp` over all N.
+    """
+
+    __slots__ = ("b", "shift", "total")
+
+    def __init__(self, b: float, shift: float, total: float):
+        self.b = b
+        self.shift = shift
+        self.total = total
+
+    @classmethod
+    def from_q(cls, q: Sequence[float], b: float) -> "LogSumExp":
+        if b <= 0:
+            raise ValueError("b must be > 0")
+        scaled = [qi / b for qi in q]
+        m = max(scaled)
+        s = 0.0
+        for x in scaled:
+            s += math.exp(x - m)
+        return cls(b, m, s)
+
+    def log_partition(self) -> float:
+        return self.shift + math.log(self.total)
+
+    def copy(self) -> "LogSumExp":
+        return LogSumExp(self.b, self.shift, self.total)
+
+    def update(self, q: Sequence[float], q_old: float, q_new: float) -> None:
+        """
+        Account for one outcome moving q_old -> q_new. `q` is the vector AFTER the
+        change; it is only read when cancellation forces a full rebuild.
+        """
+        x_old = q_old / self.b
+        x_new = q_new / self.b
+        if x_new > self.shift:
+            total = self.total * math.exp(self.shift - x_new) - math.exp(x_old - x_new) + 1.0
+            shift = x_new
+        else:
+            total = self.total - math.exp(x_old - self.shift) + math.exp(x_new - self.shift)
+            shift = self.shift
+
+        if not (total >= self.total * _LSE_REBUILD_RATIO and total > 0.0):
+            rebuilt = LogSumExp.from_q(q, self.b)
+            shift, total = rebuilt.shift, rebuilt.total
+
+        self.shift = shift
+        self.total = total
+
+
+def price_cached(lse: LogSumExp, q_i: float) -> float:
+    """p_i = exp(q_i/b) / sum_j exp(q_j/b), O(1)."""
+    return math.exp(q_i / lse.b - lse.shift) / lse.total
+
+
+def prices_cached(lse: LogSumExp, q: Sequence[float]) -> List[float]:
+    """Full price vector from the cached normalizer (no max/sum pass)."""
+    inv_b = 1.0 / lse.b
+    shift = lse.shift
+    total = lse.total
+    return [math.exp(qi * inv_b - shift) / total for qi in q]
+
+
+def cost_cached(lse: LogSumExp) -> float:
+    """C(q) = b * log(sum exp(q/b)), O(1)."""
+    return lse.b * lse.log_partition()
+
+
+def cost_delta_cached(lse: LogSumExp, q_i: float, delta: float) -> float:
+    """
+    C(q + delta*e_i) - C(q) in O(1):
+      = b * log(1 + p_i * expm1(delta/b))
+
+    Evaluated directly (no difference of two large costs), so it is at least as
+    accurate as cost(q_post) - cost(q).
+    """
+    b = lse.b
+    log_p = q_i / b - lse.log_partition()
+    x = delta / b
+    if x < 50.0:
+        arg = math.exp(log_p) * math.expm1(x)
+        if arg <= -1.0:
+            # p_i rounded to 1 and the sell drains it: no finite cost change.
+            return -math.inf
+        return b * math.log1p(arg)
+    # Large buys: log(1 - p + p*e^x) = x + log_p + log1p((1-p) * e^(-x-log_p))
+    p = math.exp(log_p)
+    return b * (x + log_p + math.log1p((1.0 - p) * math.exp(-x - log_p)))
+
+
+def buy_amount_to_delta_q_cached(lse: LogSumExp, q_i: float, amount_net: float) -> float:
+    """
+    `buy_amount_to_delta_q` reading log(S) from the cache: O(1) instead of O(N).
+    """
+    if amount_net <= 0:
+        raise ValueError("amount_net must be > 0")
+    log_ratio = lse.log_partition() - q_i / lse.b   # log(S/a)
+    t = math.expm1(amount_net / lse.b)
+    return lse.b * _log1p_exp(math.log(t) + log_ratio)
@@ -0,0 +1,134 @@
+# market/services/amm/lmsr_vec.py
+"""
+Vectorized LMSR kernel (NumPy).
+
+Same math as `lmsr.py`, but evaluated over stacked pools in one call:
+  - Q: q matrix of shape (P, N)  (P pools × N outcomes; a 1-D q is treated as P=1)
+  - b: scalar or shape (P,)
+  - amounts: scalar, shape (K,) (same sizes for every pool) or shape (P, K)
+
+Results agree with the scalar functions within 1e-12 (relative for cost / delta_q).
+Use this for homepage cards, depth ladders and simulations; single quotes should keep
+using the scalar path (NumPy call overhead dominates for one evaluation).
+"""
+from __future__ import annotations
+
+from typing import Union
+
+import numpy as np
+
+ArrayLike = Union[float, int, np.ndarray, list, tuple]
+
+
+def _as_q_matrix(Q: ArrayLike) -> np.ndarray:
+    q = np.asarray(Q, dtype=np.float64)
+    if q.ndim == 1:
+        q = q[np.newaxis, :]
+    if q.ndim != 2 or q.shape[1] == 0:
+        raise ValueError("Q must be a non-empty (pools × outcomes) matrix")
+    return q
+
+
+def _as_b_column(b: ArrayLike, n_pools: int) -> np.ndarray:
+    bv = np.asarray(b, dtype=np.float64)
+    if bv.ndim == 0:
+        bv = np.full(n_pools, float(bv))
+    if bv.shape != (n_pools,):
+        raise ValueError("b must be a scalar or have shape (P,)")
+    if np.any(~(bv > 0)):
+        raise ValueError("b must be > 0")
+    return bv[:, np.newaxis]
+
+
+def _as_amount_matrix(amount_net: ArrayLike, n_pools: int) -> np.ndarray:
+    a = np.asarray(amount_net, dtype=np.float64)
+    if a.ndim == 0:
+        a = np.full((n_pools, 1), float(a))
+    elif a.ndim == 1:
+        a = np.broadcast_to(a, (n_pools, a.shape[0]))
+    if a.ndim != 2 or a.shape[0] != n_pools:
+        raise ValueError("amount_net must be a scalar, shape (K,) or shape (P, K)")
+    if np.any(~(a > 0)):
+        raise ValueError("amount_net must be > 0")
+    return a
+
+
+def _log1p_exp(x: np.ndarray) -> np.ndarray:
+    """Vectorized twin of lmsr._log1p_exp (same branch thresholds)."""
+    mid = np.clip(x, -50.0, 50.0)
+    return np.where(
+        x > 50.0,
+        x,
+        np.where(x < -50.0, np.exp(np.minimum(x, 0.0)), np.log1p(np.exp(mid))),
+    )
+
+
+def _logsumexp_rows(scaled: np.ndarray) -> np.ndarray:
+    """Stable row-wise log(sum(exp(scaled))). Shape (P, N) -> (P,)."""
+    m = np.max(scaled, axis=1)
+    finite = np.isfinite(m)
+    shift = np.where(finite, m, 0.0)
+    s = np.sum(np.exp(scaled - shift[:, np.newaxis]), axis=1)
+    return np.where(finite, shift + np.log(s), m)
+
+
+def prices_batch(Q: ArrayLike, b: ArrayLike) -> np.ndarray:
+    """
+    Row-wise LMSR prices (softmax of q/b). Returns shape (P, N); each row sums to 1.
+    """
+    q = _as_q_matrix(Q)
+    bcol = _as_b_column(b, q.shape[0])
+    scaled = q / bcol
+    exps = np.exp(scaled - np.max(scaled, axis=1, keepdims=True))
+    return exps / np.sum(exps, axis=1, keepdims=True)
+
+
+def cost_batch(Q: ArrayLike, b: ArrayLike) -> np.ndarray:
+    """
+    Row-wise LMSR cost C(q) = b * log(sum exp(q/b)). Returns shape (P,).
+    """
+    q = _as_q_matrix(Q)
+    bcol = _as_b_column(b, q.shape[0])
+    return bcol[:, 0] * _logsumexp_rows(q / bcol)
+
+
+def buy_amount_to_delta_q_batch(
+    Q: ArrayLike,
+    b: ArrayLike,
+    option_index: ArrayLike,
+    amount_net: ArrayLike,
+) -> np.ndarray:
+    """
+    Vectorized `lmsr.buy_amount_to_delta_q`.
+
+    option_index: int (same outcome for every pool) or shape (P,).
+    amount_net: scalar, (K,) or (P, K) net spends (after fee).
+
+    Returns delta_q of shape (P, K):
+      delta = b * log(1 + expm1(amount/b) * S/a)   (computed in log-domain)
+    """
+    q = _as_q_matrix(Q)
+    n_pools, n_outcomes = q.shape
+    bcol = _as_b_column(b, n_pools)
+
+    idx = np.asarray(option_index)
+    if idx.ndim == 0:
+        idx = np.full(n_pools, int(idx), dtype=np.int64)
+    if idx.shape != (n_pools,) or not np.issubdtype(idx.dtype, np.integer):
+        raise ValueError("option_index must be an int or an integer array of shape (P,)")
+    if np.any((idx < 0) | (idx >= n_outcomes)):
+        raise IndexError("option_index out of range")
+
+    amounts = _as_amount_matrix(amount_net, n_pools)
+
+    scaled = q / bcol
+    log_s = _logsumexp_rows(scaled)
+    log_a = scaled[np.arange(n_pools), idx]
+    log_ratio = (log_s - log_a)[:, np.newaxis]
+
+    t = np.expm1(amounts / bcol)
+    x = np.log(t) + log_ratio
+    return bcol * _log1p_exp(x)
+
+
+__all__ = ["prices_batch", "cost_batch", "buy_amount_to_delta_q_batch"]
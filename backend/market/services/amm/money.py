@@ -1,6 +1,7 @@
 import math
 from decimal import Decimal, ROUND_DOWN
-from typing import List, Sequence, Union
+from functools import lru_cache
+from typing import List, Sequence, Tuple, Union
 
 from .errors import QuoteInputError
 
@@ -53,3 +54,90 @@ def _quantize_shares(x: float) -> Decimal:
     """Quantize shares to 8 decimal places, rounding down to be conservative."""
     return Decimal(str(x)).quantize(SHARES_QUANT, rounding=ROUND_DOWN)
 
+
+
+# ---------- fixed-point integer path ----------
+# Inside the quote/execution core money is carried as integer micro-units and
+# shares as integer 1e-8 units; Decimal strings only appear at the boundary.
+MONEY_SCALE = 10**6          # 1 unit = 0.000001
+SHARES_SCALE = 10**8         # 1 unit = SHARES_QUANT
+_MONEY_PLACES = 6
+_SHARES_PLACES = 8
+
+# float -> integer snapping: a product like 1.15*100 = 114.99999999999999 is treated
+# as 115 (what Decimal(str(x)) would have seen) before ceil/floor is applied.
+_SNAP_ULPS = 2
+
+
+def _ceil_div(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+@lru_cache(maxsize=16)
+def _money_step(money_quant: Decimal) -> Tuple[int, int]:
+    """(micro-units per money_quant step, decimal places), e.g. 0.01 -> (10000, 2)."""
+    places = -money_quant.as_tuple().exponent
+    step = money_quant * MONEY_SCALE
+    if places < 0 or places > _MONEY_PLACES or step <= 0 or step != step.to_integral_value():
+        raise QuoteInputError(f"money_quant must be a positive multiple of 0.000001, got={money_quant}")
+    return int(step), places
+
+
+def _units_from_decimal(x: Decimal, scale: int, rounding) -> int:
+    return int((x * scale).to_integral_value(rounding=rounding))
+
+
+def _units_from_float(x: float, scale: int, *, up: bool) -> int:
+    v = x * scale
+    n = round(v)
+    if abs(v - n) <= _SNAP_ULPS * math.ulp(v):
+        return int(n)
+    return math.ceil(v) if up else math.floor(v)
+
+
+def _money_units_from_float(x: float, step: int, *, up: bool) -> int:
+    """Quantize a float money value to `step` micro-units (ceil if up else floor)."""
+    return _units_from_float(x, MONEY_SCALE // step, up=up) * step
+
+
+def _money_units_mul_bps(micros: int, bps: int, step: int, *, up: bool) -> int:
+    """micros * bps / 10000, quantized to `step` micro-units with exact integer rounding."""
+    num = micros * bps
+    denom = 10000 * step
+    return (_ceil_div(num, denom) if up else num // denom) * step
+
+
+def _format_units(units: int, scale: int, places: int) -> str:
+    """Integer units -> fixed-point string with exactly `places` decimals."""
+    sign = "-" if units < 0 else ""
+    whole, frac = divmod(abs(units), scale)
+    if places == 0:
+        return f"{sign}{whole}"
+    digits = len(str(scale)) - 1
+    return f"{sign}{whole}.{frac:0{digits}d}"[: len(sign) + len(str(whole)) + 1 + places]
+
+
+def _format_money(micros: int, money_quant: Decimal) -> str:
+    return _format_units(micros, MONEY_SCALE, _money_step(money_quant)[1])
+
+
+def _format_shares(units: int) -> str:
+    return _format_units(units, SHARES_SCALE, _SHARES_PLACES)
+
+
+def _money_decimal(micros: int) -> Decimal:
+    return Decimal(micros).scaleb(-_MONEY_PLACES)
+
+
+def _shares_decimal(units: int) -> Decimal:
+    return Decimal(units).scaleb(-_SHARES_PLACES)
+
+
+def _parse_units(x: Number, field: str, scale: int, rounding) -> int:
+    """Boundary parse of a user number into integer units of 1/scale."""
+    if isinstance(x, int) and not isinstance(x, bool):
+        return x * scale
+    d = _to_decimal(x, field)
+    if not d.is_finite():
+        raise QuoteInputError(f"{field} must be finite")
+    return _units_from_decimal(d, scale, rounding)
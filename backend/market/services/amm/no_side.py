@@ -0,0 +1,160 @@
+"""
+"No" side engine for exclusive-event pools.
+
+Buying No on outcome i means buying the other N-1 outcomes. Two modes:
+
+  - proportional: split the net spend across j != i by p_j / sum_{k!=i} p_k and price
+    each leg against the q left by the previous legs, so C(q) moves by exactly the
+    spend. Previously each leg re-ran a full log-sum-exp against the pre-trade q
+    (O(N^2), and overpaying shares); here the shared normalizer is advanced by each
+    leg's cost (log S += amount_j / b), so it is O(N).
+
+  - complement (exact "buy all-but-i"): buy the same d shares of every j != i, which is
+    exactly d No shares. Closed form from C(q + d*(1 - e_i)) - C(q) = amount:
+        d = b * log1p( expm1(amount/b) / (1 - p_i) )
+    The math is O(1); only materializing the delta vector is O(N).
+"""
+
+import math
+import os
+from typing import List, Tuple
+
+from .errors import QuoteInputError, QuoteMathError
+from .lmsr import _log1p_exp, _logsumexp, prices
+from .money import _bps_from_probabilities
+from .state import PoolState
+
+NO_SIDE_PROPORTIONAL = "proportional"
+NO_SIDE_COMPLEMENT = "complement"
+NO_SIDE_MODES = {NO_SIDE_PROPORTIONAL, NO_SIDE_COMPLEMENT}
+
+DEFAULT_NO_SIDE_MODE = os.getenv("AMM_NO_SIDE_MODE", NO_SIDE_PROPORTIONAL).strip().lower()
+
+
+def _check(state: PoolState, target_idx: int, mode: str) -> None:
+    if mode not in NO_SIDE_MODES:
+        raise QuoteInputError(f"no-side mode must be one of {sorted(NO_SIDE_MODES)}")
+    if len(state.q) < 2:
+        raise QuoteMathError("Cannot trade No in a single-option pool")
+    if not (0 <= target_idx < len(state.q)):
+        raise QuoteInputError("target index out of range")
+
+
+def _log_partition(q: List[float], b: float) -> float:
+    return _logsumexp([qi / b for qi in q])
+
+
+def _one_minus_p(state: PoolState, target_idx: int) -> float:
+    # 1 - p_i = -expm1(log p_i): no cancellation when p_i is close to 1
+    log_p = state.q[target_idx] / state.b - state.lse.log_partition()
+    return -math.expm1(log_p)
+
+
+def no_buy_deltas(
+    state: PoolState,
+    target_idx: int,
+    net_amount: float,
+    *,
+    mode: str = NO_SIDE_PROPORTIONAL,
+) -> Tuple[List[float], float]:
+    """
+    Returns (deltas, shares_out):
+      - deltas[j]: q increase for option j (0.0 for target_idx)
+      - shares_out: No shares credited to the buyer
+    """
+    _check(state, target_idx, mode)
+    if not (net_amount > 0.0 and math.isfinite(net_amount)):
+        raise QuoteInputError("amount_net must be > 0")
+
+    n = len(state.q)
+    b = state.b
+
+    if mode == NO_SIDE_COMPLEMENT:
+        other = _one_minus_p(state, target_idx)
+        if other <= 0.0:
+            raise QuoteMathError("No other options available to distribute buy")
+        d = b * math.log1p(math.expm1(net_amount / b) / other)
+        if not (math.isfinite(d) and d > 0.0):
+            raise QuoteMathError("invalid shares for buy No")
+        deltas = [d] * n
+        deltas[target_idx] = 0.0
+        return deltas, d
+
+    probs = state.probabilities()
+    other_prob_sum = math.fsum(probs) - probs[target_idx]
+    if other_prob_sum <= 0:
+        raise QuoteMathError("No other options available to distribute buy")
+
+    # Shared normalizer: log(S) is read once, then carried from leg to leg.
+    log_s = state.lse.log_partition()
+    inv_b = 1.0 / b
+    scale = net_amount / other_prob_sum
+    deltas = [0.0] * n
+    total_shares = 0.0
+    for j in range(n):
+        if j == target_idx:
+            continue
+        amount_j = scale * probs[j]
+        if amount_j > 0:
+            # buy_amount_to_delta_q with log(S/a_j) = log_s - q_j/b
+            x = math.log(math.expm1(amount_j * inv_b)) + log_s - state.q[j] * inv_b
+            delta_j = b * _log1p_exp(x)
+            deltas[j] = delta_j
+            total_shares += delta_j
+            # Next leg prices against the q this leg left: C moved by exactly amount_j
+            log_s += amount_j * inv_b
+    return deltas, total_shares
+
+
+def no_sell_deltas(
+    state: PoolState,
+    target_idx: int,
+    shares: float,
+    *,
+    mode: str = NO_SIDE_PROPORTIONAL,
+) -> Tuple[List[float], float]:
+    """
+    Returns (deltas, gross_out) for selling `shares` No shares on target_idx:
+      - deltas[j]: q change for option j (<= 0; 0.0 for target_idx)
+      - gross_out: C(q) - C(q + deltas), before fees
+    """
+    _check(state, target_idx, mode)
+    if not (shares > 0.0 and math.isfinite(shares)):
+        raise QuoteInputError("shares must be > 0")
+
+    n = len(state.q)
+
+    if mode == NO_SIDE_COMPLEMENT:
+        # q - s*(1 - e_i) == (q + s*e_i) - s*1, so gross = s - [C(q + s*e_i) - C(q)]
+        gross = shares - state.cost_delta(target_idx, shares)
+        deltas = [-shares] * n
+        deltas[target_idx] = 0.0
+        return deltas, gross
+
+    probs = state.probabilities()
+    other_prob_sum = math.fsum(probs) - probs[target_idx]
+    if other_prob_sum <= 0:
+        raise QuoteMathError("No other options available for No sell")
+
+    scale = shares / other_prob_sum
+    deltas = [0.0] * n
+    q_post = list(state.q)
+    for j in range(n):
+        if j == target_idx:
+            continue
+        deltas[j] = -scale * probs[j]
+        q_post[j] += deltas[j]
+
+    gross = state.cost() - state.b * _log_partition(q_post, state.b)
+    return deltas, gross
+
+
+def no_post_prob_bps(state: PoolState, target_idx: int, deltas: List[float], *, mode: str) -> List[int]:
+    """Post-trade prob_bps for a No trade produced by no_buy_deltas / no_sell_deltas."""
+    if mode == NO_SIDE_COMPLEMENT:
+        # Adding c to every j != i prices like subtracting c from i alone.
+        other_idx = 1 if target_idx == 0 else 0
+        return state.post_prob_bps(target_idx, -deltas[other_idx])
+
+    q_post = [qi + d for qi, d in zip(state.q, deltas)]
+    return _bps_from_probabilities(prices(q_post, state.b))
@@ -0,0 +1,99 @@
+"""
+No -> Yes option mapping for exclusive-event pools, materialized once per pool.
+
+An exclusive pool holds one Yes option per market; each market's active side='no'
+option trades against that Yes outcome. The mapping only changes when markets or
+options are added to the event, so it is built with a single query and cached
+under the pool's "options" generation (a pool_cache version of its own, so trades
+do not invalidate it). ensure_pool_initialized bumps the generation on commit;
+with a shared pool-cache backend the bump reaches every worker.
+
+Cached dicts are shared by every PoolState built from them: treat as read-only.
+"""
+
+import threading
+from typing import Dict, Tuple
+
+from ...models import AmmPool, MarketOption
+
+NoToYes = Dict[str, Tuple[str, int]]
+
+_lock = threading.Lock()
+# pool_id -> (generation, pool layout the mapping was indexed against, mapping)
+_maps: Dict[str, Tuple[int, Dict[str, int], NoToYes]] = {}
+
+
+def _generation_key(pool_id) -> str:
+    return f"{pool_id}:options"
+
+
+def _build(event_id, option_id_to_idx: Dict[str, int]) -> NoToYes:
+    rows = MarketOption.objects.filter(market__event_id=event_id).values_list(
+        "id", "market_id", "side", "is_active"
+    )
+    yes_by_market: Dict[str, str] = {}
+    no_options = []
+    for opt_id, market_id, side, is_active in rows:
+        opt = str(opt_id)
+        if opt in option_id_to_idx:
+            yes_by_market[market_id] = opt
+        if side == "no" and is_active:
+            no_options.append((opt, market_id))
+
+    mapping: NoToYes = {}
+    for no_opt, market_id in no_options:
+        yes_opt = yes_by_market.get(market_id)
+        if yes_opt is not None:
+            mapping[no_opt] = (yes_opt, option_id_to_idx[yes_opt])
+    return mapping
+
+
+def no_to_yes_for_pool(pool: AmmPool, option_id_to_idx: Dict[str, int]) -> NoToYes:
+    """
+    {no_option_id: (yes_option_id, pool_idx)} for an event-level pool.
+    Zero queries on a hit; one query to (re)build.
+    """
+    from .pool_cache import current_version
+
+    pid = str(pool.id)
+    generation = current_version(_generation_key(pid))
+    with _lock:
+        entry = _maps.get(pid)
+        # The layout check covers the window between ensure_pool_initialized's commit
+        # and its generation bump (new option states already visible).
+        if entry is not None and entry[0] == generation and entry[1] == option_id_to_idx:
+            return entry[2]
+
+    mapping = _build(pool.event_id, option_id_to_idx)
+    with _lock:
+        _maps[pid] = (generation, dict(option_id_to_idx), mapping)
+    return mapping
+
+
+def invalidate_option_map(pool_id) -> None:
+    """Options or markets of the pool's event changed."""
+    from .pool_cache import bump_pool_version
+
+    with _lock:
+        _maps.pop(str(pool_id), None)
+    bump_pool_version(_generation_key(pool_id))
+
+
+def invalidate_option_map_on_commit(pool_id) -> None:
+    from django.db import transaction
+
+    pid = str(pool_id)
+    transaction.on_commit(lambda: invalidate_option_map(pid))
+
+
+def clear_option_map_cache() -> None:
+    with _lock:
+        _maps.clear()
+
+
+__all__ = [
+    "no_to_yes_for_pool",
+    "invalidate_option_map",
+    "invalidate_option_map_on_commit",
+    "clear_option_map_cache",
+]
@@ -0,0 +1,183 @@
+"""
+Transactional outbox for display-only trade side effects.
+
+Inside the trade transaction (row locks held) a trade writes ONE trade_outbox row:
+    {"at": iso time, "option_ids": [...], "prob_bps": [...],
+     "no_to_yes": [[no_option_id, pool_idx], ...], "volume": {"option_id", "amount"}}
+instead of locking/updating MarketOptionStats, upserting series and bumping volume.
+
+apply_outbox_batch() (run by `manage.py process_trade_outbox`) claims pending rows
+and coalesces them: per pool the newest prob vector wins, series keep the last
+value per 5s bucket, volume is summed per option. A batch costs a fixed handful of
+queries however many trades it covers. Display state lags by at most the worker's
+poll interval plus one batch; serializers read current probs from q (live_probs).
+
+AMM_TRADE_SIDE_EFFECTS=inline restores the old in-transaction updates.
+"""
+
+import os
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from ...models import AmmPoolOptionState, MarketOption, MarketOptionSeries, MarketOptionStats, TradeOutbox
+from ..series_recorder import _round_to_bucket
+from .lmsr import prices
+from .money import _bps_from_probabilities
+from .state import PoolState
+
+SIDE_EFFECTS_INLINE = "inline"
+SIDE_EFFECTS_OUTBOX = "outbox"
+TRADE_SIDE_EFFECTS = os.getenv("AMM_TRADE_SIDE_EFFECTS", SIDE_EFFECTS_OUTBOX).strip().lower()
+
+OUTBOX_BATCH_SIZE = int(os.getenv("AMM_OUTBOX_BATCH_SIZE", "500"))
+
+# One applier at a time keeps "newest row wins" true across batches.
+_ADVISORY_LOCK_KEY = 0x616D6D6F7574  # "ammout"
+
+
+def side_effects_inline() -> bool:
+    return TRADE_SIDE_EFFECTS == SIDE_EFFECTS_INLINE
+
+
+def enqueue_trade_side_effects(
+    pool_state: PoolState,
+    option_states: List[AmmPoolOptionState],
+    traded_option_id,
+    amount: Decimal,
+    now: datetime,
+) -> None:
+    """One INSERT inside the trade transaction; probs come from the persisted q."""
+    trade_outbox_row(pool_state, option_states, traded_option_id, amount, now).save(force_insert=True)
+
+
+def trade_outbox_row(
+    pool_state: PoolState,
+    option_states: List[AmmPoolOptionState],
+    traded_option_id,
+    amount: Decimal,
+    now: datetime,
+) -> TradeOutbox:
+    """Unsaved outbox row for one trade (group commits bulk_create these)."""
+    q = [float(st.q) for st in option_states]
+    prob_bps = _bps_from_probabilities(prices(q, pool_state.b))
+    return TradeOutbox(
+        pool_id=pool_state.pool_id,
+        payload={
+            "at": now.isoformat(),
+            "option_ids": [int(st.option_id) for st in option_states],
+            "prob_bps": prob_bps,
+            "no_to_yes": [[int(no_id), idx] for no_id, (_, idx) in pool_state.no_to_yes_option_id.items()],
+            "volume": {"option_id": int(traded_option_id), "amount": str(amount)},
+        },
+        created_at=now,
+    )
+
+
+def _claim(limit: int) -> List[TradeOutbox]:
+    return list(TradeOutbox.objects.select_for_update(skip_locked=True).order_by("id")[:limit])
+
+
+def _try_lock() -> bool:
+    if connection.vendor != "postgresql":
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [_ADVISORY_LOCK_KEY])
+        return bool(cursor.fetchone()[0])
+
+
+def _coalesce(rows: List[TradeOutbox]):
+    """-> (probs {option_id: bps}, series {(option_id, bucket): bps}, volume {option_id: (amount, last_at)})"""
+    latest_by_pool: Dict[str, TradeOutbox] = {}
+    series: Dict[Tuple[int, datetime], int] = {}
+    volume: Dict[int, Tuple[Decimal, datetime]] = {}
+
+    for row in rows:  # ascending id: later rows overwrite earlier ones
+        p = row.payload
+        at = parse_datetime(p["at"])
+        latest_by_pool[str(row.pool_id)] = row
+        bucket = _round_to_bucket(at)
+        for opt_id, bps in zip(p["option_ids"], p["prob_bps"]):
+            series[(int(opt_id), bucket)] = int(bps)
+        vol = p.get("volume")
+        if vol:
+            opt_id = int(vol["option_id"])
+            amount, last = volume.get(opt_id, (Decimal("0"), at))
+            volume[opt_id] = (amount + Decimal(vol["amount"]), max(last, at))
+
+    probs: Dict[int, int] = {}
+    for row in latest_by_pool.values():
+        p = row.payload
+        yes = p["prob_bps"]
+        for opt_id, bps in zip(p["option_ids"], yes):
+            probs[int(opt_id)] = int(bps)
+        for no_id, idx in p.get("no_to_yes") or ():
+            if 0 <= idx < len(yes):
+                probs[int(no_id)] = 10000 - int(yes[idx])
+    return probs, series, volume
+
+
+def apply_outbox_batch(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """Apply up to `limit` pending rows in one transaction. Returns rows applied."""
+    with transaction.atomic():
+        if not _try_lock():
+            return 0
+        rows = _claim(limit)
+        if not rows:
+            return 0
+
+        probs, series, volume = _coalesce(rows)
+        now = max(row.created_at for row in rows)
+
+        stats_ids = set(probs) | set(volume)
+        to_update: List[MarketOptionStats] = []
+        for stat in MarketOptionStats.objects.select_for_update().filter(option_id__in=stats_ids):
+            if stat.option_id in probs:
+                stat.prob_bps = probs[stat.option_id]
+            if stat.option_id in volume:
+                amount, last_at = volume[stat.option_id]
+                stat.volume_total = Decimal(stat.volume_total) + amount
+                stat.volume_24h = Decimal(stat.volume_24h) + amount
+                stat.last_trade_at = last_at
+            stat.updated_at = now
+            to_update.append(stat)
+        if to_update:
+            MarketOptionStats.objects.bulk_update(
+                to_update, ["prob_bps", "volume_total", "volume_24h", "last_trade_at", "updated_at"]
+            )
+
+        if series:
+            option_market = dict(
+                MarketOption.objects.filter(id__in={opt_id for opt_id, _ in series}).values_list("id", "market_id")
+            )
+            MarketOptionSeries.objects.bulk_create(
+                [
+                    MarketOptionSeries(
+                        option_id=opt_id,
+                        market_id=option_market[opt_id],
+                        interval="1M",
+                        bucket_start=bucket,
+                        value_bps=bps,
+                    )
+                    for (opt_id, bucket), bps in series.items()
+                    if opt_id in option_market
+                ],
+                update_conflicts=True,
+                unique_fields=["option_id", "interval", "bucket_start"],
+                update_fields=["value_bps"],
+            )
+
+        TradeOutbox.objects.filter(id__in=[row.id for row in rows]).delete()
+        return len(rows)
+
+
+__all__ = [
+    "TRADE_SIDE_EFFECTS",
+    "side_effects_inline",
+    "enqueue_trade_side_effects",
+    "trade_outbox_row",
+    "apply_outbox_batch",
+]
@@ -0,0 +1,212 @@
+"""
+PoolState cache for the quote path: process-local snapshots, optionally backed by
+a shared cross-worker layer (pool_cache_backends) with fan-out invalidation
+(pool_invalidation).
+
+  - Snapshots are keyed by pool id (an exclusive event's markets share one entry)
+    and tagged with the pool version they were loaded at.
+  - Every committed write to a pool (trade, settlement, state backfill) bumps its
+    version via transaction.on_commit; a snapshot whose version is behind is reloaded.
+  - The version is read BEFORE the DB load, so a trade that commits while we load
+    can only make the new entry look stale, never hide the trade.
+
+With a shared backend the version lives in the backend (one cache read per quote,
+no DB queries on a hit), bumps are published to every worker, and each worker
+keeps the highest version it has seen: a version that goes backwards (evicted
+key, failover) is re-raised instead of serving an older snapshot.
+
+Cached states are shared: callers must treat them as read-only (no apply_delta).
+Trades keep using the locked loader in execution.py.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from django.db import transaction
+
+from .pool_cache_backends import PoolCacheBackend, backend_from_settings
+from .pool_invalidation import publish_pool_version, start_listener
+from .quote_loader import load_pool_state
+from .state import PoolState
+
+POOL_CACHE_SIZE = int(os.getenv("AMM_POOL_CACHE_SIZE", "512"))
+
+_lock = threading.Lock()
+# Highest version seen per pool (local bumps, shared reads, fan-out messages).
+_versions: Dict[str, int] = {}
+_states: "OrderedDict[str, Tuple[int, PoolState]]" = OrderedDict()
+_market_pool: Dict[str, str] = {}
+# Bumped with every pool version; guards loads whose pool id is not known yet.
+_epoch = 0
+
+_backend: Optional[PoolCacheBackend] = backend_from_settings()
+
+
+def set_pool_cache_backend(backend: Optional[PoolCacheBackend]) -> None:
+    """Swap the shared backend (None = process-local only) and drop local state."""
+    global _backend
+    with _lock:
+        _backend = backend
+        _versions.clear()
+    clear_pool_cache()
+
+
+def _note_version(pid: str, version: int) -> None:
+    # caller holds _lock
+    if version > _versions.get(pid, 0):
+        _versions[pid] = version
+        entry = _states.get(pid)
+        if entry is not None and entry[0] < version:
+            del _states[pid]
+
+
+def note_pool_version(pool_id, version: int) -> None:
+    """A pool write committed elsewhere (fan-out message)."""
+    with _lock:
+        _note_version(str(pool_id), int(version))
+
+
+def pool_version(pool_id) -> int:
+    with _lock:
+        return _versions.get(str(pool_id), 0)
+
+
+def current_version(pool_id) -> int:
+    """
+    Version to read at: the shared version (one cache read) when a backend is
+    configured, never lower than what this process has already seen.
+    """
+    pid = str(pool_id)
+    backend = _backend
+    if backend is not None:
+        shared = backend.get_version(pid)
+        seen = pool_version(pid)
+        if shared < seen:
+            # Shared version went backwards: bumps may have been lost, so move every
+            # worker past everything seen so far and reload.
+            backend.ensure_version(pid, seen + 1)
+            shared = backend.get_version(pid)
+        note_pool_version(pid, shared)
+    return pool_version(pid)
+
+
+def bump_pool_version(pool_id) -> int:
+    """Advance the pool's version and drop its snapshot. Returns the new version."""
+    global _epoch
+    pid = str(pool_id)
+    backend = _backend
+    if backend is None:
+        with _lock:
+            v = _versions.get(pid, 0) + 1
+            _versions[pid] = v
+            _epoch += 1
+            _states.pop(pid, None)
+            return v
+
+    floor = pool_version(pid)
+    v = backend.incr_version(pid)
+    while v <= floor:
+        # shared counter went backwards: lift it past what we have seen, then take a fresh value
+        backend.ensure_version(pid, floor)
+        v = backend.incr_version(pid)
+    with _lock:
+        _epoch += 1
+        _note_version(pid, v)
+        _states.pop(pid, None)
+    publish_pool_version(pid, v)
+    return v
+
+
+def bump_pool_version_on_commit(pool_id) -> None:
+    """Bump once the surrounding transaction commits (immediately in autocommit)."""
+    pid = str(pool_id)
+    transaction.on_commit(lambda: bump_pool_version(pid))
+
+
+def _store(pid: str, version: int, state: PoolState) -> None:
+    # caller holds _lock
+    if _versions.get(pid, 0) == version:
+        _states[pid] = (version, state)
+        _states.move_to_end(pid)
+        while len(_states) > POOL_CACHE_SIZE:
+            _states.popitem(last=False)
+
+
+def get_pool_state(market_id) -> PoolState:
+    """
+    Cached load_pool_state(market_id): zero DB queries on a hit, never older than
+    the last pool write committed in this process (or, with a shared backend, in
+    any worker).
+    """
+    mid = str(market_id)
+    backend = _backend
+    if backend is not None:
+        start_listener(note_pool_version)
+
+    with _lock:
+        pool_id: Optional[str] = _market_pool.get(mid)
+    if pool_id is None and backend is not None:
+        pool_id = backend.get_pool_id(mid)
+        if pool_id is not None:
+            with _lock:
+                _market_pool[mid] = pool_id
+
+    version = 0
+    if pool_id is not None:
+        current_version(pool_id)
+        with _lock:
+            version = _versions.get(pool_id, 0)
+            entry = _states.get(pool_id)
+            if entry is not None and entry[0] == version:
+                _states.move_to_end(pool_id)
+                return entry[1].for_market(mid)
+        if backend is not None:
+            snap = backend.get_snapshot(pool_id, version)
+            if snap is not None:
+                state = PoolState.from_snapshot(mid, snap)
+                with _lock:
+                    _store(pool_id, version, state)
+                return state
+    with _lock:
+        epoch = _epoch
+
+    state = load_pool_state(mid)
+
+    pid = state.pool_id
+    with _lock:
+        _market_pool[mid] = pid
+        if pool_id is None:
+            # Version unknown before the load: only cache if nothing was bumped meanwhile
+            # (other workers' bumps are invisible to the epoch, so not with a backend).
+            if backend is None and _epoch == epoch:
+                _store(pid, _versions.get(pid, 0), state)
+        elif pid == pool_id:
+            _store(pid, version, state)
+    if backend is not None:
+        if pool_id is None:
+            backend.set_pool_id(mid, pid)
+        elif pid == pool_id:
+            backend.set_snapshot(pid, version, state.to_snapshot())
+    return state
+
+
+def clear_pool_cache() -> None:
+    global _epoch
+    with _lock:
+        _states.clear()
+        _market_pool.clear()
+        _epoch += 1
+
+
+__all__ = [
+    "get_pool_state",
+    "pool_version",
+    "current_version",
+    "bump_pool_version",
+    "bump_pool_version_on_commit",
+    "note_pool_version",
+    "set_pool_cache_backend",
+    "clear_pool_cache",
+]
@@ -0,0 +1,171 @@
+"""
+Shared (cross-worker) storage for PoolState snapshots.
+
+A backend keeps, per pool:
+  - a monotonically increasing version, bumped once per committed pool write;
+  - snapshots keyed by (pool_id, version), so a reader can only ever pick up
+    data that was loaded at the version it asked for;
+  - the market -> pool id mapping (stable; markets never move between pools).
+
+Backends:
+  - DjangoCacheBackend: any Django cache (Redis / memcached in production);
+    versions use cache.add + cache.incr, which are atomic on those stores.
+  - InMemoryBackend: dict + lock stand-in for tests; pass a multiprocessing
+    Manager dict/lock to share it between processes.
+
+Selected with AMM_POOL_CACHE_BACKEND = "" (off, process-local only) | "memory" | "django".
+"""
+
+import os
+import threading
+from typing import Dict, MutableMapping, Optional
+
+POOL_CACHE_BACKEND = os.getenv("AMM_POOL_CACHE_BACKEND", "").strip().lower()
+POOL_CACHE_ALIAS = os.getenv("AMM_POOL_CACHE_ALIAS", "default")
+# Snapshots of superseded versions simply age out.
+POOL_CACHE_TTL = int(os.getenv("AMM_POOL_CACHE_TTL", "300"))
+
+_KEY_PREFIX = "amm:pool"
+
+
+def _version_key(pool_id: str) -> str:
+    return f"{_KEY_PREFIX}:{pool_id}:v"
+
+
+def _snapshot_key(pool_id: str, version: int) -> str:
+    return f"{_KEY_PREFIX}:{pool_id}:s:{version}"
+
+
+def _market_key(market_id: str) -> str:
+    return f"{_KEY_PREFIX}:m:{market_id}"
+
+
+class PoolCacheBackend:
+    """Interface; every method must be safe to call from any worker."""
+
+    def get_version(self, pool_id: str) -> int:
+        raise NotImplementedError
+
+    def incr_version(self, pool_id: str) -> int:
+        """Atomically advance the pool version; returns the new value."""
+        raise NotImplementedError
+
+    def ensure_version(self, pool_id: str, floor: int) -> None:
+        """Raise the stored version to at least `floor` (after eviction / restart)."""
+        raise NotImplementedError
+
+    def get_snapshot(self, pool_id: str, version: int) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def set_snapshot(self, pool_id: str, version: int, snap: Dict) -> None:
+        raise NotImplementedError
+
+    def get_pool_id(self, market_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set_pool_id(self, market_id: str, pool_id: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryBackend(PoolCacheBackend):
+    def __init__(self, store: Optional[MutableMapping] = None, lock=None):
+        self.store = {} if store is None else store
+        self.lock = threading.Lock() if lock is None else lock
+
+    def get_version(self, pool_id: str) -> int:
+        return int(self.store.get(_version_key(pool_id), 0))
+
+    def incr_version(self, pool_id: str) -> int:
+        key = _version_key(pool_id)
+        with self.lock:
+            v = int(self.store.get(key, 0)) + 1
+            self.store[key] = v
+            return v
+
+    def ensure_version(self, pool_id: str, floor: int) -> None:
+        key = _version_key(pool_id)
+        with self.lock:
+            if int(self.store.get(key, 0)) < floor:
+                self.store[key] = floor
+
+    def get_snapshot(self, pool_id: str, version: int) -> Optional[Dict]:
+        return self.store.get(_snapshot_key(pool_id, version))
+
+    def set_snapshot(self, pool_id: str, version: int, snap: Dict) -> None:
+        with self.lock:
+            # keep only the newest snapshot per pool (no TTL here)
+            prev = self.store.get(f"{_KEY_PREFIX}:{pool_id}:latest")
+            if prev is not None and prev > version:
+                return
+            if prev is not None and prev != version:
+                self.store.pop(_snapshot_key(pool_id, prev), None)
+            self.store[_snapshot_key(pool_id, version)] = snap
+            self.store[f"{_KEY_PREFIX}:{pool_id}:latest"] = version
+
+    def get_pool_id(self, market_id: str) -> Optional[str]:
+        return self.store.get(_market_key(market_id))
+
+    def set_pool_id(self, market_id: str, pool_id: str) -> None:
+        self.store[_market_key(market_id)] = pool_id
+
+
+class DjangoCacheBackend(PoolCacheBackend):
+    def __init__(self, alias: str = POOL_CACHE_ALIAS, ttl: int = POOL_CACHE_TTL):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get_version(self, pool_id: str) -> int:
+        return int(self.cache.get(_version_key(pool_id), 0))
+
+    def incr_version(self, pool_id: str) -> int:
+        key = _version_key(pool_id)
+        self.cache.add(key, 0, timeout=None)
+        try:
+            return int(self.cache.incr(key))
+        except ValueError:
+            # evicted between add and incr
+            self.cache.add(key, 1, timeout=None)
+            return int(self.cache.get(key, 1))
+
+    def ensure_version(self, pool_id: str, floor: int) -> None:
+        key = _version_key(pool_id)
+        if self.cache.add(key, floor, timeout=None):
+            return
+        current = int(self.cache.get(key, 0))
+        if current < floor:
+            try:
+                self.cache.incr(key, floor - current)
+            except ValueError:
+                self.cache.add(key, floor, timeout=None)
+
+    def get_snapshot(self, pool_id: str, version: int) -> Optional[Dict]:
+        return self.cache.get(_snapshot_key(pool_id, version))
+
+    def set_snapshot(self, pool_id: str, version: int, snap: Dict) -> None:
+        self.cache.set(_snapshot_key(pool_id, version), snap, timeout=self.ttl)
+
+    def get_pool_id(self, market_id: str) -> Optional[str]:
+        return self.cache.get(_market_key(market_id))
+
+    def set_pool_id(self, market_id: str, pool_id: str) -> None:
+        self.cache.set(_market_key(market_id), pool_id, timeout=None)
+
+
+def backend_from_settings() -> Optional[PoolCacheBackend]:
+    if POOL_CACHE_BACKEND in {"", "off", "local", "none"}:
+        return None
+    if POOL_CACHE_BACKEND == "memory":
+        return InMemoryBackend()
+    if POOL_CACHE_BACKEND in {"django", "redis"}:
+        return DjangoCacheBackend()
+    raise ValueError(f"unknown AMM_POOL_CACHE_BACKEND: {POOL_CACHE_BACKEND!r}")
+
+
+__all__ = [
+    "PoolCacheBackend",
+    "InMemoryBackend",
+    "DjangoCacheBackend",
+    "backend_from_settings",
+]
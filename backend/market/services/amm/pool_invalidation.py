@@ -0,0 +1,110 @@
+"""
+Pool invalidation fan-out over the Channels layer.
+
+Every committed pool write publishes {"pool_id", "version"} to one group; each
+worker runs a small listener thread that feeds those versions into pool_cache,
+so stale process-local snapshots are dropped as soon as another worker trades.
+
+Correctness does not depend on delivery: readers also check the shared version
+(pool_cache_backends). Fan-out keeps the per-worker "highest version seen" floor
+moving and frees stale snapshots early.
+
+The listener is only started for cross-process layers (e.g. channels_redis);
+InMemoryChannelLayer is per-process and local bumps are applied directly.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_GROUP = "amm.pool_invalidation"
+INVALIDATION_TYPE = "pool.invalidate"
+
+POOL_CACHE_FANOUT = os.getenv("AMM_POOL_CACHE_FANOUT", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+_listener_lock = threading.Lock()
+_listener: Optional[threading.Thread] = None
+
+
+def _layer():
+    try:
+        from channels.layers import get_channel_layer
+    except ImportError:  # channels not installed
+        return None
+    try:
+        return get_channel_layer()
+    except Exception:
+        logger.exception("channel layer unavailable")
+        return None
+
+
+def _is_process_local(layer) -> bool:
+    from channels.layers import InMemoryChannelLayer
+
+    return isinstance(layer, InMemoryChannelLayer)
+
+
+def publish_pool_version(pool_id: str, version: int) -> None:
+    """Best effort: a lost message only delays the drop of a stale local snapshot."""
+    if not POOL_CACHE_FANOUT:
+        return
+    layer = _layer()
+    if layer is None or _is_process_local(layer):
+        return
+    from asgiref.sync import async_to_sync
+
+    try:
+        async_to_sync(layer.group_send)(
+            INVALIDATION_GROUP,
+            {"type": INVALIDATION_TYPE, "pool_id": str(pool_id), "version": int(version)},
+        )
+    except Exception:
+        logger.exception("pool invalidation publish failed (pool=%s v=%s)", pool_id, version)
+
+
+async def _listen(layer, handler: Callable[[str, int], None]) -> None:
+    channel = await layer.new_channel()
+    await layer.group_add(INVALIDATION_GROUP, channel)
+    while True:
+        message = await layer.receive(channel)
+        if message.get("type") != INVALIDATION_TYPE:
+            continue
+        try:
+            handler(str(message["pool_id"]), int(message["version"]))
+        except Exception:
+            logger.exception("bad pool invalidation message: %r", message)
+
+
+def _run(layer, handler) -> None:
+    while True:
+        try:
+            asyncio.run(_listen(layer, handler))
+        except Exception:
+            logger.exception("pool invalidation listener crashed; restarting")
+            time.sleep(1.0)
+
+
+def start_listener(handler: Callable[[str, int], None]) -> bool:
+    """Start the per-process listener once. Returns True if it is running."""
+    global _listener
+    if not POOL_CACHE_FANOUT:
+        return False
+    with _listener_lock:
+        if _listener is not None:
+            return True
+        layer = _layer()
+        if layer is None or _is_process_local(layer):
+            return False
+        _listener = threading.Thread(
+            target=_run, args=(layer, handler), name="amm-pool-invalidation", daemon=True
+        )
+        _listener.start()
+        return True
+
+
+__all__ = ["INVALIDATION_GROUP", "publish_pool_version", "start_listener"]
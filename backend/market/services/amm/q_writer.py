@@ -0,0 +1,84 @@
+"""
+Multi-row q writer for amm_pool_option_state.
+
+Every path that changes several q values of one pool (No-side trades, sequencer
+batches, future multi-leg trades, resets) writes them here in ONE statement per
+chunk instead of one UPDATE per row:
+
+  Postgres:  UPDATE amm_pool_option_state AS s SET q = s.q + v.x, ...
+             FROM (VALUES (%s, %s), ...) AS v(option_id, x) WHERE ...
+  other:     UPDATE ... SET q = q + CASE option_id WHEN %s THEN %s ... END WHERE option_id IN (...)
+
+Callers must hold the pool (row locks or a won version CAS); the writer does not
+lock or bump versions itself.
+"""
+
+from decimal import Decimal
+from typing import Dict, List, Mapping, Tuple
+
+from django.db import connection
+
+from ...models import AmmPoolOptionState
+
+# Rows per statement (2 params each; well under Postgres / SQLite parameter limits).
+Q_WRITE_CHUNK = 1000
+
+_TABLE = AmmPoolOptionState._meta.db_table
+
+
+def _statement(n: int, additive: bool) -> str:
+    if connection.vendor == "postgresql":
+        values = ", ".join(["(%s::bigint, %s::numeric)"] * n)
+        new_q = "s.q + v.x" if additive else "v.x"
+        return (
+            f"UPDATE {_TABLE} AS s SET q = {new_q}, updated_at = %s "
+            f"FROM (VALUES {values}) AS v(option_id, x) "
+            f"WHERE s.option_id = v.option_id AND s.pool_id = %s"
+        )
+    cases = " ".join(["WHEN %s THEN CAST(%s AS NUMERIC)"] * n)
+    new_q = f"q + CASE option_id {cases} END" if additive else f"CASE option_id {cases} END"
+    marks = ", ".join(["%s"] * n)
+    return f"UPDATE {_TABLE} SET q = {new_q}, updated_at = %s WHERE pool_id = %s AND option_id IN ({marks})"
+
+
+def _params(rows: List[Tuple[int, Decimal]], pool_id, now) -> List:
+    # Same order as the placeholders of _statement: pg sets updated_at before the VALUES list
+    values: List = []
+    for option_id, x in rows:
+        values += [option_id, str(x)]
+    if connection.vendor == "postgresql":
+        return [now, *values, pool_id]
+    return [*values, now, pool_id, *(option_id for option_id, _ in rows)]
+
+
+def _write(pool_id, values: Mapping, now, *, additive: bool) -> int:
+    rows = [(int(option_id), Decimal(x)) for option_id, x in values.items() if not (additive and x == 0)]
+    pool_key = AmmPoolOptionState._meta.get_field("pool").get_db_prep_value(pool_id, connection)
+    now_param = AmmPoolOptionState._meta.get_field("updated_at").get_db_prep_value(now, connection)
+    updated = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), Q_WRITE_CHUNK):
+            chunk = rows[start:start + Q_WRITE_CHUNK]
+            cursor.execute(_statement(len(chunk), additive), _params(chunk, pool_key, now_param))
+            updated += cursor.rowcount
+    return updated
+
+
+def apply_q_deltas(pool_id, deltas: Mapping[int, Decimal], now) -> int:
+    """q += delta for {option_id: delta} of one pool. Returns rows updated."""
+    return _write(pool_id, deltas, now, additive=True)
+
+
+def set_q(pool_id, values: Mapping[int, Decimal], now) -> int:
+    """q = value for {option_id: value} of one pool (resets / re-seeding). Returns rows updated."""
+    return _write(pool_id, values, now, additive=False)
+
+
+def merge_q_deltas(into: Dict[int, Decimal], deltas: Mapping[int, Decimal]) -> Dict[int, Decimal]:
+    """Accumulate per-trade deltas into one write (multi-leg trades, batches)."""
+    for option_id, x in deltas.items():
+        into[option_id] = into.get(option_id, Decimal("0")) + x
+    return into
+
+
+__all__ = ["Q_WRITE_CHUNK", "apply_q_deltas", "set_q", "merge_q_deltas"]
@@ -1,9 +1,12 @@
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Union
 
+from .errors import QuoteError
 from .money import Number
-from .quote_core import quote_from_state
+from .quote_core import build_quote, quote_from_state
+from .pool_cache import get_pool_state
 from .quote_loader import load_pool_state
+from .quote_result import Quote
 from .state import PoolState
 
 
@@ -19,11 +22,14 @@ def quote(
 ):
     """
     Backward-compatible wrapper.
+    Reads the pool through the versioned process cache (pool_cache.get_pool_state).
     For list pages / batch quotes, prefer:
-      state = load_pool_state(...)
+      state = get_pool_state(...)
       quote_from_state(state, ...)
     """
-    state: PoolState = load_pool_state(market_id)
+    state: PoolState = get_pool_state(market_id)
+    # No options of exclusive events are priced as execution fills them (No leg)
+    _, is_no_side = state.resolve_with_side(option_id=option_id, option_index=option_index)
     return quote_from_state(
         state,
         option_id=option_id,
@@ -32,8 +38,69 @@ def quote(
         amount_in=amount_in,
         shares=shares,
         money_quant=money_quant,
+        is_no_side=is_no_side,
     )
 
 
-__all__ = ["quote", "quote_from_state", "load_pool_state", "PoolState", "Number"]
+def quote_batch_from_state(
+    state: PoolState,
+    legs: Iterable[Dict],
+    *,
+    money_quant: Decimal = Decimal("0.01"),
+) -> List[Union[Quote, QuoteError]]:
+    """
+    Evaluate many legs against one PoolState (no DB access).
+
+    Each leg: {option_id | option_index, side, amount_in | shares}
+    (for sell, amount_in is the desired NET amount_out, as in quote_from_state).
+
+    Returns one entry per leg, in order: a Quote (shares the state's metadata
+    lists), or the QuoteError raised for that leg. A bad leg never fails the batch.
+    """
+    results: List[Union[Quote, QuoteError]] = []
+    for leg in legs:
+        try:
+            option_id = leg.get("option_id")
+            option_index = leg.get("option_index")
+            _, is_no_side = state.resolve_with_side(option_id=option_id, option_index=option_index)
+            results.append(
+                build_quote(
+                    state,
+                    option_id=option_id,
+                    option_index=option_index,
+                    side=leg.get("side") or "buy",
+                    amount_in=leg.get("amount_in"),
+                    shares=leg.get("shares"),
+                    money_quant=money_quant,
+                    is_no_side=is_no_side,
+                )
+            )
+        except QuoteError as exc:
+            results.append(exc)
+    return results
+
+
+def quote_batch(
+    *,
+    market_id,
+    legs: Iterable[Dict],
+    money_quant: Decimal = Decimal("0.01"),
+) -> List[Union[Quote, QuoteError]]:
+    """Load the pool once (cached) and quote every leg; see quote_batch_from_state."""
+    state: PoolState = get_pool_state(market_id)
+    return quote_batch_from_state(state, legs, money_quant=money_quant)
+
+
+__all__ = [
+    "Quote",
+    "build_quote",
+    "quote",
+    "quote_batch",
+    "quote_batch_from_state",
+    "quote_from_state",
+    "get_pool_state",
+    "load_pool_state",
+    "PoolState",
+    "Number",
+]
 
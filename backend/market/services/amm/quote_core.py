@@ -2,67 +2,38 @@ from __future__ import annotations
 
 import math
 from decimal import Decimal, ROUND_DOWN, ROUND_UP
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional
 
 from .errors import QuoteInputError, QuoteMathError
-from .lmsr import buy_amount_to_delta_q, cost, prices
 from .money import (
+    MONEY_SCALE,
+    SHARES_SCALE,
     Number,
-    _bps_from_probabilities,
+    _ceil_div,
     _fee_rate_from_bps,
-    _finite_pos_float,
-    _quantize_money,
-    _quantize_shares,
-    _to_decimal,
+    _format_money,
+    _money_step,
+    _money_units_from_float,
+    _money_units_mul_bps,
+    _parse_units,
+    _units_from_float,
 )
+from .no_side import DEFAULT_NO_SIDE_MODE, no_buy_deltas, no_sell_deltas
 from .quote_math import _max_gross_payout, _solve_sell_shares_for_gross_payout
+from .quote_result import Quote
 from .state import PoolState, _resolve_target_idx
 
 
-def _compute_no_buy_deltas(
-    state: PoolState,
-    target_idx: int,
-    net_float: float,
-) -> Tuple[List[float], float]:
-    """
-    For buying "No" on option target_idx in an exclusive event:
-    Distribute the buy across all OTHER options proportionally to their probabilities.
-    
-    Returns (deltas, total_shares) where:
-      - deltas[j] is the q increase for option j (0 for target_idx)
-      - total_shares is the sum of shares bought (used for No share calculation)
-    """
-    n = len(state.q)
-    if n < 2:
-        raise QuoteMathError("Cannot buy No in a single-option pool")
-    
-    # Get current probabilities
-    probs = prices(state.q, state.b)
-    
-    # Calculate the sum of probabilities for all options except target
-    other_prob_sum = sum(probs[j] for j in range(n) if j != target_idx)
-    if other_prob_sum <= 0:
-        raise QuoteMathError("No other options available to distribute buy")
-    
-    # Distribute the amount proportionally to probabilities of other options
-    # Each other option j gets: amount * (p_j / sum_of_other_probs)
-    deltas = [0.0] * n
-    total_shares = 0.0
-    
-    for j in range(n):
-        if j == target_idx:
-            continue
-        # Proportion of the amount going to option j
-        amount_j = net_float * (probs[j] / other_prob_sum)
-        if amount_j > 0:
-            delta_j = float(buy_amount_to_delta_q(state.q, state.b, j, amount_j))
-            deltas[j] = delta_j
-            total_shares += delta_j
-    
-    return deltas, total_shares
+# Share units added on top of the closed-form shares_in before giving up.
+_SELL_SHARES_BUMPS = 64
 
 
-def quote_from_state(
+def _gross_up_micros(net_micros: int, fee_bps: int, step: int) -> int:
+    """net / (1 - fee), rounded UP to the money step."""
+    return _ceil_div(net_micros * 10000, (10000 - fee_bps) * step) * step
+
+
+def build_quote(
     state: PoolState,
     *,
     option_id: Optional[str] = None,
@@ -71,28 +42,13 @@ def quote_from_state(
     amount_in: Optional[Number] = None,
     shares: Optional[Number] = None,
     money_quant: Decimal = Decimal("0.01"),
-    is_no_side: bool = False,  # True if this is a No option in an exclusive event
-) -> Dict:
+    is_no_side: bool = False,
+    no_side_mode: Optional[str] = None,
+) -> Quote:
     """
-    Pure function quote:
-      - NO database access
-      - Deterministic rounding:
-          buy money: ROUND_UP (user pays)
-          sell money: ROUND_DOWN (user receives)
-
-    Exactly one of (amount_in, shares) must be provided.
-
-    Semantics:
-      BUY:
-        - amount_in provided: fee taken from amount_in, net goes to AMM -> shares_out
-        - shares provided: compute net_cost, gross-up with fee -> amount_in
-
-      SELL:
-        - shares provided: compute gross proceeds, fee taken -> amount_out (net)
-        - amount_in provided: interpret as desired NET amount_out, gross-up -> solve shares_in
-        
-      For exclusive events with is_no_side=True:
-        - BUY NO: distribute buy across all OTHER options, user gets No shares
+    Typed core of quote_from_state: same semantics, returns a Quote with money in
+    integer micro-units and shares in integer 1e-8 units. Execution consumes it
+    directly; quote_from_state is build_quote(...).to_json().
     """
     side = (side or "").lower()
     if side not in {"buy", "sell"}:
@@ -101,271 +57,239 @@ def quote_from_state(
     if (amount_in is None and shares is None) or (amount_in is not None and shares is not None):
         raise QuoteInputError("provide exactly one of amount_in or shares")
 
-    fee_rate = _fee_rate_from_bps(state.fee_bps)  # Decimal
-    one_minus_fee = (Decimal("1") - fee_rate)
+    fee_bps = state.fee_bps
+    _fee_rate_from_bps(fee_bps)  # validates range
+    step, _ = _money_step(money_quant)
 
     target_idx = _resolve_target_idx(state, option_id=option_id, option_index=option_index)
 
-    pre_probs = prices(state.q, state.b)
-    pre_prob_bps = _bps_from_probabilities(pre_probs)
-    p_k = float(pre_probs[target_idx])
+    # O(1) reads from the state's cached log-sum-exp; the pre-trade vector is
+    # built once per PoolState and shared by every quote against it.
+    p_k = float(state.price(target_idx))
 
-    def post_prob_bps_for(q_post):
-        return _bps_from_probabilities(prices(q_post, state.b))
+    no_mode = (no_side_mode or DEFAULT_NO_SIDE_MODE).lower()
 
     # ---------------- BUY ----------------
     if side == "buy":
         if amount_in is not None:
-            gross_in_dec = _to_decimal(amount_in, "amount_in")
-            if gross_in_dec <= 0:
+            gross_micros = _parse_units(amount_in, "amount_in", MONEY_SCALE, ROUND_UP)
+            if gross_micros <= 0:
                 raise QuoteInputError("amount_in must be > 0")
 
             # fee & net with explicit rounding (system-favorable)
-            fee_dec = _quantize_money(gross_in_dec * fee_rate, money_quant, ROUND_UP)
-            net_dec = gross_in_dec - fee_dec
-            if net_dec <= 0:
+            fee_micros = _money_units_mul_bps(gross_micros, fee_bps, step, up=True)
+            net_micros = gross_micros - fee_micros
+            if net_micros <= 0:
                 raise QuoteMathError("Amount too low to cover fees")
 
-            net_float = _finite_pos_float(net_dec, "amount_net")
-
-            if is_no_side and state.is_exclusive:
-                # BUY NO: distribute buy across all OTHER options
-                deltas, total_shares = _compute_no_buy_deltas(state, target_idx, net_float)
-                if total_shares <= 0:
+            net_float = net_micros / MONEY_SCALE
+
+            no_side = is_no_side and state.is_exclusive
+            deltas = None
+            if no_side:
+                # BUY NO: distribute buy across all OTHER options;
+                # deltas tell execution how to update each q
+                deltas, shares_float = no_buy_deltas(state, target_idx, net_float, mode=no_mode)
+            else:
+                # Standard BUY YES
+                shares_float = float(state.buy_delta_q(target_idx, net_float))
+                if not math.isfinite(shares_float):
                     raise QuoteMathError("Amount too low to produce any shares (after fees / rounding)")
 
-                q_post = list(state.q)
-                for j, d in enumerate(deltas):
-                    q_post[j] += d
-                post_prob_bps = post_prob_bps_for(q_post)
-
-                # avg price for No shares: total amount / total shares
-                shares_out_dec = _quantize_shares(total_shares)
-                avg_price_bps = int(round(float(gross_in_dec) / float(shares_out_dec) * 10000.0))
-
-                return {
-                    "market_id": state.market_id,
-                    "pool_id": state.pool_id,
-                    "option_id": state.option_ids[target_idx],  # The Yes option corresponding to this No
-                    "side": "buy",
-                    "is_no_side": True,
-                    "amount_in": str(_quantize_money(gross_in_dec, money_quant, ROUND_UP)),
-                    "shares_out": str(shares_out_dec),
-                    "fee_amount": str(fee_dec),
-                    "avg_price_bps": avg_price_bps,
-                    "pre_prob_bps": pre_prob_bps,
-                    "post_prob_bps": post_prob_bps,
-                    "option_ids": state.option_ids,
-                    "option_indexes": state.option_indexes,
-                    "no_buy_deltas": deltas,  # For execution to know how to update each q
-                }
-
-            # Standard BUY YES
-            delta = float(buy_amount_to_delta_q(state.q, state.b, target_idx, net_float))
-            if not (math.isfinite(delta) and delta > 0.0):
+            shares_units = _units_from_float(shares_float, SHARES_SCALE, up=False) if shares_float > 0 else 0
+            if shares_units <= 0:
                 raise QuoteMathError("Amount too low to produce any shares (after fees / rounding)")
 
-            q_post = list(state.q)
-            q_post[target_idx] += delta
-            post_prob_bps = post_prob_bps_for(q_post)
-
-            # avg price uses gross user paid (rounded) / shares
-            shares_out_dec = _quantize_shares(delta)
-            avg_price_bps = int(round(float(gross_in_dec) / float(shares_out_dec) * 10000.0))
-
-            return {
-                "market_id": state.market_id,
-                "pool_id": state.pool_id,
-                "option_id": state.option_ids[target_idx],
-                "side": "buy",
-                "amount_in": str(_quantize_money(gross_in_dec, money_quant, ROUND_UP)),
-                "shares_out": str(shares_out_dec),
-                "fee_amount": str(fee_dec),
-                "avg_price_bps": avg_price_bps,
-                "pre_prob_bps": pre_prob_bps,
-                "post_prob_bps": post_prob_bps,
-                "option_ids": state.option_ids,
-                "option_indexes": state.option_indexes,
-            }
+            # avg price uses gross user paid / shares
+            avg_price_bps = int(round(gross_micros * (SHARES_SCALE * 10000 // MONEY_SCALE) / shares_units))
+
+            return Quote(
+                state=state,
+                target_idx=target_idx,
+                side="buy",
+                amount_micros=_ceil_div(gross_micros, step) * step,
+                shares_units=shares_units,
+                fee_micros=fee_micros,
+                avg_price_bps=avg_price_bps,
+                money_quant=money_quant,
+                q_delta=shares_float,
+                is_no_side=no_side,
+                no_side_mode=no_mode if no_side else None,
+                deltas=deltas,
+            )
 
         # buy with shares
-        shares_dec = _to_decimal(shares, "shares")
-        if shares_dec <= 0:
+        shares_units = _parse_units(shares, "shares", SHARES_SCALE, ROUND_DOWN)
+        if shares_units <= 0:
             raise QuoteInputError("shares must be > 0")
-        shares_float = _finite_pos_float(shares_dec, "shares")
+        shares_float = shares_units / SHARES_SCALE
 
-        q_post = list(state.q)
-        q_post[target_idx] += shares_float
-
-        net_cost_float = float(cost(q_post, state.b) - cost(state.q, state.b))
+        net_cost_float = float(state.cost_delta(target_idx, shares_float))
         if not (math.isfinite(net_cost_float) and net_cost_float > 0.0):
             raise QuoteMathError("invalid net cost for buy(shares)")
 
-        net_cost_dec = _quantize_money(Decimal(str(net_cost_float)), money_quant, ROUND_UP)
-        if one_minus_fee <= 0:
-            raise QuoteInputError("fee too high")
-
-        gross_in_dec = _quantize_money(net_cost_dec / one_minus_fee, money_quant, ROUND_UP)
-        fee_dec = gross_in_dec - net_cost_dec
-
-        post_prob_bps = post_prob_bps_for(q_post)
-        avg_price_bps = int(round(float(gross_in_dec) / shares_float * 10000.0))
-
-        return {
-            "market_id": state.market_id,
-            "pool_id": state.pool_id,
-            "option_id": state.option_ids[target_idx],
-            "side": "buy",
-            "amount_in": str(gross_in_dec),
-            "shares_out": str(shares_dec),
-            "fee_amount": str(fee_dec),
-            "avg_price_bps": avg_price_bps,
-            "pre_prob_bps": pre_prob_bps,
-            "post_prob_bps": post_prob_bps,
-            "option_ids": state.option_ids,
-            "option_indexes": state.option_indexes,
-        }
+        net_cost_micros = _money_units_from_float(net_cost_float, step, up=True)
+        gross_micros = _gross_up_micros(net_cost_micros, fee_bps, step)
+        fee_micros = gross_micros - net_cost_micros
+
+        avg_price_bps = int(round(gross_micros / MONEY_SCALE / shares_float * 10000.0))
+
+        return Quote(
+            state=state,
+            target_idx=target_idx,
+            side="buy",
+            amount_micros=gross_micros,
+            shares_units=shares_units,
+            fee_micros=fee_micros,
+            avg_price_bps=avg_price_bps,
+            money_quant=money_quant,
+            q_delta=shares_float,
+        )
 
     # ---------------- SELL ----------------
     if shares is not None:
-        shares_dec = _to_decimal(shares, "shares")
-        if shares_dec <= 0:
+        shares_units = _parse_units(shares, "shares", SHARES_SCALE, ROUND_DOWN)
+        if shares_units <= 0:
             raise QuoteInputError("shares must be > 0")
-        shares_float = _finite_pos_float(shares_dec, "shares")
+        shares_float = shares_units / SHARES_SCALE
 
-        if is_no_side and state.is_exclusive:
+        no_side = is_no_side and state.is_exclusive
+        deltas = None
+        if no_side:
             # SELL NO: reduce q for all OTHER options (reverse of buy No)
-            n = len(state.q)
-            probs = prices(state.q, state.b)
-            other_prob_sum = sum(probs[j] for j in range(n) if j != target_idx)
-            if other_prob_sum <= 0:
-                raise QuoteMathError("No other options available for No sell")
-
-            # Distribute the shares reduction proportionally
-            deltas = [0.0] * n
-            for j in range(n):
-                if j == target_idx:
-                    continue
-                share_j = shares_float * (probs[j] / other_prob_sum)
-                deltas[j] = -share_j  # negative because we're reducing
-
-            q_post = list(state.q)
-            for j, d in enumerate(deltas):
-                q_post[j] += d
-
-            gross_float = float(cost(state.q, state.b) - cost(q_post, state.b))
+            deltas, gross_float = no_sell_deltas(state, target_idx, shares_float, mode=no_mode)
+            gross_float = float(gross_float)
             if not (math.isfinite(gross_float) and gross_float > 0.0):
                 raise QuoteMathError("invalid gross proceeds for sell No(shares)")
+        else:
+            # Standard SELL YES
+            gross_float = float(-state.cost_delta(target_idx, -shares_float))
+            if not (math.isfinite(gross_float) and gross_float > 0.0):
+                raise QuoteMathError("invalid gross proceeds for sell(shares)")
 
-            gross_dec = _quantize_money(Decimal(str(gross_float)), money_quant, ROUND_DOWN)
-            fee_dec = _quantize_money(gross_dec * fee_rate, money_quant, ROUND_UP)
-            net_out_dec = _quantize_money(gross_dec - fee_dec, money_quant, ROUND_DOWN)
-
-            if net_out_dec <= 0:
-                raise QuoteMathError("Proceeds too low after fees / rounding")
-
-            post_prob_bps = post_prob_bps_for(q_post)
-            avg_price_bps = int(round(float(net_out_dec) / shares_float * 10000.0))
-
-            return {
-                "market_id": state.market_id,
-                "pool_id": state.pool_id,
-                "option_id": state.option_ids[target_idx],
-                "side": "sell",
-                "is_no_side": True,
-                "amount_out": str(net_out_dec),
-                "shares_in": str(shares_dec),
-                "fee_amount": str(fee_dec),
-                "avg_price_bps": avg_price_bps,
-                "pre_prob_bps": pre_prob_bps,
-                "post_prob_bps": post_prob_bps,
-                "option_ids": state.option_ids,
-                "option_indexes": state.option_indexes,
-                "no_sell_deltas": deltas,
-            }
-
-        # Standard SELL YES
-        q_post = list(state.q)
-        q_post[target_idx] -= shares_float
-
-        gross_float = float(cost(state.q, state.b) - cost(q_post, state.b))
-        if not (math.isfinite(gross_float) and gross_float > 0.0):
-            raise QuoteMathError("invalid gross proceeds for sell(shares)")
-
-        gross_dec = _quantize_money(Decimal(str(gross_float)), money_quant, ROUND_DOWN)
-        fee_dec = _quantize_money(gross_dec * fee_rate, money_quant, ROUND_UP)
-        net_out_dec = _quantize_money(gross_dec - fee_dec, money_quant, ROUND_DOWN)
-
-        if net_out_dec <= 0:
-            raise QuoteMathError("Proceeds too low after fees / rounding")
+        gross_micros = _money_units_from_float(gross_float, step, up=False)
+        fee_micros = _money_units_mul_bps(gross_micros, fee_bps, step, up=True)
+        net_out_micros = gross_micros - fee_micros
 
-        post_prob_bps = post_prob_bps_for(q_post)
-        avg_price_bps = int(round(float(net_out_dec) / shares_float * 10000.0))
-
-        return {
-            "market_id": state.market_id,
-            "pool_id": state.pool_id,
-            "option_id": state.option_ids[target_idx],
-            "side": "sell",
-            "amount_out": str(net_out_dec),
-            "shares_in": str(shares_dec),
-            "fee_amount": str(fee_dec),
-            "avg_price_bps": avg_price_bps,
-            "pre_prob_bps": pre_prob_bps,
-            "post_prob_bps": post_prob_bps,
-            "option_ids": state.option_ids,
-            "option_indexes": state.option_indexes,
-        }
-
-    desired_net_out_dec = _to_decimal(amount_in, "amount_in")
-    if desired_net_out_dec <= 0:
-        raise QuoteInputError("amount_in (desired amount_out) must be > 0")
+        if net_out_micros <= 0:
+            raise QuoteMathError("Proceeds too low after fees / rounding")
 
-    desired_net_out_dec = _quantize_money(desired_net_out_dec, money_quant, ROUND_DOWN)
+        avg_price_bps = int(round(net_out_micros / MONEY_SCALE / shares_float * 10000.0))
+
+        return Quote(
+            state=state,
+            target_idx=target_idx,
+            side="sell",
+            amount_micros=net_out_micros,
+            shares_units=shares_units,
+            fee_micros=fee_micros,
+            avg_price_bps=avg_price_bps,
+            money_quant=money_quant,
+            q_delta=-shares_float,
+            is_no_side=no_side,
+            no_side_mode=no_mode if no_side else None,
+            deltas=deltas,
+        )
 
-    if one_minus_fee <= 0:
-        raise QuoteInputError("fee too high")
+    desired_micros = _parse_units(amount_in, "amount_in", MONEY_SCALE, ROUND_DOWN)
+    if desired_micros <= 0:
+        raise QuoteInputError("amount_in (desired amount_out) must be > 0")
 
-    gross_needed_dec = _quantize_money(desired_net_out_dec / one_minus_fee, money_quant, ROUND_UP)
-    gross_needed_float = float(gross_needed_dec)
+    desired_micros = (desired_micros // step) * step
+    gross_needed_micros = _gross_up_micros(desired_micros, fee_bps, step)
+    gross_needed_float = gross_needed_micros / MONEY_SCALE
 
     max_gross = _max_gross_payout(p_k, state.b)
     if gross_needed_float >= max_gross:
-        max_net = Decimal(str(max_gross)) * one_minus_fee
+        max_net_micros = _money_units_mul_bps(
+            _units_from_float(max_gross, MONEY_SCALE, up=False), 10000 - fee_bps, step, up=False
+        )
         raise QuoteMathError(
-            f"desired amount_out too large (max net≈{_quantize_money(max_net, money_quant, ROUND_DOWN)})"
+            f"desired amount_out too large (max net≈{_format_money(max_net_micros, money_quant)})"
         )
 
     shares_needed = _solve_sell_shares_for_gross_payout(p_k, state.b, gross_needed_float)
     if not (math.isfinite(shares_needed) and shares_needed > 0.0):
         raise QuoteMathError("invalid shares_in solved for sell(amount_out)")
 
-    shares_needed_dec = _quantize_shares(shares_needed)
-    q_post = list(state.q)
-    q_post[target_idx] -= float(shares_needed_dec)
-
-    gross_float = float(cost(state.q, state.b) - cost(q_post, state.b))
-    gross_dec = _quantize_money(Decimal(str(gross_float)), money_quant, ROUND_DOWN)
-    fee_dec = _quantize_money(gross_dec * fee_rate, money_quant, ROUND_UP)
-    net_out_dec = _quantize_money(gross_dec - fee_dec, money_quant, ROUND_DOWN)
-
-    post_prob_bps = post_prob_bps_for(q_post)
-    avg_price_bps = int(round(float(net_out_dec) / float(shares_needed_dec) * 10000.0))
-
-    return {
-        "market_id": state.market_id,
-        "pool_id": state.pool_id,
-        "option_id": state.option_ids[target_idx],
-        "side": "sell",
-        "amount_out": str(net_out_dec),
-        "shares_in": str(shares_needed_dec),
-        "fee_amount": str(fee_dec),
-        "avg_price_bps": avg_price_bps,
-        "pre_prob_bps": pre_prob_bps,
-        "post_prob_bps": post_prob_bps,
-        "option_ids": state.option_ids,
-        "option_indexes": state.option_indexes,
-        "requested_amount_out": str(desired_net_out_dec),
-        "gross_needed": str(gross_needed_dec),
-    }
+    shares_units = _units_from_float(shares_needed, SHARES_SCALE, up=False)
+    # Flooring shares_in (and the proceeds) can land one money step short of the
+    # request: add share units until the net proceeds cover it.
+    for _ in range(_SELL_SHARES_BUMPS + 1):
+        shares_needed_float = shares_units / SHARES_SCALE
+        gross_float = float(-state.cost_delta(target_idx, -shares_needed_float))
+        gross_micros = _money_units_from_float(gross_float, step, up=False)
+        fee_micros = _money_units_mul_bps(gross_micros, fee_bps, step, up=True)
+        net_out_micros = gross_micros - fee_micros
+        if net_out_micros >= desired_micros:
+            break
+        shares_units += 1
+    else:
+        raise QuoteMathError("could not solve shares_in for sell(amount_out)")
+
+    avg_price_bps = int(round(net_out_micros / MONEY_SCALE / shares_needed_float * 10000.0))
+
+    return Quote(
+        state=state,
+        target_idx=target_idx,
+        side="sell",
+        amount_micros=net_out_micros,
+        shares_units=shares_units,
+        fee_micros=fee_micros,
+        avg_price_bps=avg_price_bps,
+        money_quant=money_quant,
+        q_delta=-shares_needed_float,
+        requested_amount_out_micros=desired_micros,
+        gross_needed_micros=gross_needed_micros,
+    )
+
 
+def quote_from_state(
+    state: PoolState,
+    *,
+    option_id: Optional[str] = None,
+    option_index: Optional[int] = None,
+    side: str = "buy",
+    amount_in: Optional[Number] = None,
+    shares: Optional[Number] = None,
+    money_quant: Decimal = Decimal("0.01"),
+    is_no_side: bool = False,  # True if this is a No option in an exclusive event
+    no_side_mode: Optional[str] = None,
+) -> Dict:
+    """
+    Pure function quote:
+      - NO database access
+      - Deterministic rounding:
+          buy money: ROUND_UP (user pays)
+          sell money: ROUND_DOWN (user receives)
+
+    Exactly one of (amount_in, shares) must be provided.
+
+    Semantics:
+      BUY:
+        - amount_in provided: fee taken from amount_in, net goes to AMM -> shares_out
+        - shares provided: compute net_cost, gross-up with fee -> amount_in
+
+      SELL:
+        - shares provided: compute gross proceeds, fee taken -> amount_out (net)
+        - amount_in provided: interpret as desired NET amount_out, gross-up -> solve shares_in
+
+      For exclusive events with is_no_side=True:
+        - BUY NO: distribute buy across all OTHER options, user gets No shares
+        - no_side_mode: "proportional" (legacy split) or "complement" (exact all-but-i),
+          defaults to AMM_NO_SIDE_MODE; see no_side.py
+
+    Internally everything runs on integer micro-units / 1e-8 share units
+    (build_quote); strings are produced here only.
+    """
+    return build_quote(
+        state,
+        option_id=option_id,
+        option_index=option_index,
+        side=side,
+        amount_in=amount_in,
+        shares=shares,
+        money_quant=money_quant,
+        is_no_side=is_no_side,
+        no_side_mode=no_side_mode,
+    ).to_json()
@@ -1,46 +1,115 @@
 import math
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
-from ...models import AmmPool, AmmPoolOptionState, Market, MarketOption
-from .errors import QuoteMathError, QuoteNotFoundError
+from django.core.exceptions import ValidationError
+from django.db import connection
+
+from ...models import AmmPool, AmmPoolOptionState, Event, Market, MarketOption
+from .errors import PoolStateNotFoundError, QuoteMathError, QuoteNotFoundError
 from .money import _fee_rate_from_bps
+from .option_map import no_to_yes_for_pool
 from .state import PoolState
 
 
-def load_pool_state(market_id) -> PoolState:
+_OPTION_MARKET = MarketOption._meta.get_field("market")
+
+
+@lru_cache(maxsize=2)
+def _pool_rows_sql(lock: bool) -> str:
     """
-    Read-only ORM fetch and normalize into PoolState.
-    Supports both market-level pools and event-level pools (for exclusive events).
+    Pool (market-level first, else the market's event-level pool) joined to its
+    option states in one statement. Locking takes FOR UPDATE OF the pool and state
+    rows only (not markets / events / options).
     """
-    # Try market-level pool first
-    pool = AmmPool.objects.filter(market_id=market_id).first()
-    
-    is_exclusive = False
-    event = None
-    
-    # If no market-level pool, check for event-level pool (exclusive events)
-    if pool is None:
-        try:
-            market = Market.objects.select_related("event").get(pk=market_id)
-            if market.event_id:
-                pool = AmmPool.objects.filter(event_id=market.event_id).first()
-                if pool is not None:
-                    event = market.event
-                    is_exclusive = (event.group_rule or "").strip().lower() == "exclusive"
-        except Market.DoesNotExist:
-            pass
-    
-    if pool is None:
-        raise QuoteNotFoundError("AMM pool not found for market")
+    pool_cols = ", ".join(f"p.{f.column}" for f in AmmPool._meta.concrete_fields)
+    state_cols = ", ".join(f"s.{f.column}" for f in AmmPoolOptionState._meta.concrete_fields)
+    sql = f"""
+        WITH target AS (
+            SELECT c.id FROM (
+                SELECT p.id, 0 AS pick FROM {AmmPool._meta.db_table} p WHERE p.market_id = %s
+                UNION ALL
+                SELECT p.id, 1 AS pick
+                FROM {Market._meta.db_table} m
+                JOIN {AmmPool._meta.db_table} p ON p.event_id = m.event_id
+                WHERE m.id = %s
+            ) c
+            ORDER BY c.pick
+            LIMIT 1
+        )
+        SELECT {pool_cols}, e.group_rule, o.option_index, o.market_id, {state_cols}
+        FROM target t
+        JOIN {AmmPool._meta.db_table} p ON p.id = t.id
+        LEFT JOIN {Event._meta.db_table} e ON e.id = p.event_id
+        JOIN {AmmPoolOptionState._meta.db_table} s ON s.pool_id = p.id
+        JOIN {MarketOption._meta.db_table} o ON o.id = s.option_id
+        ORDER BY o.option_index, s.option_id
+    """
+    if lock and connection.features.has_select_for_update:
+        sql += " FOR UPDATE OF p, s" if connection.features.has_select_for_update_of else " FOR UPDATE"
+    return sql
+
 
-    states = list(
-        AmmPoolOptionState.objects.select_related("option")
-        .filter(pool=pool)
-        .order_by("option__option_index", "option_id")
+def _from_row(model, values):
+    fields = model._meta.concrete_fields
+    return model.from_db(
+        connection.alias,
+        [f.attname for f in fields],
+        [f.to_python(v) for f, v in zip(fields, values)],
     )
-    if not states:
-        raise QuoteNotFoundError("AMM pool option state not found")
 
+
+def load_pool_rows(market_id, *, lock: bool = False) -> Tuple[AmmPool, List[AmmPoolOptionState], PoolState]:
+    """
+    Single builder for quoting (lock=False) and execution (lock=True, inside a
+    transaction): resolves the pool and its option states in one round trip and
+    returns (pool, option_states, PoolState). Supports market-level pools and
+    event-level pools (exclusive events).
+    """
+    try:
+        key = Market._meta.pk.get_db_prep_value(market_id, connection)
+    except ValidationError:
+        raise QuoteNotFoundError("AMM pool not found for market")
+
+    with connection.cursor() as cursor:
+        cursor.execute(_pool_rows_sql(lock), [key, key])
+        rows = cursor.fetchall()
+
+    if not rows:
+        # Error path only: tell "no pool" from "pool without states".
+        if (
+            AmmPool.objects.filter(market_id=market_id).exists()
+            or AmmPool.objects.filter(event__markets__id=market_id).exists()
+        ):
+            raise PoolStateNotFoundError("AMM pool option state not found")
+        raise QuoteNotFoundError("AMM pool not found for market")
+
+    n_pool = len(AmmPool._meta.concrete_fields)
+    pool = _from_row(AmmPool, rows[0][:n_pool])
+    group_rule = rows[0][n_pool]
+    # Only event-level pools belong to exclusive events (market-level pools win).
+    is_exclusive = pool.event_id is not None and (group_rule or "").strip().lower() == "exclusive"
+
+    option_states: List[AmmPoolOptionState] = []
+    option_ids: List[str] = []
+    option_indexes: List[int] = []
+    q: List[float] = []
+    for row in rows:
+        st = _from_row(AmmPoolOptionState, row[n_pool + 3:])
+        # st.option without a query (what select_related("option") used to give)
+        opt = MarketOption.from_db(
+            connection.alias,
+            ["id", "market_id", "option_index"],
+            [st.option_id, _OPTION_MARKET.to_python(row[n_pool + 2]), row[n_pool + 1]],
+        )
+        AmmPoolOptionState.option.field.set_cached_value(st, opt)
+        option_states.append(st)
+        option_ids.append(str(st.option_id))
+        option_indexes.append(int(row[n_pool + 1]))
+        q.append(float(st.q))
+
+    if pool.b is None:
+        raise QuoteMathError("pool.b must be positive finite")
     b = float(pool.b)
     if not (math.isfinite(b) and b > 0.0):
         raise QuoteMathError("pool.b must be positive finite")
@@ -48,42 +117,15 @@ def load_pool_state(market_id) -> PoolState:
     fee_bps = int(pool.fee_bps or 0)
     _ = _fee_rate_from_bps(fee_bps)  # validates range
 
-    option_ids: List[str] = []
-    option_indexes: List[int] = []
-    q: List[float] = []
-    for s in states:
-        opt: MarketOption = s.option
-        option_ids.append(str(opt.id))
-        option_indexes.append(int(opt.option_index))
-        q.append(float(s.q))
-
     option_id_to_idx = {oid: i for i, oid in enumerate(option_ids)}
-    option_index_to_idx = {oi: i for i, oi in enumerate(option_indexes)}
-    
-    # Build no_to_yes_option_id mapping for exclusive events
-    no_to_yes_option_id: Dict[str, Tuple[str, int]] = {}
-    if is_exclusive:
-        # For each Yes option in the pool, find its No counterpart
-        yes_option_ids = [int(oid) for oid in option_ids]
-        yes_options = MarketOption.objects.filter(id__in=yes_option_ids).values_list("id", "market_id")
-        yes_market_ids = [m_id for _, m_id in yes_options]
-        yes_opt_by_market = {m_id: opt_id for opt_id, m_id in yes_options}
-        
-        # Find No counterparts (side='no' in the same markets)
-        no_options = list(
-            MarketOption.objects.filter(market_id__in=yes_market_ids, side="no", is_active=True)
-            .values_list("id", "market_id")
-        )
-        for no_opt_id, m_id in no_options:
-            yes_opt_id = yes_opt_by_market.get(m_id)
-            if yes_opt_id is not None:
-                yes_opt_str = str(yes_opt_id)
-                if yes_opt_str in option_id_to_idx:
-                    pool_idx = option_id_to_idx[yes_opt_str]
-                    no_to_yes_option_id[str(no_opt_id)] = (yes_opt_str, pool_idx)
-
-    return PoolState(
-        market_id=str(market_id),  # Use the passed market_id, consistent with execution
+
+    # Exclusive events: No option -> (Yes option, pool idx), cached per pool
+    no_to_yes_option_id: Dict[str, Tuple[str, int]] = (
+        no_to_yes_for_pool(pool, option_id_to_idx) if is_exclusive else {}
+    )
+
+    state = PoolState(
+        market_id=str(market_id),  # the requested market, not pool.market_id (None for event pools)
         pool_id=str(pool.id),
         b=b,
         fee_bps=fee_bps,
@@ -91,9 +133,14 @@ def load_pool_state(market_id) -> PoolState:
         option_indexes=option_indexes,
         q=q,
         option_id_to_idx=option_id_to_idx,
-        option_index_to_idx=option_index_to_idx,
+        option_index_to_idx={oi: i for i, oi in enumerate(option_indexes)},
         no_to_yes_option_id=no_to_yes_option_id,
         is_exclusive=is_exclusive,
+        version=int(pool.version or 0),
     )
+    return pool, option_states, state
 
 
+def load_pool_state(market_id) -> PoolState:
+    """Read-only fetch normalized into PoolState (see load_pool_rows)."""
+    return load_pool_rows(market_id)[2]
@@ -0,0 +1,110 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from .money import _format_money, _format_shares
+from .no_side import no_post_prob_bps
+from .state import PoolState
+
+
+@dataclass(frozen=True, slots=True)
+class Quote:
+    """
+    Typed quote result (see quote_core.build_quote).
+
+    Money is integer micro-units, shares integer 1e-8 units. Pool metadata
+    (option_ids, option_indexes, pre_prob_bps) are shared references into the
+    PoolState, and post_prob_bps is computed on first access, so building many
+    quotes against one state allocates no per-quote lists.
+
+      buy:  amount_micros = amount_in,  shares_units = shares_out
+      sell: amount_micros = amount_out, shares_units = shares_in
+    """
+
+    state: PoolState
+    target_idx: int
+    side: str
+    amount_micros: int
+    shares_units: int
+    fee_micros: int
+    avg_price_bps: int
+    money_quant: Decimal = Decimal("0.01")
+    # Signed q change on target_idx (single-outcome trades); post probs derive from it.
+    q_delta: float = 0.0
+    is_no_side: bool = False
+    no_side_mode: Optional[str] = None
+    # Per-outcome q deltas for No-side trades (exclusive events).
+    deltas: Optional[List[float]] = None
+    # sell(amount_out) only
+    requested_amount_out_micros: Optional[int] = None
+    gross_needed_micros: Optional[int] = None
+    _post_prob_bps: Optional[List[int]] = field(default=None, repr=False, compare=False)
+
+    # ---- shared pool metadata ----
+    @property
+    def market_id(self) -> str:
+        return self.state.market_id
+
+    @property
+    def pool_id(self) -> str:
+        return self.state.pool_id
+
+    @property
+    def option_id(self) -> str:
+        return self.state.option_ids[self.target_idx]
+
+    @property
+    def pre_prob_bps(self) -> List[int]:
+        return self.state.prob_bps()
+
+    @property
+    def post_prob_bps(self) -> List[int]:
+        if self._post_prob_bps is None:
+            if self.deltas is not None:
+                post = no_post_prob_bps(self.state, self.target_idx, self.deltas, mode=self.no_side_mode)
+            else:
+                post = self.state.post_prob_bps(self.target_idx, self.q_delta)
+            object.__setattr__(self, "_post_prob_bps", post)
+        return self._post_prob_bps
+
+    def to_json(self, *, include_pool: bool = True) -> Dict:
+        """
+        API dict (money/shares as fixed-point strings), same keys as the legacy
+        quote dicts. include_pool=False drops option_ids/option_indexes/pre_prob_bps
+        for callers that send them once per batch.
+        """
+        buy = self.side == "buy"
+        out: Dict = {
+            "market_id": self.market_id,
+            "pool_id": self.pool_id,
+            "option_id": self.option_id,
+            "side": self.side,
+        }
+        if self.is_no_side:
+            out["is_no_side"] = True
+        amount = _format_money(self.amount_micros, self.money_quant)
+        shares = _format_shares(self.shares_units)
+        if buy:
+            out["amount_in"] = amount
+            out["shares_out"] = shares
+        else:
+            out["amount_out"] = amount
+            out["shares_in"] = shares
+        out["fee_amount"] = _format_money(self.fee_micros, self.money_quant)
+        out["avg_price_bps"] = self.avg_price_bps
+        if include_pool:
+            out["pre_prob_bps"] = self.pre_prob_bps
+        out["post_prob_bps"] = self.post_prob_bps
+        if include_pool:
+            out["option_ids"] = self.state.option_ids
+            out["option_indexes"] = self.state.option_indexes
+        if self.deltas is not None:
+            out["no_buy_deltas" if buy else "no_sell_deltas"] = self.deltas
+            out["no_side_mode"] = self.no_side_mode
+        if self.requested_amount_out_micros is not None:
+            out["requested_amount_out"] = _format_money(self.requested_amount_out_micros, self.money_quant)
+            out["gross_needed"] = _format_money(self.gross_needed_micros, self.money_quant)
+        return out
+
+
+__all__ = ["Quote"]
@@ -0,0 +1,606 @@
+"""
+Per-pool single-writer trade sequencer (AMM_EXECUTION_MODE=sequencer).
+
+On the locking path every trade on a hot pool is its own transaction holding the
+market/option, pool/state, balance and position row locks for a dozen round trips,
+so a pool tops out at one trade per transaction latency. In sequencer mode each
+pool is owned by one thread in this process that:
+
+  - keeps the pool's q (option state rows + PoolState) in memory,
+  - applies queued trades in arrival order with the locking path's own quote and
+    validation helpers (build_quote, slippage guards, balance / share checks),
+  - group-commits the batch (balances, positions, q, order intents, trades, pool
+    cash, outbox rows) in ONE transaction of bulk statements, at most every
+    AMM_SEQUENCER_WINDOW_MS or AMM_SEQUENCER_BATCH_SIZE trades.
+
+A trade that fails validation fails alone; the rest of its batch commits. If the
+commit itself fails, the batch is retried one trade at a time.
+
+Recovery: a caller only gets its result after its batch has committed, so the DB
+is always the source of truth. Each batch starts with one locked read of the pool
+and state rows; if they no longer match memory (settlement, admin, a worker still
+on the locking path, a restart) the memory is rebuilt from the DB. After a failed
+batch or an idle timeout the memory is dropped and reloaded on the next batch.
+
+Callers block until their batch commits. The sequencer commits on its own
+connection: do not call it inside a transaction whose uncommitted rows the trade
+needs. Route a pool's traffic to one process for best batching; correctness does
+not depend on it (the per-batch row locks still serialize other writers).
+"""
+
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from ...models import (
+    AmmPool,
+    AmmPoolOptionState,
+    BalanceSnapshot,
+    Event,
+    Market,
+    MarketOption,
+    OrderIntent,
+    Position,
+    Trade,
+    TradeOutbox,
+)
+from .errors import QuoteError
+from .exposure import ExposureDeltas, add_exposure, merge_exposure
+from .idempotency import remember_order_results
+from .q_writer import apply_q_deltas, merge_q_deltas
+from .execution import (
+    DEFAULT_TOKEN,
+    DUST_THRESHOLD,
+    MONEY_QUANT,
+    ExecutionError,
+    _apply_trade_q,
+    _buy_response,
+    _check_market_open,
+    _dust_response,
+    _lock_balance,
+    _lock_pool_state,
+    _order_intent_row,
+    _pool_load_error,
+    _pool_locked_first,
+    _quote_buy,
+    _quote_sell,
+    _recompute_option_probs,
+    _resolve_trade_target,
+    _resolve_wallet,
+    _sell_response,
+    _trade_row,
+    _update_stats_volume,
+    _write_pool,
+)
+from .outbox import side_effects_inline, trade_outbox_row
+from .pool_cache import get_pool_state
+from .state import PoolState
+from .trade_profile import profile_trade
+
+logger = logging.getLogger(__name__)
+
+SEQUENCER_WINDOW_MS = float(os.getenv("AMM_SEQUENCER_WINDOW_MS", "2"))
+SEQUENCER_BATCH_SIZE = int(os.getenv("AMM_SEQUENCER_BATCH_SIZE", "64"))
+SEQUENCER_TIMEOUT = float(os.getenv("AMM_SEQUENCER_TIMEOUT", "10"))
+SEQUENCER_IDLE_SECONDS = float(os.getenv("AMM_SEQUENCER_IDLE_SECONDS", "60"))
+
+
+@dataclass
+class TradeRequest:
+    """One parsed execute_buy / execute_sell call, waiting for its batch."""
+
+    side: str  # "buy" | "sell"
+    user: Any
+    market_id: Any
+    option_id: Optional[str]
+    option_index: Optional[int]
+    token: str = DEFAULT_TOKEN
+    wallet_id: Optional[str] = None
+    wallet: Any = None  # resolved by the caller before submit
+    client_nonce: Optional[str] = None
+    request_hash: Optional[str] = None  # idempotency.order_fingerprint of a nonce'd order
+    money_quant: Decimal = MONEY_QUANT
+    # buy
+    amount_in: Optional[Decimal] = None
+    min_shares_units: Optional[int] = None
+    max_slippage_bps: Optional[int] = None
+    # sell
+    shares: Optional[Decimal] = None
+    desired_out: Optional[Decimal] = None
+    sell_all: bool = False
+    min_amount_out: Optional[Decimal] = None
+    future: Future = field(default_factory=Future, repr=False, compare=False)
+
+
+class _Batch:
+    """
+    Rows locked for one batch plus the writes it accumulates. One per pool; a
+    batch spanning pools (batch_orders) shares the account side (markets, options,
+    balances, positions, intents, outbox) of its first context via `accounts`.
+    """
+
+    _ACCOUNT_FIELDS = (
+        "markets", "events", "options_by_id", "options_by_index", "balances", "positions",
+        "dirty_balances", "dirty_positions", "exposure", "intents", "responses", "outbox", "volume",
+    )
+
+    def __init__(
+        self,
+        pool: AmmPool,
+        option_states: List[AmmPoolOptionState],
+        state: PoolState,
+        now,
+        accounts: Optional["_Batch"] = None,
+    ):
+        self.pool = pool
+        self.option_states = option_states
+        self.state = state
+        self.now = now
+        self.q_deltas: Dict[int, Decimal] = {}
+        self.pool_cash_delta = Decimal("0")
+        if accounts is not None:
+            for name in self._ACCOUNT_FIELDS:
+                setattr(self, name, getattr(accounts, name))
+            return
+        self.markets: Dict[str, Market] = {}
+        self.events: Dict[Any, Event] = {}
+        self.options_by_id: Dict[str, MarketOption] = {}
+        self.options_by_index: Dict[Tuple[str, int], MarketOption] = {}
+        self.balances: Dict[Tuple[Any, str], BalanceSnapshot] = {}
+        self.positions: Dict[Tuple[Any, Any], Position] = {}
+        self.dirty_balances: Dict[Tuple[Any, str], BalanceSnapshot] = {}
+        self.dirty_positions: Dict[Tuple[Any, Any], Position] = {}
+        self.exposure: ExposureDeltas = {}
+        self.intents: List[Tuple[OrderIntent, Any]] = []  # (intent, quote); quote None: dust close, no trade
+        self.responses: List[Tuple[OrderIntent, Dict]] = []
+        self.outbox: List[TradeOutbox] = []
+        self.volume: List[Tuple[Any, Decimal]] = []
+
+    def resolve(self, req: TradeRequest) -> Tuple[Market, MarketOption]:
+        """_lock_market_and_option's checks against the batch's locked rows."""
+        market = self.markets.get(str(req.market_id))
+        if market is None:
+            raise ExecutionError("Market not found", code="MARKET_NOT_FOUND", http_status=404)
+        _check_market_open(market, self.events.get(market.event_id), self.now)
+
+        if not req.option_id and req.option_index is None:
+            raise ExecutionError("option_id or option_index is required", code="INVALID_PARAM", http_status=400)
+        if req.option_id:
+            option = self.options_by_id.get(str(req.option_id))
+            if option is not None and str(option.market_id) != str(market.id):
+                option = None
+        else:
+            option = self.options_by_index.get((str(market.id), int(req.option_index)))
+        if option is None:
+            raise ExecutionError("Option not found for market", code="OPTION_NOT_FOUND", http_status=404)
+        if not option.is_active:
+            raise ExecutionError("Option is not active", code="OPTION_NOT_ACTIVE", http_status=400)
+
+        pool = self.pool
+        if pool.market_id != market.id and (pool.event_id is None or pool.event_id != market.event_id):
+            raise ExecutionError("Option not present in pool state", code="POOL_MISMATCH", http_status=422)
+        return market, option
+
+    def balance(self, user_id, token: str) -> BalanceSnapshot:
+        bal = self.balances.get((user_id, token))
+        if bal is None:
+            bal = self.balances[(user_id, token)] = _lock_balance(user_id, token, self.now)
+        return bal
+
+    def position(self, user_id, market: Market, option: MarketOption, *, create: bool) -> Optional[Position]:
+        pos = self.positions.get((user_id, option.id))
+        if pos is None and create:
+            pos = self.positions[(user_id, option.id)] = Position(
+                user_id=user_id,
+                market=market,
+                option=option,
+                shares=Decimal("0"),
+                cost_basis=Decimal("0"),
+                created_at=self.now,
+                updated_at=self.now,
+            )
+        return pos
+
+    def move_q(self, quote, is_no_side: bool, target_idx: int, shares_delta: Decimal) -> None:
+        deltas = _apply_trade_q(self.option_states, quote, is_no_side, target_idx, shares_delta, self.now)
+        merge_q_deltas(self.q_deltas, deltas)
+        for option_id in deltas:
+            idx = self.state.option_id_to_idx[str(option_id)]
+            self.state.apply_delta(idx, float(self.option_states[idx].q) - self.state.q[idx])
+
+    def record(self, req: TradeRequest, market, option, wallet, quote, amount, shares) -> OrderIntent:
+        intent = _order_intent_row(
+            req.user, wallet, market, option, req.side, amount, shares, req.client_nonce, self.now, req.request_hash
+        )
+        self.intents.append((intent, quote))
+        return intent
+
+    def respond(self, intent: OrderIntent, response: Dict) -> Dict:
+        # Built before move_q (the quote's probs read the live state);
+        # order_intent_id is filled in once the batch's intents are inserted.
+        self.responses.append((intent, response))
+        return response
+
+    def side_effects(self, option_id, amount: Decimal) -> None:
+        """After move_q: the outbox row carries the post-trade probs."""
+        if side_effects_inline():
+            self.volume.append((option_id, amount))
+        else:
+            self.outbox.append(trade_outbox_row(self.state, self.option_states, option_id, amount, self.now))
+
+
+class PoolSequencer:
+    """Single writer for one pool. submit() from any thread; batches run on one thread."""
+
+    def __init__(self, pool_id):
+        self.pool_id = str(pool_id)
+        self._queue: "queue.Queue[TradeRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # Authoritative between batches (checked against the locked rows per batch)
+        self._option_states: Optional[List[AmmPoolOptionState]] = None
+        self._state: Optional[PoolState] = None
+
+    def submit(self, req: TradeRequest) -> Future:
+        self._queue.put(req)
+        return req.future
+
+    def drain(self) -> int:
+        """Run everything queued on the calling thread. Returns trades processed."""
+        done = 0
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                return done
+            self.run_batch(batch)
+            done += len(batch)
+
+    def reset(self) -> None:
+        """Drop the in-memory q; the next batch reloads it from the DB."""
+        self._option_states = None
+        self._state = None
+
+    # ---- thread ----
+    def _start(self) -> None:
+        # caller holds _registry_lock
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"amm-sequencer-{self.pool_id}", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                batch = self._take(block=True)
+                if not batch:
+                    with _registry_lock:
+                        if self._queue.empty():
+                            self._thread = None
+                            self.reset()
+                            return
+                    continue
+                close_old_connections()
+                self.run_batch(batch)
+        finally:
+            connection.close()
+
+    def _take(self, *, block: bool) -> List[TradeRequest]:
+        try:
+            first = self._queue.get(timeout=SEQUENCER_IDLE_SECONDS) if block else self._queue.get_nowait()
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + SEQUENCER_WINDOW_MS / 1000.0
+        while len(batch) < SEQUENCER_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if block and remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Callers that timed out and cancelled are dropped here, before any work.
+        return [req for req in batch if req.future.set_running_or_notify_cancel()]
+
+    # ---- batch ----
+    def run_batch(self, batch: List[TradeRequest]) -> None:
+        committed: List[bool] = []
+        outcomes: List[Any] = []
+        try:
+            self._commit(batch, outcomes, committed)
+        except Exception as exc:
+            if committed:
+                # Only an on_commit hook failed; the trades are in.
+                logger.exception("AMM sequencer post-commit hook failed", extra={"pool_id": self.pool_id})
+            else:
+                self.reset()
+                if len(batch) > 1:
+                    for req in batch:
+                        self.run_batch([req])
+                    return
+                if not isinstance(exc, ExecutionError):
+                    logger.exception("AMM sequencer batch failed", extra={"pool_id": self.pool_id})
+                    exc = ExecutionError("Trade could not be committed", code="SEQUENCER_COMMIT_FAILED", http_status=503)
+                batch[0].future.set_exception(exc)
+                return
+
+        for req, outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                req.future.set_exception(outcome)
+            else:
+                req.future.set_result(outcome)
+
+    def _commit(self, batch: List[TradeRequest], outcomes: List[Any], committed: List[bool]) -> None:
+        """Fills outcomes (response dict or ExecutionError per request) and commits."""
+        with profile_trade("batch", pool_id=self.pool_id, trades=len(batch)) as prof, transaction.atomic():
+            transaction.on_commit(lambda: committed.append(True))
+            ctx = self._lock(batch)
+
+            prof.mark("quote")
+            for req in batch:
+                try:
+                    outcomes.append(apply_buy(req, ctx) if req.side == "buy" else apply_sell(req, ctx))
+                except ExecutionError as exc:
+                    outcomes.append(exc)
+
+            prof.mark("persist")
+            write_accounts(ctx)
+            # Pool row is locked by _sync: a plain write (version bump included)
+            write_pool_state(ctx, locked=True)
+
+    def _lock(self, batch: List[TradeRequest]) -> _Batch:
+        """
+        Same lock order as execute_* and batch_orders: markets + options, balances,
+        positions, then the pool row + states (optimistic mode writes the pool
+        last). With AMM_POOL_CONCURRENCY=locking the pool/states come before the
+        balances, as they do on the locking path there.
+        """
+        now = timezone.now()
+        market_ids = {str(req.market_id) for req in batch}
+        markets = {
+            str(m.id): m for m in Market.objects.select_for_update().filter(pk__in=market_ids).order_by("id")
+        }
+        options = list(
+            MarketOption.objects.select_for_update().filter(market_id__in=[m.id for m in markets.values()]).order_by("id")
+        )
+
+        synced = self._sync(batch[0].market_id) if _pool_locked_first() else None
+        user_ids = {req.user.id for req in batch}
+        tokens = {req.token for req in batch}
+        balances = list(
+            BalanceSnapshot.objects.select_for_update().filter(user_id__in=user_ids, token__in=tokens).order_by("user_id", "token")
+        )
+        positions = list(
+            Position.objects.select_for_update()
+            .filter(user_id__in=user_ids, option_id__in=[o.id for o in options])
+            .order_by("user_id", "option_id")
+        )
+        pool, option_states, state = synced or self._sync(batch[0].market_id)
+
+        ctx = _Batch(pool, option_states, state, now)
+        ctx.markets = markets
+        event_ids = {m.event_id for m in markets.values() if m.event_id}
+        if event_ids:
+            ctx.events = {e.id: e for e in Event.objects.filter(pk__in=event_ids)}
+        for opt in options:
+            ctx.options_by_id[str(opt.id)] = opt
+            ctx.options_by_index[(str(opt.market_id), opt.option_index)] = opt
+
+        for bal in balances:
+            ctx.balances.setdefault((bal.user_id, bal.token), bal)
+        for pos in positions:
+            ctx.positions[(pos.user_id, pos.option_id)] = pos
+        return ctx
+
+    def _sync(self, market_id) -> Tuple[AmmPool, List[AmmPoolOptionState], PoolState]:
+        """Locked read of pool + states; keep the in-memory q unless the DB moved under us."""
+        pool, option_states, state = _lock_pool_state(market_id)
+        if str(pool.id) != self.pool_id:
+            raise ExecutionError("Option not present in pool state", code="POOL_MISMATCH", http_status=422)
+        mem = self._option_states
+        if mem is not None and _same_q(mem, option_states):
+            return pool, mem, self._state
+        if mem is not None:
+            logger.warning("AMM pool changed outside the sequencer; reloaded", extra={"pool_id": self.pool_id})
+        self._option_states, self._state = option_states, state
+        return pool, option_states, state
+
+
+def apply_buy(req: TradeRequest, ctx: _Batch) -> Dict:
+    """Validate and apply one buy to the batch in memory (nothing is touched if it fails)."""
+    market, option = ctx.resolve(req)
+    is_no_side, quote_option_id, target_idx = _resolve_trade_target(ctx.state, option, req.option_id)
+
+    amt = req.amount_in
+    balance = ctx.balance(req.user.id, req.token)
+    if balance.available_amount < amt:
+        raise ExecutionError("Insufficient balance", code="INSUFFICIENT_BALANCE", http_status=400)
+
+    quote, shares_out = _quote_buy(
+        ctx.state,
+        quote_option_id=quote_option_id,
+        option_index=req.option_index if not is_no_side else None,
+        is_no_side=is_no_side,
+        target_idx=target_idx,
+        amt=amt,
+        money_quant=req.money_quant,
+        min_shares_units=req.min_shares_units,
+        max_slippage_bps=req.max_slippage_bps,
+    )
+    wallet = req.wallet or _resolve_wallet(req.user, req.wallet_id)
+
+    # Validated: apply in memory
+    now = ctx.now
+    balance.available_amount = Decimal(balance.available_amount) - amt
+    balance.updated_at = now
+    ctx.dirty_balances[(req.user.id, req.token)] = balance
+
+    position = ctx.position(req.user.id, market, option, create=True)
+    position.shares = Decimal(position.shares) + shares_out
+    position.cost_basis = Decimal(position.cost_basis) + amt
+    position.updated_at = now
+    ctx.dirty_positions[(req.user.id, option.id)] = position
+    merge_exposure(ctx.exposure, option.id, market.id, shares_out)
+
+    intent = ctx.record(req, market, option, wallet, quote, amt, shares_out)
+    response = ctx.respond(
+        intent, _buy_response(market, option, amt, shares_out, quote, req.money_quant, balance, position, intent)
+    )
+
+    ctx.move_q(quote, is_no_side, target_idx, shares_out)
+    ctx.pool_cash_delta += amt
+    ctx.side_effects(option.id, amt)
+    return response
+
+
+def apply_sell(req: TradeRequest, ctx: _Batch) -> Dict:
+    """Validate and apply one sell to the batch in memory (see apply_buy)."""
+    market, option = ctx.resolve(req)
+    is_no_side, quote_option_id, target_idx = _resolve_trade_target(ctx.state, option, req.option_id)
+
+    balance = ctx.balance(req.user.id, req.token)
+    position = ctx.position(req.user.id, market, option, create=False)
+    if position is None or Decimal(position.shares) <= 0:
+        raise ExecutionError("No position to sell", code="NO_POSITION", http_status=400)
+
+    now = ctx.now
+    position_shares = Decimal(position.shares)
+    if req.sell_all and position_shares <= DUST_THRESHOLD:
+        position.shares = Decimal("0")
+        position.cost_basis = Decimal("0")
+        position.updated_at = now
+        ctx.dirty_positions[(req.user.id, option.id)] = position
+        merge_exposure(ctx.exposure, option.id, market.id, -position_shares)
+        wallet = req.wallet or _resolve_wallet(req.user, req.wallet_id)
+        intent = ctx.record(req, market, option, wallet, None, Decimal("0"), position_shares)
+        return ctx.respond(intent, _dust_response(market, option, position_shares, balance, intent))
+
+    quote, shares_to_sell, amount_out = _quote_sell(
+        ctx.state,
+        quote_option_id=quote_option_id,
+        option_index=req.option_index if not is_no_side else None,
+        is_no_side=is_no_side,
+        shares_in=position_shares if req.sell_all else req.shares,
+        desired_out=req.desired_out,
+        money_quant=req.money_quant,
+        position_shares=position_shares,
+        min_amount_out=req.min_amount_out,
+    )
+    wallet = req.wallet or _resolve_wallet(req.user, req.wallet_id)
+
+    cost_reduction = Decimal(position.cost_basis) * shares_to_sell / position_shares
+    position.shares = position_shares - shares_to_sell
+    position.cost_basis = max(Decimal("0"), Decimal(position.cost_basis) - cost_reduction)
+    position.updated_at = now
+    ctx.dirty_positions[(req.user.id, option.id)] = position
+    merge_exposure(ctx.exposure, option.id, market.id, -shares_to_sell)
+
+    balance.available_amount = Decimal(balance.available_amount) + amount_out
+    balance.updated_at = now
+    ctx.dirty_balances[(req.user.id, req.token)] = balance
+
+    intent = ctx.record(req, market, option, wallet, quote, amount_out, shares_to_sell)
+    response = ctx.respond(
+        intent, _sell_response(market, option, shares_to_sell, quote, req.money_quant, balance, position, intent)
+    )
+
+    ctx.move_q(quote, is_no_side, target_idx, -shares_to_sell)
+    ctx.pool_cash_delta -= amount_out
+    ctx.side_effects(option.id, amount_out)
+    return response
+
+
+def write_accounts(ctx: _Batch) -> None:
+    """Group commit of the account side: one bulk statement per table."""
+    if ctx.dirty_balances:
+        BalanceSnapshot.objects.bulk_update(list(ctx.dirty_balances.values()), ["available_amount", "updated_at"])
+
+    new_positions = [p for p in ctx.dirty_positions.values() if p.pk is None]
+    old_positions = [p for p in ctx.dirty_positions.values() if p.pk is not None]
+    if new_positions:
+        Position.objects.bulk_create(new_positions)
+    if old_positions:
+        Position.objects.bulk_update(old_positions, ["shares", "cost_basis", "updated_at"])
+    add_exposure(ctx.exposure, ctx.now)
+
+    if not ctx.intents:
+        return
+
+    OrderIntent.objects.bulk_create([intent for intent, _ in ctx.intents])
+    Trade.objects.bulk_create([_trade_row(intent, quote) for intent, quote in ctx.intents if quote is not None])
+    for intent, response in ctx.responses:
+        response["order_intent_id"] = intent.id
+    remember_order_results(ctx.responses)
+
+    if ctx.outbox:
+        TradeOutbox.objects.bulk_create(ctx.outbox)
+    for option_id, amount in ctx.volume:
+        _update_stats_volume(option_id, amount, ctx.now)
+
+
+def write_pool_state(ctx: _Batch, *, locked: bool) -> None:
+    """Group commit of one pool: the pool row (version bump / CAS), then q deltas and inline probs."""
+    if not ctx.q_deltas:
+        return
+    # Pool row before its state rows, as on the single-trade path: same lock order, no deadlock
+    _write_pool(ctx.pool, ctx.pool_cash_delta, ctx.now, locked=locked)
+    apply_q_deltas(ctx.pool.id, ctx.q_deltas, ctx.now)
+    if side_effects_inline():
+        _recompute_option_probs(ctx.option_states, ctx.state.b, ctx.now, ctx.state.no_to_yes_option_id)
+
+
+def _same_q(mem: List[AmmPoolOptionState], fresh: List[AmmPoolOptionState]) -> bool:
+    # Tolerance only for the DB's rounding of what we wrote (numeric(40,18) / sqlite REAL).
+    return len(mem) == len(fresh) and all(
+        a.option_id == b.option_id and math.isclose(float(a.q), float(b.q), rel_tol=1e-12, abs_tol=1e-12)
+        for a, b in zip(mem, fresh)
+    )
+
+
+_registry_lock = threading.Lock()
+_sequencers: Dict[str, PoolSequencer] = {}
+
+
+def sequencer_for(pool_id) -> PoolSequencer:
+    pid = str(pool_id)
+    with _registry_lock:
+        seq = _sequencers.get(pid)
+        if seq is None:
+            seq = _sequencers[pid] = PoolSequencer(pid)
+        return seq
+
+
+def submit_trade(req: TradeRequest) -> Dict:
+    """Queue a trade to its pool's sequencer and wait for the batch to commit."""
+    try:
+        pool_id = get_pool_state(req.market_id).pool_id
+    except QuoteError as exc:
+        raise _pool_load_error(exc)
+
+    seq = sequencer_for(pool_id)
+    with _registry_lock:
+        future = seq.submit(req)
+        seq._start()
+    try:
+        return future.result(timeout=SEQUENCER_TIMEOUT)
+    except FutureTimeout:
+        if future.cancel():
+            raise ExecutionError("Trade queue timed out", code="SEQUENCER_TIMEOUT", http_status=503)
+        # Already in a batch: its outcome is decided by the commit, wait for it.
+        return future.result()
+
+
+__all__ = [
+    "SEQUENCER_WINDOW_MS",
+    "SEQUENCER_BATCH_SIZE",
+    "TradeRequest",
+    "PoolSequencer",
+    "sequencer_for",
+    "submit_trade",
+]
@@ -0,0 +1,337 @@
+"""
+Resumable, chunked market settlement.
+
+  enqueue_settlement()   validate the resolved market, sum the winning
+                         positions and, in the transaction creating its
+                         settlement_jobs row (one per market, idempotent), debit
+                         that total from the pool and close it (_reserve)
+  run_settlement_chunk() ONE transaction: lock the job row, pay the next
+                         SETTLEMENT_CHUNK winners after last_position_id and
+                         advance the checkpoint with them
+  _finish()              once no winner is left: write the MarketSettlement
+                         audit row, mark the market settled
+
+The payout is funded before anyone is paid: a market the pool cannot cover fails
+at enqueue with nothing credited, and a job never stops half-paid for lack of
+funds. Chunks cannot pay past the reserved total.
+
+A chunk and its checkpoint commit together, so a worker that dies mid-run
+resumes from the last committed chunk without paying anyone twice (the
+settlement_payouts unique key is the backstop). Nothing holds the pool or the
+positions across chunks: resolved markets cannot trade.
+
+Jobs are run by `manage.py process_settlement_jobs`; settle_market() runs one
+to completion in-process.
+"""
+
+import logging
+from decimal import Decimal
+from typing import Callable, Dict, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ...models import AmmPool, EventSettlementJob, Market, MarketOption, MarketSettlement, SettlementJob
+from .pool_cache import bump_pool_version_on_commit
+from .settlement import SettlementError, _generate_settlement_tx_id, _get_pool_for_market
+from .settlement_payouts import next_winners, pay_chunk, winning_shares
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+OPEN_JOB_STATUSES = (JOB_PENDING, JOB_RUNNING)
+
+
+def _funding(pool: AmmPool, total: Decimal) -> Tuple[Decimal, Decimal]:
+    """-> (pool_cash_used, collateral_used): pool_cash first, collateral for the shortfall."""
+    pool_cash = Decimal(pool.pool_cash)
+    collateral_amount = Decimal(pool.collateral_amount)
+    if total <= 0:
+        return Decimal("0"), Decimal("0")
+    pool_cash_used = max(Decimal("0"), min(pool_cash, total))
+    remaining = total - pool_cash_used
+    if remaining > collateral_amount:
+        raise SettlementError(
+            f"Insufficient funds: need {remaining} more but only {collateral_amount} collateral available",
+            code="INSUFFICIENT_FUNDS",
+            http_status=400,
+        )
+    return pool_cash_used, remaining
+
+
+def _reserve(pool: AmmPool, total: Decimal, now) -> Tuple[Decimal, Decimal]:
+    """
+    In the transaction creating a settlement job, with the pool row locked: debit
+    the whole payout (_funding's split) and close the pool. Returns the split.
+    """
+    pool_cash_used, collateral_used = _funding(pool, total)
+    pool.pool_cash = Decimal(pool.pool_cash) - pool_cash_used
+    pool.collateral_amount = Decimal(pool.collateral_amount) - collateral_used
+    pool.status = "closed"
+    pool.version += 1  # fails any trade that read the pool before settlement
+    pool.updated_at = now
+    pool.save(update_fields=["pool_cash", "collateral_amount", "status", "version", "updated_at"])
+    bump_pool_version_on_commit(pool.id)
+    return pool_cash_used, collateral_used
+
+
+def _check_reserved(job, rows) -> None:
+    """Before a chunk credits anyone: it must fit in what was debited at enqueue."""
+    due = sum((Decimal(row[2]) for row in rows), Decimal("0"))
+    if Decimal(job.paid_amount) + due > Decimal(job.total_payout):
+        raise SettlementError(
+            f"Winners exceed the reserved payout {job.total_payout}", code="PAYOUT_EXCEEDS_RESERVED", http_status=409
+        )
+
+
+def _release_unpaid(job, now) -> Tuple[Decimal, Decimal]:
+    """
+    When a job finishes: give back the part of the reservation nobody claimed
+    (collateral first, the reverse of _funding). Returns the (pool_cash, collateral)
+    actually used.
+    """
+    pool_cash_used, collateral_used = Decimal(job.pool_cash_used), Decimal(job.collateral_used)
+    unpaid = Decimal(job.total_payout) - Decimal(job.paid_amount)
+    if unpaid <= 0:
+        return pool_cash_used, collateral_used
+    collateral_back = min(unpaid, collateral_used)
+    cash_back = unpaid - collateral_back
+    AmmPool.objects.filter(pk=job.pool_id).update(
+        pool_cash=F("pool_cash") + cash_back,
+        collateral_amount=F("collateral_amount") + collateral_back,
+        updated_at=now,
+    )
+    return pool_cash_used - cash_back, collateral_used - collateral_back
+
+
+def job_payload(job: SettlementJob) -> Dict:
+    total = Decimal(job.total_payout)
+    paid = Decimal(job.paid_amount)
+    return {
+        "job_id": job.id,
+        "market_id": str(job.market_id),
+        "settlement_tx_id": job.settlement_tx_id,
+        "status": job.status,
+        "winning_option_id": job.option_id,
+        "total_payout": str(total),
+        "paid_amount": str(paid),
+        "winners_paid": job.winners_paid,
+        "progress": float(paid / total) if total > 0 else (1.0 if job.status == JOB_DONE else 0.0),
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def settled_payload(settlement: MarketSettlement, *, already_settled: bool) -> Dict:
+    job = SettlementJob.objects.filter(market_id=settlement.market_id).first()
+    return {
+        "market_id": str(settlement.market_id),
+        "settlement_tx_id": settlement.settlement_tx_id,
+        "winning_option_id": settlement.resolved_option_id,
+        "total_payout": str(settlement.total_payout),
+        "pool_cash_used": str(settlement.pool_cash_used),
+        "collateral_used": str(settlement.collateral_used),
+        "settled_at": settlement.settled_at.isoformat(),
+        "payouts_count": job.winners_paid if job else None,
+        "already_settled": already_settled,
+    }
+
+
+def enqueue_settlement(
+    *,
+    market_id: str,
+    settlement_tx_id: Optional[str] = None,
+    settled_by_user_id: Optional[str] = None,
+) -> Dict:
+    """
+    Create (or return) the market's settlement job. A settled market returns its
+    settlement (already_settled); a failed job is put back in the queue.
+    """
+    with transaction.atomic():
+        try:
+            market = Market.objects.select_for_update().get(pk=market_id)
+        except Market.DoesNotExist:
+            raise SettlementError("Market not found", code="MARKET_NOT_FOUND", http_status=404)
+
+        if market.settled_at is not None:
+            existing = MarketSettlement.objects.filter(market=market).first()
+            if existing:
+                return settled_payload(existing, already_settled=True)
+
+        if market.event_id and EventSettlementJob.objects.filter(event_id=market.event_id).exists():
+            raise SettlementError(
+                "Market is settled with its event", code="EVENT_SETTLEMENT_EXISTS", http_status=409
+            )
+
+        job = SettlementJob.objects.select_for_update().filter(market=market).first()
+        if job is not None:
+            if job.status == JOB_FAILED:
+                job.status, job.error, job.updated_at = JOB_PENDING, None, timezone.now()
+                job.save(update_fields=["status", "error", "updated_at"])
+            return job_payload(job)
+
+        if market.status != "resolved":
+            raise SettlementError(
+                f"Market must be resolved before settlement (current status: {market.status})",
+                code="NOT_RESOLVED",
+                http_status=400,
+            )
+        if market.resolved_option_index is None:
+            raise SettlementError("Market has no resolved option", code="NO_RESOLVED_OPTION", http_status=400)
+        try:
+            winning_option = MarketOption.objects.get(market=market, option_index=market.resolved_option_index)
+        except MarketOption.DoesNotExist:
+            raise SettlementError("Winning option not found", code="OPTION_NOT_FOUND", http_status=404)
+        pool = _get_pool_for_market(market)
+        if pool is None:
+            raise SettlementError("AMM pool not found for market", code="POOL_NOT_FOUND", http_status=404)
+        pool = AmmPool.objects.select_for_update().get(pk=pool.id)
+
+        # Each winning share pays out 1 unit of collateral: the exact total (not the
+        # option_exposure counter, which can drift) is debited before anyone is paid.
+        total_payout = winning_shares(market.id, winning_option.id)
+        now = timezone.now()
+        pool_cash_used, collateral_used = _reserve(pool, total_payout, now)
+
+        job = SettlementJob.objects.create(
+            market=market,
+            option=winning_option,
+            pool=pool,
+            token=pool.collateral_token,
+            settlement_tx_id=settlement_tx_id or _generate_settlement_tx_id(),
+            status=JOB_PENDING,
+            total_payout=total_payout,
+            pool_cash_used=pool_cash_used,
+            collateral_used=collateral_used,
+            settled_by_id=settled_by_user_id,
+            created_at=now,
+            updated_at=now,
+        )
+    logger.info("Settlement enqueued: market_id=%s, job_id=%s, total_payout=%s", market_id, job.id, total_payout)
+    return job_payload(job)
+
+
+def _finish(job: SettlementJob, now) -> None:
+    """Last step, inside the chunk transaction holding the job row (the pool was debited at enqueue)."""
+    market = Market.objects.select_for_update().get(pk=job.market_id)
+    paid = Decimal(job.paid_amount)
+    pool_cash_used, collateral_used = _release_unpaid(job, now)
+
+    MarketSettlement.objects.create(
+        market_id=job.market_id,
+        resolved_option_id=job.option_id,
+        total_payout=paid,
+        pool_cash_used=pool_cash_used,
+        collateral_used=collateral_used,
+        settled_by_id=job.settled_by_id,
+        settled_at=now,
+        settlement_tx_id=job.settlement_tx_id,
+    )
+    market.settled_at = now
+    market.settlement_tx_id = job.settlement_tx_id
+    market.updated_at = now
+    market.save(update_fields=["settled_at", "settlement_tx_id", "updated_at"])
+
+    job.status = JOB_DONE
+    job.updated_at = job.finished_at = now
+    job.save(update_fields=["status", "updated_at", "finished_at"])
+    logger.info(
+        "Market settled: market_id=%s, tx_id=%s, total_payout=%s, pool_cash_used=%s, collateral_used=%s, winners=%s",
+        job.market_id,
+        job.settlement_tx_id,
+        paid,
+        pool_cash_used,
+        collateral_used,
+        job.winners_paid,
+    )
+
+
+def run_settlement_chunk(job_id) -> bool:
+    """Pay one chunk (or finish the job) in one transaction. True while work remains."""
+    with transaction.atomic():
+        job = SettlementJob.objects.select_for_update().get(pk=job_id)
+        if job.status == JOB_DONE:
+            return False
+        now = timezone.now()
+        rows = next_winners(job.market_id, job.option_id, job.last_position_id)
+        if not rows:
+            _finish(job, now)
+            return False
+
+        _check_reserved(job, rows)
+        paid = pay_chunk(
+            rows,
+            market_id=job.market_id,
+            option_id=job.option_id,
+            token=job.token,
+            settlement_tx_id=job.settlement_tx_id,
+            now=now,
+        )
+        job.last_position_id = paid.last_position_id
+        job.paid_amount = Decimal(job.paid_amount) + paid.total
+        job.winners_paid += paid.winners
+        job.status = JOB_RUNNING
+        job.updated_at = now
+        job.save(update_fields=["last_position_id", "paid_amount", "winners_paid", "status", "updated_at"])
+        return True
+
+
+def run_chunks(model, run_chunk: Callable[[object], bool], job_id, keep_going: Optional[Callable[[], bool]]):
+    """Drive run_chunk until it reports no work left; on error mark the job row failed and re-raise."""
+    try:
+        while (keep_going is None or keep_going()) and run_chunk(job_id):
+            pass
+    except Exception as exc:
+        model.objects.filter(pk=job_id).update(status=JOB_FAILED, error=str(exc)[:2000], updated_at=timezone.now())
+        raise
+    return model.objects.get(pk=job_id)
+
+
+def run_settlement_job(job_id, *, keep_going: Optional[Callable[[], bool]] = None) -> Dict:
+    """
+    Run a job from its checkpoint until done (or keep_going() turns False between
+    chunks). A failure marks the job failed and re-raises.
+    """
+    return job_payload(run_chunks(SettlementJob, run_settlement_chunk, job_id, keep_going))
+
+
+def settlement_progress(market_id) -> Optional[Dict]:
+    job = SettlementJob.objects.filter(market_id=market_id).first()
+    return job_payload(job) if job else None
+
+
+def process_settlement_jobs(limit: Optional[int] = None) -> int:
+    """Run open jobs oldest first. Returns the number finished; failures are logged and left failed."""
+    job_ids = list(
+        SettlementJob.objects.filter(status__in=OPEN_JOB_STATUSES).order_by("created_at", "id").values_list("id", flat=True)
+    )
+    finished = 0
+    for job_id in job_ids[:limit] if limit else job_ids:
+        try:
+            run_settlement_job(job_id)
+            finished += 1
+        except Exception:
+            logger.exception("Settlement job %s failed", job_id)
+    return finished
+
+
+__all__ = [
+    "JOB_DONE",
+    "JOB_FAILED",
+    "JOB_PENDING",
+    "JOB_RUNNING",
+    "OPEN_JOB_STATUSES",
+    "enqueue_settlement",
+    "job_payload",
+    "process_settlement_jobs",
+    "run_chunks",
+    "run_settlement_chunk",
+    "run_settlement_job",
+    "settled_payload",
+    "settlement_progress",
+]
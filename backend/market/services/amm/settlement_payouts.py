@@ -0,0 +1,149 @@
+"""
+Set-based payout of a market's (or an exclusive event's) winners.
+
+settle_market used to lock every winning Position and then lock + save (or
+create) each winner's BalanceSnapshot: two queries per winner in one
+transaction. Here winners are read in position id order, SETTLEMENT_CHUNK at a
+time (keyset: id > the last paid id), and each chunk costs two statements:
+
+  INSERT INTO balance_snapshot (...) VALUES (...), ...
+    ON CONFLICT (user_id, token) DO UPDATE SET available_amount = available_amount + excluded
+  INSERT INTO settlement_payouts (...) VALUES (...), ...        (bulk_create)
+
+Only resolved markets are paid, and trading rejects them, so positions do not
+move between chunks (settlement_jobs.py and event_settlement.py run each chunk
+in its own transaction).
+"""
+
+import os
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection
+from django.db.models import Sum
+
+from ...models import BalanceSnapshot, Position, SettlementPayout
+
+# Positions per chunk (4 params per balance row: well under Postgres / SQLite limits).
+SETTLEMENT_CHUNK = int(os.getenv("AMM_SETTLEMENT_CHUNK", "2000"))
+
+_BALANCES = BalanceSnapshot._meta.db_table
+
+
+@dataclass
+class PayoutTotals:
+    winners: int = 0
+    total: Decimal = Decimal("0")
+    last_position_id: int = 0
+
+
+def next_winners(
+    market_id, option_id, after_position_id: int, limit: Optional[int] = None
+) -> List[Tuple[int, object, Decimal]]:
+    """(position_id, user_id, shares) of the next chunk of winning positions after the checkpoint."""
+    return list(
+        Position.objects.filter(market_id=market_id, option_id=option_id, shares__gt=0, id__gt=after_position_id)
+        .order_by("id")
+        .values_list("id", "user_id", "shares")[: limit or SETTLEMENT_CHUNK]
+    )
+
+
+def next_event_winners(
+    option_ids: List, after_position_id: int, limit: Optional[int] = None
+) -> List[Tuple[int, object, Decimal, object, int]]:
+    """(position_id, user_id, shares, market_id, option_id) of the next chunk across several markets' winning options."""
+    return list(
+        Position.objects.filter(option_id__in=option_ids, shares__gt=0, id__gt=after_position_id)
+        .order_by("id")
+        .values_list("id", "user_id", "shares", "market_id", "option_id")[: limit or SETTLEMENT_CHUNK]
+    )
+
+
+def winning_shares(market_id, option_id) -> Decimal:
+    """Total payout owed to the option's holders (one aggregate query)."""
+    total = Position.objects.filter(market_id=market_id, option_id=option_id, shares__gt=0).aggregate(
+        total=Sum("shares")
+    )["total"]
+    return Decimal(total or 0)
+
+
+def _upsert_sql(n: int) -> str:
+    cast = "%s::numeric" if connection.vendor == "postgresql" else "CAST(%s AS NUMERIC)"
+    values = ", ".join([f"(%s, %s, {cast}, 0, %s)"] * n)
+    return (
+        f"INSERT INTO {_BALANCES} (user_id, token, available_amount, locked_amount, updated_at) "
+        f"VALUES {values} "
+        f"ON CONFLICT (user_id, token) DO UPDATE SET "
+        f"available_amount = {_BALANCES}.available_amount + excluded.available_amount, "
+        f"updated_at = excluded.updated_at"
+    )
+
+
+def credit_balances(amounts: Dict, token: str, now) -> None:
+    """available_amount += amount for {user_id: amount}, creating missing balances (one statement)."""
+    if not amounts:
+        return
+    user_field = BalanceSnapshot._meta.get_field("user")
+    now_param = BalanceSnapshot._meta.get_field("updated_at").get_db_prep_value(now, connection)
+    params: List = []
+    for user_id, amount in amounts.items():
+        params += [user_field.get_db_prep_value(user_id, connection), token, str(amount), now_param]
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(len(amounts)), params)
+
+
+def pay_chunk(
+    rows: List[Tuple[int, object, Decimal]], *, market_id, option_id, token: str, settlement_tx_id: str, now
+) -> PayoutTotals:
+    """Credit and record one chunk of (position_id, user_id, shares); each share pays 1 token."""
+    return pay_positions(
+        [(position_id, user_id, shares, market_id, option_id) for position_id, user_id, shares in rows],
+        token=token,
+        settlement_tx_id=settlement_tx_id,
+        now=now,
+    )
+
+
+def pay_positions(
+    rows: List[Tuple[int, object, Decimal, object, int]], *, token: str, settlement_tx_id: str, now
+) -> PayoutTotals:
+    """
+    pay_chunk for rows spanning markets: (position_id, user_id, shares, market_id, option_id).
+    Still two statements: one balance upsert per user, one payout row per (market, option, user).
+    """
+    amounts: Dict = {}
+    payouts: Dict = {}
+    for _, user_id, shares, market_id, option_id in rows:
+        amounts[user_id] = amounts.get(user_id, Decimal("0")) + Decimal(shares)
+        key = (market_id, option_id, user_id)
+        payouts[key] = payouts.get(key, Decimal("0")) + Decimal(shares)
+    credit_balances(amounts, token, now)
+    SettlementPayout.objects.bulk_create(
+        [
+            SettlementPayout(
+                market_id=market_id,
+                option_id=option_id,
+                user_id=user_id,
+                token=token,
+                shares=amount,
+                payout=amount,
+                settlement_tx_id=settlement_tx_id,
+                created_at=now,
+            )
+            for (market_id, option_id, user_id), amount in payouts.items()
+        ]
+    )
+    return PayoutTotals(winners=len(payouts), total=sum(amounts.values(), Decimal("0")), last_position_id=rows[-1][0])
+
+
+__all__ = [
+    "SETTLEMENT_CHUNK",
+    "PayoutTotals",
+    "credit_balances",
+    "next_event_winners",
+    "next_winners",
+    "pay_chunk",
+    "pay_positions",
+    "winning_shares",
+]
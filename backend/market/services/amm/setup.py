@@ -8,8 +8,11 @@ from enum import Enum
 from typing import Any, Dict, Optional, Sequence, List
 
 from django.db import IntegrityError, transaction
+from django.db.models import F
 
 from ...models import AmmPool, AmmPoolOptionState, Event, Market, MarketOption
+from .option_map import invalidate_option_map_on_commit
+from .pool_cache import bump_pool_version_on_commit
 
 logger = logging.getLogger(__name__)
 
@@ -332,5 +335,13 @@ def ensure_pool_initialized(
                 to_create = []
         if to_create:
             AmmPoolOptionState.objects.bulk_create(to_create, ignore_conflicts=True, batch_size=batch_size)
+        # New outcomes change every price: trades quoted against the old layout must lose their CAS.
+        AmmPool.objects.filter(pk=pool.pk).update(version=F("version") + 1)
+
+    # Option states may have been added: cached quote snapshots must reload.
+    bump_pool_version_on_commit(pool.id)
+    if event is not None:
+        # ... and so may the event's markets / No options.
+        invalidate_option_map_on_commit(pool.id)
 
     return pool
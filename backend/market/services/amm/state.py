@@ -1,7 +1,18 @@
+import copy
+import math
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
 from .errors import QuoteInputError
+from .lmsr import (
+    LogSumExp,
+    buy_amount_to_delta_q_cached,
+    cost_cached,
+    cost_delta_cached,
+    price_cached,
+    prices_cached,
+)
+from .money import _bps_from_probabilities
 
 
 @dataclass(frozen=True)
@@ -19,6 +30,116 @@ class PoolState:
     no_to_yes_option_id: Dict[str, Tuple[str, int]] = field(default_factory=dict)
     # Whether this pool is for an exclusive event
     is_exclusive: bool = False
+    # AmmPool.version the q was read at (firm quotes); not advanced by apply_delta
+    version: int = 0
+    # Cached log-sum-exp of q/b: single-outcome prices/costs are O(1) after load.
+    lse: LogSumExp = field(init=False, repr=False, compare=False)
+    # Lazily computed pre-trade probabilities (shared by every quote on this state).
+    _probs: Optional[List[float]] = field(default=None, init=False, repr=False, compare=False)
+    _prob_bps: Optional[List[int]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "lse", LogSumExp.from_q(self.q, self.b))
+
+    # ---- cached LMSR reads ----
+    def price(self, idx: int) -> float:
+        return price_cached(self.lse, self.q[idx])
+
+    def probabilities(self) -> List[float]:
+        if self._probs is None:
+            object.__setattr__(self, "_probs", prices_cached(self.lse, self.q))
+        return self._probs
+
+    def prob_bps(self) -> List[int]:
+        """Pre-trade prob_bps; the list is cached, callers must not mutate it."""
+        if self._prob_bps is None:
+            object.__setattr__(self, "_prob_bps", _bps_from_probabilities(self.probabilities()))
+        return self._prob_bps
+
+    def cost(self) -> float:
+        return cost_cached(self.lse)
+
+    def cost_delta(self, idx: int, delta: float) -> float:
+        """C(q + delta*e_idx) - C(q), O(1)."""
+        return cost_delta_cached(self.lse, self.q[idx], delta)
+
+    def buy_delta_q(self, idx: int, amount_net: float) -> float:
+        """Shares of outcome idx bought by net spend amount_net, O(1)."""
+        return buy_amount_to_delta_q_cached(self.lse, self.q[idx], amount_net)
+
+    def post_prob_bps(self, idx: int, delta: float) -> List[int]:
+        """
+        prob_bps after q_idx += delta, rescaled from the cached pre-trade vector:
+          p_j' = p_j / D,  p_idx' = p_idx * e^(delta/b) / D,  D = 1 + p_idx*expm1(delta/b)
+        """
+        probs = self.probabilities()
+        p_i = probs[idx]
+        x = delta / self.b
+        denom = 1.0 + p_i * math.expm1(x)
+        if not (math.isfinite(denom) and denom > 0.0):
+            # Extreme move: fall back to a fresh normalizer.
+            q_post = list(self.q)
+            q_post[idx] += delta
+            return _bps_from_probabilities(prices_cached(LogSumExp.from_q(q_post, self.b), q_post))
+        inv = 1.0 / denom
+        post = [p * inv for p in probs]
+        post[idx] = math.exp(math.log(p_i) + x - math.log(denom)) if p_i > 0.0 else 0.0
+        return _bps_from_probabilities(post)
+
+    def for_market(self, market_id: str) -> "PoolState":
+        """
+        Same pool viewed from another market of the event (exclusive pools are shared).
+        Shallow copy: q, lookups and the log-sum-exp cache are shared, not rebuilt.
+        """
+        if market_id == self.market_id:
+            return self
+        clone = copy.copy(self)
+        object.__setattr__(clone, "market_id", market_id)
+        return clone
+
+    def to_snapshot(self) -> Dict:
+        """Plain-data form for shared caches (derived caches are rebuilt on load)."""
+        return {
+            "pool_id": self.pool_id,
+            "b": self.b,
+            "fee_bps": self.fee_bps,
+            "option_ids": list(self.option_ids),
+            "option_indexes": list(self.option_indexes),
+            "q": list(self.q),
+            "no_to_yes_option_id": dict(self.no_to_yes_option_id),
+            "is_exclusive": self.is_exclusive,
+            "version": self.version,
+        }
+
+    @classmethod
+    def from_snapshot(cls, market_id: str, snap: Dict) -> "PoolState":
+        option_ids = list(snap["option_ids"])
+        option_indexes = list(snap["option_indexes"])
+        return cls(
+            market_id=market_id,
+            pool_id=snap["pool_id"],
+            b=float(snap["b"]),
+            fee_bps=int(snap["fee_bps"]),
+            option_ids=option_ids,
+            option_indexes=option_indexes,
+            q=[float(x) for x in snap["q"]],
+            option_id_to_idx={oid: i for i, oid in enumerate(option_ids)},
+            option_index_to_idx={oi: i for i, oi in enumerate(option_indexes)},
+            no_to_yes_option_id={k: tuple(v) for k, v in snap["no_to_yes_option_id"].items()},
+            is_exclusive=bool(snap["is_exclusive"]),
+            version=int(snap.get("version", 0)),
+        )
+
+    def apply_delta(self, idx: int, delta: float) -> None:
+        """
+        Move q_idx by delta IN PLACE, keeping the cache consistent in O(1).
+        Only for states owned by a single writer; shared snapshots must not be mutated.
+        """
+        q_old = self.q[idx]
+        self.q[idx] = q_old + delta
+        self.lse.update(self.q, q_old, self.q[idx])
+        object.__setattr__(self, "_probs", None)
+        object.__setattr__(self, "_prob_bps", None)
 
     def resolve_target_idx(self, *, option_id: Optional[str], option_index: Optional[int]) -> int:
         return _resolve_target_idx(self, option_id=option_id, option_index=option_index)
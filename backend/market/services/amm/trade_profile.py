@@ -0,0 +1,117 @@
+"""
+Per-trade DB instrumentation for execute_buy / execute_sell.
+
+profile_trade() hooks the connection's execute_wrapper for the duration of one
+trade and attributes every query to the current phase:
+
+    lock          market/option, pool/state, balance, position row locks
+    quote         pure math (should stay at 0 queries)
+    persist       balance / position / q / order intent / trade / pool writes
+    side_effects  display probs, price series, volume stats
+
+Phases are a stopwatch (prof.mark("quote")), not nested blocks; re-entering a phase
+accumulates. Per phase we record query count, DB time and lock time, i.e. time
+spent in SELECT ... FOR UPDATE statements (an upper bound on lock wait).
+
+One structured record per trade is logged on the "market.amm.trade" logger:
+    logger.info("amm_trade", extra={"amm_trade": {...}})
+AMM_TRADE_PROFILE=0 turns it off (mark() becomes a no-op).
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from django.db import connection
+
+logger = logging.getLogger("market.amm.trade")
+
+TRADE_PROFILE = os.getenv("AMM_TRADE_PROFILE", "1").strip().lower() not in {"0", "false", "no", "off"}
+
+PHASES = ("lock", "quote", "persist", "side_effects")
+
+
+class TradeProfiler:
+    __slots__ = ("kind", "phase", "phases", "started", "fields")
+
+    def __init__(self, kind: str, **fields):
+        self.kind = kind
+        self.phase = PHASES[0]
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.started = time.perf_counter()
+        self.fields = fields
+
+    def mark(self, phase: str) -> None:
+        self.phase = phase
+
+    def _bucket(self) -> Dict[str, float]:
+        b = self.phases.get(self.phase)
+        if b is None:
+            b = self.phases[self.phase] = {"queries": 0, "db_ms": 0.0, "lock_ms": 0.0}
+        return b
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            b = self._bucket()
+            b["queries"] += 1
+            b["db_ms"] += ms
+            if "FOR UPDATE" in sql:
+                b["lock_ms"] += ms
+
+    @property
+    def total_queries(self) -> int:
+        return int(sum(b["queries"] for b in self.phases.values()))
+
+    def record(self, outcome: str) -> Dict:
+        return {
+            "kind": self.kind,
+            "outcome": outcome,
+            "total_ms": round((time.perf_counter() - self.started) * 1000.0, 3),
+            "queries": self.total_queries,
+            "db_ms": round(sum(b["db_ms"] for b in self.phases.values()), 3),
+            "lock_ms": round(sum(b["lock_ms"] for b in self.phases.values()), 3),
+            "phases": {
+                name: {"queries": int(b["queries"]), "db_ms": round(b["db_ms"], 3), "lock_ms": round(b["lock_ms"], 3)}
+                for name, b in self.phases.items()
+            },
+            **self.fields,
+        }
+
+
+class _NullProfiler:
+    __slots__ = ()
+
+    def mark(self, phase: str) -> None:
+        pass
+
+
+@contextmanager
+def profile_trade(kind: str, **fields) -> Iterator[Optional[TradeProfiler]]:
+    """
+    Wrap one trade (outside transaction.atomic, so the commit and on_commit hooks
+    are included in total_ms). Failed trades are logged with their error code.
+    """
+    if not TRADE_PROFILE:
+        yield _NullProfiler()
+        return
+
+    prof = TradeProfiler(kind, **fields)
+    outcome = "ok"
+    try:
+        with connection.execute_wrapper(prof):
+            yield prof
+    except Exception as exc:
+        outcome = getattr(exc, "code", None) or type(exc).__name__
+        raise
+    finally:
+        record = prof.record(outcome)
+        logger.info("amm_trade", extra={"amm_trade": record})
+
+
+__all__ = ["PHASES", "TradeProfiler", "profile_trade"]
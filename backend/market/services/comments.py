@@ -1,6 +1,7 @@
 from collections import defaultdict
 
 from ..models import Position
+from .amm.live_probs import live_prob_bps, option_prob_bps
 
 
 def serialize_comment(comment, holdings):
@@ -26,14 +27,14 @@ def collect_holdings(market_id, user_ids):
     if not user_ids:
         return {}
     holdings = defaultdict(list)
-    positions = (
-        Position.objects.select_related("option", "option__stats")
+    positions = list(
+        Position.objects.select_related("market", "option", "option__stats")
         .filter(market_id=market_id, user_id__in=user_ids, shares__gt=0)
         .order_by("option__option_index", "option_id")
     )
+    live = live_prob_bps([positions[0].market]) if positions else {}
     for pos in positions:
         option = getattr(pos, "option", None)
-        stats = getattr(option, "stats", None) if option else None
         holdings[pos.user_id].append(
             {
                 "option_id": pos.option_id,
@@ -41,7 +42,7 @@ def collect_holdings(market_id, user_ids):
                 "option_index": option.option_index if option else None,
                 "shares": str(pos.shares),
                 "cost_basis": str(pos.cost_basis),
-                "probability_bps": stats.prob_bps if stats else None,
+                "probability_bps": option_prob_bps(option, live) if option else None,
                 "side": option.side if option else None,
             }
         )
@@ -56,6 +56,7 @@ def parse_buy_payload(payload):
         "client_nonce": payload.get("client_nonce"),
         "min_shares_out": min_shares_out,
         "max_slippage_bps": max_slippage_bps,
+        "quote_token": payload.get("quote_token") or None,
     }, None
 
 
@@ -94,4 +95,5 @@ def parse_sell_payload(payload):
         "wallet_id": payload.get("wallet_id"),
         "client_nonce": payload.get("client_nonce"),
         "min_amount_out": min_amount_out,
+        "quote_token": payload.get("quote_token") or None,
     }, None
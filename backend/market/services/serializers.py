@@ -1,10 +1,12 @@
+from typing import Dict, Optional
+
 from ..models import Event, Market, MarketOption
+from .amm.live_probs import live_prob_bps, option_prob_bps
 
 
-def serialize_option(option: MarketOption):
-    probability_bps = None
-    if hasattr(option, "stats") and option.stats:
-        probability_bps = option.stats.prob_bps
+def serialize_option(option: MarketOption, live: Optional[Dict[int, int]] = None):
+    # live: {option_id: prob_bps} from the pool q; falls back to MarketOptionStats
+    probability_bps = option_prob_bps(option, live)
 
     return {
         "id": option.id,
@@ -16,14 +18,16 @@ def serialize_option(option: MarketOption):
     }
 
 
-def serialize_market(market: Market):
+def serialize_market(market: Market, live: Optional[Dict[int, int]] = None):
     options = []
     if hasattr(market, "prefetched_options"):
         options = market.prefetched_options
     elif hasattr(market, "options"):
         options = list(market.options.all())
 
-    option_payload = [serialize_option(o) for o in options]
+    if live is None:
+        live = live_prob_bps([market])
+    option_payload = [serialize_option(o, live) for o in options]
     is_binary = len(option_payload) == 2
 
     return {
@@ -57,7 +61,8 @@ def serialize_event(event: Event):
     elif hasattr(event, "markets"):
         markets = list(event.markets.all())
 
-    market_payload = [serialize_market(m) for m in markets]
+    live = live_prob_bps(markets)  # one cached pool state per pool, shared by an exclusive event
+    market_payload = [serialize_market(m, live) for m in markets]
     primary_market = None
     if event.primary_market_id:
         primary_market = next((m for m in market_payload if m["id"] == str(event.primary_market_id)), None)
@@ -0,0 +1,136 @@
+"""
+Wallet resolution for trade recording, cached per user.
+
+Every OrderIntent / Trade needs a wallet: the explicit wallet_id, else the user's
+primary wallet, else any of theirs. The answer almost never changes, so it is
+resolved in one query and kept in a process-local LRU:
+
+  - entries expire after WALLET_CACHE_TTL_SECONDS (wallets are also written
+    outside this process);
+  - code that creates a wallet or moves a user's primary wallet calls
+    invalidate_user_wallets (applied on commit); placeholders created here are
+    cached once committed.
+
+Users get their web2 placeholder wallet at sync time (ensure_user_wallet);
+resolve_wallet only creates one for a user who never synced.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Wallet
+
+WALLET_CACHE_SIZE = int(os.getenv("WALLET_CACHE_SIZE", "4096"))
+WALLET_CACHE_TTL_SECONDS = float(os.getenv("WALLET_CACHE_TTL_SECONDS", "300"))
+
+Key = Tuple[str, Optional[str]]
+
+_lock = threading.Lock()
+# (user_id, wallet_id or None) -> (expires_at monotonic, wallet)
+_wallets: "OrderedDict[Key, Tuple[float, Wallet]]" = OrderedDict()
+
+
+def _key(user_id, wallet_id) -> Key:
+    return str(user_id), str(wallet_id) if wallet_id else None
+
+
+def _cached(key: Key) -> Optional[Wallet]:
+    with _lock:
+        entry = _wallets.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _wallets[key]
+            return None
+        _wallets.move_to_end(key)
+        return entry[1]
+
+
+def _remember(key: Key, wallet: Wallet) -> None:
+    with _lock:
+        _wallets[key] = (time.monotonic() + WALLET_CACHE_TTL_SECONDS, wallet)
+        _wallets.move_to_end(key)
+        while len(_wallets) > WALLET_CACHE_SIZE:
+            _wallets.popitem(last=False)
+
+
+def _default_wallet(user) -> Optional[Wallet]:
+    """Primary wallet, else the first is_primary / oldest one (one query)."""
+    wallets = list(Wallet.objects.filter(user_id=user.id).order_by("-is_primary", "id")[:16])
+    primary_id = getattr(user, "primary_wallet_id", None)
+    if primary_id:
+        for w in wallets:
+            if w.id == primary_id:
+                return w
+    return wallets[0] if wallets else None
+
+
+def ensure_user_wallet(user, now=None) -> Wallet:
+    """The user's default wallet, creating the web2 placeholder if they have none."""
+    key = _key(user.id, None)
+    wallet = _cached(key)
+    if wallet is not None:
+        return wallet
+    wallet = _default_wallet(user)
+    if wallet is not None:
+        _remember(key, wallet)
+        return wallet
+
+    wallet = Wallet.objects.create(
+        user=user,
+        chain_family="web2",
+        address=f"web2-{user.id}",
+        is_primary=True,
+        created_at=now or timezone.now(),
+    )
+    transaction.on_commit(lambda: _remember(key, wallet))
+    return wallet
+
+
+def resolve_wallet(user, wallet_id: Any = None) -> Optional[Wallet]:
+    """
+    Wallet to record the user's trade against; None if an explicit wallet_id is
+    not one of theirs. Cached: no queries on a hit.
+    """
+    if not wallet_id:
+        return ensure_user_wallet(user)
+    key = _key(user.id, wallet_id)
+    wallet = _cached(key)
+    if wallet is None:
+        wallet = Wallet.objects.filter(pk=wallet_id, user_id=user.id).first()
+        if wallet is not None:
+            _remember(key, wallet)
+    return wallet
+
+
+def invalidate_user_wallets(user_id) -> None:
+    """A wallet of the user was created / changed or their primary wallet moved (on commit)."""
+    uid = str(user_id)
+
+    def drop():
+        with _lock:
+            for key in [k for k in _wallets if k[0] == uid]:
+                del _wallets[key]
+
+    transaction.on_commit(drop)
+
+
+def clear_wallet_cache() -> None:
+    with _lock:
+        _wallets.clear()
+
+
+__all__ = [
+    "WALLET_CACHE_SIZE",
+    "WALLET_CACHE_TTL_SECONDS",
+    "clear_wallet_cache",
+    "ensure_user_wallet",
+    "invalidate_user_wallets",
+    "resolve_wallet",
+]
@@ -0,0 +1,161 @@
+# market/tests/conftest.py
+import os
+import sys
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+
+@pytest.fixture(scope="module")
+def schema():
+    """
+    Throwaway in-memory SQLite schema for the (unmanaged upstream) market models.
+    Only available when running on the sqlite fallback database.
+    """
+    import django
+    django.setup()
+
+    from django.apps import apps
+    from django.conf import settings
+    from django.db import connection, connections
+
+    from market.services import wallets
+    from market.services.amm import idempotency, option_map, pool_cache
+
+    db = settings.DATABASES["default"]
+    if db["ENGINE"] != "django.db.backends.sqlite3":
+        pytest.skip("needs the sqlite fallback database")
+    old_name = db["NAME"]
+    connections["default"].close()
+    db["NAME"] = ":memory:"
+    models = list(apps.get_app_config("market").get_models())
+    managed = {m: m._meta.managed for m in models}
+    try:
+        with connection.schema_editor() as editor:
+            for m in models:
+                m._meta.managed = True
+                editor.create_model(m)
+            # unique keys the trade path upserts on (present in the real schema)
+            editor.execute(
+                "CREATE UNIQUE INDEX market_option_series_bucket "
+                "ON market_option_series (option_id, interval, bucket_start)"
+            )
+            editor.execute("CREATE UNIQUE INDEX balance_snapshot_user_id_token_key ON balance_snapshot (user_id, token)")
+            editor.execute(
+                "CREATE UNIQUE INDEX settlement_payouts_winner_unique ON settlement_payouts (market_id, option_id, user_id)"
+            )
+            editor.execute(
+                "CREATE UNIQUE INDEX order_intents_user_client_nonce ON order_intents (user_id, client_nonce) "
+                "WHERE client_nonce IS NOT NULL AND response IS NOT NULL"
+            )
+        yield
+    finally:
+        for m, flag in managed.items():
+            m._meta.managed = flag
+        connections["default"].close()
+        db["NAME"] = old_name
+        option_map.clear_option_map_cache()
+        pool_cache.clear_pool_cache()
+        idempotency.clear_idempotency_cache()
+        wallets.clear_wallet_cache()
+
+
+@pytest.fixture
+def funded_user(schema):
+    """funded_user(amount="1000", **fields) -> a new User holding `amount` USDC (None: no balance row)."""
+    import uuid
+    from decimal import Decimal
+
+    from django.utils import timezone
+
+    from market.models import BalanceSnapshot, User
+
+    def make(amount="1000", **fields):
+        user = User.objects.create(id=uuid.uuid4(), display_name=f"u-{uuid.uuid4().hex[:8]}", **fields)
+        if amount is not None:
+            BalanceSnapshot.objects.create(
+                user=user, token="USDC", available_amount=Decimal(amount), locked_amount=0, updated_at=timezone.now()
+            )
+        return user
+
+    return make
+
+
+@pytest.fixture
+def binary_market(schema):
+    """
+    binary_market(event=None, pool=False) -> (market, [no, yes]): an active market
+    with No/Yes options at 50%; pool=True also initializes its AMM pool.
+    """
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from market.models import Market, MarketOption, MarketOptionStats
+    from market.services.amm.setup import ensure_pool_initialized
+
+    def make(event=None, pool=False):
+        later = timezone.now() + timedelta(days=30)
+        m = Market.objects.create(
+            title="m", event=event, status="active", trading_deadline=later, resolution_deadline=later
+        )
+        opts = []
+        for i, side in enumerate(("no", "yes")):
+            opt = MarketOption.objects.create(market=m, option_index=i, title=side, side=side)
+            MarketOptionStats.objects.create(option=opt, market=m, prob_bps=5000)
+            opts.append(opt)
+        if pool:
+            ensure_pool_initialized(market=m)
+        return m, opts
+
+    return make
+
+
+@pytest.fixture
+def exclusive_event(binary_market):
+    """
+    exclusive_event(n_markets=3) -> (event, [(market, [no, yes]), ...]): an active
+    exclusive event of binary markets sharing one initialized AMM pool.
+    """
+    from market.models import Event
+    from market.services.amm.setup import ensure_pool_initialized
+
+    def make(n_markets=3):
+        event = Event.objects.create(title="e", group_rule="exclusive", status="active")
+        markets = [binary_market(event) for _ in range(n_markets)]
+        ensure_pool_initialized(event=event)
+        return event, markets
+
+    return make
+
+
+@pytest.fixture
+def resolved_market(binary_market, funded_user):
+    """
+    resolved_market(holders) -> (market, [no, yes], users): a market resolved to Yes
+    whose pool holds 100 cash + 1000 collateral. holders is [(Yes shares, USDC
+    balance or None)]; every holder also has 3 losing No shares.
+    """
+    from decimal import Decimal
+
+    from market.models import AmmPool, Position
+    from market.services.amm.settlement import resolve_market
+
+    def make(holders):
+        m, (no, yes) = binary_market(pool=True)
+        AmmPool.objects.filter(market=m).update(pool_cash=Decimal("100"), collateral_amount=Decimal("1000"))
+        users = []
+        for shares, balance in holders:
+            user = funded_user(balance)
+            Position.objects.create(user=user, market=m, option=yes, shares=Decimal(shares), cost_basis=Decimal("1"))
+            Position.objects.create(user=user, market=m, option=no, shares=Decimal("3"), cost_basis=Decimal("1"))
+            users.append(user)
+        resolve_market(market_id=m.id, winning_option_index=1)
+        return m, [no, yes], users
+
+    return make
@@ -0,0 +1,137 @@
+# market/tests/test_batch_orders.py
+"""Batch orders: legs across markets in one transaction, all-or-nothing or best-effort."""
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from market.models import BalanceSnapshot, OrderIntent, Position, Trade
+from market.services.amm.batch_orders import BATCH_BEST_EFFORT, BatchLegError, execute_batch
+from market.services.amm.execution import execute_buy
+
+
+def _balance(user):
+    return BalanceSnapshot.objects.get(user=user, token="USDC").available_amount
+
+
+def _buy(m, opt, amount, **extra):
+    return {"side": "buy", "market_id": str(m.id), "option_id": str(opt.id), "amount_in": amount, **extra}
+
+
+def test_legs_across_markets_match_single_trades(funded_user, binary_market):
+    m1, (_, yes1) = binary_market(pool=True)
+    m2, (no2, _) = binary_market(pool=True)
+    m3, (_, yes3) = binary_market(pool=True)
+    m4, (no4, _) = binary_market(pool=True)
+    user, ref = funded_user(), funded_user()
+
+    out = execute_batch(user=user, legs=[_buy(m1, yes1, "10"), _buy(m2, no2, "20")])
+
+    assert out["filled"] == 2 and out["failed"] == 0
+    assert [r["status"] for r in out["results"]] == ["filled", "filled"]
+    single = [
+        execute_buy(user=ref, market_id=m3.id, option_id=str(yes3.id), option_index=None, amount_in="10"),
+        execute_buy(user=ref, market_id=m4.id, option_id=str(no4.id), option_index=None, amount_in="20"),
+    ]
+    for leg, one in zip(out["results"], single):
+        assert leg["shares_out"] == one["shares_out"]
+        assert leg["avg_price_bps"] == one["avg_price_bps"]
+        assert leg["order_intent_id"]
+
+    assert _balance(user) == Decimal("970")
+    assert Decimal(out["results"][1]["balance_available"]) == _balance(user)
+    assert Trade.objects.filter(user=user).count() == 2
+    assert Position.objects.filter(user=user).count() == 2
+
+
+def test_same_pool_legs_pay_earlier_price_impact(funded_user, binary_market):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+
+    out = execute_batch(user=user, legs=[_buy(m, yes, "50"), _buy(m, yes, "50")])
+
+    first, second = out["results"]
+    assert Decimal(second["shares_out"]) < Decimal(first["shares_out"])
+    pos = Position.objects.get(user=user, option=yes)
+    assert pos.shares == Decimal(first["shares_out"]) + Decimal(second["shares_out"])
+    assert _balance(user) == Decimal("900")
+
+
+def test_all_or_nothing_rolls_back_on_failing_leg(funded_user, binary_market):
+    m1, (_, yes1) = binary_market(pool=True)
+    m2, (_, yes2) = binary_market(pool=True)
+    user = funded_user("100")
+
+    with pytest.raises(BatchLegError) as exc:
+        execute_batch(user=user, legs=[_buy(m1, yes1, "60"), _buy(m2, yes2, "60")])
+
+    assert exc.value.leg == 1
+    assert exc.value.to_payload()["code"] == "INSUFFICIENT_BALANCE"
+    assert _balance(user) == Decimal("100")
+    assert not OrderIntent.objects.filter(user=user).exists()
+
+
+def test_best_effort_commits_the_legs_that_fit(funded_user, binary_market):
+    m1, (_, yes1) = binary_market(pool=True)
+    m2, (_, yes2) = binary_market(pool=True)
+    user = funded_user("100")
+
+    out = execute_batch(
+        user=user,
+        mode=BATCH_BEST_EFFORT,
+        legs=[
+            _buy(m1, yes1, "60", client_nonce="b-1"),
+            _buy(m2, yes2, "60"),
+            {"side": "sell", "market_id": "not-a-uuid", "shares": "1"},
+        ],
+    )
+
+    assert [r["status"] for r in out["results"]] == ["filled", "failed", "failed"]
+    assert out["results"][1]["code"] == "INSUFFICIENT_BALANCE"
+    assert out["results"][2]["code"] == "INVALID_PARAM"
+    assert _balance(user) == Decimal("40")
+
+    again = execute_batch(user=user, mode=BATCH_BEST_EFFORT, legs=[_buy(m1, yes1, "60", client_nonce="b-1")])
+    assert again["results"][0]["status"] == "replayed"
+    assert again["results"][0]["order_intent_id"] == out["results"][0]["order_intent_id"]
+    assert _balance(user) == Decimal("40")
+
+
+def test_queries_do_not_grow_per_leg(funded_user, binary_market):
+    markets = [binary_market(pool=True) for _ in range(4)]
+    user = funded_user()
+
+    def run(n):
+        legs = [_buy(m, yes, "5") for m, (_, yes) in markets[:n]]
+        with CaptureQueriesContext(connection) as ctx:
+            execute_batch(user=user, legs=legs)
+        return len(ctx.captured_queries)
+
+    two, four = run(2), run(4)
+    # per extra pool: pool read, q write, pool row write, outbox/stats work is bulk
+    assert four - two <= 2 * 4
+
+
+def test_pool_row_is_written_before_its_state_rows(funded_user, binary_market):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    with CaptureQueriesContext(connection) as ctx:
+        execute_batch(user=user, legs=[_buy(m, yes, "5")])
+    updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    # the single-trade lock order: pool CAS, then q (a reversed batch could deadlock with it)
+    pool_write = next(i for i, sql in enumerate(updates) if '"amm_pools"' in sql)
+    q_write = next(i for i, sql in enumerate(updates) if "amm_pool_option_state" in sql)
+    assert pool_write < q_write
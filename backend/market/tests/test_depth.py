@@ -0,0 +1,75 @@
+# market/tests/test_depth.py
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from market.services.amm.depth import DEPTH_SIZES, clear_depth_cache, compute_depth, depth_for_state
+from market.services.amm.errors import QuoteMathError
+from market.services.amm.quote_core import quote_from_state
+from market.services.amm.state import PoolState
+
+
+def _state(q, b=20_000.0, fee_bps=150, pool_id="p") -> PoolState:
+    ids = [f"opt-{i}" for i in range(len(q))]
+    return PoolState(
+        market_id="m",
+        pool_id=pool_id,
+        b=b,
+        fee_bps=fee_bps,
+        option_ids=ids,
+        option_indexes=list(range(len(q))),
+        q=list(q),
+        option_id_to_idx={oid: i for i, oid in enumerate(ids)},
+        option_index_to_idx={i: i for i in range(len(q))},
+    )
+
+
+def test_grid_is_one_two_five_up_to_100k():
+    assert DEPTH_SIZES[0] == 1 and DEPTH_SIZES[-1] == 100_000
+    assert len(DEPTH_SIZES) == 16
+
+
+def test_ladder_matches_quotes():
+    state = _state([4_000.0, -1_500.0, 0.0])
+    ladder = compute_depth(state)
+    assert ladder["sizes"][:3] == ["1", "2", "5"]
+
+    for i, row in enumerate(ladder["outcomes"]):
+        assert row["prob_bps"] == state.prob_bps()[i]
+        for k, size in enumerate(DEPTH_SIZES):
+            q = quote_from_state(state, option_index=i, side="buy", amount_in=size)
+            assert float(row["buy"]["shares"][k]) == pytest.approx(float(q["shares_out"]), rel=1e-9, abs=2e-8)
+            assert row["buy"]["avg_price_bps"][k] == pytest.approx(q["avg_price_bps"], abs=1)
+            assert row["buy"]["post_prob_bps"][k] == pytest.approx(q["post_prob_bps"][i], abs=1)
+
+            try:
+                q = quote_from_state(state, option_index=i, side="sell", amount_in=size)
+            except QuoteMathError:
+                assert row["sell"]["shares"][k] is None
+                continue
+            assert float(row["sell"]["shares"][k]) == pytest.approx(float(q["shares_in"]), rel=1e-9, abs=2e-8)
+            assert row["sell"]["post_prob_bps"][k] == pytest.approx(q["post_prob_bps"][i], abs=1)
+
+
+def test_large_sells_are_unavailable():
+    ladder = compute_depth(_state([0.0, 0.0], b=1_000.0))
+    sell = ladder["outcomes"][0]["sell"]
+    # max gross ≈ b*ln 2 ≈ 693
+    assert sell["shares"][DEPTH_SIZES.index(500)] is not None
+    assert sell["shares"][DEPTH_SIZES.index(1000)] is None
+    assert sell["avg_price_bps"][-1] is None and sell["post_prob_bps"][-1] is None
+
+
+def test_memoized_by_pool_version():
+    clear_depth_cache()
+    a = depth_for_state(_state([10.0, 0.0]))
+    assert depth_for_state(_state([10.0, 0.0])) is a
+    b = depth_for_state(_state([10.0, 1e-9]))
+    assert b is not a and b["version"] != a["version"]
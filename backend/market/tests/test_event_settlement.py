@@ -0,0 +1,162 @@
+# market/tests/test_event_settlement.py
+"""Exclusive events resolve and settle as a whole: one pass over every market's Yes and No winners, one pool debit."""
+import json
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from market.models import (
+    AmmPool,
+    BalanceSnapshot,
+    Event,
+    EventSettlementJob,
+    Market,
+    MarketSettlement,
+    OptionExposure,
+    Position,
+)
+from market.services.amm import settlement_payouts
+from market.services.amm.event_settlement import enqueue_event_settlement, resolve_event, settle_event
+from market.services.amm.execution import execute_buy
+from market.services.amm.settlement import SettlementError
+from market.services.amm.settlement_jobs import enqueue_settlement
+from market.views.admin import admin_event_settlement_progress, admin_resolve_and_settle_event
+
+
+def _balance(user):
+    return BalanceSnapshot.objects.get(user=user, token="USDC").available_amount
+
+
+def _buy(user, m, opt, amount):
+    out = execute_buy(user=user, market_id=m.id, option_id=str(opt.id), option_index=None, amount_in=amount)
+    return Decimal(out["shares_out"])
+
+
+def test_event_settles_yes_and_no_winners_in_one_pass(funded_user, exclusive_event, monkeypatch):
+    monkeypatch.setattr(settlement_payouts, "SETTLEMENT_CHUNK", 2)
+    event, [(m0, (no0, yes0)), (m1, (no1, yes1)), (m2, (no2, yes2))] = exclusive_event()
+    AmmPool.objects.filter(event=event).update(collateral_amount=Decimal("1000"))
+    yes_winner, no_winner, both, loser = funded_user(), funded_user(), funded_user(), funded_user()
+    yes0_s = _buy(yes_winner, m0, yes0, "30")
+    no1_s = _buy(no_winner, m1, no1, "20")
+    # No on the two losing markets: paid once per market, credited in one balance row
+    both1_s, both2_s = _buy(both, m1, no1, "5"), _buy(both, m2, no2, "5")
+    owed = {yes_winner: yes0_s, no_winner: no1_s, both: both1_s + both2_s, loser: Decimal("0")}
+    _buy(loser, m0, no0, "10")
+    _buy(loser, m2, yes2, "10")
+    before = {u: _balance(u) for u in owed}
+    pool = AmmPool.objects.get(event=event)
+    funds = Decimal(pool.pool_cash) + Decimal(pool.collateral_amount)
+
+    admin, rf = funded_user(None, role="admin"), RequestFactory()
+    resp = admin_resolve_and_settle_event(
+        rf.post(
+            "/", data=json.dumps({"winning_market_id": str(m0.id)}), content_type="application/json",
+            HTTP_X_USER_ID=str(admin.id),
+        ),
+        event.id,
+    )
+    assert resp.status_code == 202
+    body = json.loads(resp.content)
+    assert [(r["market_id"], r["resolved_option_id"]) for r in body["resolution"]["markets"]] == sorted(
+        [(str(m0.id), yes0.id), (str(m1.id), no1.id), (str(m2.id), no2.id)]
+    )
+    assert Decimal(body["settlement"]["total_payout"]) == sum(owed.values())
+    with pytest.raises(SettlementError) as exc:
+        enqueue_settlement(market_id=m1.id)
+    assert exc.value.code == "EVENT_SETTLEMENT_EXISTS"
+    # the whole payout is debited with the job, before anyone is paid
+    pool = AmmPool.objects.get(event=event)
+    assert pool.status == "closed"
+    assert Decimal(pool.pool_cash) + Decimal(pool.collateral_amount) == funds - sum(owed.values())
+
+    with CaptureQueriesContext(connection) as ctx:
+        call_command("process_settlement_jobs", "--once", stdout=open(os.devnull, "w"))
+    assert not any("amm_pools" in q["sql"] for q in ctx.captured_queries)
+
+    assert {u: _balance(u) - before[u] for u in owed} == owed
+    progress = admin_event_settlement_progress(rf.get("/", HTTP_X_USER_ID=str(admin.id)), event.id)
+    progress = json.loads(progress.content)
+    assert progress["status"] == "done" and progress["winners_paid"] == 4
+
+    settlements = {s.market_id: s for s in MarketSettlement.objects.filter(market__event=event)}
+    assert {mid: s.resolved_option_id for mid, s in settlements.items()} == {
+        m0.id: yes0.id, m1.id: no1.id, m2.id: no2.id
+    }
+    assert {mid: s.total_payout for mid, s in settlements.items()} == {
+        m0.id: yes0_s, m1.id: no1_s + both1_s, m2.id: both2_s
+    }
+    for s in settlements.values():
+        assert s.pool_cash_used + s.collateral_used == s.total_payout
+    assert len({s.settlement_tx_id for s in settlements.values()}) == 1
+    assert not Market.objects.filter(event=event, settled_at__isnull=True).exists()
+
+    pool = AmmPool.objects.get(event=event)
+    assert pool.status == "closed"
+    assert Decimal(pool.pool_cash) + Decimal(pool.collateral_amount) == funds - sum(owed.values())
+
+    again = settle_event(event_id=event.id)
+    assert again["already_settled"] and len(again["markets"]) == 3
+
+
+def test_event_and_market_settlement_exclude_each_other(binary_market, exclusive_event):
+    event, [(m0, _), (m1, _)] = exclusive_event(2)
+    resolve_event(event_id=event.id, winning_market_id=m1.id)
+    assert resolve_event(event_id=event.id, winning_market_id=m1.id)["already_resolved"]
+    with pytest.raises(SettlementError) as exc:
+        resolve_event(event_id=event.id, winning_market_id=m0.id)
+    assert exc.value.code == "RESOLUTION_CONFLICT"
+
+    settle_event(event_id=event.id)
+    assert EventSettlementJob.objects.get(event=event).status == "done"
+    # already settled with the event: the per-market path just reports it
+    assert enqueue_settlement(market_id=m0.id)["already_settled"]
+
+    other, [(m2, _), (m3, _)] = exclusive_event(2)
+    resolve_event(event_id=other.id, winning_market_id=m2.id)
+    enqueue_settlement(market_id=m3.id)
+    with pytest.raises(SettlementError) as exc:
+        settle_event(event_id=other.id)
+    assert exc.value.code == "MARKET_SETTLEMENT_EXISTS"
+
+    independent = Event.objects.create(title="e", group_rule="independent", status="active")
+    m4, _ = binary_market(independent)
+    with pytest.raises(SettlementError) as exc:
+        resolve_event(event_id=independent.id, winning_market_id=m4.id)
+    assert exc.value.code == "NOT_EXCLUSIVE"
+
+
+def test_event_pool_short_of_the_payout_fails_before_anyone_is_paid(funded_user, exclusive_event):
+    event, [(m0, (_, yes0)), (m1, (no1, _))] = exclusive_event(2)
+    holders = [funded_user(), funded_user()]
+    Position.objects.create(user=holders[0], market=m0, option=yes0, shares=Decimal("700"), cost_basis=Decimal("1"))
+    Position.objects.create(user=holders[1], market=m1, option=no1, shares=Decimal("700"), cost_basis=Decimal("1"))
+    # counters that drifted low must not hide the shortfall
+    for m, opt in ((m0, yes0), (m1, no1)):
+        OptionExposure.objects.create(option=opt, market=m, outstanding_shares=Decimal("1"), updated_at=timezone.now())
+    resolve_event(event_id=event.id, winning_market_id=m0.id)
+    funds = AmmPool.objects.filter(event=event).values_list("pool_cash", "collateral_amount").get()
+
+    with pytest.raises(SettlementError) as exc:
+        enqueue_event_settlement(event_id=event.id)
+    assert exc.value.code == "INSUFFICIENT_FUNDS"
+    assert not EventSettlementJob.objects.filter(event=event).exists()
+    assert AmmPool.objects.filter(event=event).values_list("pool_cash", "collateral_amount").get() == funds
+    assert [_balance(u) for u in holders] == [Decimal("1000"), Decimal("1000")]
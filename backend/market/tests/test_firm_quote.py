@@ -0,0 +1,113 @@
+# market/tests/test_firm_quote.py
+"""Firm quotes: signed results filled as is while the pool version is unchanged."""
+import json
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.test import RequestFactory
+
+from market.services.amm import execution, firm_quote
+from market.services.amm.execution import ExecutionError, execute_buy, execute_sell
+from market.services.amm.firm_quote import issue_firm_quote
+from market.services.amm.quote_loader import load_pool_state
+from market.views import amm as amm_views
+
+
+def _no_requote(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("firm quote was re-quoted")
+
+    monkeypatch.setattr(execution, "build_quote", fail)
+
+
+def test_firm_buy_is_filled_without_requote(funded_user, binary_market, monkeypatch):
+    m, (_, yes) = binary_market(pool=True)
+    firm = issue_firm_quote(load_pool_state(m.id), option_id=yes.id, side="buy", amount_in="25")
+
+    _no_requote(monkeypatch)
+    result = execute_buy(
+        user=funded_user(),
+        market_id=m.id,
+        option_id=str(yes.id),
+        option_index=None,
+        amount_in="25.00",
+        quote_token=firm.token,
+    )
+    assert Decimal(result["shares_out"]) == Decimal(firm.quote.shares_units) / Decimal(10**8)
+
+
+def test_moved_pool_or_expired_token_requotes(funded_user, binary_market, monkeypatch):
+    m, (_, yes) = binary_market(pool=True)
+    firm = issue_firm_quote(load_pool_state(m.id), option_id=yes.id, side="buy", amount_in="25")
+    late = issue_firm_quote(load_pool_state(m.id), option_id=yes.id, side="buy", amount_in="10")
+
+    user = funded_user()
+    moved = execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="25", quote_token=firm.token)
+    # first fill used the token; the pool version moved, so the same token now re-quotes at the new price
+    again = execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="25", quote_token=firm.token)
+    assert Decimal(again["shares_out"]) < Decimal(moved["shares_out"])
+
+    monkeypatch.setattr(firm_quote, "FIRM_QUOTE_TTL_SECONDS", -1)
+    expired = execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10", quote_token=late.token)
+    assert Decimal(expired["shares_out"]) != Decimal(late.quote.shares_units) / Decimal(10**8)
+
+
+def test_forged_or_mismatched_token_is_rejected(funded_user, binary_market):
+    m, (no, yes) = binary_market(pool=True)
+    firm = issue_firm_quote(load_pool_state(m.id), option_id=yes.id, side="buy", amount_in="25")
+    user = funded_user()
+
+    for kwargs in (
+        {"option_id": str(yes.id), "amount_in": "25", "quote_token": firm.token[:-2] + "xx"},
+        {"option_id": str(yes.id), "amount_in": "30", "quote_token": firm.token},
+        {"option_id": str(no.id), "amount_in": "25", "quote_token": firm.token},
+    ):
+        with pytest.raises(ExecutionError) as exc:
+            execute_buy(user=user, market_id=m.id, option_index=None, **kwargs)
+        assert exc.value.code == "INVALID_QUOTE_TOKEN"
+
+
+def test_firm_no_side_sell_on_exclusive_event(funded_user, exclusive_event, monkeypatch):
+    _, markets = exclusive_event(3)
+    m, (no, _) = markets[1]
+    user = funded_user()
+    bought = execute_buy(user=user, market_id=m.id, option_id=str(no.id), option_index=None, amount_in="40")
+
+    firm = issue_firm_quote(load_pool_state(m.id), option_id=no.id, side="sell", shares=bought["shares_out"])
+    assert firm.quote.is_no_side and firm.quote.deltas
+
+    _no_requote(monkeypatch)
+    sold = execute_sell(
+        user=user, market_id=m.id, option_id=str(no.id), option_index=None, shares=bought["shares_out"], quote_token=firm.token
+    )
+    assert Decimal(sold["amount_out"]) == Decimal(firm.quote.amount_micros) / Decimal(10**6)
+
+
+
+def test_plain_and_firm_quote_price_no_options_alike(exclusive_event):
+    _, markets = exclusive_event(3)
+    m, (no, yes) = markets[1]
+    rf = RequestFactory()
+
+    def get(**params):
+        return json.loads(amm_views.quote(rf.get("/", params), m.id).content)
+
+    for side, size in (("buy", {"amount_in": "25"}), ("sell", {"shares": "10"})):
+        plain = get(option_id=str(no.id), side=side, **size)
+        firm = get(option_id=str(no.id), side=side, firm="1", **size)
+        assert plain["option_id"] == firm["option_id"] == str(no.id)
+        assert {k: v for k, v in firm.items() if k in plain} == plain
+    # the No leg, not the Yes one
+    assert get(option_id=str(no.id), amount_in="25")["shares_out"] != get(option_id=str(yes.id), amount_in="25")["shares_out"]
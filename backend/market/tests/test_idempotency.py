@@ -0,0 +1,134 @@
+# market/tests/test_idempotency.py
+"""Orders with a client_nonce fill once; retries replay the original response."""
+import os
+import sys
+import threading
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from market.models import BalanceSnapshot, OrderIntent, Position, Trade, User
+from market.services.amm import idempotency
+from market.services.amm.batch_orders import BATCH_BEST_EFFORT, execute_batch
+from market.services.amm.execution import ExecutionError, execute_buy, execute_sell
+
+
+def _balance(user):
+    return BalanceSnapshot.objects.get(user=user, token="USDC").available_amount
+
+
+def test_retried_buy_replays_without_filling_again(funded_user, binary_market):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    kwargs = dict(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10", client_nonce="n-1")
+
+    first = execute_buy(**kwargs)
+    with CaptureQueriesContext(connection) as ctx:
+        assert execute_buy(**kwargs) == first
+    assert len(ctx.captured_queries) == 0  # process-local result cache
+
+    idempotency.clear_idempotency_cache()
+    with CaptureQueriesContext(connection) as ctx:
+        assert execute_buy(**kwargs) == first
+    assert len(ctx.captured_queries) == 1  # one indexed read
+
+    assert _balance(user) == Decimal("990")
+    assert OrderIntent.objects.filter(user=user).count() == 1
+    assert Trade.objects.filter(user=user).count() == 1
+
+    other = execute_buy(**{**kwargs, "client_nonce": "n-2"})
+    assert other["order_intent_id"] != first["order_intent_id"]
+    assert _balance(user) == Decimal("980")
+
+
+def test_retried_sell_replays(funded_user, binary_market):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    bought = execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+    kwargs = dict(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, shares=bought["shares_out"], client_nonce="s-1")
+
+    first = execute_sell(**kwargs)
+    idempotency.clear_idempotency_cache()
+    assert execute_sell(**kwargs) == first
+    assert OrderIntent.objects.filter(user=user, side="sell").count() == 1
+
+
+def test_retried_dust_close_replays(funded_user, binary_market):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    Position.objects.create(user=user, market=m, option=yes, shares=Decimal("0.05"), cost_basis=Decimal("0.01"))
+    kwargs = dict(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, sell_all=True, client_nonce="d-1")
+
+    first = execute_sell(**kwargs)
+    assert first["dust_cleanup"] and first["order_intent_id"]
+    idempotency.clear_idempotency_cache()
+    assert execute_sell(**kwargs) == first  # not NO_POSITION
+    assert OrderIntent.objects.filter(user=user, side="sell").count() == 1
+    assert not Trade.objects.filter(user=user).exists()
+
+
+def test_nonce_reused_for_a_different_order_is_rejected(funded_user, binary_market):
+    m, (no, yes) = binary_market(pool=True)
+    user = funded_user()
+    kwargs = dict(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10", client_nonce="r-1")
+    first = execute_buy(**kwargs)
+    # same order, amount spelled differently: still a replay
+    assert execute_buy(**{**kwargs, "amount_in": Decimal("10.00")}) == first
+
+    for changed in ({"amount_in": "11"}, {"option_id": str(no.id)}, {"min_shares_out": "1"}):
+        for cached in (True, False):
+            if not cached:
+                idempotency.clear_idempotency_cache()
+            with pytest.raises(ExecutionError) as exc:
+                execute_buy(**{**kwargs, **changed})
+            assert exc.value.code == "CLIENT_NONCE_REUSED" and exc.value.http_status == 409
+    with pytest.raises(ExecutionError):
+        execute_sell(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, shares="1", client_nonce="r-1")
+
+    leg = {"side": "buy", "market_id": str(m.id), "option_id": str(yes.id), "client_nonce": "r-1"}
+    assert execute_batch(user=user, legs=[{**leg, "amount_in": "10"}])["results"][0]["status"] == "replayed"
+    failed = execute_batch(user=user, mode=BATCH_BEST_EFFORT, legs=[{**leg, "amount_in": "12"}])["results"][0]
+    assert failed["status"] == "failed" and failed["code"] == "CLIENT_NONCE_REUSED"
+    assert _balance(user) == Decimal("990")
+
+
+def test_inflight_duplicates_wait_for_the_first(monkeypatch):
+    results = {}
+    calls = []
+
+    monkeypatch.setattr(
+        idempotency, "order_result", lambda user_id, nonce, request_hash=None: results.get((str(user_id), nonce))
+    )
+
+    @idempotency.idempotent("buy")
+    def slow_order(*, user, client_nonce, request_hash=None):
+        calls.append(client_nonce)
+        time.sleep(0.05)
+        results[(str(user.id), client_nonce)] = {"order_intent_id": len(calls)}
+        return results[(str(user.id), client_nonce)]
+
+    user = User(id=uuid.uuid4())
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(slow_order(user=user, client_nonce="dup"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["dup"]
+    assert out == [{"order_intent_id": 1}] * 4
+    assert idempotency._inflight == {}
@@ -0,0 +1,79 @@
+# market/tests/test_live_probs.py
+"""Read-side probabilities: serializers derive prob_bps from the cached pool q."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from market.models import Market, MarketOptionStats
+from market.services import serializers
+from market.services.amm import live_probs, outbox
+from market.services.amm.execution import execute_buy
+from market.services.amm.pool_cache import clear_pool_cache
+from market.services.amm.quote_loader import load_pool_state
+
+
+@pytest.fixture(autouse=True)
+def outbox_mode(monkeypatch):
+    monkeypatch.setattr(outbox, "TRADE_SIDE_EFFECTS", outbox.SIDE_EFFECTS_OUTBOX)
+    monkeypatch.setattr(live_probs, "LIVE_PROBS", True)
+    clear_pool_cache()
+
+
+def _probs(payload):
+    return {o["id"]: o["probability_bps"] for o in payload["options"]}
+
+
+def test_market_reads_q_before_stats_are_refreshed(funded_user, binary_market):
+    m, (no, yes) = binary_market(pool=True)
+    execute_buy(user=funded_user(), market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="100")
+
+    assert MarketOptionStats.objects.get(option=yes).prob_bps == 5000  # outbox not applied
+    expected = load_pool_state(m.id).prob_bps()
+    assert _probs(serializers.serialize_market(m)) == {no.id: expected[0], yes.id: expected[1]}
+    assert expected[1] > 5000
+
+
+def test_exclusive_event_uses_one_pool_state(funded_user, exclusive_event):
+    event, markets = exclusive_event(4)
+    m, (no, _) = markets[0]
+    execute_buy(user=funded_user(), market_id=m.id, option_id=str(no.id), option_index=None, amount_in="50")
+
+    serializers.serialize_event(event)  # warm the pool cache
+    with CaptureQueriesContext(connection) as ctx:
+        live = live_probs.live_prob_bps(Market.objects.filter(event=event))
+    assert len(ctx.captured_queries) == 1  # the market list itself
+
+    payload = serializers.serialize_event(event)
+    for market in payload["markets"]:
+        probs = {o["title"]: o["probability_bps"] for o in market["options"]}
+        assert probs["no"] == 10000 - probs["yes"]
+    assert len(live) == 8
+    assert live[no.id] > 7500  # four outcomes start at 2500 each
+
+
+def test_falls_back_to_stats(funded_user, binary_market, monkeypatch):
+    m, (no, yes) = binary_market(pool=True)
+    execute_buy(user=funded_user(), market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="100")
+
+    m.status = "resolved"
+    assert _probs(serializers.serialize_market(m)) == {no.id: 5000, yes.id: 5000}
+
+    m.status = "active"
+    monkeypatch.setattr(live_probs, "LIVE_PROBS", False)
+    assert _probs(serializers.serialize_market(m)) == {no.id: 5000, yes.id: 5000}
+
+    draft, (d_no, d_yes) = binary_market()  # no pool
+    assert _probs(serializers.serialize_market(draft)) == {d_no.id: 5000, d_yes.id: 5000}
@@ -9,7 +9,16 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from market.services.amm.lmsr import prices, cost, buy_amount_to_delta_q
+from market.services.amm.lmsr import (
+    LogSumExp,
+    buy_amount_to_delta_q,
+    buy_amount_to_delta_q_cached,
+    cost,
+    cost_cached,
+    cost_delta_cached,
+    prices,
+    prices_cached,
+)
 
 
 ABS_TOL = 1e-12
@@ -266,3 +275,53 @@ def test_large_trade_pushes_probability_toward_one_binary():
     assert p1[0] > 0.999999  # 接近 1
     assert p1[1] < 0.000001
     assert sum(p1) == pytest.approx(1.0, abs=ABS_TOL)
+
+
+# ---------- cached log-sum-exp: same answers, O(1) per single-outcome change ----------
+def test_cached_reads_match_scalar():
+    rng = _rng()
+    for _ in range(60):
+        n = rng.randint(2, 8)
+        b = rng.uniform(100.0, 1e6)
+        q = _rand_q(rng, n, scale=1e5)
+        i = rng.randrange(n)
+        lse = LogSumExp.from_q(q, b)
+
+        assert prices_cached(lse, q) == pytest.approx(prices(q, b), abs=ABS_TOL)
+        assert cost_cached(lse) == pytest.approx(cost(q, b), rel=1e-12)
+
+        amount = rng.uniform(0.01 * b, 5.0 * b)
+        assert buy_amount_to_delta_q_cached(lse, q[i], amount) == pytest.approx(
+            buy_amount_to_delta_q(q, b, i, amount), rel=1e-12
+        )
+
+        d = rng.uniform(-2.0 * b, 2.0 * b)
+        q2 = list(q)
+        q2[i] += d
+        assert cost_delta_cached(lse, q[i], d) == pytest.approx(cost(q2, b) - cost(q, b), rel=1e-9, abs=1e-6)
+
+
+def test_cached_update_tracks_full_rebuild():
+    rng = _rng()
+    n = 6
+    b = 5_000.0
+    q = _rand_q(rng, n, scale=2e4)
+    lse = LogSumExp.from_q(q, b)
+    for _ in range(500):
+        i = rng.randrange(n)
+        q_old = q[i]
+        q[i] = q_old + rng.uniform(-3.0 * b, 3.0 * b)
+        lse.update(q, q_old, q[i])
+
+        fresh = LogSumExp.from_q(q, b)
+        assert lse.log_partition() == pytest.approx(fresh.log_partition(), rel=1e-12, abs=1e-12)
+
+
+def test_cached_update_survives_dominant_outcome_collapse():
+    # 主导 outcome 大幅下降时会触发重建，避免相减抵消精度
+    b = 10_000.0
+    q = [1e6, 0.0, 0.0]
+    lse = LogSumExp.from_q(q, b)
+    q[0] = 0.0
+    lse.update(q, 1e6, 0.0)
+    assert prices_cached(lse, q) == pytest.approx([1 / 3, 1 / 3, 1 / 3], abs=ABS_TOL)
@@ -0,0 +1,114 @@
+# market/tests/test_lmsr_vec.py
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from market.services.amm.lmsr import buy_amount_to_delta_q, cost, prices
+from market.services.amm.lmsr_vec import buy_amount_to_delta_q_batch, cost_batch, prices_batch
+
+
+TOL = 1e-12
+
+
+def _rng() -> random.Random:
+    # 固定种子：测试可复现
+    return random.Random(20260102)
+
+
+def _rand_pools(rng: random.Random, n_pools: int, n: int, scale: float = 1e5):
+    Q = [[rng.uniform(-scale, scale) for _ in range(n)] for _ in range(n_pools)]
+    b = [rng.uniform(100.0, 1e6) for _ in range(n_pools)]
+    return Q, b
+
+
+# ---------- input validation mirrors the scalar functions ----------
+def test_invalid_inputs_raise():
+    Q = [[0.0, 0.0], [1.0, 2.0]]
+
+    with pytest.raises(ValueError):
+        prices_batch(Q, 0.0)
+    with pytest.raises(ValueError):
+        cost_batch(Q, [1.0, -1.0])
+    with pytest.raises(ValueError):
+        buy_amount_to_delta_q_batch(Q, 1.0, 0, [10.0, 0.0])
+    with pytest.raises(IndexError):
+        buy_amount_to_delta_q_batch(Q, 1.0, 2, 10.0)
+    with pytest.raises(IndexError):
+        buy_amount_to_delta_q_batch(Q, 1.0, [0, -1], 10.0)
+
+
+def test_one_dimensional_q_is_a_single_pool():
+    p = prices_batch([0.0, 0.0], 10_000.0)
+    assert p.shape == (1, 2)
+    assert p[0] == pytest.approx([0.5, 0.5], abs=TOL)
+    assert cost_batch([0.0, 0.0], 10_000.0).shape == (1,)
+
+
+# ---------- agreement with the scalar kernel ----------
+def test_prices_match_scalar():
+    rng = _rng()
+    for _ in range(20):
+        n = rng.randint(2, 12)
+        Q, b = _rand_pools(rng, rng.randint(1, 16), n, scale=1e6)
+        out = prices_batch(Q, b)
+        for row, q, bi in zip(out, Q, b):
+            assert list(row) == pytest.approx(prices(q, bi), abs=TOL)
+
+
+def test_cost_matches_scalar():
+    rng = _rng()
+    for _ in range(20):
+        n = rng.randint(2, 12)
+        Q, b = _rand_pools(rng, rng.randint(1, 16), n, scale=1e6)
+        out = cost_batch(Q, b)
+        for c, q, bi in zip(out, Q, b):
+            assert c == pytest.approx(cost(q, bi), rel=TOL, abs=1e-9)
+
+
+def test_delta_q_matches_scalar_shared_sizes():
+    rng = _rng()
+    for _ in range(20):
+        n = rng.randint(2, 10)
+        n_pools = rng.randint(1, 12)
+        Q, b = _rand_pools(rng, n_pools, n)
+        idx = [rng.randrange(n) for _ in range(n_pools)]
+        sizes = [rng.uniform(0.01, 5e5) for _ in range(rng.randint(1, 8))]
+
+        out = buy_amount_to_delta_q_batch(Q, b, idx, sizes)
+        assert out.shape == (n_pools, len(sizes))
+        for p in range(n_pools):
+            for k, amount in enumerate(sizes):
+                expected = buy_amount_to_delta_q(Q[p], b[p], idx[p], amount)
+                assert out[p, k] == pytest.approx(expected, rel=TOL)
+
+
+def test_delta_q_matches_scalar_per_pool_sizes():
+    rng = _rng()
+    Q, b = _rand_pools(rng, 6, 5)
+    amounts = [[rng.uniform(1.0, 1e5) for _ in range(4)] for _ in range(6)]
+
+    out = buy_amount_to_delta_q_batch(Q, b, 3, amounts)
+    for p in range(6):
+        for k in range(4):
+            expected = buy_amount_to_delta_q(Q[p], b[p], 3, amounts[p][k])
+            assert out[p, k] == pytest.approx(expected, rel=TOL)
+
+
+def test_extreme_sizes_stay_finite():
+    # 覆盖 _log1p_exp 的两个渐近分支
+    b = 10_000.0
+    Q = [[0.0, 0.0], [5e5, -5e5]]
+    sizes = [1e-6, 1.0, 20.0 * b]
+    out = buy_amount_to_delta_q_batch(Q, b, 0, sizes)
+    assert np.all(np.isfinite(out)) and np.all(out > 0)
+    for p in range(2):
+        for k, amount in enumerate(sizes):
+            assert out[p, k] == pytest.approx(buy_amount_to_delta_q(Q[p], b, 0, amount), rel=TOL)
@@ -0,0 +1,128 @@
+# market/tests/test_money.py
+import random
+import sys
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from market.services.amm.errors import QuoteInputError
+from market.services.amm.money import (
+    MONEY_SCALE,
+    SHARES_SCALE,
+    _format_money,
+    _format_shares,
+    _money_step,
+    _money_units_from_float,
+    _money_units_mul_bps,
+    _parse_units,
+    _units_from_float,
+)
+from market.services.amm.quote_core import build_quote, quote_from_state
+from market.services.amm.state import PoolState
+
+CENT = Decimal("0.01")
+
+
+def _rng() -> random.Random:
+    # 固定种子：测试可复现
+    return random.Random(20260106)
+
+
+def test_money_step_and_format():
+    assert _money_step(CENT) == (10_000, 2)
+    assert _money_step(Decimal("0.000001")) == (1, 6)
+    with pytest.raises(QuoteInputError):
+        _money_step(Decimal("0.0000001"))
+    assert _format_money(12_345_670_000, CENT) == "12345.67"
+    assert _format_money(0, CENT) == "0.00"
+    assert _format_shares(123_456_789) == "1.23456789"
+    assert _format_shares(5) == "0.00000005"
+
+
+def test_parse_units_boundary():
+    assert _parse_units(7, "x", MONEY_SCALE, ROUND_UP) == 7_000_000
+    assert _parse_units("1.0000001", "x", MONEY_SCALE, ROUND_UP) == 1_000_001
+    assert _parse_units("1.0000001", "x", MONEY_SCALE, ROUND_DOWN) == 1_000_000
+    with pytest.raises(QuoteInputError):
+        _parse_units("Infinity", "x", MONEY_SCALE, ROUND_UP)
+    with pytest.raises(QuoteInputError):
+        _parse_units("abc", "x", MONEY_SCALE, ROUND_UP)
+
+
+def test_float_quantization_matches_decimal_str():
+    # Same result as Decimal(str(x)).quantize(...) away from float-noise boundaries.
+    rng = _rng()
+    for _ in range(5000):
+        x = rng.uniform(0.0, 1e6)
+        for up in (True, False):
+            rounding = ROUND_UP if up else ROUND_DOWN
+            cents = Decimal(str(x)).quantize(CENT, rounding=rounding)
+            assert _money_units_from_float(x, 10_000, up=up) == int(cents * MONEY_SCALE)
+        shares = Decimal(str(x)).quantize(Decimal("0.00000001"), rounding=ROUND_DOWN)
+        assert _units_from_float(x, SHARES_SCALE, up=False) == pytest.approx(int(shares * SHARES_SCALE), abs=1)
+
+
+def test_float_products_snap_to_intended_value():
+    assert _money_units_from_float(1.15, 10_000, up=False) == 1_150_000
+    assert _money_units_from_float(0.29, 10_000, up=True) == 290_000
+
+
+def test_fee_rounding_is_exact():
+    # 100.01 * 1.5% = 1.50015 -> UP 1.51 / DOWN 1.50
+    assert _money_units_mul_bps(100_010_000, 150, 10_000, up=True) == 1_510_000
+    assert _money_units_mul_bps(100_010_000, 150, 10_000, up=False) == 1_500_000
+    assert _money_units_mul_bps(100_000_000, 150, 10_000, up=True) == 1_500_000
+
+
+def _state(q, b=8_000.0, fee_bps=175) -> PoolState:
+    ids = [f"opt-{i}" for i in range(len(q))]
+    return PoolState(
+        market_id="m",
+        pool_id="p",
+        b=b,
+        fee_bps=fee_bps,
+        option_ids=ids,
+        option_indexes=list(range(len(q))),
+        q=list(q),
+        option_id_to_idx={oid: i for i, oid in enumerate(ids)},
+        option_index_to_idx={i: i for i in range(len(q))},
+    )
+
+
+def test_units_quote_serializes_at_boundary():
+    state = _state([250.0, -40.0])
+    units = build_quote(state, option_index=0, side="buy", amount_in="123.45")
+    text = quote_from_state(state, option_index=0, side="buy", amount_in="123.45")
+
+    assert units.amount_micros == 123_450_000
+    assert units.fee_micros == 2_170_000  # 123.45 * 1.75% = 2.160375 -> UP 2.17
+    assert text["amount_in"] == "123.45" and text["fee_amount"] == "2.17"
+    assert Decimal(text["shares_out"]) * SHARES_SCALE == units.shares_units
+
+
+def test_sell_rounding_directions():
+    state = _state([900.0, 0.0, -300.0])
+    rng = _rng()
+    for _ in range(200):
+        shares = Decimal(str(round(rng.uniform(0.5, 2_000.0), 4)))
+        units = build_quote(state, option_index=1, side="sell", shares=shares)
+        gross = units.amount_micros + units.fee_micros
+        # everything lands on the cent grid; fee rounded UP from the rounded-DOWN gross
+        assert gross % 10_000 == 0 and units.fee_micros % 10_000 == 0
+        assert units.fee_micros == -(-gross * 175 // (10_000 * 10_000)) * 10_000
+
+
+def test_sell_amount_out_nets_at_least_requested():
+    rng = _rng()
+    for _ in range(300):
+        state = _state([rng.uniform(-500.0, 500.0) for _ in range(3)], b=rng.uniform(2_000.0, 20_000.0))
+        amount = Decimal(str(round(rng.uniform(1.0, 120.0), 2)))
+        units = build_quote(state, option_index=1, side="sell", amount_in=amount)
+        assert units.amount_micros == units.requested_amount_out_micros == int(amount * MONEY_SCALE)
+        # the smallest shares_in that does it
+        less = build_quote(state, option_index=1, side="sell", shares=Decimal(units.shares_units - 1) / SHARES_SCALE)
+        assert less.amount_micros < units.amount_micros
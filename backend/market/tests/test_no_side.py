@@ -0,0 +1,153 @@
+# market/tests/test_no_side.py
+import random
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from market.services.amm.errors import QuoteInputError
+from market.services.amm.lmsr import buy_amount_to_delta_q, cost, prices
+from market.services.amm.no_side import (
+    NO_SIDE_COMPLEMENT,
+    NO_SIDE_PROPORTIONAL,
+    no_buy_deltas,
+    no_post_prob_bps,
+    no_sell_deltas,
+)
+from market.services.amm.quote_core import quote_from_state
+from market.services.amm.state import PoolState
+
+
+def _rng() -> random.Random:
+    # 固定种子：测试可复现
+    return random.Random(20260103)
+
+
+def _state(q, b=10_000.0, fee_bps=100) -> PoolState:
+    ids = [f"opt-{i}" for i in range(len(q))]
+    return PoolState(
+        market_id="m",
+        pool_id="p",
+        b=b,
+        fee_bps=fee_bps,
+        option_ids=ids,
+        option_indexes=list(range(len(q))),
+        q=list(q),
+        option_id_to_idx={oid: i for i, oid in enumerate(ids)},
+        option_index_to_idx={i: i for i in range(len(q))},
+        is_exclusive=True,
+    )
+
+
+def _sequential_no_buy(q, b, target_idx, net):
+    # 参考实现：按腿依次买入，每条腿按前一条腿之后的 q 定价
+    probs = prices(q, b)
+    other = sum(p for j, p in enumerate(probs) if j != target_idx)
+    q = list(q)
+    deltas = [0.0] * len(q)
+    for j in range(len(q)):
+        if j != target_idx:
+            deltas[j] = buy_amount_to_delta_q(q, b, j, net * probs[j] / other)
+            q[j] += deltas[j]
+    return deltas, sum(deltas)
+
+
+# ---------- proportional mode prices each leg against the evolving q ----------
+def test_proportional_buy_matches_sequential_legs():
+    rng = _rng()
+    for _ in range(50):
+        n = rng.randint(2, 40)
+        b = rng.uniform(100.0, 1e5)
+        q = [rng.uniform(-5 * b, 5 * b) for _ in range(n)]
+        i = rng.randrange(n)
+        net = rng.uniform(0.5, 2 * b)
+
+        deltas, total = no_buy_deltas(_state(q, b), i, net, mode=NO_SIDE_PROPORTIONAL)
+        exp_deltas, exp_total = _sequential_no_buy(q, b, i, net)
+        assert deltas == pytest.approx(exp_deltas, rel=1e-9, abs=1e-9)
+        assert total == pytest.approx(exp_total, rel=1e-9)
+        # the pool is paid exactly the spend
+        q_post = [a + x for a, x in zip(q, deltas)]
+        assert cost(q_post, b) - cost(q, b) == pytest.approx(net, rel=1e-9)
+
+
+# ---------- complement mode is the exact all-but-i trade ----------
+def test_complement_buy_costs_exactly_the_amount():
+    rng = _rng()
+    for _ in range(50):
+        n = rng.randint(2, 60)
+        b = rng.uniform(100.0, 1e5)
+        q = [rng.uniform(-5 * b, 5 * b) for _ in range(n)]
+        i = rng.randrange(n)
+        net = rng.uniform(0.5, 3 * b)
+
+        state = _state(q, b)
+        deltas, d = no_buy_deltas(state, i, net, mode=NO_SIDE_COMPLEMENT)
+        assert deltas[i] == 0.0
+        assert all(deltas[j] == d for j in range(n) if j != i)
+
+        q_post = [a + x for a, x in zip(q, deltas)]
+        assert cost(q_post, b) - cost(q, b) == pytest.approx(net, rel=1e-9)
+        assert no_post_prob_bps(state, i, deltas, mode=NO_SIDE_COMPLEMENT) == pytest.approx(
+            [round(p * 10000) for p in prices(q_post, b)], abs=1
+        )
+
+
+def test_complement_sell_round_trips_buy():
+    rng = _rng()
+    for _ in range(30):
+        n = rng.randint(2, 30)
+        b = rng.uniform(100.0, 1e5)
+        q = [rng.uniform(-3 * b, 3 * b) for _ in range(n)]
+        i = rng.randrange(n)
+        net = rng.uniform(1.0, b)
+
+        _, d = no_buy_deltas(_state(q, b), i, net, mode=NO_SIDE_COMPLEMENT)
+        q_post = [a + (0.0 if j == i else d) for j, a in enumerate(q)]
+        sell_deltas, gross = no_sell_deltas(_state(q_post, b), i, d, mode=NO_SIDE_COMPLEMENT)
+        assert gross == pytest.approx(net, rel=1e-9)
+        assert [a + x for a, x in zip(q_post, sell_deltas)] == pytest.approx(q, rel=1e-12, abs=1e-6)
+
+
+def test_complement_near_certain_target_stays_finite():
+    # p_i -> 1: 1 - p_i must not cancel to 0
+    b = 1_000.0
+    state = _state([30 * b, 0.0, 0.0], b)
+    _, d = no_buy_deltas(state, 0, 5.0, mode=NO_SIDE_COMPLEMENT)
+    assert d > 5.0 and d < 1e12
+
+
+def test_proportional_sell_matches_cost_difference():
+    q = [1200.0, -300.0, 50.0, 0.0]
+    b = 2_000.0
+    deltas, gross = no_sell_deltas(_state(q, b), 1, 75.0, mode=NO_SIDE_PROPORTIONAL)
+    assert sum(deltas) == pytest.approx(-75.0)
+    q_post = [a + x for a, x in zip(q, deltas)]
+    assert gross == pytest.approx(cost(q, b) - cost(q_post, b), rel=1e-12)
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(QuoteInputError):
+        no_buy_deltas(_state([0.0, 0.0]), 0, 1.0, mode="bogus")
+
+
+# ---------- quote_from_state wiring ----------
+def test_quote_no_buy_modes():
+    state = _state([0.0, 500.0, -250.0, 100.0], b=5_000.0)
+    prop = quote_from_state(state, option_index=1, side="buy", amount_in=100, is_no_side=True)
+    comp = quote_from_state(
+        state, option_index=1, side="buy", amount_in=100, is_no_side=True, no_side_mode="complement"
+    )
+    assert prop["no_side_mode"] == NO_SIDE_PROPORTIONAL
+    assert comp["no_side_mode"] == NO_SIDE_COMPLEMENT
+    assert prop["fee_amount"] == comp["fee_amount"] == "1.00"
+    # Complement: one No share costs about 1 - p_i (plus fee and slippage).
+    no_price_bps = 10000 - comp["pre_prob_bps"][1]
+    assert no_price_bps <= comp["avg_price_bps"] <= no_price_bps * 1.05
+    assert Decimal(comp["shares_out"]) > 0
+    assert sum(comp["post_prob_bps"]) == pytest.approx(10000, abs=4)
+    assert comp["post_prob_bps"][1] < comp["pre_prob_bps"][1]
@@ -0,0 +1,117 @@
+# market/tests/test_option_exposure.py
+"""Per-option outstanding shares: kept in step by every trade path, read by solvency and settlement, reconciled."""
+import json
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from market.models import AmmPool, OptionExposure, Position
+from market.services.amm.batch_orders import execute_batch
+from market.services.amm.execution import execute_buy, execute_sell
+from market.services.amm.exposure import reconcile_market_exposure
+from market.services.amm.settlement import resolve_market
+from market.services.amm.settlement_jobs import enqueue_settlement
+from market.views.admin import admin_market_solvency
+
+
+def _counter(option):
+    return OptionExposure.objects.get(option=option).outstanding_shares
+
+
+def _held(option):
+    return Position.objects.filter(option=option).aggregate(total=Sum("shares"))["total"]
+
+
+def test_every_trade_path_keeps_the_counter_in_step(funded_user, binary_market):
+    m, (no, yes) = binary_market(pool=True)
+    alice, bob = funded_user(), funded_user()
+
+    execute_buy(user=alice, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="40")
+    execute_buy(user=bob, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="15")
+    execute_sell(user=alice, market_id=m.id, option_id=str(yes.id), option_index=None, shares="5")
+    execute_batch(user=bob, legs=[
+        {"side": "buy", "market_id": str(m.id), "option_id": str(no.id), "amount_in": "20"},
+        {"side": "sell", "market_id": str(m.id), "option_id": str(yes.id), "shares": "3"},
+    ])
+    assert _counter(yes) == _held(yes) and _counter(yes) > 0
+    assert _counter(no) == _held(no) and _counter(no) > 0
+
+    # dust cleanup zeroes the position without touching the pool
+    dusty = funded_user()
+    Position.objects.create(user=dusty, market=m, option=no, shares=Decimal("0.05"), cost_basis=Decimal("0.01"))
+    call_command("reconcile_option_exposure", "--market", str(m.id), "--fix", stdout=open(os.devnull, "w"))
+    execute_sell(user=dusty, market_id=m.id, option_id=str(no.id), option_index=None, sell_all=True)
+    assert _counter(no) == _held(no)
+
+    assert reconcile_market_exposure(m.id) == []
+
+
+def test_solvency_is_worst_outcome_of_the_event(funded_user, exclusive_event):
+    event, markets = exclusive_event(3)
+    (m0, (_, yes0)), (m1, (no1, _)), (m2, (no2, _)) = markets
+    user = funded_user()
+    execute_buy(user=user, market_id=m0.id, option_id=str(yes0.id), option_index=None, amount_in="30")
+    execute_buy(user=user, market_id=m1.id, option_id=str(no1.id), option_index=None, amount_in="20")
+    execute_buy(user=user, market_id=m2.id, option_id=str(no2.id), option_index=None, amount_in="10")
+    yes0_s, no1_s, no2_s = _counter(yes0), _counter(no1), _counter(no2)
+
+    admin = funded_user(None, role="admin")
+    with CaptureQueriesContext(connection) as ctx:
+        resp = admin_market_solvency(RequestFactory().get("/", HTTP_X_USER_ID=str(admin.id)), m1.id)
+    assert resp.status_code == 200
+    assert len(ctx.captured_queries) <= 4  # admin, pool version, pool row, counters: no scan of positions
+    body = json.loads(resp.content)
+
+    # outcome k pays its Yes holders and the No holders of every other outcome
+    expected = [yes0_s + no1_s + no2_s, no2_s, no1_s]
+    assert [Decimal(o["payout"]) for o in body["outcomes"]] == expected
+    assert Decimal(body["worst_case_payout"]) == max(expected)
+    assert body["worst_case_option_id"] == str(yes0.id)
+    pool = AmmPool.objects.get(event=event)
+    available = Decimal(pool.pool_cash) + Decimal(pool.collateral_amount)
+    assert Decimal(body["surplus"]) == available - max(expected)
+    assert body["solvent"] == (available >= max(expected))
+
+    denied = admin_market_solvency(RequestFactory().get("/", HTTP_X_USER_ID=str(user.id)), m1.id)
+    assert denied.status_code == 403
+
+
+def test_reconcile_repairs_drift_and_settlement_pays_the_positions(funded_user, binary_market):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    out = execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="25")
+    shares = Decimal(out["shares_out"])
+
+    # a position written outside the trade path
+    stray = funded_user()
+    Position.objects.create(user=stray, market=m, option=yes, shares=Decimal("4"), cost_basis=Decimal("1"))
+    drift = reconcile_market_exposure(m.id)
+    assert [(d["option_id"], Decimal(d["counter"]), Decimal(d["positions"])) for d in drift] == [
+        (yes.id, shares, shares + 4)
+    ]
+
+    # settlement owes the positions, drifted counter or not
+    AmmPool.objects.filter(market=m).update(collateral_amount=Decimal("1000"))
+    resolve_market(market_id=m.id, winning_option_index=1)
+    job = enqueue_settlement(market_id=m.id)
+    assert Decimal(job["total_payout"]) == shares + 4
+
+    call_command("reconcile_option_exposure", "--fix", stdout=open(os.devnull, "w"))
+    assert _counter(yes) == shares + 4
+    assert reconcile_market_exposure(m.id) == []
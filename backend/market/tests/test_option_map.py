@@ -0,0 +1,63 @@
+# market/tests/test_option_map.py
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from market.services.amm import option_map, pool_cache
+
+POOL = SimpleNamespace(id="pool-9", event_id="event-9")
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+
+    def build(event_id, option_id_to_idx):
+        calls.append(event_id)
+        return {f"no-{oid}": (oid, idx) for oid, idx in option_id_to_idx.items()}
+
+    monkeypatch.setattr(option_map, "_build", build)
+    option_map.clear_option_map_cache()
+    yield calls
+    option_map.clear_option_map_cache()
+
+
+def test_built_once_per_pool(builds):
+    layout = {"1": 0, "2": 1}
+    a = option_map.no_to_yes_for_pool(POOL, layout)
+    b = option_map.no_to_yes_for_pool(POOL, dict(layout))
+    assert a is b and a == {"no-1": ("1", 0), "no-2": ("2", 1)}
+    assert builds == ["event-9"]
+
+
+def test_trades_do_not_invalidate(builds):
+    option_map.no_to_yes_for_pool(POOL, {"1": 0})
+    pool_cache.bump_pool_version(POOL.id)
+    option_map.no_to_yes_for_pool(POOL, {"1": 0})
+    assert len(builds) == 1
+
+
+def test_invalidate_on_commit_rebuilds(builds):
+    option_map.no_to_yes_for_pool(POOL, {"1": 0})
+    option_map.invalidate_option_map_on_commit(POOL.id)  # autocommit: runs now
+    option_map.no_to_yes_for_pool(POOL, {"1": 0})
+    assert len(builds) == 2
+
+
+def test_new_layout_before_bump_is_not_served_stale(builds):
+    option_map.no_to_yes_for_pool(POOL, {"1": 0, "2": 1})
+    # ensure_pool_initialized committed a new option ahead of the others; bump not run yet
+    mapping = option_map.no_to_yes_for_pool(POOL, {"0": 0, "1": 1, "2": 2})
+    assert mapping["no-2"] == ("2", 2)
+    assert len(builds) == 2
@@ -0,0 +1,246 @@
+# market/tests/test_pool_cache.py
+import os
+import sys
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from market.services.amm import pool_cache
+from market.services.amm.state import PoolState
+
+
+def _state(market_id, q, pool_id="pool-1") -> PoolState:
+    ids = [f"{pool_id}-opt-{i}" for i in range(len(q))]
+    return PoolState(
+        market_id=market_id,
+        pool_id=pool_id,
+        b=1_000.0,
+        fee_bps=0,
+        option_ids=ids,
+        option_indexes=list(range(len(q))),
+        q=list(q),
+        option_id_to_idx={oid: i for i, oid in enumerate(ids)},
+        option_index_to_idx={i: i for i in range(len(q))},
+    )
+
+
+class FakeDB:
+    """Counts loads; q is whatever the 'database' currently holds."""
+
+    def __init__(self):
+        self.q = [0.0, 0.0]
+        self.loads = 0
+        self.during_load = None
+
+    def load(self, market_id):
+        self.loads += 1
+        snapshot = list(self.q)
+        if self.during_load:
+            hook, self.during_load = self.during_load, None
+            hook()
+        return _state(market_id, snapshot)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(pool_cache, "load_pool_state", fake.load)
+    pool_cache.clear_pool_cache()
+    yield fake
+    pool_cache.clear_pool_cache()
+
+
+def test_hit_after_first_load(db):
+    a = pool_cache.get_pool_state("m1")
+    b = pool_cache.get_pool_state("m1")
+    assert db.loads == 1 and b is a
+
+
+def test_markets_of_one_pool_share_the_snapshot(db):
+    a = pool_cache.get_pool_state("m1")
+    b = pool_cache.get_pool_state("m2")  # first sight of m2 -> one load to learn its pool
+    c = pool_cache.get_pool_state("m2")
+    assert db.loads == 2
+    assert c.market_id == "m2" and c.q is b.q
+    assert a.market_id == "m1"
+
+
+def test_bump_forces_reload(db):
+    pool_cache.get_pool_state("m1")
+    db.q = [5.0, 0.0]
+    v = pool_cache.bump_pool_version("pool-1")
+    assert v == pool_cache.pool_version("pool-1")
+    assert pool_cache.get_pool_state("m1").q == [5.0, 0.0]
+    assert db.loads == 2
+
+
+def test_trade_committing_during_load_is_not_hidden(db):
+    pool_cache.get_pool_state("m1")
+    pool_cache.bump_pool_version("pool-1")
+
+    def trade_commits():
+        db.q = [9.0, 0.0]
+        pool_cache.bump_pool_version("pool-1")
+
+    # the reload reads the old q, then the trade commits before we store it
+    db.during_load = trade_commits
+    assert pool_cache.get_pool_state("m1").q == [0.0, 0.0]
+    # ...so the stale snapshot must not be served afterwards
+    assert pool_cache.get_pool_state("m1").q == [9.0, 0.0]
+
+
+def test_unknown_pool_load_racing_a_bump_is_not_cached(db):
+    db.during_load = lambda: pool_cache.bump_pool_version("pool-1")
+    pool_cache.get_pool_state("m1")
+    pool_cache.get_pool_state("m1")
+    assert db.loads == 2
+
+
+def test_on_commit_bump_runs_in_autocommit(db):
+    before = pool_cache.pool_version("pool-1")
+    pool_cache.bump_pool_version_on_commit("pool-1")
+    assert pool_cache.pool_version("pool-1") == before + 1
+
+
+# ---------- shared (cross-worker) backend ----------
+from market.services.amm.pool_cache_backends import InMemoryBackend
+
+
+@pytest.fixture
+def shared(db):
+    backend = InMemoryBackend()
+    pool_cache.set_pool_cache_backend(backend)
+    yield backend
+    pool_cache.set_pool_cache_backend(None)
+
+
+def _new_worker(backend):
+    # a fresh process: empty local cache, nothing seen yet
+    pool_cache.set_pool_cache_backend(backend)
+
+
+def test_shared_snapshot_serves_a_cold_worker(db, shared):
+    pool_cache.get_pool_state("m1")  # learns the pool
+    pool_cache.get_pool_state("m1")  # loads and publishes the snapshot
+    assert db.loads == 2
+    _new_worker(shared)
+    s = pool_cache.get_pool_state("m1")
+    assert db.loads == 2 and s.q == [0.0, 0.0] and s.market_id == "m1"
+
+
+def test_bump_in_another_worker_is_seen(db, shared):
+    pool_cache.get_pool_state("m1")
+    pool_cache.get_pool_state("m1")
+    db.q = [7.0, 0.0]
+    shared.incr_version("pool-1")  # the other worker's commit hook
+    assert pool_cache.get_pool_state("m1").q == [7.0, 0.0]
+
+
+def test_fanout_drops_stale_snapshot(db, shared):
+    pool_cache.get_pool_state("m1")
+    pool_cache.get_pool_state("m1")
+    v = shared.incr_version("pool-1")
+    pool_cache.note_pool_version("pool-1", v)
+    assert pool_cache.pool_version("pool-1") == v
+    assert "pool-1" not in pool_cache._states
+
+
+def test_shared_version_going_backwards_never_serves_older(db, shared):
+    pool_cache.get_pool_state("m1")
+    pool_cache.bump_pool_version("pool-1")
+    pool_cache.get_pool_state("m1")
+    seen = pool_cache.pool_version("pool-1")
+    loads = db.loads
+
+    shared.store.clear()  # evicted: versions and snapshots gone
+    db.q = [3.0, 0.0]
+    assert pool_cache.get_pool_state("m1").q == [3.0, 0.0]
+    assert db.loads == loads + 1
+    assert shared.get_version("pool-1") > seen
+    v = pool_cache.bump_pool_version("pool-1")
+    assert v > seen and v == pool_cache.pool_version("pool-1")
+
+
+# ---------- multi-process read-after-trade ----------
+ROUNDS = 15
+READERS = 2
+
+
+def _install(store, lock, dbq, loads):
+    pool_cache.set_pool_cache_backend(InMemoryBackend(store, lock))
+
+    def load(market_id):
+        with lock:
+            loads.value += 1
+        return _state(market_id, list(dbq))
+
+    pool_cache.load_pool_state = load
+
+
+def _reader(n, store, lock, dbq, loads, barrier, errors):
+    try:
+        _install(store, lock, dbq, loads)
+        mid = f"m{n}"
+        assert pool_cache.get_pool_state(mid).q[0] == 0.0
+        for k in range(1, ROUNDS + 1):
+            barrier.wait()  # ready for trade k
+            barrier.wait()  # trade k committed
+            first = pool_cache.get_pool_state(mid)
+            again = pool_cache.get_pool_state(mid)
+            assert first.q[0] == again.q[0] == float(k), (n, k, first.q)
+    except BaseException as exc:  # noqa: BLE001 - reported to the parent
+        errors.put(f"reader {n}: {exc!r}")
+        barrier.abort()
+
+
+def _writer(store, lock, dbq, loads, barrier, errors):
+    try:
+        _install(store, lock, dbq, loads)
+        for k in range(1, ROUNDS + 1):
+            barrier.wait()
+            dbq[0] = float(k)  # the trade's UPDATE ...
+            pool_cache.bump_pool_version("pool-1")  # ... and its commit hook
+            barrier.wait()
+    except BaseException as exc:  # noqa: BLE001
+        errors.put(f"writer: {exc!r}")
+        barrier.abort()
+
+
+def test_read_after_trade_across_processes():
+    import multiprocessing as mp
+
+    if "fork" not in mp.get_all_start_methods():
+        pytest.skip("needs fork")
+    ctx = mp.get_context("fork")
+    with ctx.Manager() as manager:
+        store, lock = manager.dict(), manager.Lock()
+        dbq = manager.list([0.0, 0.0])
+        loads = manager.Value("i", 0)
+        barrier = ctx.Barrier(READERS + 1, timeout=30)
+        errors = ctx.Queue()
+
+        procs = [
+            ctx.Process(target=_reader, args=(n, store, lock, dbq, loads, barrier, errors))
+            for n in range(READERS)
+        ]
+        procs.append(ctx.Process(target=_writer, args=(store, lock, dbq, loads, barrier, errors)))
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(60)
+
+        failures = []
+        while not errors.empty():
+            failures.append(errors.get())
+        assert not failures, failures
+        assert all(p.exitcode == 0 for p in procs)
+        # one DB load per trade per reader at most (plus the first sighting)
+        assert loads.value <= READERS * (ROUNDS + 1)
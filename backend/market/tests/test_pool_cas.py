@@ -0,0 +1,105 @@
+# market/tests/test_pool_cas.py
+"""Optimistic pool concurrency: AmmPool.version compare-and-swap and the retry policy."""
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from market.models import AmmPool, AmmPoolOptionState
+from market.services.amm import execution
+from market.services.amm.execution import (
+    ExecutionError,
+    PoolVersionConflict,
+    _retry_pool_conflicts,
+    _write_pool,
+    execute_buy,
+)
+from market.services.amm.setup import ensure_pool_initialized
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(execution, "POOL_CONCURRENCY", execution.POOL_CONCURRENCY_OPTIMISTIC)
+    monkeypatch.setattr(execution, "POOL_CAS_RETRIES", 3)
+    monkeypatch.setattr(execution, "POOL_CAS_BACKOFF_MS", 0.0)
+
+
+def test_trade_bumps_version(funded_user, binary_market):
+    m, (_, yes) = binary_market()
+    pool = ensure_pool_initialized(market=m)
+    before = AmmPool.objects.get(pk=pool.pk).version
+    execute_buy(user=funded_user(), market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+    after = AmmPool.objects.get(pk=pool.pk)
+    assert after.version == before + 1
+    assert after.pool_cash == Decimal("10")
+
+
+def test_stale_write_loses_cas(binary_market):
+    m, _ = binary_market()
+    pool = ensure_pool_initialized(market=m)
+    stale = AmmPool.objects.get(pk=pool.pk)
+    AmmPool.objects.filter(pk=pool.pk).update(version=F("version") + 1)  # someone else committed
+
+    with pytest.raises(PoolVersionConflict):
+        with transaction.atomic():
+            _write_pool(stale, Decimal("5"), timezone.now())
+    assert AmmPool.objects.get(pk=pool.pk).pool_cash == 0
+
+
+def test_conflicting_trade_is_retried_once_applied(funded_user, binary_market, monkeypatch):
+    m, (_, yes) = binary_market()
+    pool = ensure_pool_initialized(market=m)
+    real_load = execution.load_pool_rows
+    calls = []
+
+    def load_then_race(market_id, **kwargs):
+        rows = real_load(market_id, **kwargs)
+        if not calls:
+            # Another trade commits between our read and our CAS.
+            AmmPool.objects.filter(pk=pool.pk).update(version=F("version") + 1)
+        calls.append(market_id)
+        return rows
+
+    monkeypatch.setattr(execution, "load_pool_rows", load_then_race)
+    version = AmmPool.objects.get(pk=pool.pk).version
+    result = execute_buy(user=funded_user(), market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+
+    assert len(calls) == 2
+    # (the simulated writer shares our connection, so its bump rolled back with the lost attempt)
+    assert AmmPool.objects.get(pk=pool.pk).version == version + 1
+    assert Decimal(AmmPoolOptionState.objects.get(option=yes).q) == Decimal(result["shares_out"])
+
+
+def test_retry_policy_gives_up_with_contended():
+    attempts = []
+
+    @_retry_pool_conflicts
+    def always_loses():
+        attempts.append(1)
+        raise PoolVersionConflict("p")
+
+    with pytest.raises(ExecutionError) as exc:
+        always_loses()
+    assert exc.value.code == "POOL_CONTENDED" and exc.value.http_status == 409
+    assert len(attempts) == 4  # first try + POOL_CAS_RETRIES
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(execution, "POOL_CAS_BACKOFF_MS", 2.0)
+    monkeypatch.setattr(execution, "POOL_CAS_BACKOFF_MAX_MS", 50.0)
+    assert 0.001 <= execution._cas_backoff_seconds(0) <= 0.002
+    assert 0.025 <= execution._cas_backoff_seconds(10) <= 0.050
@@ -0,0 +1,80 @@
+# market/tests/test_pool_loader.py
+"""
+quote_loader.load_pool_rows: the one builder behind quoting and execution locking.
+Runs against a throwaway in-memory SQLite schema (models are unmanaged upstream).
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from market.models import AmmPool
+from market.services.amm.execution import ExecutionError, _lock_pool_state
+from market.services.amm.quote_loader import load_pool_rows, load_pool_state
+from market.services.amm.setup import ensure_pool_initialized
+
+
+def test_market_pool_in_one_query(binary_market):
+    m, opts = binary_market()
+    pool = ensure_pool_initialized(market=m)
+    with CaptureQueriesContext(connection) as ctx:
+        got_pool, states, state = load_pool_rows(m.id)
+    assert len(ctx.captured_queries) == 1
+    assert got_pool.id == pool.id and not state.is_exclusive
+    assert state.option_ids == [str(o.id) for o in opts]
+    assert [st.option_id for st in states] == [o.id for o in opts]
+    assert state.q == [0.0, 0.0] and state.market_id == str(m.id)
+
+
+def test_event_pool_resolves_from_any_market(exclusive_event):
+    event, markets = exclusive_event(3)
+    pool = AmmPool.objects.get(event=event)
+
+    state = load_pool_state(markets[2][0].id)
+    assert state.pool_id == str(pool.id) and state.is_exclusive
+    no_opt, yes_opt = markets[1][1]
+    assert state.no_to_yes_option_id[str(no_opt.id)] == (str(yes_opt.id), 1)
+
+    # locking path: one statement once the No->Yes map is cached
+    with transaction.atomic(), CaptureQueriesContext(connection) as ctx:
+        _, _, locked = _lock_pool_state(str(markets[0][0].id))
+    assert len([q for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]) == 1
+    assert locked.option_ids == state.option_ids and locked.no_to_yes_option_id == state.no_to_yes_option_id
+
+
+def test_locked_rows_are_writable(binary_market):
+    m, _ = binary_market(pool=True)
+    with transaction.atomic():
+        pool, states, _ = _lock_pool_state(str(m.id))
+        states[1].q = states[1].q + 5
+        states[1].save(update_fields=["q"])
+        pool.pool_cash = pool.pool_cash + 3
+        pool.save(update_fields=["pool_cash"])
+    assert load_pool_state(m.id).q == [0.0, 5.0]
+    assert AmmPool.objects.get(pk=pool.pk).pool_cash == 3
+
+
+def test_lock_error_codes(binary_market):
+    for missing in (uuid.uuid4(), "not-a-uuid"):
+        with pytest.raises(ExecutionError) as exc:
+            _lock_pool_state(missing)
+        assert exc.value.code == "POOL_NOT_FOUND"
+
+    m, _ = binary_market()
+    AmmPool.objects.create(market=m, b=1, collateral_token="USDC")
+    with pytest.raises(ExecutionError) as exc:
+        _lock_pool_state(str(m.id))
+    assert exc.value.code == "POOL_STATE_NOT_FOUND"
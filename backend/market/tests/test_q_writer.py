@@ -0,0 +1,100 @@
+# market/tests/test_q_writer.py
+"""Multi-row q writes: one statement per chunk, values applied per option."""
+import os
+import sys
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from market.models import AmmPoolOptionState, Market, MarketOption, MarketOptionStats
+from market.services.amm import q_writer
+from market.services.amm.q_writer import apply_q_deltas, merge_q_deltas, set_q
+from market.services.amm.setup import ensure_pool_initialized
+
+
+def _pool(n_outcomes=4):
+    later = timezone.now() + timedelta(days=30)
+    m = Market.objects.create(title="m", status="active", trading_deadline=later, resolution_deadline=later)
+    for i in range(n_outcomes):
+        opt = MarketOption.objects.create(market=m, option_index=i, title=f"o{i}")
+        MarketOptionStats.objects.create(option=opt, market=m, prob_bps=10000 // n_outcomes)
+    pool = ensure_pool_initialized(market=m)
+    states = list(AmmPoolOptionState.objects.filter(pool=pool).order_by("option_id"))
+    return pool, states
+
+
+def _q(pool):
+    return {st.option_id: Decimal(st.q) for st in AmmPoolOptionState.objects.filter(pool=pool)}
+
+
+def test_apply_q_deltas_one_statement(schema):
+    pool, states = _pool()
+    before = _q(pool)
+    deltas = {states[0].option_id: Decimal("1.5"), states[2].option_id: Decimal("-0.25"), states[3].option_id: Decimal("0")}
+    now = timezone.now()
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert apply_q_deltas(pool.id, deltas, now) == 2  # zero deltas are skipped
+    assert len(ctx.captured_queries) == 1
+
+    after = _q(pool)
+    assert after[states[0].option_id] == before[states[0].option_id] + Decimal("1.5")
+    assert after[states[1].option_id] == before[states[1].option_id]
+    assert after[states[2].option_id] == before[states[2].option_id] - Decimal("0.25")
+    assert after[states[3].option_id] == before[states[3].option_id]
+
+
+def test_set_q_and_chunking(schema, monkeypatch):
+    monkeypatch.setattr(q_writer, "Q_WRITE_CHUNK", 2)
+    pool, states = _pool(5)
+    values = {st.option_id: Decimal(i) for i, st in enumerate(states)}
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert set_q(pool.id, values, timezone.now()) == 5
+    assert len(ctx.captured_queries) == 3
+    assert _q(pool) == values
+
+
+def test_writes_only_the_given_pool(schema):
+    pool, states = _pool(2)
+    other, other_states = _pool(2)
+    before = _q(other)
+    # option ids of another pool are ignored
+    assert apply_q_deltas(pool.id, {other_states[0].option_id: Decimal("3")}, timezone.now()) == 0
+    assert _q(other) == before
+
+
+def test_merge_q_deltas():
+    merged = merge_q_deltas({1: Decimal("1")}, {1: Decimal("2"), 2: Decimal("-1")})
+    assert merged == {1: Decimal("3"), 2: Decimal("-1")}
+
+
+def test_postgres_placeholders_line_up_with_params(monkeypatch):
+    class _Pg:
+        vendor = "postgresql"
+
+    monkeypatch.setattr(q_writer, "connection", _Pg())
+    rows = [(11, Decimal("1.5")), (12, Decimal("-2"))]
+    for additive in (True, False):
+        sql = q_writer._statement(len(rows), additive)
+        params = q_writer._params(rows, "pool-1", "NOW")
+        # each param against the SQL just before its placeholder
+        bound = list(zip(sql.split("%s")[:-1], params))
+        assert len(bound) == len(params) == sql.count("%s")
+        assert bound[0][0].endswith("updated_at = ") and bound[0][1] == "NOW"
+        assert bound[-1][0].endswith("pool_id = ") and bound[-1][1] == "pool-1"
+        assert [p for text, p in bound if text.endswith("(")] == [11, 12]
+        assert [p for text, p in bound if text.endswith("::bigint, ")] == ["1.5", "-2"]
@@ -0,0 +1,128 @@
+# market/tests/test_quote_batch.py
+import os
+import sys
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from market.services.amm.errors import QuoteInputError, QuoteMathError
+from market.services.amm.quote import quote_batch_from_state, quote_from_state
+from market.services.amm.state import PoolState
+from market.views.amm import _parse_quote_params
+
+
+def _exclusive_state() -> PoolState:
+    ids = ["11", "21", "31"]
+    return PoolState(
+        market_id="m1",
+        pool_id="p",
+        b=5_000.0,
+        fee_bps=100,
+        option_ids=ids,
+        option_indexes=[0, 1, 2],
+        q=[300.0, -100.0, 0.0],
+        option_id_to_idx={oid: i for i, oid in enumerate(ids)},
+        option_index_to_idx={0: 0, 1: 1, 2: 2},
+        no_to_yes_option_id={"12": ("11", 0), "22": ("21", 1), "32": ("31", 2)},
+        is_exclusive=True,
+    )
+
+
+def test_batch_matches_single_quotes():
+    state = _exclusive_state()
+    legs = [
+        {"option_id": oid, "side": side, **size}
+        for oid in ("11", "21")
+        for side in ("buy", "sell")
+        for size in ({"amount_in": "10"}, {"amount_in": "250.5"}, {"shares": "40"})
+    ]
+    out = quote_batch_from_state(state, legs)
+    assert len(out) == len(legs)
+    for leg, got in zip(legs, out):
+        assert got.to_json() == quote_from_state(
+            state,
+            option_id=leg["option_id"],
+            side=leg["side"],
+            amount_in=leg.get("amount_in"),
+            shares=leg.get("shares"),
+        )
+
+
+def test_batch_detects_no_side_per_leg():
+    state = _exclusive_state()
+    yes, no = quote_batch_from_state(
+        state,
+        [{"option_id": "21", "amount_in": 50}, {"option_id": "22", "amount_in": 50}],
+    )
+    assert yes.is_no_side is False and no.is_no_side is True
+    assert no.option_id == "21"
+    assert no.to_json()["is_no_side"] is True
+
+
+def test_batch_reports_errors_per_leg():
+    state = _exclusive_state()
+    ok, missing, both, too_big = quote_batch_from_state(
+        state,
+        [
+            {"option_index": 2, "side": "buy", "amount_in": "5"},
+            {"option_id": "999", "amount_in": "5"},
+            {"option_id": "11", "amount_in": "5", "shares": "1"},
+            {"option_id": "11", "side": "sell", "amount_in": "1e9"},
+        ],
+    )
+    assert ok.option_id == "31"
+    assert isinstance(missing, QuoteInputError)
+    assert isinstance(both, QuoteInputError)
+    assert isinstance(too_big, QuoteMathError)
+
+
+@pytest.mark.parametrize(
+    "params, code",
+    [
+        ({"side": "hold", "option_index": 0, "shares": 1}, "BAD_SIDE"),
+        ({"option_id": "1", "option_index": 0, "shares": 1}, "AMBIGUOUS_OPTION"),
+        ({"option_index": "x", "shares": 1}, "BAD_OPTION_INDEX"),
+        ({"shares": 1}, "MISSING_OPTION"),
+        ({"side": "sell", "option_index": 0, "amount_in": 1, "amount_out": 1}, "AMBIGUOUS_AMOUNT"),
+        ({"option_index": 0, "amount_out": 1}, "INVALID_PARAM"),
+        ({"option_index": 0}, "BAD_AMOUNT_SHARES"),
+    ],
+)
+def test_parse_quote_params_errors(params, code):
+    parsed, err = _parse_quote_params(params)
+    assert parsed is None and err[1] == code
+
+
+def test_parse_quote_params_sell_amount_out():
+    parsed, err = _parse_quote_params({"side": "SELL", "option_index": 1, "amount_out": 12.5})
+    assert err is None
+    assert parsed == {"side": "sell", "option_id": None, "option_index": 1, "amount_in": 12.5, "shares": None}
+
+
+def test_batch_quotes_share_pool_lists():
+    state = _exclusive_state()
+    a, b = quote_batch_from_state(state, [{"option_id": "11", "amount_in": 5}, {"option_id": "31", "shares": 2}])
+    assert a.pre_prob_bps is b.pre_prob_bps is state.prob_bps()
+    body = a.to_json(include_pool=False)
+    assert "option_ids" not in body and "pre_prob_bps" not in body
+    assert a.to_json()["option_ids"] is state.option_ids
+
+
+def test_quote_is_frozen_and_post_probs_lazy():
+    import dataclasses
+
+    q = quote_batch_from_state(_exclusive_state(), [{"option_id": "22", "amount_in": 40}])[0]
+    assert not hasattr(q, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        q.avg_price_bps = 1
+    assert q._post_prob_bps is None
+    post = q.post_prob_bps
+    assert q.post_prob_bps is post and sum(post) == pytest.approx(10000, abs=3)
@@ -0,0 +1,179 @@
+# market/tests/test_sequencer.py
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from market.models import (
+    AmmPoolOptionState,
+    BalanceSnapshot,
+    OrderIntent,
+    Position,
+    Trade,
+    TradeOutbox,
+)
+from market.services.amm import execution
+from market.services.amm.execution import ExecutionError, execute_buy
+from market.services.amm.idempotency import order_result
+from market.services.amm.sequencer import PoolSequencer, TradeRequest
+from market.services.amm.setup import ensure_pool_initialized
+
+
+def _sequencer(m):
+    return PoolSequencer(ensure_pool_initialized(market=m).id)
+
+
+def _buy(seq, user, m, opt, amount):
+    return seq.submit(TradeRequest(
+        side="buy", user=user, market_id=m.id, option_id=str(opt.id), option_index=None, amount_in=Decimal(amount)
+    ))
+
+
+def _q(opt):
+    return Decimal(AmmPoolOptionState.objects.get(option_id=opt.id).q)
+
+
+def _balance(user):
+    return BalanceSnapshot.objects.get(user=user, token="USDC").available_amount
+
+
+def test_batch_matches_locking_path(funded_user, binary_market):
+    m1, (_, yes1) = binary_market()
+    seq = _sequencer(m1)
+    m2, (_, yes2) = binary_market(pool=True)
+    users = [funded_user() for _ in range(3)]
+    amounts = ["10", "25", "5", "40"]
+
+    futures = [_buy(seq, users[i % 3], m1, yes1, a) for i, a in enumerate(amounts)]
+    assert seq.drain() == 4
+    batched = [f.result() for f in futures]
+
+    twins = [funded_user() for _ in range(3)]
+    locked = [
+        execute_buy(user=twins[i % 3], market_id=m2.id, option_id=str(yes2.id), option_index=None, amount_in=a)
+        for i, a in enumerate(amounts)
+    ]
+
+    assert [r["shares_out"] for r in batched] == [r["shares_out"] for r in locked]
+    assert [r["post_prob_bps"] for r in batched] == [r["post_prob_bps"] for r in locked]
+    assert _q(yes1) == _q(yes2)
+    assert [_balance(u) for u in users] == [_balance(u) for u in twins]
+    assert Trade.objects.filter(market=m1).count() == 4
+    assert TradeOutbox.objects.filter(pool__market=m1).count() == 4
+    assert all(r["order_intent_id"] for r in batched)
+    assert Decimal(batched[3]["balance_available"]) == Decimal("950")  # balance after that trade
+
+
+def test_failed_trade_does_not_fail_its_batch(funded_user, binary_market):
+    m, (_, yes) = binary_market()
+    seq = _sequencer(m)
+    rich, poor = funded_user(), funded_user("1")
+    ok1 = _buy(seq, rich, m, yes, "10")
+    bad = _buy(seq, poor, m, yes, "5")
+    ok2 = _buy(seq, rich, m, yes, "10")
+    seq.drain()
+
+    with pytest.raises(ExecutionError) as exc:
+        bad.result()
+    assert exc.value.code == "INSUFFICIENT_BALANCE"
+    assert _balance(poor) == Decimal("1")
+    assert _balance(rich) == Decimal("980")
+    shares = Decimal(ok1.result()["shares_out"]) + Decimal(ok2.result()["shares_out"])
+    assert Position.objects.get(user=rich, option=yes).shares == shares
+    assert _q(yes) == shares
+
+
+def test_buy_and_sell_in_one_batch(funded_user, binary_market):
+    m, (_, yes) = binary_market()
+    seq = _sequencer(m)
+    user = funded_user()
+    buy = _buy(seq, user, m, yes, "20")
+    sell = seq.submit(TradeRequest(
+        side="sell", user=user, market_id=m.id, option_id=str(yes.id), option_index=None, shares=Decimal("5")
+    ))
+    seq.drain()
+
+    bought = Decimal(buy.result()["shares_out"])
+    assert Decimal(sell.result()["shares_sold"]) == 5
+    assert Position.objects.get(user=user, option=yes).shares == bought - 5
+    assert OrderIntent.objects.filter(user=user).count() == 2
+    assert _balance(user) == Decimal("980") + Decimal(sell.result()["amount_out"])
+
+
+def test_dust_close_is_recorded_for_replay(funded_user, binary_market):
+    m, (_, yes) = binary_market()
+    seq = _sequencer(m)
+    user = funded_user()
+    Position.objects.create(user=user, market=m, option=yes, shares=Decimal("0.05"), cost_basis=Decimal("0.01"))
+    close = seq.submit(TradeRequest(
+        side="sell", user=user, market_id=m.id, option_id=str(yes.id), option_index=None, sell_all=True,
+        client_nonce="d-1",
+    ))
+    seq.drain()
+
+    response = close.result()
+    assert response["dust_cleanup"] and response["order_intent_id"]
+    assert OrderIntent.objects.get(user=user, client_nonce="d-1").response == response
+    assert not Trade.objects.filter(user=user).exists()
+    assert order_result(user.id, "d-1") == response
+
+
+@pytest.mark.parametrize("concurrency", [execution.POOL_CONCURRENCY_OPTIMISTIC, execution.POOL_CONCURRENCY_LOCKING])
+def test_batch_takes_locks_in_the_trade_path_order(funded_user, binary_market, monkeypatch, concurrency):
+    monkeypatch.setattr(execution, "POOL_CONCURRENCY", concurrency)
+    m, (_, yes) = binary_market()
+    seq = _sequencer(m)
+    user = funded_user()
+    _buy(seq, user, m, yes, "5")
+    with CaptureQueriesContext(connection) as ctx:
+        seq.drain()
+    sqls = [q["sql"] for q in ctx.captured_queries]
+    pool = next(i for i, sql in enumerate(sqls) if "amm_pools" in sql)  # the pool + states load
+    balance = next(i for i, sql in enumerate(sqls) if '"balance_snapshot"' in sql)
+    # optimistic execute_* / batch_orders: balance, position, pool (CAS) last; locking mode: pool first
+    assert (pool < balance) == (concurrency == execution.POOL_CONCURRENCY_LOCKING)
+
+def test_batch_queries_do_not_grow_with_trades(funded_user, binary_market):
+    m, (_, yes) = binary_market()
+    seq = _sequencer(m)
+    users = [funded_user(), funded_user()]
+    for u in users:  # positions and wallets exist from here on
+        _buy(seq, u, m, yes, "1")
+    seq.drain()
+
+    def run(n):
+        for i in range(n):
+            _buy(seq, users[i % 2], m, yes, "1")
+        with CaptureQueriesContext(connection) as ctx:
+            assert seq.drain() == n
+        return len(ctx.captured_queries)
+
+    assert run(2) == run(10)
+
+
+def test_resyncs_after_write_outside_sequencer(funded_user, binary_market):
+    m, (_, yes) = binary_market()
+    seq = _sequencer(m)
+    user = funded_user()
+    first = _buy(seq, user, m, yes, "10")
+    seq.drain()
+    outside = execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+    last = _buy(seq, user, m, yes, "10")
+    seq.drain()
+
+    total = sum(Decimal(r["shares_out"]) for r in (first.result(), outside, last.result()))
+    assert _q(yes) == total
+    assert Position.objects.get(user=user, option=yes).shares == total
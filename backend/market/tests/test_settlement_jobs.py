@@ -0,0 +1,134 @@
+# market/tests/test_settlement_jobs.py
+"""Settlement jobs: enqueued by the admin API, paid in checkpointed chunks, resumable after a crash."""
+import json
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+
+from django.core.management import call_command
+from django.test import RequestFactory
+from django.utils import timezone
+
+from market.models import (
+    AmmPool,
+    BalanceSnapshot,
+    Market,
+    MarketSettlement,
+    OptionExposure,
+    Position,
+    SettlementJob,
+    SettlementPayout,
+)
+from market.services.amm import settlement_jobs, settlement_payouts
+from market.services.amm.settlement import SettlementError
+from market.services.amm.settlement_jobs import enqueue_settlement, run_settlement_chunk, run_settlement_job
+from market.views.admin import admin_settle_market, admin_settlement_progress
+
+
+def _balance(user):
+    return BalanceSnapshot.objects.get(user=user, token="USDC").available_amount
+
+
+def test_admin_enqueues_and_reports_progress(funded_user, resolved_market, monkeypatch):
+    monkeypatch.setattr(settlement_payouts, "SETTLEMENT_CHUNK", 2)
+    m, _, users = resolved_market([("1", None), ("2", "1"), ("3", None)])
+    admin = funded_user(None, role="admin")
+    rf = RequestFactory()
+
+    resp = admin_settle_market(
+        rf.post("/", data=json.dumps({}), content_type="application/json", HTTP_X_USER_ID=str(admin.id)), m.id
+    )
+    assert resp.status_code == 202
+    job = json.loads(resp.content)
+    assert job["status"] == "pending" and Decimal(job["total_payout"]) == Decimal("6")
+    assert Market.objects.get(pk=m.id).settled_at is None  # nothing paid in the request
+
+    assert run_settlement_chunk(job["job_id"])
+    progress = json.loads(admin_settlement_progress(rf.get("/", HTTP_X_USER_ID=str(admin.id)), m.id).content)
+    assert progress["status"] == "running" and progress["winners_paid"] == 2
+    assert Decimal(progress["paid_amount"]) == Decimal("3") and progress["progress"] == 0.5
+
+    call_command("process_settlement_jobs", "--once", stdout=open(os.devnull, "w"))
+    assert SettlementJob.objects.get(pk=job["job_id"]).status == "done"
+    assert [_balance(u) for u in users] == [Decimal("1"), Decimal("3"), Decimal("3")]
+    assert MarketSettlement.objects.get(market=m).total_payout == Decimal("6")
+
+    again = admin_settle_market(
+        rf.post("/", data=json.dumps({}), content_type="application/json", HTTP_X_USER_ID=str(admin.id)), m.id
+    )
+    assert again.status_code == 200 and json.loads(again.content)["already_settled"]
+
+
+def test_crash_resumes_from_checkpoint_without_double_paying(resolved_market, monkeypatch):
+    monkeypatch.setattr(settlement_payouts, "SETTLEMENT_CHUNK", 2)
+    m, _, users = resolved_market([("1", "10"), ("1", "10"), ("1", "10"), ("1", "10"), ("1", "10")])
+    job = enqueue_settlement(market_id=m.id)
+
+    real_pay_chunk = settlement_jobs.pay_chunk
+    calls = []
+
+    def crash_on_second_chunk(rows, **kwargs):
+        calls.append(rows)
+        result = real_pay_chunk(rows, **kwargs)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return result
+
+    monkeypatch.setattr(settlement_jobs, "pay_chunk", crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        run_settlement_job(job["job_id"])
+
+    failed = SettlementJob.objects.get(pk=job["job_id"])
+    assert failed.status == "failed" and "worker died" in failed.error
+    assert failed.winners_paid == 2  # the crashed chunk rolled back with its checkpoint
+    assert SettlementPayout.objects.filter(market=m).count() == 2
+
+    monkeypatch.setattr(settlement_jobs, "pay_chunk", real_pay_chunk)
+    assert enqueue_settlement(market_id=m.id)["status"] == "pending"
+    done = run_settlement_job(job["job_id"])
+
+    assert done["status"] == "done" and done["winners_paid"] == 5
+    assert all(_balance(u) == Decimal("11") for u in users)
+    assert SettlementPayout.objects.filter(market=m).count() == 5
+    assert BalanceSnapshot.objects.filter(user__in=users).count() == 5
+
+
+def test_enqueue_debits_the_exact_payout_before_anyone_is_paid(funded_user, resolved_market):
+    m, opts, users = resolved_market([("60", None), ("70", None)])
+    # a counter that drifted low must not let an unfundable job start paying
+    OptionExposure.objects.create(
+        option=opts[1], market=m, outstanding_shares=Decimal("1"), updated_at=timezone.now()
+    )
+    AmmPool.objects.filter(market=m).update(pool_cash=Decimal("100"), collateral_amount=Decimal("20"))
+
+    with pytest.raises(SettlementError) as exc:
+        enqueue_settlement(market_id=m.id)
+    assert exc.value.code == "INSUFFICIENT_FUNDS"
+    assert not SettlementJob.objects.filter(market=m).exists()
+    assert Decimal(AmmPool.objects.get(market=m).pool_cash) == Decimal("100")
+
+    AmmPool.objects.filter(market=m).update(collateral_amount=Decimal("50"))
+    job = enqueue_settlement(market_id=m.id)
+    pool = AmmPool.objects.get(market=m)
+    assert Decimal(job["total_payout"]) == Decimal("130")
+    assert (Decimal(pool.pool_cash), Decimal(pool.collateral_amount), pool.status) == (0, Decimal("20"), "closed")
+
+    # a winner appearing after the debit cannot be paid out of thin air
+    late = funded_user(None)
+    Position.objects.create(user=late, market=m, option=opts[1], shares=Decimal("5"), cost_basis=Decimal("1"))
+    with pytest.raises(SettlementError) as exc:
+        run_settlement_job(job["job_id"])
+    assert exc.value.code == "PAYOUT_EXCEEDS_RESERVED"
+    assert not SettlementPayout.objects.filter(market=m).exists()
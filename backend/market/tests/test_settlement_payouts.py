@@ -0,0 +1,63 @@
+# market/tests/test_settlement_payouts.py
+"""settle_market pays winners set-based: a fixed number of statements per chunk, one payout row per winner."""
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from market.models import BalanceSnapshot, SettlementPayout
+from market.services.amm import settlement_payouts
+from market.services.amm.settlement import settle_market
+
+
+def _balance(user):
+    return BalanceSnapshot.objects.get(user=user, token="USDC").available_amount
+
+
+def test_winners_are_credited_and_recorded(resolved_market):
+    m, (_, yes), users = resolved_market([("10", "5"), ("2.5", None), ("0", "7")])
+
+    out = settle_market(market_id=m.id, settlement_tx_id="settle:t1")
+
+    assert Decimal(out["total_payout"]) == Decimal("12.5")
+    assert out["payouts_count"] == 2
+    assert Decimal(out["pool_cash_used"]) == Decimal("12.5")
+    assert _balance(users[0]) == Decimal("15")
+    assert _balance(users[1]) == Decimal("2.5")
+    assert _balance(users[2]) == Decimal("7")  # no winning shares
+
+    payouts = {p.user_id: p for p in SettlementPayout.objects.filter(market=m)}
+    assert set(payouts) == {users[0].id, users[1].id}
+    assert payouts[users[0].id].payout == Decimal("10") and payouts[users[0].id].option_id == yes.id
+    assert {p.settlement_tx_id for p in payouts.values()} == {"settle:t1"}
+
+    again = settle_market(market_id=m.id)
+    assert again["already_settled"] and again["settlement_tx_id"] == "settle:t1"
+    assert _balance(users[0]) == Decimal("15")
+
+
+def test_statements_per_chunk_do_not_grow_with_winners(resolved_market, monkeypatch):
+    monkeypatch.setattr(settlement_payouts, "SETTLEMENT_CHUNK", 4)
+
+    def run(n):
+        m, _, _ = resolved_market([("1", "1" if i % 2 else None) for i in range(n)])
+        with CaptureQueriesContext(connection) as ctx:
+            settle_market(market_id=m.id)
+        return len(ctx.captured_queries)
+
+    small, large = run(4), run(12)
+    # two more chunks, each its own transaction (BEGIN / COMMIT):
+    # job lock, next winners, balance upsert, payout insert, checkpoint
+    assert large - small == 2 * (2 + 5)
@@ -0,0 +1,111 @@
+# market/tests/test_trade_budget.py
+"""
+Per-trade query budgets for execute_buy / execute_sell, read from the
+trade_profile record each trade logs. A budget failing means a change added
+queries to the hot path: fix the regression or raise the budget deliberately.
+"""
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+
+
+from market.models import Position
+from market.services.amm import outbox
+from market.services.amm.execution import execute_buy, execute_sell
+
+
+def _profile(caplog, fn, **kwargs):
+    caplog.clear()
+    with caplog.at_level("INFO", logger="market.amm.trade"):
+        fn(**kwargs)
+    records = [r.amm_trade for r in caplog.records if hasattr(r, "amm_trade")]
+    assert len(records) == 1
+    return records[0]
+
+
+def _queries(record, phase):
+    return record["phases"].get(phase, {}).get("queries", 0)
+
+
+# Budgets per phase (quote is pure math and must stay at zero queries).
+# lock:    market + option (+ event), pool/states, balance, position
+# persist: balance, position, exposure, q (one statement), order intent, trade, pool
+#          (the wallet is resolved, from cache, before the trade transaction)
+# side_effects: one trade_outbox row (inline mode: stats lock + update, series upsert, volume)
+
+
+def test_standard_buy_budget(funded_user, binary_market, caplog):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")  # creates position/wallet
+
+    rec = _profile(caplog, execute_buy, user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+    assert rec["outcome"] == "ok" and rec["kind"] == "buy"
+    assert _queries(rec, "quote") == 0
+    assert _queries(rec, "lock") <= 6
+    assert _queries(rec, "persist") <= 7
+    assert _queries(rec, "side_effects") <= 1
+    assert rec["queries"] <= 14
+
+
+@pytest.mark.parametrize("n_markets", [2, 5])
+def test_no_buy_on_exclusive_event_budget(funded_user, exclusive_event, caplog, n_markets):
+    event, markets = exclusive_event(n_markets)
+    user = funded_user()
+    m, (no, _) = markets[1]
+    execute_buy(user=user, market_id=m.id, option_id=str(no.id), option_index=None, amount_in="10")
+
+    rec = _profile(caplog, execute_buy, user=user, market_id=m.id, option_id=str(no.id), option_index=None, amount_in="10")
+    assert rec["outcome"] == "ok"
+    assert _queries(rec, "quote") == 0
+    # No->Yes mapping is cached: lock does not grow with the event
+    assert _queries(rec, "lock") <= 7
+    # every other outcome's q moves in one statement: persist does not grow with the event
+    assert _queries(rec, "persist") <= 7
+    assert _queries(rec, "side_effects") <= 1
+    assert rec["queries"] <= 15
+
+
+def test_inline_side_effects_budget(funded_user, binary_market, caplog, monkeypatch):
+    monkeypatch.setattr(outbox, "TRADE_SIDE_EFFECTS", outbox.SIDE_EFFECTS_INLINE)
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+
+    rec = _profile(caplog, execute_buy, user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+    assert _queries(rec, "side_effects") <= 4
+    assert rec["queries"] <= 17
+
+
+def test_sell_all_dust_budget(funded_user, binary_market, caplog):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+    Position.objects.create(user=user, market=m, option=yes, shares=Decimal("0.05"), cost_basis=Decimal("0.01"))
+
+    rec = _profile(caplog, execute_sell, user=user, market_id=m.id, option_id=str(yes.id), option_index=None, sell_all=True)
+    assert rec["outcome"] == "ok" and rec["kind"] == "sell"
+    assert "quote" not in rec["phases"] and "side_effects" not in rec["phases"]
+    assert _queries(rec, "lock") <= 6
+    assert _queries(rec, "persist") <= 3  # position, exposure, order intent (replayable close)
+
+
+def test_failed_trade_is_logged_with_its_code(funded_user, binary_market, caplog):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user(amount="0")
+    with pytest.raises(Exception):
+        _profile(caplog, execute_buy, user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="10")
+    rec = [r.amm_trade for r in caplog.records if hasattr(r, "amm_trade")][-1]
+    assert rec["outcome"] == "INSUFFICIENT_BALANCE"
+    assert "persist" not in rec["phases"]
@@ -0,0 +1,78 @@
+# market/tests/test_trade_outbox.py
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from market.models import MarketOptionSeries, MarketOptionStats, TradeOutbox
+from market.services.amm import outbox
+from market.services.amm.execution import execute_buy
+from market.services.amm.quote_loader import load_pool_state
+
+
+@pytest.fixture(autouse=True)
+def outbox_mode(monkeypatch):
+    monkeypatch.setattr(outbox, "TRADE_SIDE_EFFECTS", outbox.SIDE_EFFECTS_OUTBOX)
+
+
+def _stats(opt):
+    return MarketOptionStats.objects.get(option=opt)
+
+
+def test_trades_enqueue_and_worker_coalesces(funded_user, binary_market):
+    m, (no, yes) = binary_market(pool=True)
+    user = funded_user()
+    for amount in ("10", "25", "5"):
+        execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in=amount)
+
+    assert TradeOutbox.objects.count() == 3
+    assert _stats(yes).prob_bps == 5000  # not applied yet
+
+    assert outbox.apply_outbox_batch() == 3
+    assert TradeOutbox.objects.count() == 0
+    expected = load_pool_state(m.id).prob_bps()
+    assert [_stats(no).prob_bps, _stats(yes).prob_bps] == expected
+    assert _stats(yes).volume_total == Decimal("40")
+    assert _stats(yes).last_trade_at is not None
+    assert MarketOptionSeries.objects.filter(option=yes).exists()
+
+
+def test_batch_cost_does_not_grow_with_trades(funded_user, binary_market):
+    m, (_, yes) = binary_market(pool=True)
+    user = funded_user()
+
+    def run(n):
+        for _ in range(n):
+            execute_buy(user=user, market_id=m.id, option_id=str(yes.id), option_index=None, amount_in="1")
+        with CaptureQueriesContext(connection) as ctx:
+            assert outbox.apply_outbox_batch() == n
+        return len(ctx.captured_queries)
+
+    assert run(2) == run(8)
+
+
+def test_exclusive_no_options_follow_their_yes(funded_user, exclusive_event):
+    _, markets = exclusive_event(3)
+    user = funded_user()
+    m, (no, yes) = markets[0]
+    execute_buy(user=user, market_id=m.id, option_id=str(no.id), option_index=None, amount_in="50")
+
+    call_command("process_trade_outbox", "--once", stdout=open(os.devnull, "w"))
+    assert TradeOutbox.objects.count() == 0
+    for _, (no_opt, yes_opt) in markets:
+        assert _stats(no_opt).prob_bps == 10000 - _stats(yes_opt).prob_bps
+    assert _stats(no).volume_total == Decimal("50")
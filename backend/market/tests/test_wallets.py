@@ -0,0 +1,77 @@
+# market/tests/test_wallets.py
+"""Wallet resolution for trades: one query per user, then cached; placeholders at sync."""
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "monofuture.settings")
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from market.models import OrderIntent, Wallet
+from market.services import wallets
+from market.services.amm.execution import ExecutionError, execute_buy
+from market.views.users import sync_user
+
+
+def test_primary_wallet_is_resolved_once_then_cached(funded_user):
+    user = funded_user()
+    Wallet.objects.create(user=user, address="0xa", is_primary=True)
+    primary = Wallet.objects.create(user=user, address="0xb")
+    user.primary_wallet = primary
+    user.save(update_fields=["primary_wallet"])
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert wallets.resolve_wallet(user).id == primary.id
+    assert len(ctx.captured_queries) == 1
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert wallets.resolve_wallet(user).id == primary.id
+        assert wallets.resolve_wallet(user, primary.id).id == primary.id
+    assert len(ctx.captured_queries) == 1  # the explicit id is looked up once
+
+    other = Wallet.objects.create(user=user, address="0xc")
+    user.primary_wallet = other
+    user.save(update_fields=["primary_wallet"])
+    wallets.invalidate_user_wallets(user.id)
+    assert wallets.resolve_wallet(user).id == other.id
+
+
+def test_trade_records_the_cached_wallet_and_rejects_foreign_ones(binary_market, funded_user):
+    m, _ = binary_market(pool=True)
+    user, stranger = funded_user(), funded_user()
+    foreign = Wallet.objects.create(user=stranger, address="0xf")
+
+    with pytest.raises(ExecutionError) as exc:
+        execute_buy(user=user, market_id=m.id, option_id=None, option_index=1, amount_in="10", wallet_id=foreign.id)
+    assert exc.value.code == "WALLET_NOT_FOUND"
+
+    execute_buy(user=user, market_id=m.id, option_id=None, option_index=1, amount_in="10")
+    execute_buy(user=user, market_id=m.id, option_id=None, option_index=1, amount_in="10")
+    placeholder = Wallet.objects.get(user=user)
+    assert placeholder.chain_family == "web2"
+    assert set(OrderIntent.objects.filter(user=user).values_list("wallet_id", flat=True)) == {placeholder.id}
+
+
+def test_sync_creates_the_placeholder_wallet(schema):
+    user_id = str(uuid.uuid4())
+    request = RequestFactory().post(
+        "/api/users/sync/", data=json.dumps({"id": user_id, "display_name": "sync"}), content_type="application/json"
+    )
+    assert sync_user(request).status_code == 200
+    assert sync_user(request).status_code == 200
+
+    (wallet,) = Wallet.objects.filter(user_id=user_id)
+    assert wallet.address == f"web2-{user_id}" and wallet.is_primary
@@ -52,11 +52,26 @@ urlpatterns = [
         orders.place_sell_order,
         name="market-order-sell",
     ),
+    path(
+        "api/orders/batch/",
+        orders.place_batch_orders,
+        name="orders-batch",
+    ),
     path(
         "api/markets/<uuid:market_id>/quote/",
         amm.quote,
         name="market-quote",
     ),
+    path(
+        "api/markets/<uuid:market_id>/quote/batch/",
+        amm.quote_batch,
+        name="market-quote-batch",
+    ),
+    path(
+        "api/markets/<uuid:market_id>/depth/",
+        amm.depth,
+        name="market-depth",
+    ),
     path(
         "api/markets/<uuid:market_id>/comments/",
         comments.market_comments,
@@ -84,5 +99,25 @@ urlpatterns = [
         admin.admin_resolve_and_settle_market,
         name="admin-market-resolve-and-settle",
     ),
+    path(
+        "api/admin/markets/<uuid:market_id>/settlement/",
+        admin.admin_settlement_progress,
+        name="admin-market-settlement",
+    ),
+    path(
+        "api/admin/markets/<uuid:market_id>/solvency/",
+        admin.admin_market_solvency,
+        name="admin-market-solvency",
+    ),
+    path(
+        "api/admin/events/<uuid:event_id>/resolve-and-settle/",
+        admin.admin_resolve_and_settle_event,
+        name="admin-event-resolve-and-settle",
+    ),
+    path(
+        "api/admin/events/<uuid:event_id>/settlement/",
+        admin.admin_event_settlement_progress,
+        name="admin-event-settlement",
+    ),
 ]
 
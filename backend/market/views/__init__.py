@@ -11,6 +11,10 @@ from .admin import (
     admin_resolve_market,
     admin_settle_market,
     admin_resolve_and_settle_market,
+    admin_settlement_progress,
+    admin_market_solvency,
+    admin_resolve_and_settle_event,
+    admin_event_settlement_progress,
 )
 
 __all__ = [
@@ -28,5 +32,9 @@ __all__ = [
     "admin_resolve_market",
     "admin_settle_market",
     "admin_resolve_and_settle_market",
+    "admin_settlement_progress",
+    "admin_market_solvency",
+    "admin_resolve_and_settle_event",
+    "admin_event_settlement_progress",
 ]
 
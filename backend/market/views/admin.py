@@ -13,12 +13,11 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
 from ..models import User
-from ..services.amm.settlement import (
-    SettlementError,
-    resolve_and_settle_market,
-    resolve_market,
-    settle_market,
-)
+from ..services.amm.errors import QuoteNotFoundError
+from ..services.amm.event_settlement import enqueue_event_settlement, event_settlement_progress, resolve_event
+from ..services.amm.exposure import pool_solvency
+from ..services.amm.settlement import SettlementError, resolve_market
+from ..services.amm.settlement_jobs import enqueue_settlement, settlement_progress
 
 logger = logging.getLogger(__name__)
 
@@ -106,25 +105,26 @@ def admin_settle_market(request, market_id: str) -> JsonResponse:
     """
     POST /api/admin/markets/<market_id>/settle/
 
-    Settle a resolved market, paying out winners.
+    Enqueue the payout of a resolved market's winners. The settlement job runs in
+    `manage.py process_settlement_jobs`; poll GET .../settlement/ for progress.
 
     Request body:
     {
         "settlement_tx_id": "optional-unique-id"  // for idempotency
     }
 
-    Response:
+    Response (202, or 200 with already_settled for a settled market):
     {
+        "job_id": 1,
         "market_id": "...",
         "settlement_tx_id": "settle:uuid",
+        "status": "pending",
         "winning_option_id": 123,
-        "winning_option_index": 0,
         "total_payout": "1000.00",
-        "pool_cash_used": "800.00",
-        "collateral_used": "200.00",
-        "settled_at": "2024-01-04T12:00:00Z",
-        "payouts_count": 10,
-        "already_settled": false
+        "paid_amount": "0",
+        "winners_paid": 0,
+        "progress": 0.0,
+        ...
     }
     """
     admin_user = _get_admin_user(request)
@@ -139,12 +139,12 @@ def admin_settle_market(request, market_id: str) -> JsonResponse:
     settlement_tx_id = data.get("settlement_tx_id")
 
     try:
-        result = settle_market(
+        result = enqueue_settlement(
             market_id=market_id,
             settlement_tx_id=settlement_tx_id,
             settled_by_user_id=str(admin_user.id),
         )
-        return JsonResponse(result)
+        return JsonResponse(result, status=200 if result.get("already_settled") else 202)
     except SettlementError as e:
         return _json_error(str(e), e.code, status=e.http_status)
     except Exception as e:
@@ -158,7 +158,7 @@ def admin_resolve_and_settle_market(request, market_id: str) -> JsonResponse:
     """
     POST /api/admin/markets/<market_id>/resolve-and-settle/
 
-    Resolve and settle a market in one operation.
+    Resolve a market and enqueue its settlement in one operation (202).
 
     Request body:
     {
@@ -192,15 +192,125 @@ def admin_resolve_and_settle_market(request, market_id: str) -> JsonResponse:
         )
 
     try:
-        result = resolve_and_settle_market(
+        resolution = resolve_market(
             market_id=market_id,
             winning_option_id=str(winning_option_id) if winning_option_id else None,
             winning_option_index=int(winning_option_index) if winning_option_index is not None else None,
-            settled_by_user_id=str(admin_user.id),
+            resolved_by_user_id=str(admin_user.id),
         )
-        return JsonResponse(result)
+        settlement = enqueue_settlement(market_id=market_id, settled_by_user_id=str(admin_user.id))
+        status = 200 if settlement.get("already_settled") else 202
+        return JsonResponse({"resolution": resolution, "settlement": settlement}, status=status)
     except SettlementError as e:
         return _json_error(str(e), e.code, status=e.http_status)
     except Exception as e:
         logger.exception("Error resolve-and-settle market %s: %s", market_id, e)
         return _json_error("Internal server error", "INTERNAL_ERROR", status=500)
+
+
+@require_http_methods(["GET"])
+def admin_settlement_progress(request, market_id: str) -> JsonResponse:
+    """
+    GET /api/admin/markets/<market_id>/settlement/
+
+    Progress of the market's settlement job (status, paid_amount / total_payout,
+    winners_paid, error).
+    """
+    admin_user = _get_admin_user(request)
+    if admin_user is None:
+        return _json_error("Admin access required", "UNAUTHORIZED", status=403)
+
+    progress = settlement_progress(market_id)
+    if progress is None:
+        return _json_error("No settlement job for market", "SETTLEMENT_JOB_NOT_FOUND", status=404)
+    return JsonResponse(progress)
+
+
+@require_http_methods(["GET"])
+def admin_market_solvency(request, market_id: str) -> JsonResponse:
+    """
+    GET /api/admin/markets/<market_id>/solvency/
+
+    Live worst-case payout of the market's pool (per outcome, from the
+    option_exposure counters) against pool_cash + collateral.
+    """
+    admin_user = _get_admin_user(request)
+    if admin_user is None:
+        return _json_error("Admin access required", "UNAUTHORIZED", status=403)
+
+    try:
+        return JsonResponse(pool_solvency(market_id))
+    except QuoteNotFoundError as e:
+        return _json_error(str(e), "POOL_NOT_FOUND", status=404)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def admin_resolve_and_settle_event(request, event_id: str) -> JsonResponse:
+    """
+    POST /api/admin/events/<event_id>/resolve-and-settle/
+
+    Resolve every market of an exclusive event (the winner Yes, the rest No) and
+    enqueue ONE settlement job paying all of them from the event pool (202).
+    Poll GET .../settlement/ for progress.
+
+    Request body:
+    {
+        "winning_market_id": "uuid",
+        "settlement_tx_id": "optional-unique-id"
+    }
+
+    Response:
+    {
+        "resolution": { ..., "markets": [{"market_id", "resolved_option_index", ...}] },
+        "settlement": { "job_id", "status", "total_payout", ... }
+    }
+    """
+    admin_user = _get_admin_user(request)
+    if admin_user is None:
+        return _json_error("Admin access required", "UNAUTHORIZED", status=403)
+
+    try:
+        data = json.loads(request.body or "{}")
+    except json.JSONDecodeError:
+        return _json_error("Invalid JSON", "INVALID_JSON", status=400)
+
+    winning_market_id = data.get("winning_market_id")
+    if not winning_market_id:
+        return _json_error("winning_market_id is required", "MISSING_PARAM", status=400)
+
+    try:
+        resolution = resolve_event(
+            event_id=event_id,
+            winning_market_id=str(winning_market_id),
+            resolved_by_user_id=str(admin_user.id),
+        )
+        settlement = enqueue_event_settlement(
+            event_id=event_id,
+            settlement_tx_id=data.get("settlement_tx_id"),
+            settled_by_user_id=str(admin_user.id),
+        )
+        status = 200 if settlement.get("already_settled") else 202
+        return JsonResponse({"resolution": resolution, "settlement": settlement}, status=status)
+    except SettlementError as e:
+        return _json_error(str(e), e.code, status=e.http_status)
+    except Exception as e:
+        logger.exception("Error resolve-and-settle event %s: %s", event_id, e)
+        return _json_error("Internal server error", "INTERNAL_ERROR", status=500)
+
+
+@require_http_methods(["GET"])
+def admin_event_settlement_progress(request, event_id: str) -> JsonResponse:
+    """
+    GET /api/admin/events/<event_id>/settlement/
+
+    Progress of the event's settlement job.
+    """
+    admin_user = _get_admin_user(request)
+    if admin_user is None:
+        return _json_error("Admin access required", "UNAUTHORIZED", status=403)
+
+    progress = event_settlement_progress(event_id)
+    if progress is None:
+        return _json_error("No settlement job for event", "SETTLEMENT_JOB_NOT_FOUND", status=404)
+    return JsonResponse(progress)
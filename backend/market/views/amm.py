@@ -1,15 +1,92 @@
 import logging
-from django.http import JsonResponse
+import os
+
+from django.http import HttpResponseNotModified, JsonResponse
 from django.utils import timezone
 from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
 from ..models import Market, MarketOption
-from ..services.amm.errors import QuoteInputError, QuoteMathError, QuoteNotFoundError
+from ..services.amm.depth import depth_for_state
+from ..services.amm.errors import QuoteError, QuoteMathError, QuoteNotFoundError
+from ..services.amm.execution import MONEY_QUANT
+from ..services.amm.firm_quote import issue_firm_quote
+from ..services.amm.quote import get_pool_state
 from ..services.amm.quote import quote as quote_service
+from ..services.amm.quote import quote_batch as quote_batch_service
+from ..services.orders import parse_json_body
 
 logger = logging.getLogger(__name__)
 
+QUOTE_BATCH_MAX_LEGS = int(os.getenv("AMM_QUOTE_BATCH_MAX_LEGS", "200"))
+
+
+def _blank_to_none(value):
+    return value if value not in (None, "") else None
+
+
+def _parse_quote_params(params):
+    """
+    Shared parsing for single and batch quotes.
+    Returns (parsed, None) or (None, (message, code)); parsed["amount_in"] is the
+    buy amount_in or the sell desired net amount_out.
+    """
+    side = (params.get("side") or "buy").lower()
+    if side not in {"buy", "sell"}:
+        return None, ("side must be 'buy' or 'sell'", "BAD_SIDE")
+
+    option_id = _blank_to_none(params.get("option_id"))
+    option_index_raw = _blank_to_none(params.get("option_index"))
+    if option_id and option_index_raw is not None:
+        return None, ("Provide only one of option_id or option_index", "AMBIGUOUS_OPTION")
+
+    option_index = None
+    if option_index_raw is not None:
+        try:
+            option_index = int(option_index_raw)
+        except (TypeError, ValueError):
+            return None, ("option_index must be an integer", "BAD_OPTION_INDEX")
+
+    if not option_id and option_index is None:
+        return None, ("option_id or option_index is required", "MISSING_OPTION")
+
+    # Parse money/shares.
+    amount_in_raw = _blank_to_none(params.get("amount_in"))
+    amount_out_raw = _blank_to_none(params.get("amount_out"))  # preferred explicit name for sell
+    shares_raw = _blank_to_none(params.get("shares"))
+
+    # Prevent conflicting money params
+    if amount_in_raw is not None and amount_out_raw is not None:
+        return None, ("Provide only one of amount_in or amount_out", "AMBIGUOUS_AMOUNT")
+
+    # ✅ Strict semantic guard: BUY should NOT accept amount_out
+    if side == "buy" and amount_out_raw is not None:
+        return None, ("amount_out is not valid for buy side. Use shares or amount_in.", "INVALID_PARAM")
+
+    # For SELL, prefer amount_out naming; keep backward-compat with amount_in meaning "desired net out"
+    amount_param = amount_out_raw if amount_out_raw is not None else amount_in_raw
+
+    # Must provide exactly one of amount or shares
+    if (amount_param is None and shares_raw is None) or (amount_param is not None and shares_raw is not None):
+        return None, ("Provide exactly one of amount_in/amount_out or shares", "BAD_AMOUNT_SHARES")
+
+    return {
+        "side": side,
+        "option_id": str(option_id) if option_id else None,
+        "option_index": option_index,
+        "amount_in": amount_param,
+        "shares": shares_raw,
+    }, None
+
+
+def _quote_error_payload(exc: QuoteError):
+    if isinstance(exc, QuoteNotFoundError):
+        return {"error": str(exc), "code": "QUOTE_NOT_FOUND"}, 404
+    if isinstance(exc, QuoteMathError):
+        return {"error": str(exc), "code": "QUOTE_MATH_ERROR"}, 422
+    return {"error": str(exc), "code": "QUOTE_INPUT_ERROR"}, 400
+
 
 def _validate_market_and_option(market_id, option_id, option_index):
     """
@@ -84,101 +161,195 @@ def quote(request, market_id):
       - amount_in or shares: exactly one
         * For SELL with amount: use amount_out=... (preferred).
           If amount_in is provided with sell, it is treated as desired NET amount_out.
+      - firm=1: also return quote_token / quote_expires_at; passing quote_token to
+        the order endpoints fills exactly this quote while the pool is unchanged
     """
-    side = (request.GET.get("side") or "buy").lower()
-    if side not in {"buy", "sell"}:
-        return JsonResponse(
-            {"error": "side must be 'buy' or 'sell'", "code": "BAD_SIDE"},
-            status=400,
-        )
+    params, param_error = _parse_quote_params(request.GET)
+    if param_error:
+        message, code = param_error
+        return JsonResponse({"error": message, "code": code}, status=400)
 
-    option_id = request.GET.get("option_id") or None
-    option_index_raw = request.GET.get("option_index")
-    if option_id and option_index_raw not in (None, ""):
-        return JsonResponse(
-            {"error": "Provide only one of option_id or option_index", "code": "AMBIGUOUS_OPTION"},
-            status=400,
-        )
+    option_id = params["option_id"]
+    option_index = params["option_index"]
+    side = params["side"]
+    amount_param = params["amount_in"]
+    shares_param = params["shares"]
 
-    option_index = None
-    if option_index_raw not in (None, ""):
-        try:
-            option_index = int(option_index_raw)
-        except (TypeError, ValueError):
-            return JsonResponse(
-                {"error": "option_index must be an integer", "code": "BAD_OPTION_INDEX"},
-                status=400,
+    # Validate tradability (market/event/deadline/option active)
+    _, option, validation_error = _validate_market_and_option(market_id, option_id, option_index)
+    if validation_error:
+        return validation_error
+
+    # Call service
+    try:
+        if (request.GET.get("firm") or "").lower() in {"1", "true", "yes"}:
+            firm = issue_firm_quote(
+                get_pool_state(market_id),
+                option_id=option.id,
+                side=side,
+                amount_in=amount_param,
+                shares=shares_param,
+                money_quant=MONEY_QUANT,
+            )
+            data = firm.quote.to_json()
+            data["quote_token"] = firm.token
+            data["quote_expires_at"] = firm.expires_at.isoformat()
+        else:
+            data = quote_service(
+                market_id=market_id,
+                option_id=option_id,
+                option_index=option_index,
+                side=side,
+                amount_in=amount_param,   # buy: amount_in; sell: desired net amount_out
+                shares=shares_param,
             )
+        data["option_id"] = str(option.id)  # No options are priced on their Yes leg
+    except QuoteError as exc:
+        payload, status = _quote_error_payload(exc)
+        return JsonResponse(payload, status=status)
+    except Exception:
+        logger.exception("Unexpected error in quote endpoint", extra={"market_id": str(market_id)})
+        return JsonResponse({"error": "Internal server error", "code": "INTERNAL"}, status=500)
 
-    if not option_id and option_index is None:
-        return JsonResponse(
-            {"error": "option_id or option_index is required", "code": "MISSING_OPTION"},
-            status=400,
-        )
+    resp = JsonResponse(data, status=200)
+    resp["Cache-Control"] = "no-store"
+    return resp
 
-    # Parse money/shares.
-    amount_in_raw = request.GET.get("amount_in")
-    amount_out_raw = request.GET.get("amount_out")  # preferred explicit name for sell
-    shares_raw = request.GET.get("shares")
 
-    # Normalize empty strings to None
-    amount_in_raw = amount_in_raw if amount_in_raw not in (None, "") else None
-    amount_out_raw = amount_out_raw if amount_out_raw not in (None, "") else None
-    shares_raw = shares_raw if shares_raw not in (None, "") else None
+@csrf_exempt
+@never_cache
+@require_http_methods(["POST", "OPTIONS"])
+def quote_batch(request, market_id):
+    """
+    Batch AMM quote: many options × many sizes against one loaded pool.
+
+    Body:
+      {"legs": [{"option_id"|"option_index", "side", "amount_in"|"amount_out"|"shares"}, ...]}
 
-    # Prevent conflicting money params
-    if amount_in_raw is not None and amount_out_raw is not None:
+    Each leg follows the same rules as the GET quote endpoint. The market is validated
+    and the pool loaded once; a bad leg yields {"ok": false, "error", "code"} in its
+    slot instead of failing the whole batch. option_ids / option_indexes /
+    pre_prob_bps are returned once at the top level rather than per leg.
+    """
+    if request.method == "OPTIONS":
+        return JsonResponse({}, status=200)
+
+    payload = parse_json_body(request)
+    if payload is None:
+        return JsonResponse({"error": "Invalid JSON body", "code": "BAD_JSON"}, status=400)
+
+    raw_legs = payload.get("legs")
+    if not isinstance(raw_legs, list) or not raw_legs:
+        return JsonResponse({"error": "legs must be a non-empty list", "code": "BAD_LEGS"}, status=400)
+    if len(raw_legs) > QUOTE_BATCH_MAX_LEGS:
         return JsonResponse(
-            {"error": "Provide only one of amount_in or amount_out", "code": "AMBIGUOUS_AMOUNT"},
+            {"error": f"At most {QUOTE_BATCH_MAX_LEGS} legs per batch", "code": "TOO_MANY_LEGS"},
             status=400,
         )
 
-    # ✅ Strict semantic guard: BUY should NOT accept amount_out
-    if side == "buy" and amount_out_raw is not None:
-        return JsonResponse(
+    market, _, validation_error = _validate_market_and_option(market_id, None, None)
+    if validation_error:
+        return validation_error
+
+    # One query for every leg's option guardrails (must belong to this market and be active).
+    options = list(MarketOption.objects.filter(market=market).values("id", "option_index", "is_active"))
+    option_by_id = {str(o["id"]): o for o in options}
+    option_by_index = {int(o["option_index"]): o for o in options}
+
+    results = [None] * len(raw_legs)
+    pool_meta = {}
+    legs = []
+    leg_slots = []
+    for i, raw in enumerate(raw_legs):
+        if not isinstance(raw, dict):
+            results[i] = {"ok": False, "error": "leg must be an object", "code": "BAD_LEG"}
+            continue
+        params, param_error = _parse_quote_params(raw)
+        if param_error:
+            message, code = param_error
+            results[i] = {"ok": False, "error": message, "code": code}
+            continue
+
+        if params["option_id"]:
+            option = option_by_id.get(params["option_id"])
+        else:
+            option = option_by_index.get(params["option_index"])
+        if option is None:
+            results[i] = {"ok": False, "error": "Option not found for market", "code": "OPTION_NOT_FOUND"}
+            continue
+        if not option["is_active"]:
+            results[i] = {"ok": False, "error": "Option is not active", "code": "OPTION_NOT_ACTIVE"}
+            continue
+
+        # Quote by option_id: option_index is not unique inside an event-level pool.
+        legs.append(
             {
-                "error": "amount_out is not valid for buy side. Use shares or amount_in.",
-                "code": "INVALID_PARAM",
-            },
-            status=400,
+                "option_id": str(option["id"]),
+                "side": params["side"],
+                "amount_in": params["amount_in"],
+                "shares": params["shares"],
+            }
         )
+        leg_slots.append(i)
 
-    # For SELL, prefer amount_out naming; keep backward-compat with amount_in meaning "desired net out"
-    amount_param = amount_out_raw if amount_out_raw is not None else amount_in_raw
-    shares_param = shares_raw
+    if legs:
+        try:
+            quoted = quote_batch_service(market_id=market_id, legs=legs)
+        except QuoteError as exc:
+            err, status = _quote_error_payload(exc)
+            return JsonResponse(err, status=status)
+        except Exception:
+            logger.exception("Unexpected error in batch quote endpoint", extra={"market_id": str(market_id)})
+            return JsonResponse({"error": "Internal server error", "code": "INTERNAL"}, status=500)
 
-    # Must provide exactly one of amount or shares
-    if (amount_param is None and shares_param is None) or (amount_param is not None and shares_param is not None):
-        return JsonResponse(
-            {"error": "Provide exactly one of amount_in/amount_out or shares", "code": "BAD_AMOUNT_SHARES"},
-            status=400,
-        )
+        for i, item in zip(leg_slots, quoted):
+            if isinstance(item, QuoteError):
+                err, _ = _quote_error_payload(item)
+                results[i] = {"ok": False, **err}
+            else:
+                # Pool metadata is identical for every leg: send it once.
+                if not pool_meta:
+                    pool_meta = {
+                        "pool_id": item.pool_id,
+                        "option_ids": item.state.option_ids,
+                        "option_indexes": item.state.option_indexes,
+                        "pre_prob_bps": item.pre_prob_bps,
+                    }
+                results[i] = {"ok": True, "quote": item.to_json(include_pool=False)}
 
-    # Validate tradability (market/event/deadline/option active)
-    _, _, validation_error = _validate_market_and_option(market_id, option_id, option_index)
+    resp = JsonResponse({"market_id": str(market_id), **pool_meta, "results": results}, status=200)
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
+@require_http_methods(["GET"])
+def depth(request, market_id):
+    """
+    Depth ladder: shares / avg price / post-trade prob for the DEPTH_SIZES grid,
+    buy (amount_in) and sell (net amount_out) for every outcome in the pool.
+
+    Responses carry an ETag of the pool version; poll with If-None-Match to get a
+    304 until the pool moves.
+    """
+    market, _, validation_error = _validate_market_and_option(market_id, None, None)
     if validation_error:
         return validation_error
 
-    # Call service
     try:
-        data = quote_service(
-            market_id=market_id,
-            option_id=option_id,
-            option_index=option_index,
-            side=side,
-            amount_in=amount_param,   # buy: amount_in; sell: desired net amount_out
-            shares=shares_param,
-        )
-    except QuoteNotFoundError as exc:
-        return JsonResponse({"error": str(exc), "code": "QUOTE_NOT_FOUND"}, status=404)
-    except QuoteInputError as exc:
-        return JsonResponse({"error": str(exc), "code": "QUOTE_INPUT_ERROR"}, status=400)
-    except QuoteMathError as exc:
-        return JsonResponse({"error": str(exc), "code": "QUOTE_MATH_ERROR"}, status=422)
+        state = get_pool_state(market_id)
+        ladder = depth_for_state(state)
+    except QuoteError as exc:
+        err, status = _quote_error_payload(exc)
+        return JsonResponse(err, status=status)
     except Exception:
-        logger.exception("Unexpected error in quote endpoint", extra={"market_id": str(market_id)})
+        logger.exception("Unexpected error in depth endpoint", extra={"market_id": str(market_id)})
         return JsonResponse({"error": "Internal server error", "code": "INTERNAL"}, status=500)
 
-    resp = JsonResponse(data, status=200)
-    resp["Cache-Control"] = "no-store"
+    etag = f'"{ladder["version"]}"'
+    if request.headers.get("If-None-Match") == etag:
+        resp = HttpResponseNotModified()
+    else:
+        resp = JsonResponse({"market_id": str(market.id), **ladder}, status=200)
+    resp["ETag"] = etag
+    resp["Cache-Control"] = "no-cache"
     return resp
@@ -8,7 +8,8 @@ from django.views.decorators.http import require_http_methods
 
 from ..models import Market
 from ..services.auth import get_user_from_request
-from ..services.amm.execution import ExecutionError, execute_buy, execute_sell
+from ..services.amm.batch_orders import BATCH_ALL_OR_NOTHING, execute_batch
+from ..services.amm.execution import DEFAULT_TOKEN, ExecutionError, execute_buy, execute_sell
 from ..services.orders import parse_buy_payload, parse_json_body, parse_sell_payload
 
 logger = logging.getLogger(__name__)
@@ -208,6 +209,7 @@ def _handle_buy(*, user, market_id, payload: dict) -> JsonResponse:
             client_nonce=parsed["client_nonce"],
             min_shares_out=parsed["min_shares_out"],
             max_slippage_bps=parsed["max_slippage_bps"],
+            quote_token=parsed["quote_token"],
         )
     except ExecutionError as exc:
         return JsonResponse(exc.to_payload(), status=getattr(exc, "http_status", 400))
@@ -237,6 +239,7 @@ def _handle_sell(*, user, market_id, payload: dict) -> JsonResponse:
             wallet_id=parsed["wallet_id"],
             client_nonce=parsed["client_nonce"],
             min_amount_out=parsed["min_amount_out"],
+            quote_token=parsed["quote_token"],
         )
     except ExecutionError as exc:
         return JsonResponse(exc.to_payload(), status=getattr(exc, "http_status", 400))
@@ -304,3 +307,38 @@ def place_order(request, market_id):
     if side == "sell":
         return _handle_sell(user=user, market_id=market_id, payload=payload)
     return _handle_buy(user=user, market_id=market_id, payload=payload)
+
+
+@csrf_exempt
+@require_http_methods(["POST", "OPTIONS"])
+def place_batch_orders(request):
+    """
+    Many buys / sells across markets in one transaction.
+    Body: {"legs": [{"side", "market_id", ...order fields}], "mode": "all_or_nothing" | "best_effort", "token"}
+    """
+    if request.method == "OPTIONS":
+        return JsonResponse({}, status=200)
+
+    user = get_user_from_request(request)
+    if not user:
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+
+    payload = parse_json_body(request)
+    if payload is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    try:
+        result = execute_batch(
+            user=user,
+            legs=payload.get("legs"),
+            mode=payload.get("mode") or BATCH_ALL_OR_NOTHING,
+            token=payload.get("token") or DEFAULT_TOKEN,
+            wallet_id=payload.get("wallet_id"),
+        )
+    except ExecutionError as exc:
+        return JsonResponse(exc.to_payload(), status=getattr(exc, "http_status", 400))
+    except Exception:
+        logger.exception("Unexpected error in execute_batch")
+        return JsonResponse({"error": "Internal server error"}, status=500)
+
+    return JsonResponse(result, status=201 if result["filled"] else 400)
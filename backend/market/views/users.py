@@ -6,8 +6,10 @@ from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
-from ..models import BalanceSnapshot, MarketOptionStats, OrderIntent, Position, User
+from ..models import BalanceSnapshot, OrderIntent, Position, User
+from ..services.amm.live_probs import live_prob_bps, option_prob_bps
 from ..services.auth import get_user_from_request
+from ..services.wallets import ensure_user_wallet
 
 
 @csrf_exempt
@@ -55,6 +57,9 @@ def sync_user(request):
             update_fields.append("role")
         user.save(update_fields=update_fields)
 
+    # Placeholder wallet now rather than inside the user's first trade
+    ensure_user_wallet(user, now)
+
     return JsonResponse(
         {"id": str(user.id), "role": user.role, "display_name": user.display_name},
         status=200,
@@ -119,12 +124,12 @@ def portfolio(request):
         .filter(user=user)
         .order_by("-updated_at")
     )
+    live = live_prob_bps({pos.market_id: pos.market for pos in positions}.values())
 
     items = []
     total_value = Decimal(0)
     for pos in positions:
-        stats = getattr(pos.option, "stats", None)
-        prob_bps = stats.prob_bps if stats else None
+        prob_bps = option_prob_bps(pos.option, live)
         price = Decimal(prob_bps) / Decimal(10000) if prob_bps is not None else None
         value = price * pos.shares if price is not None else Decimal(0)
         total_value += value
@@ -178,20 +183,16 @@ def order_history(request):
     offset = (page - 1) * page_size
 
     base_qs = (
-        OrderIntent.objects.select_related("market", "option")
+        OrderIntent.objects.select_related("market", "option", "option__stats")
         .filter(user=user)
         .order_by("-created_at")
     )
     total = base_qs.count()
-    intents = base_qs[offset : offset + page_size]
+    intents = list(base_qs[offset : offset + page_size])
+    live = live_prob_bps({intent.market_id: intent.market for intent in intents if intent.market}.values())
     items = []
     for intent in intents:
-        prob_bps = None
-        try:
-            stats = MarketOptionStats.objects.get(option=intent.option)
-            prob_bps = stats.prob_bps
-        except MarketOptionStats.DoesNotExist:
-            pass
+        prob_bps = option_prob_bps(intent.option, live) if intent.option else None
         price = Decimal(prob_bps) / Decimal(10000) if prob_bps is not None else None
         items.append(
             {
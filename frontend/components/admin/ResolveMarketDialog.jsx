@@ -14,12 +14,20 @@ import {
 const backendBase =
   process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
 
+// How often to poll a pending settlement job (paid by process_settlement_jobs)
+const SETTLEMENT_POLL_MS = 2000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 /**
  * ResolveMarketDialog - A dialog for resolving and settling markets
  *
  * For standalone events: Select YES or NO for the single market
  * For exclusive events: Select which market wins (the YES option of that market)
  * For independent events: Each market can be resolved independently to YES or NO
+ *
+ * Settlement is paid by a background worker: a 202 means the job is queued, so
+ * the dialog polls /settlement/ and only reports success once the job is done.
  */
 export default function ResolveMarketDialog({
   open,
@@ -31,6 +39,7 @@ export default function ResolveMarketDialog({
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
   const [success, setSuccess] = useState("");
+  const [progress, setProgress] = useState("");
 
   // For standalone: which option wins (option_id)
   // For exclusive: which market wins (market_id), then we pick that market's YES option
@@ -42,6 +51,7 @@ export default function ResolveMarketDialog({
     if (open) {
       setError("");
       setSuccess("");
+      setProgress("");
       setSelections({});
       setLoading(false);
     }
@@ -66,6 +76,35 @@ export default function ResolveMarketDialog({
     );
   };
 
+  // Title of a market, for progress messages
+  const getMarketTitle = (marketId) =>
+    markets.find((m) => m.id === marketId)?.title || "Market";
+
+  // Poll a queued settlement job until the worker has paid every winner
+  const waitForSettlement = async (marketId, title) => {
+    for (;;) {
+      const res = await fetch(
+        `${backendBase}/api/admin/markets/${marketId}/settlement/`,
+        { headers: user ? { "X-User-Id": user.id } : {} }
+      );
+      const job = await res.json();
+      if (!res.ok) {
+        throw new Error(job.error || "Could not load settlement progress");
+      }
+      if (job.status === "done") return job;
+      if (job.status === "failed") {
+        throw new Error(`Settlement failed: ${job.error || "unknown error"}`);
+      }
+      setProgress(
+        job.status === "pending"
+          ? `${title}: settlement queued, waiting for the worker...`
+          : `${title}: paid ${job.paid_amount} of ${job.total_payout} ` +
+              `(${job.winners_paid} winners, ${Math.floor(job.progress * 100)}%)`
+      );
+      await sleep(SETTLEMENT_POLL_MS);
+    }
+  };
+
   // Resolve and settle a single market
   const resolveMarket = async (marketId, winningOptionId) => {
     const res = await fetch(
@@ -83,6 +122,9 @@ export default function ResolveMarketDialog({
     if (!res.ok) {
       throw new Error(data.error || data.detail || "Resolution failed");
     }
+    if (res.status === 202) {
+      await waitForSettlement(marketId, getMarketTitle(marketId));
+    }
     return data;
   };
 
@@ -111,6 +153,7 @@ export default function ResolveMarketDialog({
     } catch (err) {
       setError(err.message);
     } finally {
+      setProgress("");
       setLoading(false);
     }
   };
@@ -144,6 +187,7 @@ export default function ResolveMarketDialog({
     } catch (err) {
       setError(err.message);
     } finally {
+      setProgress("");
       setLoading(false);
     }
   };
@@ -175,6 +219,7 @@ export default function ResolveMarketDialog({
     } catch (err) {
       setError(err.message);
     } finally {
+      setProgress("");
       setLoading(false);
     }
   };
@@ -372,6 +417,11 @@ export default function ResolveMarketDialog({
             {error}
           </div>
         )}
+        {progress && !error && (
+          <div className="mt-4 p-3 bg-blue-500/10 border border-blue-500/30 rounded-lg text-blue-400 text-sm">
+            {progress}
+          </div>
+        )}
         {success && (
           <div className="mt-4 p-3 bg-green-500/10 border border-green-500/30 rounded-lg text-green-400 text-sm">
             {success}
@@ -383,7 +433,7 @@ export default function ResolveMarketDialog({
             Cancel
           </Button>
           <Button onClick={handleResolve} disabled={loading || success}>
-            {loading ? "Processing..." : "Resolve & Settle"}
+            {loading ? (progress ? "Settling..." : "Processing...") : "Resolve & Settle"}
           </Button>
         </DialogFooter>
       </DialogContent>